@@ -0,0 +1,639 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# Asynchronous certificate enrolment client
+#
+# Drives CMP (RFC4210 over HTTP as per RFC6712) and EST (RFC7030)
+# enrolments with asyncio. HTTP/1.1 connections to the CA are kept
+# alive and shared by concurrent enrolments, pending requests are
+# polled by each enrolment on its own, so that thousands of them may
+# wait on the CA at once without holding a connection.
+#
+# Requires Python 3.5 or later.
+#
+import asyncio
+import base64
+import collections
+import hashlib
+import os
+import ssl
+import time
+
+from urllib import parse
+
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+from pyasn1.codec.der import encoder
+
+from pyasn1_modules import cmp
+from pyasn1_modules import oids
+from pyasn1_modules import rfc4055
+from pyasn1_modules import rfc4210
+from pyasn1_modules import rfc5480
+from pyasn1_modules import rfc7030
+from pyasn1_modules import tlv
+
+
+class EnrolmentError(error.PyAsn1Error):
+    """Enrolment failed at HTTP or PKI level
+
+    The `status` is HTTP status code or PKIStatus name, the `statusInfo`
+    is DER serialisation of PKIStatusInfo if CA reported one.
+    """
+    def __init__(self, message, status=None, statusInfo=None):
+        error.PyAsn1Error.__init__(self, message)
+        self.status = status
+        self.statusInfo = statusInfo
+
+
+HttpResponse = collections.namedtuple(
+    'HttpResponse', ('status', 'headers', 'body'))
+
+
+class HttpConnectionPool(object):
+    """Keep-alive HTTP/1.1 connections to the origin of `url`
+
+    At most `maxConnections` requests are in flight at a time, each
+    on its own connection; idle connections are reused. Requests not
+    answered within `timeout` seconds fail with `asyncio.TimeoutError`.
+    HTTPS connections use `sslContext` or the default one.
+    """
+    def __init__(self, url, maxConnections=100, timeout=60.0,
+                 sslContext=None):
+        parts = parse.urlsplit(url)
+
+        if parts.scheme not in ('http', 'https'):
+            raise error.PyAsn1Error('Unsupported URL %s' % url)
+
+        self._host = parts.hostname
+        self._port = parts.port
+
+        self._ssl = None
+
+        if parts.scheme == 'https':
+            self._ssl = sslContext or ssl.create_default_context()
+
+            if self._port is None:
+                self._port = 443
+
+        elif self._port is None:
+            self._port = 80
+
+        self._hostHeader = parts.netloc.rsplit('@', 1)[-1]
+
+        self._maxConnections = maxConnections
+        self._timeout = timeout
+        self._semaphore = None
+        self._idle = []
+
+        self.connectionsMade = 0
+
+    async def _connect(self):
+        while self._idle:
+            reader, writer = self._idle.pop()
+
+            if not reader.at_eof() and not writer.transport.is_closing():
+                return reader, writer, True
+
+            writer.close()
+
+        reader, writer = await asyncio.open_connection(
+            self._host, self._port, ssl=self._ssl)
+
+        self.connectionsMade += 1
+
+        return reader, writer, False
+
+    def _encodeRequest(self, method, path, headers, body):
+        lines = ['%s %s HTTP/1.1' % (method, path),
+                 'Host: %s' % self._hostHeader]
+
+        for name, value in (headers or {}).items():
+            lines.append('%s: %s' % (name, value))
+
+        if body is not None:
+            lines.append('Content-Length: %d' % len(body))
+
+        lines.append('\r\n')
+
+        return '\r\n'.join(lines).encode('latin-1') + (body or b'')
+
+    @staticmethod
+    async def _readResponse(reader):
+        statusLine = await reader.readline()
+
+        if not statusLine:
+            raise ConnectionResetError('Connection closed by peer')
+
+        try:
+            version, status = statusLine.split(None, 2)[:2]
+            status = int(status)
+
+        except ValueError:
+            raise error.PyAsn1Error('Bad HTTP status line %r' % statusLine)
+
+        headers = {}
+
+        while True:
+            line = await reader.readline()
+
+            if not line.strip():
+                break
+
+            name, _, value = line.decode('latin-1').partition(':')
+
+            headers[name.strip().lower()] = value.strip()
+
+        keepAlive = (version == b'HTTP/1.1' and
+                     headers.get('connection', '').lower() != 'close')
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+
+            while True:
+                size = await reader.readline()
+                size = int(size.split(b';', 1)[0], 16)
+
+                if not size:
+                    break
+
+                chunk = await reader.readexactly(size + 2)
+                chunks.append(chunk[:-2])
+
+            while (await reader.readline()).strip():
+                pass
+
+            body = b''.join(chunks)
+
+        elif 'content-length' in headers:
+            body = await reader.readexactly(
+                int(headers['content-length']))
+
+        elif status in (204, 304) or 100 <= status < 200:
+            body = b''
+
+        else:
+            body = await reader.read()
+            keepAlive = False
+
+        return HttpResponse(status, headers, body), keepAlive
+
+    async def _request(self, method, path, headers, body):
+        request = self._encodeRequest(method, path, headers, body)
+
+        while True:
+            reader, writer, reused = await self._connect()
+
+            try:
+                writer.write(request)
+
+                response, keepAlive = await self._readResponse(reader)
+
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+
+                # keep-alive connection may have been closed by the server
+                if reused:
+                    continue
+
+                raise
+
+            except BaseException:
+                writer.close()
+                raise
+
+            if keepAlive:
+                self._idle.append((reader, writer))
+
+            else:
+                writer.close()
+
+            return response
+
+    async def request(self, method, path, headers=None, body=None):
+        """Send HTTP request, return :class:`HttpResponse`"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._maxConnections)
+
+        async with self._semaphore:
+            return await asyncio.wait_for(
+                self._request(method, path, headers, body), self._timeout)
+
+    def close(self):
+        """Close idle connections"""
+        while self._idle:
+            reader, writer = self._idle.pop()
+            writer.close()
+
+
+# Signature algorithms to hash functions for certHash of certConf
+
+_certHashFunctions = oids.OidMap({
+    rfc5480.sha1WithRSAEncryption: hashlib.sha1,
+    rfc4055.sha224WithRSAEncryption: hashlib.sha224,
+    rfc4055.sha256WithRSAEncryption: hashlib.sha256,
+    rfc4055.sha384WithRSAEncryption: hashlib.sha384,
+    rfc4055.sha512WithRSAEncryption: hashlib.sha512,
+    rfc5480.ecdsa_with_SHA1: hashlib.sha1,
+    rfc5480.ecdsa_with_SHA224: hashlib.sha224,
+    rfc5480.ecdsa_with_SHA256: hashlib.sha256,
+    rfc5480.ecdsa_with_SHA384: hashlib.sha384,
+    rfc5480.ecdsa_with_SHA512: hashlib.sha512,
+    rfc5480.id_dsa_with_sha1: hashlib.sha1,
+    rfc5480.id_dsa_with_sha224: hashlib.sha224,
+    rfc5480.id_dsa_with_sha256: hashlib.sha256,
+})
+
+
+def certHash(certificate):
+    """Return certHash of DER-serialised certificate for CertStatus
+
+    The certificate is hashed with the hash function of its signature
+    algorithm, SHA-256 if that is not known.
+    """
+    components = tlv.children(certificate, tlv.readTlv(certificate))
+
+    if len(components) != 3:
+        raise error.PyAsn1Error('Malformed certificate')
+
+    algorithm = tlv.readTlv(certificate, components[1].valueOffset)
+
+    hashFunction = _certHashFunctions.get(
+        bytes(tlv.value(certificate, algorithm)), hashlib.sha256)
+
+    return hashFunction(certificate).digest()
+
+
+# PKIBody types of responses to certification requests
+
+_responseTypes = {
+    'ir': 'ip',
+    'cr': 'cp',
+    'kur': 'kup',
+    'p10cr': 'cp',
+}
+
+
+class _Transaction(object):
+    __slots__ = ('transactionID', 'recipNonce', 'responseType')
+
+    def __init__(self, responseType):
+        self.transactionID = os.urandom(16)
+        self.recipNonce = None
+        self.responseType = responseType
+
+
+class CMPClient(object):
+    """CMP client enrolling with CA at `url` over HTTP (RFC6712)
+
+    The `sender` and `recipient` are GeneralNames, pyasn1 objects or
+    their DER serialisations. Messages are protected if `protection`
+    is given: it should have `algorithm` attribute (AlgorithmIdentifier)
+    and `protect` method returning PKIProtection octets of DER-serialised
+    ProtectedPart (e.g. signature or PasswordBasedMac). The `senderKID`
+    and `extraCerts` (DER-serialised certificates) go into every message.
+
+    HTTP connections are taken from `pool` or from a pool created with
+    `poolOptions` (see :class:`HttpConnectionPool`). A certification
+    request is polled at most `maxPolls` times.
+    """
+    def __init__(self, url, sender, recipient, protection=None,
+                 senderKID=None, extraCerts=(), pool=None, maxPolls=100,
+                 **poolOptions):
+        parts = parse.urlsplit(url)
+
+        self._path = parts.path or '/'
+
+        if parts.query:
+            self._path += '?' + parts.query
+
+        self._pool = pool or HttpConnectionPool(url, **poolOptions)
+
+        self._sender = tlv.encodeDer(sender)
+        self._recipient = tlv.encodeDer(recipient)
+        self._protection = protection
+        self._protectionAlg = None
+
+        if protection is not None:
+            self._protectionAlg = tlv.encodeDer(protection.algorithm)
+
+        self._senderKID = senderKID
+        self._extraCerts = [tlv.encodeDer(x) for x in extraCerts]
+        self._maxPolls = maxPolls
+
+    @property
+    def pool(self):
+        return self._pool
+
+    def close(self):
+        self._pool.close()
+
+    def _encodeMessage(self, transaction, senderNonce, bodyType, content):
+        header = cmp.encodeHeader(
+            self._sender, self._recipient,
+            transactionID=transaction.transactionID, senderNonce=senderNonce,
+            recipNonce=transaction.recipNonce, senderKID=self._senderKID,
+            protectionAlg=self._protectionAlg,
+            messageTime=time.strftime('%Y%m%d%H%M%SZ', time.gmtime()))
+
+        body = cmp.encodeBody(bodyType, content)
+
+        protection = None
+
+        if self._protection is not None:
+            protection = self._protection.protect(
+                cmp.encodeProtectedPart(header, body))
+
+        return cmp.encodeMessage(header, body, protection, self._extraCerts)
+
+    async def _exchange(self, transaction, bodyType, content):
+        senderNonce = os.urandom(16)
+
+        response = await self._pool.request(
+            'POST', self._path, {'Content-Type': 'application/pkixcmp'},
+            self._encodeMessage(transaction, senderNonce, bodyType, content))
+
+        if response.status != 200:
+            raise EnrolmentError(
+                'CA responded with HTTP status %d' % response.status,
+                response.status)
+
+        frame = cmp.readFrame(response.body)
+
+        if frame.transactionID != transaction.transactionID:
+            raise EnrolmentError('transactionID mismatch in CA response')
+
+        if frame.recipNonce != senderNonce:
+            raise EnrolmentError('recipNonce mismatch in CA response')
+
+        transaction.recipNonce = frame.senderNonce
+
+        if frame.bodyType == 'error':
+            substrate, component = cmp.readBody(frame)
+
+            errorMsg, rest = decoder.decode(
+                substrate[component.offset:component.end],
+                asn1Spec=rfc4210.ErrorMsgContent())
+
+            statusInfo = errorMsg['pKIStatusInfo']
+
+            raise EnrolmentError(
+                'CA reported error: %s' % statusInfo.prettyPrint(),
+                statusInfo['status'].prettyPrint(),
+                encoder.encode(statusInfo))
+
+        return frame
+
+    def _certResponses(self, transaction, frame):
+        if frame.bodyType != transaction.responseType:
+            raise EnrolmentError(
+                'Unexpected %s response from CA' % frame.bodyType)
+
+        return cmp.readCertRepMessage(*cmp.readBody(frame))
+
+    async def enrol(self, request, bodyType='ir', confirm=True):
+        """Submit certification request, poll for and confirm certificates
+
+        The `request` is CertReqMessages (for `ir`, `cr` and `kur` body
+        types) or CertificationRequest (for `p10cr`), pyasn1 object or
+        its DER serialisation. Issued certificates are confirmed
+        with certConf unless `confirm` is false.
+
+        Returns list of :class:`cmp.CertResponseInfo`.
+        """
+        try:
+            transaction = _Transaction(_responseTypes[bodyType])
+
+        except KeyError:
+            raise error.PyAsn1Error(
+                'Not a certification request type %s' % bodyType)
+
+        frame = await self._exchange(transaction, bodyType, request)
+
+        responses = self._certResponses(transaction, frame)
+
+        polls = 0
+
+        while True:
+            waiting = [response.certReqId for response in responses
+                       if response.status == 'waiting']
+
+            if not waiting:
+                break
+
+            frame = await self._exchange(
+                transaction, 'pollReq', cmp.encodePollReqContent(waiting))
+
+            if frame.bodyType == 'pollRep':
+                polls += 1
+
+                if polls > self._maxPolls:
+                    raise EnrolmentError(
+                        'Certificate not issued after %d polls' % polls,
+                        'waiting')
+
+                checkAfter = max([checkAfter for certReqId, checkAfter
+                                  in cmp.readPollRepContent(
+                                      *cmp.readBody(frame))] or [0])
+
+                await asyncio.sleep(checkAfter)
+
+                continue
+
+            issued = dict(
+                (response.certReqId, response) for response in
+                self._certResponses(transaction, frame))
+
+            responses = [issued.get(response.certReqId, response)
+                         for response in responses]
+
+        certStatuses = [(certHash(response.certificate), response.certReqId)
+                        for response in responses if response.certificate]
+
+        if confirm and certStatuses:
+            frame = await self._exchange(
+                transaction, 'certConf',
+                cmp.encodeCertConfirmContent(certStatuses))
+
+            if frame.bodyType != 'pkiconf':
+                raise EnrolmentError(
+                    'Unexpected %s response to certConf' % frame.bodyType)
+
+        return responses
+
+    async def enrolMany(self, requests, bodyType='ir', concurrency=1000):
+        """Enrol with each of `requests` concurrently, see :meth:`enrol`
+
+        At most `concurrency` enrolments are in progress at a time.
+        Returns list of enrolment results or exceptions, in the order
+        of `requests`.
+        """
+        return await _gather(
+            [self.enrol(request, bodyType) for request in requests],
+            concurrency)
+
+
+async def _gather(coroutines, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(
+        *[limited(coroutine) for coroutine in coroutines],
+        return_exceptions=True)
+
+
+_signedDataTag = (0x80, 0x20, 0)
+
+
+def readCertsOnly(substrate):
+    """Return DER serialisations of certificates of certs-only CMS
+
+    The `substrate` is DER serialisation of ContentInfo of SignedData
+    as returned by EST `cacerts` and `simpleenroll` requests.
+    """
+    contentInfo = tlv.readTlv(substrate)
+
+    components = tlv.children(substrate, contentInfo)
+
+    if len(components) != 2 or components[1].tag != _signedDataTag:
+        raise error.PyAsn1Error('Malformed ContentInfo')
+
+    signedData = tlv.readTlv(substrate, components[1].valueOffset)
+
+    for component in tlv.children(substrate, signedData)[3:]:
+        # certificates [0] IMPLICIT CertificateSet
+        if component.tag == (0x80, 0x20, 0):
+            return [bytes(substrate[x.offset:x.end])
+                    for x in tlv.children(substrate, component)]
+
+    return []
+
+
+class ESTClient(object):
+    """EST client talking to server at `url` (RFC7030)
+
+    The `url` is the path prefix of EST operations, e.g.
+    `https://ca.example.com/.well-known/est` or its CA label, its query
+    string (if any) is passed on with every request. Requests carry
+    `authorization` (HTTP Authorization header value) if given.
+    Requests answered with 202 status are repeated after Retry-After
+    seconds (`retryAfter` if the server does not tell) at most
+    `maxRetries` times.
+
+    HTTP connections are taken from `pool` or from a pool created with
+    `poolOptions` (see :class:`HttpConnectionPool`).
+    """
+    def __init__(self, url, authorization=None, pool=None, maxRetries=100,
+                 retryAfter=60, **poolOptions):
+        parts = parse.urlsplit(url)
+
+        self._path = parts.path.rstrip('/')
+        self._query = parts.query and '?' + parts.query
+
+        self._pool = pool or HttpConnectionPool(url, **poolOptions)
+
+        self._authorization = authorization
+        self._maxRetries = maxRetries
+        self._retryAfter = retryAfter
+
+    @property
+    def pool(self):
+        return self._pool
+
+    def close(self):
+        self._pool.close()
+
+    async def _call(self, operation, contentType=None, body=None):
+        headers = {}
+
+        if self._authorization is not None:
+            headers['Authorization'] = self._authorization
+
+        if body is None:
+            method = 'GET'
+
+        else:
+            method = 'POST'
+            headers['Content-Type'] = contentType
+            headers['Content-Transfer-Encoding'] = 'base64'
+            body = base64.b64encode(tlv.encodeDer(body))
+
+        retries = 0
+
+        while True:
+            response = await self._pool.request(
+                method, '%s/%s%s' % (self._path, operation, self._query),
+                headers, body)
+
+            if response.status != 202:
+                break
+
+            retries += 1
+
+            if retries > self._maxRetries:
+                raise EnrolmentError(
+                    'EST %s not done after %d retries' % (operation, retries),
+                    response.status)
+
+            try:
+                retryAfter = int(response.headers['retry-after'])
+
+            except (KeyError, ValueError):
+                retryAfter = self._retryAfter
+
+            await asyncio.sleep(retryAfter)
+
+        if response.status == 204:
+            return b''
+
+        if response.status != 200:
+            raise EnrolmentError(
+                'EST %s failed with HTTP status %d' % (
+                    operation, response.status), response.status)
+
+        return base64.b64decode(response.body)
+
+    async def getCaCerts(self):
+        """Return DER serialisations of CA certificates"""
+        return readCertsOnly(await self._call('cacerts'))
+
+    async def getCsrAttrs(self):
+        """Return rfc7030.CsrAttrs the server wants in CSRs"""
+        substrate = await self._call('csrattrs')
+
+        if not substrate:
+            return rfc7030.CsrAttrs()
+
+        csrAttrs, rest = decoder.decode(
+            substrate, asn1Spec=rfc7030.CsrAttrs())
+
+        return csrAttrs
+
+    async def simpleEnroll(self, csr):
+        """Enrol with PKCS#10 `csr`, return DER-serialised certificates
+
+        The `csr` is CertificationRequest object or its DER serialisation.
+        """
+        return readCertsOnly(await self._call(
+            'simpleenroll', 'application/pkcs10', csr))
+
+    async def simpleReenroll(self, csr):
+        """Re-enrol with PKCS#10 `csr`, see :meth:`simpleEnroll`"""
+        return readCertsOnly(await self._call(
+            'simplereenroll', 'application/pkcs10', csr))
+
+    async def enrolMany(self, csrs, concurrency=1000):
+        """Run :meth:`simpleEnroll` for each of `csrs` concurrently
+
+        At most `concurrency` enrolments are in progress at a time.
+        Returns list of certificate lists or exceptions, in the order
+        of `csrs`.
+        """
+        return await _gather(
+            [self.simpleEnroll(csr) for csr in csrs], concurrency)
@@ -0,0 +1,302 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# X.509 certificate chain building
+#
+# Indexes serialised rfc5280.Certificate objects by canonical subject
+# Name, subject key identifier and authority key identifier read
+# straight off the DER substrate, so that candidate issuers of any
+# certificate are found with a couple of dictionary lookups.
+# Certificates are only decoded when asked for.
+#
+# Chain building does not verify signatures, validity periods or
+# any other constraints - it merely enumerates candidate paths.
+#
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+from pyasn1.codec.der import encoder
+
+from pyasn1_modules import extensions
+from pyasn1_modules import rfc5280
+from pyasn1_modules import tlv
+from pyasn1_modules import x509name
+
+_versionTag = (0x80, 0x20, 0)
+
+_extensionsTag = (0x80, 0x20, 3)
+
+_keyIdentifierTag = (0x80, 0x00, 0)
+
+
+class CertificateEntry(object):
+    """Serialised certificate with its chain building keys
+
+    Parameters
+    ----------
+    substrate: :py:class:`bytes`
+        DER-serialised rfc5280.Certificate
+
+    Attributes
+    ----------
+    subject, issuer: :py:class:`bytes`
+        DER-serialised subject and issuer Name
+    canonicalSubject, canonicalIssuer: :py:class:`bytes`
+        Canonical form of subject and issuer Name as returned
+        by :func:`x509name.canonicalName`
+    subjectKeyIdentifier, authorityKeyIdentifier: :py:class:`bytes`
+        Key identifier octets or `None` if extension is absent
+    """
+    __slots__ = ('substrate', 'subject', 'issuer',
+                 'canonicalSubject', 'canonicalIssuer',
+                 'subjectKeyIdentifier', 'authorityKeyIdentifier',
+                 '_certificate')
+
+    def __init__(self, substrate):
+        substrate = bytes(substrate)
+
+        try:
+            certificate = tlv.readTlv(substrate)
+
+            components = tlv.children(
+                substrate, tlv.children(substrate, certificate)[0])
+
+        except error.PyAsn1Error:
+            raise error.PyAsn1Error('Malformed certificate')
+
+        if components and components[0].tag == _versionTag:
+            components = components[1:]
+
+        if len(components) < 6:
+            raise error.PyAsn1Error('Malformed certificate')
+
+        issuer, subject = components[2], components[4]
+
+        self.substrate = substrate
+        self.issuer = substrate[issuer.offset:issuer.end]
+        self.subject = substrate[subject.offset:subject.end]
+        self.canonicalIssuer = x509name.canonicalName(self.issuer)
+        self.canonicalSubject = x509name.canonicalName(self.subject)
+        self.subjectKeyIdentifier = None
+        self.authorityKeyIdentifier = None
+        self._certificate = None
+
+        for component in components[6:]:
+            if component.tag == _extensionsTag:
+                self._readExtensions(extensions.ExtensionIndex(
+                    substrate, tlv.readTlv(substrate, component.valueOffset)))
+
+    def _readExtensions(self, index):
+        try:
+            value = index.getRawValue(rfc5280.id_ce_subjectKeyIdentifier)
+
+        except KeyError:
+            pass
+
+        else:
+            self.subjectKeyIdentifier = bytes(
+                tlv.value(value, tlv.readTlv(value)))
+
+        try:
+            value = index.getRawValue(rfc5280.id_ce_authorityKeyIdentifier)
+
+        except KeyError:
+            return
+
+        for component in tlv.children(value, tlv.readTlv(value)):
+            if component.tag == _keyIdentifierTag:
+                self.authorityKeyIdentifier = bytes(
+                    tlv.value(value, component))
+
+    def __repr__(self):
+        return '%s(<%d octets>)' % (
+            self.__class__.__name__, len(self.substrate))
+
+    def __eq__(self, other):
+        if not isinstance(other, CertificateEntry):
+            return NotImplemented
+
+        return self.substrate == other.substrate
+
+    def __ne__(self, other):
+        if not isinstance(other, CertificateEntry):
+            return NotImplemented
+
+        return self.substrate != other.substrate
+
+    def __hash__(self):
+        return hash(self.substrate)
+
+    @property
+    def isSelfIssued(self):
+        return self.canonicalSubject == self.canonicalIssuer
+
+    @property
+    def identity(self):
+        """Subject Name and key this certificate certifies
+
+        Cross-certificates and re-issued certificates share it.
+        """
+        if self.subjectKeyIdentifier is None:
+            return self.canonicalSubject, self.substrate
+
+        return self.canonicalSubject, self.subjectKeyIdentifier
+
+    @property
+    def certificate(self):
+        """Decoded rfc5280.Certificate"""
+        if self._certificate is None:
+            self._certificate, rest = decoder.decode(
+                self.substrate, asn1Spec=rfc5280.Certificate())
+
+        return self._certificate
+
+
+def _toEntry(certificate):
+    if isinstance(certificate, CertificateEntry):
+        return certificate
+
+    if isinstance(certificate, rfc5280.Certificate):
+        certificate = encoder.encode(certificate)
+
+    return CertificateEntry(certificate)
+
+
+class CertificateStore(object):
+    """Pool of certificates indexed for issuer lookup
+
+    Certificates can be given as DER-serialised octets, rfc5280.Certificate
+    objects or :class:`CertificateEntry` objects. Duplicates are
+    stored once.
+    """
+    def __init__(self, certificates=()):
+        self._entries = {}
+        self._bySubject = {}
+        self._bySubjectKeyIdentifier = {}
+
+        for certificate in certificates:
+            self.add(certificate)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries.values())
+
+    def __contains__(self, certificate):
+        return _toEntry(certificate).substrate in self._entries
+
+    def add(self, certificate):
+        """Add certificate to the store, return its :class:`CertificateEntry`"""
+        entry = _toEntry(certificate)
+
+        try:
+            return self._entries[entry.substrate]
+
+        except KeyError:
+            self._entries[entry.substrate] = entry
+
+        self._bySubject.setdefault(entry.canonicalSubject, []).append(entry)
+
+        if entry.subjectKeyIdentifier is not None:
+            self._bySubjectKeyIdentifier.setdefault(
+                entry.subjectKeyIdentifier, []).append(entry)
+
+        return entry
+
+    def findBySubject(self, name):
+        """Return certificates issued to `name`
+
+        The `name` can be rfc5280.Name object or its DER serialisation,
+        it is matched by its canonical form.
+        """
+        return list(self._bySubject.get(x509name.canonicalName(name), ()))
+
+    def findBySubjectKeyIdentifier(self, keyIdentifier):
+        """Return certificates carrying given subject key identifier"""
+        return list(self._bySubjectKeyIdentifier.get(bytes(keyIdentifier), ()))
+
+    def findIssuers(self, certificate):
+        """Return candidate issuer certificates of `certificate`
+
+        Candidates are matched by authority key identifier and
+        issuer Name if the former is present, by issuer Name otherwise.
+        The certificate itself is never reported.
+        """
+        entry = _toEntry(certificate)
+
+        if entry.authorityKeyIdentifier is not None:
+            candidates = self._bySubjectKeyIdentifier.get(
+                entry.authorityKeyIdentifier, ())
+
+            issuers = [
+                candidate for candidate in candidates
+                if (candidate.canonicalSubject == entry.canonicalIssuer and
+                    candidate.substrate != entry.substrate)]
+
+            if issuers:
+                return issuers
+
+        candidates = self._bySubject.get(entry.canonicalIssuer, ())
+
+        return [candidate for candidate in candidates
+                if candidate.substrate != entry.substrate]
+
+    def buildChains(self, certificate, anchors=None, maxDepth=16):
+        """Yield candidate certification paths for `certificate`
+
+        Each path is a list of :class:`CertificateEntry` objects running
+        from `certificate` up to a trust anchor. Trust anchors are taken
+        from `anchors` :class:`CertificateStore` or, if not given, are
+        self-issued certificates found in this store.
+
+        Paths never pass through the same subject and key twice, so
+        mutually cross-certified CAs do not cause infinite loops.
+        Paths longer than `maxDepth` certificates are not explored.
+        """
+        entry = _toEntry(certificate)
+
+        if anchors is None:
+            isAnchor = lambda x: x.isSelfIssued
+
+        else:
+            isAnchor = lambda x: x in anchors
+
+        if isAnchor(entry):
+            yield [entry]
+            return
+
+        path = [entry]
+        seen = set([entry.identity])
+        candidates = [iter(self._findIssuers(entry, anchors))]
+
+        while candidates:
+            for issuer in candidates[-1]:
+                if issuer.identity in seen:
+                    continue
+
+                if isAnchor(issuer):
+                    yield path + [issuer]
+                    continue
+
+                if len(path) + 1 < maxDepth:
+                    path.append(issuer)
+                    seen.add(issuer.identity)
+                    candidates.append(iter(self._findIssuers(issuer, anchors)))
+                    break
+
+            else:
+                candidates.pop()
+                seen.discard(path.pop().identity)
+
+    def _findIssuers(self, entry, anchors):
+        issuers = self.findIssuers(entry)
+
+        if anchors is not None and anchors is not self:
+            for issuer in anchors.findIssuers(entry):
+                if issuer.substrate not in self._entries:
+                    issuers.append(issuer)
+
+        return issuers
@@ -0,0 +1,474 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# CMC body part index and PKIResponse assembly
+#
+# Indexes controls, requests, CMS contents and other messages of
+# serialised rfc6402.PKIData by BodyPartID in a single pass over the
+# substrate. Body parts are decoded on demand, PKIData nested in
+# TaggedContentInfo (possibly inside SignedData or AuthenticatedData)
+# is indexed on first access so that BodyPartPath is resolved with one
+# lookup per nesting level.
+#
+# PKIResponse is assembled from body parts serialised as they are
+# added and written out in chunks.
+#
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+from pyasn1.type import univ
+
+from pyasn1_modules import oids
+from pyasn1_modules import rfc5652
+from pyasn1_modules import rfc6402
+from pyasn1_modules import tlv
+
+_explicitTag = (0x80, 0x20, 0)
+
+_constructedOctetString = (0x00, 0x20, 4)
+
+_pkiDataOid = oids.oidKey(rfc6402.id_cct_PKIData)
+
+_signedDataOid = oids.oidKey(rfc5652.id_signedData)
+
+_authDataOid = oids.oidKey(rfc5652.id_ct_authData)
+
+# TaggedRequest alternatives by tag ID
+
+_requestTypes = {
+    0: 'tcr',
+    1: 'crm',
+    2: 'orm'
+}
+
+# Body part specs by PKIData component
+
+_bodyPartSpecs = {
+    'controlSequence': rfc6402.TaggedAttribute(),
+    'reqSequence': rfc6402.TaggedRequest(),
+    'cmsSequence': rfc6402.TaggedContentInfo(),
+    'otherMsgSequence': rfc6402.OtherMsg()
+}
+
+
+def _explicitContent(substrate, component):
+    """Return TLV wrapped into [0] EXPLICIT `component`"""
+    if component.tag != _explicitTag:
+        raise error.PyAsn1Error(
+            'Expected [0] at offset %d' % component.offset)
+
+    return tlv.readTlv(substrate, component.valueOffset)
+
+
+def _octetString(substrate, component):
+    """Return contents of (possibly constructed) OCTET STRING"""
+    if component.tag not in (tlv.tagOctetString, _constructedOctetString):
+        raise error.PyAsn1Error(
+            'Expected OCTET STRING at offset %d' % component.offset)
+
+    if not component.tag[1]:
+        return substrate[component.valueOffset:component.valueEnd]
+
+    return b''.join([bytes(_octetString(substrate, segment))
+                     for segment in tlv.children(substrate, component)])
+
+
+def _components(substrate, component, minimum, maximum=None):
+    """Return components of SEQUENCE `component` checking their count"""
+    if component.tag != tlv.tagSequence:
+        raise error.PyAsn1Error(
+            'Expected SEQUENCE at offset %d' % component.offset)
+
+    components = tlv.children(substrate, component)
+
+    if (len(components) < minimum or
+            maximum is not None and len(components) > maximum):
+        raise error.PyAsn1Error(
+            'Unexpected number of components at offset %d' % component.offset)
+
+    return components
+
+
+def _oidValue(substrate, component):
+    if component.tag != tlv.tagObjectIdentifier:
+        raise error.PyAsn1Error(
+            'Expected OBJECT IDENTIFIER at offset %d' % component.offset)
+
+    return tlv.value(substrate, component)
+
+
+def _encapsulatedPKIData(substrate, contentInfo):
+    """Return serialised PKIData carried by ContentInfo or `None`"""
+    contentType, content = _components(substrate, contentInfo, 2, 2)
+
+    contentType = _oidValue(substrate, contentType)
+
+    content = _explicitContent(substrate, content)
+
+    if contentType == _pkiDataOid:
+        return substrate[content.offset:content.end]
+
+    if contentType == _signedDataOid:
+        # version, digestAlgorithms, encapContentInfo, ..., signerInfos
+        encapContentInfo = _components(substrate, content, 4)[2]
+
+    elif contentType == _authDataOid:
+        # version, recipientInfos, macAlgorithm, encapContentInfo, mac
+        # interleaved with context-tagged optional components
+        components = [
+            component for component in _components(substrate, content, 5)
+            if not component.tag[0]]
+
+        if len(components) != 5:
+            raise error.PyAsn1Error(
+                'Malformed AuthenticatedData at offset %d' % content.offset)
+
+        encapContentInfo = components[3]
+
+    else:
+        return None
+
+    components = _components(substrate, encapContentInfo, 1, 2)
+
+    # detached eContent can not be indexed
+    if (_oidValue(substrate, components[0]) != _pkiDataOid or
+            len(components) != 2):
+        return None
+
+    return _octetString(
+        substrate, _explicitContent(substrate, components[1]))
+
+
+class BodyPartEntry(object):
+    """Body part located in serialised PKIData
+
+    Parameters
+    ----------
+    substrate: :py:class:`bytes`
+        Serialised PKIData
+    component: :py:class:`tlv.Tlv`
+        Body part within `substrate`
+    sequence: :py:class:`str`
+        PKIData component holding the body part (`controlSequence`,
+        `reqSequence`, `cmsSequence` or `otherMsgSequence`)
+
+    The `requestType` is TaggedRequest alternative (`tcr`, `crm` or
+    `orm`) of request body parts, `typeId` is the attribute, content,
+    request or other message type OID, where applicable.
+    """
+    __slots__ = ('bodyPartID', 'sequence', 'requestType', 'typeId',
+                 '_substrate', '_component', '_value', '_nested')
+
+    def __init__(self, substrate, component, sequence):
+        self._substrate = substrate
+        self._component = component
+        self._value = None
+        self._nested = None
+
+        self.sequence = sequence
+        self.requestType = None
+        self.typeId = None
+
+        components = tlv.children(substrate, component)
+
+        if sequence == 'reqSequence':
+            tagClass, tagFormat, tagId = component.tag
+
+            self.requestType = _requestTypes.get(tagId)
+
+            if tagClass != 0x80 or self.requestType is None:
+                raise error.PyAsn1Error(
+                    'Unknown TaggedRequest at offset %d' % component.offset)
+
+            if self.requestType == 'crm':
+                # certReqId of CertReqMsg is the body part ID
+                components = tlv.children(substrate, components[0])
+
+        if not components or components[0].tag != tlv.tagInteger:
+            raise error.PyAsn1Error(
+                'Malformed body part at offset %d' % component.offset)
+
+        self.bodyPartID = tlv.integerValue(substrate, components[0])
+
+        if self.requestType == 'tcr' or self.requestType == 'crm':
+            return
+
+        if len(components) < 2:
+            raise error.PyAsn1Error(
+                'Malformed body part at offset %d' % component.offset)
+
+        if sequence == 'cmsSequence':
+            contentType = _components(substrate, components[1], 2, 2)[0]
+
+        else:
+            contentType = components[1]
+
+        self.typeId = oids.intern(bytes(_oidValue(substrate, contentType)))
+
+    def __repr__(self):
+        return '<%s %s bodyPartID=%d>' % (
+            self.__class__.__name__, self.requestType or self.sequence,
+            self.bodyPartID)
+
+    @property
+    def substrate(self):
+        """DER serialisation of the body part"""
+        return self._substrate[self._component.offset:self._component.end]
+
+    @property
+    def value(self):
+        """Body part decoded against rfc6402 schema
+
+        Open types of controls are decoded against
+        rfc6402.cmcControlAttributesMap. Decoded value is memoized, the
+        returned object is shared between callers and should not be
+        modified.
+        """
+        if self._value is None:
+            self._value, rest = decoder.decode(
+                self.substrate, asn1Spec=_bodyPartSpecs[self.sequence],
+                decodeOpenTypes=True)
+
+        return self._value
+
+    @property
+    def nested(self):
+        """Index of PKIData carried by TaggedContentInfo or `None`
+
+        PKIData is looked up right in ContentInfo or encapsulated into
+        SignedData or AuthenticatedData.
+        """
+        if self.sequence != 'cmsSequence':
+            return None
+
+        if self._nested is None:
+            substrate = self._substrate
+
+            contentInfo = tlv.children(substrate, self._component)[1]
+
+            pkiData = _encapsulatedPKIData(substrate, contentInfo)
+
+            if pkiData is None:
+                return None
+
+            self._nested = PKIDataIndex(pkiData)
+
+        return self._nested
+
+
+class PKIDataIndex(object):
+    """Body parts of serialised PKIData by BodyPartID
+
+    Parameters
+    ----------
+    substrate: :py:class:`bytes`
+        DER serialisation of rfc6402.PKIData
+
+    Body parts are listed in `controls`, `requests`, `cmsContents` and
+    `otherMsgs` in their PKIData order. Duplicate BodyPartIDs are
+    rejected.
+    """
+    def __init__(self, substrate):
+        components = tlv.children(substrate, tlv.readTlv(substrate))
+
+        if len(components) != 4:
+            raise error.PyAsn1Error('Malformed PKIData')
+
+        self._substrate = substrate
+        self._byBodyPartID = {}
+        self._byTypeId = {}
+
+        self.controls = self._index(components[0], 'controlSequence')
+        self.requests = self._index(components[1], 'reqSequence')
+        self.cmsContents = self._index(components[2], 'cmsSequence')
+        self.otherMsgs = self._index(components[3], 'otherMsgSequence')
+
+    def _index(self, parent, sequence):
+        entries = []
+
+        for component in tlv.children(self._substrate, parent):
+            entry = BodyPartEntry(self._substrate, component, sequence)
+
+            if entry.bodyPartID in self._byBodyPartID:
+                raise error.PyAsn1Error(
+                    'Duplicate BodyPartID %d' % entry.bodyPartID)
+
+            self._byBodyPartID[entry.bodyPartID] = entry
+
+            if entry.typeId is not None:
+                self._byTypeId.setdefault(
+                    oids.oidKey(entry.typeId), []).append(entry)
+
+            entries.append(entry)
+
+        return entries
+
+    def __len__(self):
+        return len(self._byBodyPartID)
+
+    def __iter__(self):
+        for entries in (self.controls, self.requests,
+                        self.cmsContents, self.otherMsgs):
+            for entry in entries:
+                yield entry
+
+    def __contains__(self, bodyPartID):
+        return bodyPartID in self._byBodyPartID
+
+    def __getitem__(self, bodyPartID):
+        return self._byBodyPartID[bodyPartID]
+
+    def get(self, bodyPartID, default=None):
+        return self._byBodyPartID.get(bodyPartID, default)
+
+    def findByType(self, typeId):
+        """Return list of body parts of attribute, content or message `typeId`
+
+        The `typeId` can be ObjectIdentifier, tuple of integers, dotted
+        string or serialised OID contents.
+        """
+        return list(self._byTypeId.get(oids.oidKey(typeId), ()))
+
+    def resolve(self, reference):
+        """Return body part referred to by `reference`
+
+        The `reference` is BodyPartID, BodyPartPath or BodyPartReference
+        given as pyasn1 object, integer or sequence of integers. All but
+        the last BodyPartID of the path refer to TaggedContentInfo
+        carrying nested PKIData.
+
+        Raises
+        ------
+        : :py:class:`~pyasn1.error.PyAsn1Error`
+            If any of the body parts can not be found
+        """
+        if isinstance(reference, univ.Choice):
+            reference = reference.getComponent()
+
+        if isinstance(reference, (int, univ.Integer)):
+            path = (int(reference),)
+
+        else:
+            path = [int(bodyPartID) for bodyPartID in reference]
+
+        index = self
+
+        for depth, bodyPartID in enumerate(path):
+            entry = index.get(bodyPartID)
+
+            if entry is None:
+                raise error.PyAsn1Error(
+                    'BodyPartID %d not found at depth %d' % (
+                        bodyPartID, depth))
+
+            if depth + 1 == len(path):
+                return entry
+
+            index = entry.nested
+
+            if index is None:
+                raise error.PyAsn1Error(
+                    'BodyPartID %d does not carry PKIData' % bodyPartID)
+
+        raise error.PyAsn1Error('Empty BodyPartPath')
+
+
+class PKIResponseEncoder(object):
+    """Serialised PKIResponse assembled body part by body part
+
+    Body parts are serialised as they are added, values may be pyasn1
+    objects or their DER serialisations. The PKIResponse is then
+    produced by :meth:`chunks` or :meth:`write` without being joined
+    into a single buffer.
+    """
+    def __init__(self):
+        self._controls = []
+        self._cmsContents = []
+        self._otherMsgs = []
+        self._bodyPartIDs = set()
+
+    def _add(self, sequence, bodyPartID, components):
+        if bodyPartID in self._bodyPartIDs:
+            raise error.PyAsn1Error('Duplicate BodyPartID %d' % bodyPartID)
+
+        self._bodyPartIDs.add(bodyPartID)
+
+        sequence.append(tlv.encodeTlv(tlv.tagSequence, b''.join(
+            [tlv.encodeInteger(bodyPartID)] + components)))
+
+    def addControl(self, bodyPartID, attrType, attrValues):
+        """Add TaggedAttribute to controlSequence
+
+        The `attrType` can be ObjectIdentifier, tuple of integers,
+        dotted string or serialised OID contents, `attrValues` is a
+        sequence of attribute values.
+        """
+        attrValues = sorted(
+            [tlv.encodeDer(attrValue) for attrValue in attrValues])
+
+        self._add(self._controls, bodyPartID, [
+            tlv.encodeTlv(tlv.tagObjectIdentifier, oids.oidKey(attrType)),
+            tlv.encodeTlv(tlv.tagSet, b''.join(attrValues))])
+
+    def addContentInfo(self, bodyPartID, contentInfo):
+        """Add TaggedContentInfo to cmsSequence"""
+        self._add(self._cmsContents, bodyPartID, [tlv.encodeDer(contentInfo)])
+
+    def addOtherMsg(self, bodyPartID, otherMsgType, otherMsgValue):
+        """Add OtherMsg to otherMsgSequence"""
+        self._add(self._otherMsgs, bodyPartID, [
+            tlv.encodeTlv(tlv.tagObjectIdentifier, oids.oidKey(otherMsgType)),
+            tlv.encodeDer(otherMsgValue)])
+
+    def _headers(self):
+        headers = []
+        length = 0
+
+        for sequence in (self._controls, self._cmsContents, self._otherMsgs):
+            sequenceLength = sum([len(octets) for octets in sequence])
+
+            header = tlv.encodeHeader(tlv.tagSequence, sequenceLength)
+
+            headers.append(header)
+
+            length += len(header) + sequenceLength
+
+        return tlv.encodeHeader(tlv.tagSequence, length), headers, length
+
+    def __len__(self):
+        header, headers, length = self._headers()
+
+        return len(header) + length
+
+    def chunks(self):
+        """Yield DER serialisation of PKIResponse in chunks"""
+        header, headers, length = self._headers()
+
+        yield header
+
+        for header, sequence in zip(
+                headers, (self._controls, self._cmsContents,
+                          self._otherMsgs)):
+            yield header
+
+            for octets in sequence:
+                yield octets
+
+    def write(self, stream):
+        """Write DER serialisation of PKIResponse into `stream`
+
+        Returns the number of octets written.
+        """
+        length = 0
+
+        for chunk in self.chunks():
+            stream.write(chunk)
+            length += len(chunk)
+
+        return length
+
+    def getvalue(self):
+        """Return DER serialisation of PKIResponse"""
+        return b''.join(self.chunks())
@@ -0,0 +1,381 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# CMP message routing and assembly
+#
+# Classifies serialised rfc4210.PKIMessage by PKIBody alternative and
+# reads PKIHeader fields commonly used for routing (sender, recipient,
+# transactionID and nonces) straight from the substrate. The message
+# is passed on to its handler untouched, to be decoded there.
+#
+# Enrolment messages are assembled from pre-encoded components, and
+# certificate and polling responses are read, at the DER level.
+#
+import collections
+
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+
+from pyasn1_modules import rfc4210
+from pyasn1_modules import tlv
+
+# PKIHeader [n] EXPLICIT component tag IDs
+
+_messageTime = 0
+_protectionAlg = 1
+_senderKID = 2
+_transactionID = 4
+_senderNonce = 5
+_recipNonce = 6
+
+
+def _buildBodyTypesMap():
+    bodyTypesMap = {}
+
+    for namedType in rfc4210.PKIBody.componentType.namedTypes:
+        outerTag = namedType.asn1Object.tagSet[-1]
+        bodyTypesMap[(outerTag.tagClass, outerTag.tagId)] = namedType.name
+
+    return bodyTypesMap
+
+
+# Map of (tagClass, tagId) to PKIBody component name
+
+bodyTypesMap = _buildBodyTypesMap()
+
+_bodyTypes = frozenset(bodyTypesMap.values())
+
+_bodyTags = dict(
+    (name, tagId) for (tagClass, tagId), name in bodyTypesMap.items())
+
+_statusNames = dict(
+    (value, name) for name, value in rfc4210.PKIStatus.namedValues.items())
+
+
+class PKIMessageFrame(object):
+    """Serialised PKIMessage with routing information
+
+    Carries PKIHeader `pvno`, DER-serialised `sender` and `recipient`
+    GeneralNames, `senderKID`, `transactionID`, `senderNonce` and
+    `recipNonce` octets (`None` if absent) and PKIBody component name
+    `bodyType` read from the substrate without decoding the message.
+    """
+    __slots__ = ('pvno', 'sender', 'recipient', 'senderKID',
+                 'transactionID', 'senderNonce', 'recipNonce',
+                 'bodyType', 'substrate')
+
+    def __init__(self, substrate, offset=0):
+        message = tlv.readTlv(substrate, offset)
+
+        if message.tag != tlv.tagSequence:
+            raise error.PyAsn1Error(
+                'PKIMessage expected at offset %d' % offset)
+
+        header = tlv.readTlv(substrate, message.valueOffset)
+
+        self._readHeader(substrate, header)
+
+        if header.end >= message.valueEnd:
+            raise error.PyAsn1Error(
+                'PKIBody missing at offset %d' % header.end)
+
+        bodyTag, _, _ = tlv.readHeader(substrate, header.end)
+
+        try:
+            self.bodyType = bodyTypesMap[(bodyTag[0], bodyTag[2])]
+
+        except KeyError:
+            raise error.PyAsn1Error(
+                'Unknown PKIBody tag %s at offset %d' % (bodyTag, header.end))
+
+        if message.offset or message.end != len(substrate):
+            substrate = substrate[message.offset:message.end]
+
+        self.substrate = bytes(substrate)
+
+    def _readHeader(self, substrate, header):
+        if header.tag != tlv.tagSequence:
+            raise error.PyAsn1Error(
+                'PKIHeader expected at offset %d' % header.offset)
+
+        components = tlv.iterTlvs(
+            substrate, header.valueOffset, header.valueEnd)
+
+        try:
+            pvno = next(components)
+            sender = next(components)
+            recipient = next(components)
+
+        except StopIteration:
+            raise error.PyAsn1Error(
+                'Malformed PKIHeader at offset %d' % header.offset)
+
+        self.pvno = tlv.integerValue(substrate, pvno)
+        self.sender = bytes(substrate[sender.offset:sender.end])
+        self.recipient = bytes(substrate[recipient.offset:recipient.end])
+
+        fields = {}
+
+        for component in components:
+            tagId = component.tag[2]
+
+            if tagId > _recipNonce:
+                break
+
+            if tagId >= _senderKID:
+                fields[tagId] = bytes(tlv.value(
+                    substrate, tlv.readTlv(substrate, component.valueOffset)))
+
+        self.senderKID = fields.get(_senderKID)
+        self.transactionID = fields.get(_transactionID)
+        self.senderNonce = fields.get(_senderNonce)
+        self.recipNonce = fields.get(_recipNonce)
+
+    def __repr__(self):
+        return '%s(bodyType=%r, transactionID=%r, <%d octets>)' % (
+            self.__class__.__name__, self.bodyType, self.transactionID,
+            len(self.substrate))
+
+    def decode(self, asn1Spec=None):
+        """Decode frame into PKIMessage"""
+        if asn1Spec is None:
+            asn1Spec = rfc4210.PKIMessage()
+
+        asn1Object, rest = decoder.decode(self.substrate, asn1Spec=asn1Spec)
+
+        if rest:
+            raise error.PyAsn1Error(
+                'Trailing %d octets in PKIMessage frame' % len(rest))
+
+        return asn1Object
+
+
+def readFrame(substrate, offset=0):
+    """Return :class:`PKIMessageFrame` of PKIMessage found at `offset`"""
+    return PKIMessageFrame(substrate, offset)
+
+
+class PKIMessageRouter(object):
+    """Dispatch serialised PKIMessages to handlers by PKIBody type
+
+    Handlers are callables taking :class:`PKIMessageFrame`, messages
+    of body types without a route go to the `default` handler.
+    """
+    def __init__(self, default=None):
+        self._routes = {}
+        self._default = default
+
+    def addRoute(self, bodyTypes, handler):
+        """Route messages of PKIBody component names `bodyTypes` to `handler`"""
+        if isinstance(bodyTypes, str):
+            bodyTypes = (bodyTypes,)
+
+        for bodyType in bodyTypes:
+            if bodyType not in _bodyTypes:
+                raise error.PyAsn1Error('Unknown PKIBody type %s' % bodyType)
+
+            self._routes[bodyType] = handler
+
+    def getHandler(self, bodyType):
+        """Return handler of `bodyType` messages or `None`"""
+        return self._routes.get(bodyType, self._default)
+
+    def route(self, substrate, offset=0):
+        """Pass PKIMessage found at `offset` to its handler
+
+        Returns whatever the handler returns.
+        """
+        frame = PKIMessageFrame(substrate, offset)
+
+        handler = self.getHandler(frame.bodyType)
+
+        if handler is None:
+            raise error.PyAsn1Error(
+                'No route for PKIBody type %s' % frame.bodyType)
+
+        return handler(frame)
+
+
+def _explicit(tagId, octets):
+    return tlv.encodeTlv((0x80, 0x20, tagId), octets)
+
+
+def encodeHeader(sender, recipient, transactionID=None, senderNonce=None,
+                 recipNonce=None, senderKID=None, protectionAlg=None,
+                 messageTime=None, pvno=2):
+    """Return DER serialisation of PKIHeader
+
+    The `sender`, `recipient` (GeneralName) and `protectionAlg`
+    (AlgorithmIdentifier) may be pyasn1 objects or their DER
+    serialisations. The `messageTime` is GeneralizedTime text
+    (e.g. `20200101000000Z`), other optional fields are octets.
+    """
+    components = [tlv.encodeInteger(pvno), tlv.encodeDer(sender),
+                  tlv.encodeDer(recipient)]
+
+    if messageTime is not None:
+        components.append(_explicit(_messageTime, tlv.encodeTlv(
+            tlv.tagGeneralizedTime, messageTime.encode('ascii'))))
+
+    if protectionAlg is not None:
+        components.append(
+            _explicit(_protectionAlg, tlv.encodeDer(protectionAlg)))
+
+    for tagId, octets in ((_senderKID, senderKID),
+                          (_transactionID, transactionID),
+                          (_senderNonce, senderNonce),
+                          (_recipNonce, recipNonce)):
+        if octets is not None:
+            components.append(
+                _explicit(tagId, tlv.encodeTlv(tlv.tagOctetString, octets)))
+
+    return tlv.encodeTlv(tlv.tagSequence, b''.join(components))
+
+
+def encodeBody(bodyType, content):
+    """Return DER serialisation of PKIBody
+
+    The `content` is PKIBody `bodyType` alternative (e.g. CertReqMessages
+    of `ir`) as pyasn1 object or its DER serialisation.
+    """
+    try:
+        tagId = _bodyTags[bodyType]
+
+    except KeyError:
+        raise error.PyAsn1Error('Unknown PKIBody type %s' % bodyType)
+
+    return _explicit(tagId, tlv.encodeDer(content))
+
+
+def encodeProtectedPart(header, body):
+    """Return DER serialisation of ProtectedPart, the input of protection"""
+    return tlv.encodeTlv(tlv.tagSequence, header + body)
+
+
+def encodeMessage(header, body, protection=None, extraCerts=()):
+    """Return DER serialisation of PKIMessage
+
+    The `header` and `body` are DER serialisations, `protection` is
+    PKIProtection BIT STRING value octets, `extraCerts` are DER
+    serialisations of certificates.
+    """
+    components = [header, body]
+
+    if protection is not None:
+        components.append(_explicit(0, tlv.encodeTlv(
+            tlv.tagBitString, b'\x00' + protection)))
+
+    if extraCerts:
+        components.append(_explicit(1, tlv.encodeTlv(
+            tlv.tagSequence,
+            b''.join([tlv.encodeDer(x) for x in extraCerts]))))
+
+    return tlv.encodeTlv(tlv.tagSequence, b''.join(components))
+
+
+def encodePollReqContent(certReqIds):
+    """Return DER serialisation of PollReqContent"""
+    return tlv.encodeTlv(tlv.tagSequence, b''.join(
+        [tlv.encodeTlv(tlv.tagSequence, tlv.encodeInteger(certReqId))
+         for certReqId in certReqIds]))
+
+
+def encodeCertConfirmContent(certStatuses):
+    """Return DER serialisation of CertConfirmContent
+
+    The `certStatuses` is a sequence of `(certHash, certReqId)` pairs.
+    """
+    return tlv.encodeTlv(tlv.tagSequence, b''.join(
+        [tlv.encodeTlv(tlv.tagSequence, tlv.encodeTlv(
+            tlv.tagOctetString, certHash) + tlv.encodeInteger(certReqId))
+         for certHash, certReqId in certStatuses]))
+
+
+def readBody(frame):
+    """Return `(substrate, Tlv)` of PKIBody alternative of the frame"""
+    substrate = frame.substrate
+
+    message = tlv.readTlv(substrate)
+
+    header = tlv.readTlv(substrate, message.valueOffset)
+
+    body = tlv.readTlv(substrate, header.end)
+
+    return substrate, tlv.readTlv(substrate, body.valueOffset)
+
+
+# Outcome of certification request: `status` is PKIStatus name,
+# `certificate` is DER serialisation of issued certificate or `None`,
+# `statusInfo` is DER serialisation of PKIStatusInfo
+
+CertResponseInfo = collections.namedtuple(
+    'CertResponseInfo', ('certReqId', 'status', 'certificate', 'statusInfo'))
+
+
+def readCertRepMessage(substrate, component):
+    """Return list of :class:`CertResponseInfo` of CertRepMessage
+
+    CertRepMessage is `component` :class:`tlv.Tlv` of `substrate`.
+    Certificates encrypted by CA are not supported.
+    """
+    components = tlv.children(substrate, component)
+
+    if not components:
+        raise error.PyAsn1Error(
+            'Malformed CertRepMessage at offset %d' % component.offset)
+
+    responses = []
+
+    for certResponse in tlv.children(substrate, components[-1]):
+        fields = tlv.children(substrate, certResponse)
+
+        if len(fields) < 2:
+            raise error.PyAsn1Error(
+                'Malformed CertResponse at offset %d' % certResponse.offset)
+
+        certReqId = tlv.integerValue(substrate, fields[0])
+
+        statusInfo = fields[1]
+
+        status = tlv.integerValue(
+            substrate, tlv.readTlv(substrate, statusInfo.valueOffset))
+
+        certificate = None
+
+        if len(fields) > 2 and fields[2].tag == tlv.tagSequence:
+            certOrEncCert = tlv.readTlv(substrate, fields[2].valueOffset)
+
+            if certOrEncCert.tag != (0x80, 0x20, 0):
+                raise error.PyAsn1Error(
+                    'Unsupported certOrEncCert at offset %d' % (
+                        certOrEncCert.offset,))
+
+            certificate = tlv.readTlv(substrate, certOrEncCert.valueOffset)
+
+            certificate = bytes(substrate[certificate.offset:certificate.end])
+
+        responses.append(CertResponseInfo(
+            certReqId, _statusNames.get(status, status), certificate,
+            bytes(substrate[statusInfo.offset:statusInfo.end])))
+
+    return responses
+
+
+def readPollRepContent(substrate, component):
+    """Return list of `(certReqId, checkAfter)` of PollRepContent"""
+    polls = []
+
+    for certRep in tlv.children(substrate, component):
+        fields = tlv.children(substrate, certRep)
+
+        if len(fields) < 2:
+            raise error.PyAsn1Error(
+                'Malformed PollRepContent at offset %d' % certRep.offset)
+
+        polls.append((tlv.integerValue(substrate, fields[0]),
+                      tlv.integerValue(substrate, fields[1])))
+
+    return polls
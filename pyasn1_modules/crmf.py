@@ -0,0 +1,176 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# CRMF certificate request assembly
+#
+# Builds serialised rfc4211.CertReqMessages out of a CertTemplate
+# skeleton encoded once. Fields shared by all requests are kept as DER
+# runs preceding and following the subject and publicKey slots; each
+# request is assembled by computing the enclosing lengths and joining
+# the runs with the per-request certReqId, subject, publicKey and
+# ProofOfPossession. The result is DER identical to what the schema
+# encoder produces for the same values.
+#
+from pyasn1 import error
+
+from pyasn1_modules import tlv
+
+# CertTemplate [n] component tag IDs
+
+_subject = 5
+_publicKey = 6
+
+_subjectTag = (0x80, 0x20, _subject)
+
+# ProofOfPossession alternative raVerified [0] NULL
+
+raVerified = b'\x80\x00'
+
+
+def _retag(octets, tagOctet, what):
+    """Replace SEQUENCE tag of DER `octets` with IMPLICIT `tagOctet`"""
+    if octets[:1] != b'\x30':
+        raise error.PyAsn1Error('%s is not a DER SEQUENCE' % what)
+
+    return tagOctet + octets[1:]
+
+
+def _sequence(components):
+    return tlv.encodeTlv(tlv.tagSequence, b''.join(components))
+
+
+def encodePOPOSigningKeyInput(publicKey, sender=None, publicKeyMAC=None):
+    """Return DER serialisation of POPOSigningKeyInput
+
+    Exactly one of `sender` (GeneralName) or `publicKeyMAC` (PKMACValue)
+    is expected. Values may be pyasn1 objects or their DER
+    serialisations.
+
+    Per RFC 4211, POPOSigningKeyInput is the signature input when the
+    CertTemplate lacks subject or publicKey, otherwise the DER
+    serialisation of CertRequest is signed.
+    """
+    if (sender is None) == (publicKeyMAC is None):
+        raise error.PyAsn1Error(
+            'Either sender or publicKeyMAC must be given')
+
+    if sender is not None:
+        authInfo = tlv.encodeTlv((0x80, 0x20, 0), tlv.encodeDer(sender))
+
+    else:
+        authInfo = tlv.encodeDer(publicKeyMAC)
+
+    return _sequence((authInfo, tlv.encodeDer(publicKey)))
+
+
+def encodePOPOSigningKey(algorithmIdentifier, signature, poposkInput=None):
+    """Return DER serialisation of ProofOfPossession `signature` alternative
+
+    The `algorithmIdentifier` and `poposkInput` (POPOSigningKeyInput) may
+    be pyasn1 objects or their DER serialisations, `signature` is BIT
+    STRING value octets.
+    """
+    components = []
+
+    if poposkInput is not None:
+        components.append(
+            _retag(tlv.encodeDer(poposkInput), b'\xa0', 'poposkInput'))
+
+    components.append(tlv.encodeDer(algorithmIdentifier))
+    components.append(tlv.encodeTlv(tlv.tagBitString, b'\x00' + signature))
+
+    return tlv.encodeTlv((0x80, 0x20, 1), b''.join(components))
+
+
+class CertReqBuilder(object):
+    """Pre-encoded CertReqMsg skeleton
+
+    Parameters
+    ----------
+    certTemplate: :py:class:`rfc4211.CertTemplate` or :py:class:`bytes`
+        Fields shared by all requests. Subject and publicKey, if present,
+        are ignored in favour of per-request values.
+    controls: :py:class:`rfc4211.Controls` or :py:class:`bytes`
+        Controls shared by all requests, if any
+    regInfo: :py:class:`univ.SequenceOf` or :py:class:`bytes`
+        CertReqMsg regInfo shared by all requests, if any
+
+    Per-request subject (Name) and publicKey (SubjectPublicKeyInfo) are
+    untagged pyasn1 objects or, preferably, their DER serialisations. The
+    `popo` is DER serialisation of ProofOfPossession, e.g.
+    :py:data:`raVerified` or the output of :func:`encodePOPOSigningKey`.
+    """
+    def __init__(self, certTemplate=None, controls=None, regInfo=None):
+        head = []
+        tail = []
+
+        if certTemplate is not None:
+            substrate = tlv.encodeDer(certTemplate)
+
+            for component in tlv.children(substrate, tlv.readTlv(substrate)):
+                tagClass, tagFormat, tagId = component.tag
+
+                if tagClass != 0x80:
+                    raise error.PyAsn1Error(
+                        'Unexpected CertTemplate component at offset %d' % (
+                            component.offset))
+
+                octets = substrate[component.offset:component.end]
+
+                if tagId < _subject:
+                    head.append(octets)
+
+                elif tagId > _publicKey:
+                    tail.append(octets)
+
+        self._head = b''.join(head)
+        self._tail = b''.join(tail)
+        self._controls = tlv.encodeDer(controls) or b''
+        self._regInfo = tlv.encodeDer(regInfo) or b''
+
+    def certTemplate(self, subject=None, publicKey=None):
+        """Return DER serialisation of CertTemplate"""
+        components = [self._head]
+
+        if subject is not None:
+            components.append(
+                tlv.encodeTlv(_subjectTag, tlv.encodeDer(subject)))
+
+        if publicKey is not None:
+            components.append(
+                _retag(tlv.encodeDer(publicKey), b'\xa6', 'publicKey'))
+
+        components.append(self._tail)
+
+        return _sequence(components)
+
+    def certRequest(self, certReqId, subject=None, publicKey=None):
+        """Return DER serialisation of CertRequest
+
+        This is the signature input of ProofOfPossession when both
+        `subject` and `publicKey` are present.
+        """
+        return _sequence((tlv.encodeInteger(certReqId),
+                          self.certTemplate(subject, publicKey),
+                          self._controls))
+
+    def certReqMsg(self, certReqId, subject=None, publicKey=None, popo=None):
+        """Return DER serialisation of CertReqMsg"""
+        return _sequence((self.certRequest(certReqId, subject, publicKey),
+                          popo or b'', self._regInfo))
+
+    def build(self, requests):
+        """Return DER serialisation of CertReqMessages
+
+        The `requests` is an iterable of `(certReqId, subject, publicKey,
+        popo)` tuples, trailing items may be omitted.
+        """
+        components = [self.certReqMsg(*request) for request in requests]
+
+        if not components:
+            raise error.PyAsn1Error('CertReqMessages can not be empty')
+
+        return _sequence(components)
@@ -0,0 +1,311 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# X.509 extensions access
+#
+# Indexes Extensions carried by serialised certificates, CRLs, CRL
+# entries and PKCS#10 certification requests by extension OID. The
+# index is built on first access by scanning the DER substrate, values
+# are decoded on demand against rfc5280.certificateExtensionsMap
+# and memoized.
+#
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+from pyasn1.codec.der import encoder
+from pyasn1.type import univ
+
+from pyasn1_modules import oids
+from pyasn1_modules import rfc2986
+from pyasn1_modules import rfc5280
+from pyasn1_modules import tlv
+
+_extensionsTag = (0x80, 0x20, 3)
+
+_crlExtensionsTag = (0x80, 0x20, 0)
+
+_attributesTag = (0x80, 0x20, 0)
+
+_universalBoolean = (0x00, 0x00, 1)
+
+_universalInteger = (0x00, 0x00, 2)
+
+_universalSequence = (0x00, 0x20, 16)
+
+# UTCTime and GeneralizedTime
+
+_timeTags = ((0x00, 0x00, 23), (0x00, 0x00, 24))
+
+_extensionRequestOid = rfc5280.pkcs_9 + (14,)
+
+# Extension values specs by serialised OID
+
+_extensionsMap = oids.OidMap(rfc5280.certificateExtensionsMap)
+
+
+class ExtensionIndex(object):
+    """Extensions indexed by extension OID
+
+    Parameters
+    ----------
+    substrate: :py:class:`bytes`
+        Serialised structure holding Extensions
+    extensions: :py:class:`tlv.Tlv`
+        Extensions SEQUENCE OF within `substrate` or `None` if absent
+
+    Extension OIDs can be given as ObjectIdentifier, tuple of integers,
+    dotted string or serialised OID contents. Missing extensions
+    raise `KeyError`.
+    """
+    __slots__ = ('_substrate', '_extensions', '_index', '_values')
+
+    def __init__(self, substrate, extensions=None):
+        self._substrate = substrate
+        self._extensions = extensions
+        self._index = None
+        self._values = {}
+
+    @classmethod
+    def fromCertificate(cls, certificate):
+        """Index extensions of rfc5280.Certificate or its DER serialisation"""
+        if isinstance(certificate, rfc5280.Certificate):
+            certificate = encoder.encode(certificate)
+
+        components = tlv.children(
+            certificate, tlv.children(certificate, tlv.readTlv(certificate))[0])
+
+        for component in components[6:]:
+            if component.tag == _extensionsTag:
+                return cls(certificate,
+                           tlv.readTlv(certificate, component.valueOffset))
+
+        return cls(certificate)
+
+    @classmethod
+    def fromCertificateList(cls, certificateList):
+        """Index crlExtensions of rfc5280.CertificateList, TBSCertList or DER"""
+        if isinstance(certificateList, (rfc5280.CertificateList,
+                                        rfc5280.TBSCertList)):
+            certificateList = encoder.encode(certificateList)
+
+        tbsCertList = _tbsCertList(certificateList)
+
+        component = tlv.children(certificateList, tbsCertList)[-1]
+
+        if component.tag == _crlExtensionsTag:
+            return cls(certificateList,
+                       tlv.readTlv(certificateList, component.valueOffset))
+
+        return cls(certificateList)
+
+    @classmethod
+    def fromCrlEntry(cls, revokedCertificate):
+        """Index crlEntryExtensions of serialised revoked certificate entry"""
+        if isinstance(revokedCertificate, univ.Sequence):
+            revokedCertificate = encoder.encode(revokedCertificate)
+
+        return cls._fromCrlEntry(
+            revokedCertificate, tlv.readTlv(revokedCertificate))
+
+    @classmethod
+    def _fromCrlEntry(cls, substrate, revokedCertificate):
+        components = tlv.children(substrate, revokedCertificate)
+
+        if len(components) > 2:
+            return cls(substrate, components[2])
+
+        return cls(substrate)
+
+    @classmethod
+    def fromCertificationRequest(cls, certificationRequest):
+        """Index extensionRequest of rfc2986.CertificationRequest or DER"""
+        if isinstance(certificationRequest, rfc2986.CertificationRequest):
+            certificationRequest = encoder.encode(certificationRequest)
+
+        substrate = certificationRequest
+
+        info = tlv.children(substrate, tlv.readTlv(substrate))[0]
+
+        components = tlv.children(substrate, info)
+
+        if len(components) < 4 or components[3].tag != _attributesTag:
+            raise error.PyAsn1Error('Malformed CertificationRequest')
+
+        extensionRequest = oids.oidKey(_extensionRequestOid)
+
+        for attribute in tlv.children(substrate, components[3]):
+            attrType, attrValues = tlv.children(substrate, attribute)
+
+            if tlv.value(substrate, attrType) == extensionRequest:
+                return cls(substrate, tlv.readTlv(
+                    substrate, attrValues.valueOffset))
+
+        return cls(substrate)
+
+    def _buildIndex(self):
+        index = {}
+
+        if self._extensions is not None:
+            substrate = self._substrate
+
+            for extension in tlv.children(substrate, self._extensions):
+                components = tlv.children(substrate, extension)
+
+                critical = (len(components) == 3 and
+                            components[1].tag == _universalBoolean and
+                            tlv.value(substrate, components[1]) != b'\x00')
+
+                key = bytes(tlv.value(substrate, components[0]))
+
+                if key in index:
+                    raise error.PyAsn1Error('Duplicate extension')
+
+                extnValue = components[-1]
+
+                index[key] = critical, extnValue.valueOffset, extnValue.valueEnd
+
+        self._index = index
+
+        return index
+
+    def _lookup(self, oid):
+        index = self._index
+
+        if index is None:
+            index = self._buildIndex()
+
+        return index[oids.oidKey(oid)]
+
+    def __contains__(self, oid):
+        try:
+            self._lookup(oid)
+
+        except KeyError:
+            return False
+
+        return True
+
+    def __len__(self):
+        index = self._index
+
+        if index is None:
+            index = self._buildIndex()
+
+        return len(index)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        """Return extension OIDs as ObjectIdentifier objects"""
+        index = self._index
+
+        if index is None:
+            index = self._buildIndex()
+
+        return [oids.intern(key) for key in index]
+
+    def isCritical(self, oid):
+        return self._lookup(oid)[0]
+
+    def getRawValue(self, oid):
+        """Return extnValue contents, i.e. serialised extension value"""
+        critical, start, end = self._lookup(oid)
+
+        return self._substrate[start:end]
+
+    def getValue(self, oid, asn1Spec=None):
+        """Return decoded extension value
+
+        Decoded values are memoized per OID, the returned object is shared
+        between callers and should not be modified. If `asn1Spec` is not
+        given, it is looked up in rfc5280.certificateExtensionsMap.
+        """
+        key = oids.oidKey(oid)
+
+        try:
+            return self._values[key]
+
+        except KeyError:
+            pass
+
+        substrate = self.getRawValue(key)
+
+        if asn1Spec is None:
+            asn1Spec = _extensionsMap.get(key)
+
+            if asn1Spec is None:
+                raise error.PyAsn1Error(
+                    'Unknown extension %s' % oids.intern(key))
+
+        value, rest = decoder.decode(substrate, asn1Spec=asn1Spec)
+
+        if rest:
+            raise error.PyAsn1Error('Trailing octets in extension value')
+
+        self._values[key] = value
+
+        return value
+
+    def get(self, oid, default=None):
+        try:
+            return self.getValue(oid)
+
+        except KeyError:
+            return default
+
+
+def _tbsCertList(substrate):
+    outer = tlv.readTlv(substrate)
+
+    first = tlv.readTlv(substrate, outer.valueOffset)
+
+    # TBSCertList starts with optional INTEGER, CertificateList with SEQUENCE
+    if first.tag == _universalSequence:
+        return first
+
+    return outer
+
+
+def _revokedCertificates(substrate, tbsCertList):
+    components = tlv.children(substrate, tbsCertList)
+
+    position = 3
+
+    if components[0].tag == _universalInteger:
+        position += 1
+
+    if position < len(components) and components[position].tag in _timeTags:
+        position += 1
+
+    if (position < len(components) and
+            components[position].tag == _universalSequence):
+        return components[position]
+
+
+def iterCrlEntries(certificateList):
+    """Yield `(userCertificate, ExtensionIndex)` of revoked certificates
+
+    The `certificateList` can be rfc5280.CertificateList, TBSCertList
+    or their DER serialisation. Entries are read straight off the
+    substrate, serial numbers are returned as integers.
+    """
+    if isinstance(certificateList, (rfc5280.CertificateList,
+                                    rfc5280.TBSCertList)):
+        certificateList = encoder.encode(certificateList)
+
+    substrate = certificateList
+
+    revokedCertificates = _revokedCertificates(
+        substrate, _tbsCertList(substrate))
+
+    if revokedCertificates is None:
+        return
+
+    for revokedCertificate in tlv.children(substrate, revokedCertificates):
+        serialNumber = tlv.readTlv(substrate, revokedCertificate.valueOffset)
+
+        yield (tlv.integerValue(substrate, serialNumber),
+               ExtensionIndex._fromCrlEntry(substrate, revokedCertificate))
@@ -0,0 +1,419 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# Frozen decoded objects
+#
+# Turns decoded pyasn1 Sequence, Set, SequenceOf, SetOf and Choice
+# trees into read-only wrappers that can be shared between threads,
+# hashed and used as dictionary keys. Frozen objects are interned:
+# structurally equal subtrees (e.g. issuer Names or AlgorithmIdentifiers
+# repeated across certificates) are represented by the same object.
+# Scalar values are immutable pyasn1 objects already and are kept as
+# they are, OIDs are shared through oids.intern().
+#
+import threading
+import weakref
+
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+from pyasn1.codec.der import encoder
+from pyasn1.type import univ
+
+from pyasn1_modules import oids
+
+# Empty schema objects by type, tags and component type
+
+_templates = {}
+
+
+def _template(asn1Object):
+    key = (type(asn1Object), asn1Object.tagSet,
+           id(asn1Object.componentType))
+
+    try:
+        return _templates[key][1]
+
+    except KeyError:
+        pass
+
+    template = asn1Object.clone()
+
+    # keep component type referenced so that its id is not reused
+    _templates[key] = asn1Object.componentType, template
+
+    return template
+
+
+def _sameValues(values1, values2):
+    """Compare component values, telling apart equal values of other types"""
+    if values1 is values2:
+        return True
+
+    if len(values1) != len(values2) or values1 != values2:
+        return False
+
+    for value1, value2 in zip(values1, values2):
+        if type(value1) is not type(value2):
+            return False
+
+    return True
+
+
+def _valueKey(value):
+    """Return hashable key of component value telling apart its type"""
+    if value is None or isinstance(value, FrozenBase):
+        return value
+
+    try:
+        hash(value)
+
+    except TypeError:
+        # e.g. BitString
+        return type(value), encoder.encode(value)
+
+    return type(value), value
+
+
+def _thaw(value):
+    if isinstance(value, FrozenBase):
+        return value.thaw()
+
+    return value
+
+
+class FrozenBase(object):
+    """Read-only view of decoded constructed pyasn1 object
+
+    Frozen objects compare equal and hash alike when their schema and
+    component values are equal. Use :meth:`thaw` to obtain mutable
+    pyasn1 object, e.g. for encoding.
+    """
+    __slots__ = ('_template', '_values', '_hash', '__weakref__')
+
+    def __init__(self, template, values, key=None):
+        if key is None:
+            key = tuple([_valueKey(value) for value in values])
+
+        object.__setattr__(self, '_template', template)
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_hash', hash(
+            (self.__class__, id(template), key)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            '%s object is immutable' % self.__class__.__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError(
+            '%s object is immutable' % self.__class__.__name__)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+
+        if not isinstance(other, FrozenBase):
+            return NotImplemented
+
+        return (self._hash == other._hash and
+                self.__class__ is other.__class__ and
+                self._template is other._template and
+                _sameValues(self._values, other._values))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+
+        if result is NotImplemented:
+            return result
+
+        return not result
+
+    def __repr__(self):
+        return '<%s %s>' % (
+            self.__class__.__name__, self._template.__class__.__name__)
+
+    @property
+    def asn1Type(self):
+        """Schema object the frozen object was built off"""
+        return self._template
+
+    @property
+    def tagSet(self):
+        return self._template.tagSet
+
+    def thaw(self):
+        """Return mutable pyasn1 object equal to this one"""
+        raise NotImplementedError()
+
+    def prettyPrint(self, scope=0):
+        return self.thaw().prettyPrint(scope)
+
+
+class FrozenSequence(FrozenBase):
+    """Frozen Sequence or Set
+
+    Components are accessed by name or position like with pyasn1
+    objects, absent OPTIONAL components are `None`.
+    """
+    __slots__ = ()
+
+    def _position(self, key):
+        if isinstance(key, int):
+            if not 0 <= key < len(self._values):
+                raise IndexError(key)
+
+            return key
+
+        try:
+            return self._template.componentType.getPositionByName(key)
+
+        except error.PyAsn1Error:
+            raise KeyError(key)
+
+    def __getitem__(self, key):
+        return self._values[self._position(key)]
+
+    def __contains__(self, key):
+        try:
+            return self._values[self._position(key)] is not None
+
+        except (KeyError, IndexError):
+            return False
+
+    def __len__(self):
+        return len([value for value in self._values if value is not None])
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+
+        except (KeyError, IndexError):
+            return default
+
+        if value is None:
+            return default
+
+        return value
+
+    def keys(self):
+        """Return names of present components"""
+        componentType = self._template.componentType
+
+        return [componentType.getNameByPosition(position)
+                for position, value in enumerate(self._values)
+                if value is not None]
+
+    def values(self):
+        return [value for value in self._values if value is not None]
+
+    def items(self):
+        return list(zip(self.keys(), self.values()))
+
+    def thaw(self):
+        asn1Object = self._template.clone()
+
+        for position, value in enumerate(self._values):
+            if value is not None:
+                asn1Object.setComponentByPosition(
+                    position, _thaw(value), verifyConstraints=False)
+
+        return asn1Object
+
+
+class FrozenSequenceOf(FrozenBase):
+    """Frozen SequenceOf or SetOf, a read-only sequence of components"""
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def thaw(self):
+        asn1Object = self._template.clone()
+
+        for position, value in enumerate(self._values):
+            asn1Object.setComponentByPosition(
+                position, _thaw(value), verifyConstraints=False)
+
+        return asn1Object
+
+
+class FrozenChoice(FrozenBase):
+    """Frozen Choice holding its chosen alternative"""
+    __slots__ = ()
+
+    def getName(self):
+        return self._template.componentType.getNameByPosition(
+            self._values[0])
+
+    def getComponent(self):
+        return self._values[1]
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            position = key
+
+        else:
+            try:
+                position = self._template.componentType.getPositionByName(
+                    key)
+
+            except error.PyAsn1Error:
+                raise KeyError(key)
+
+        if position != self._values[0]:
+            raise error.PyAsn1Error('Component %s not chosen' % (key,))
+
+        return self._values[1]
+
+    def thaw(self):
+        asn1Object = self._template.clone()
+
+        asn1Object.setComponentByPosition(
+            self._values[0], _thaw(self._values[1]), verifyConstraints=False)
+
+        return asn1Object
+
+
+class Freezer(object):
+    """Pool of interned frozen objects
+
+    Structurally equal frozen objects built through the same pool are
+    the same object. The pool only holds weak references, objects are
+    dropped from it once no longer used elsewhere. Pools are safe to
+    share between threads.
+    """
+    def __init__(self):
+        self._pool = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pool)
+
+    def clear(self):
+        with self._lock:
+            self._pool.clear()
+
+    def _intern(self, frozenType, template, values):
+        valuesKey = tuple([_valueKey(value) for value in values])
+
+        key = frozenType, id(template), valuesKey
+
+        with self._lock:
+            frozen = self._pool.get(key)
+
+            if frozen is not None:
+                return frozen
+
+            frozen = frozenType(template, values, valuesKey)
+
+            self._pool[key] = frozen
+
+        return frozen
+
+    def freeze(self, asn1Object):
+        """Return frozen counterpart of decoded pyasn1 object
+
+        Scalar values are returned as they are, except for OIDs which
+        are shared through oids.intern(). Absent DEFAULT components take
+        their default value, other components without value are `None`.
+        """
+        if asn1Object is None or isinstance(asn1Object, FrozenBase):
+            return asn1Object
+
+        if not asn1Object.isValue:
+            return None
+
+        if isinstance(asn1Object, univ.Choice):
+            componentType = asn1Object.componentType
+
+            position = componentType.getPositionByName(asn1Object.getName())
+
+            values = position, self.freeze(asn1Object.getComponent())
+
+            frozenType = FrozenChoice
+
+        elif isinstance(asn1Object, univ.SequenceOfAndSetOfBase):
+            values = tuple([self.freeze(component)
+                            for component in asn1Object])
+
+            frozenType = FrozenSequenceOf
+
+        elif isinstance(asn1Object, univ.SequenceAndSetBase):
+            componentType = asn1Object.componentType
+
+            values = []
+
+            for position in range(len(componentType or asn1Object)):
+                component = asn1Object.getComponentByPosition(
+                    position, default=None, instantiate=False)
+
+                # absent DEFAULT components take their default value
+                if component is None and componentType:
+                    namedType = componentType[position]
+
+                    if namedType.isDefaulted:
+                        component = namedType.asn1Object
+
+                values.append(self.freeze(component))
+
+            values = tuple(values)
+
+            frozenType = FrozenSequence
+
+        elif (isinstance(asn1Object, univ.ObjectIdentifier) and
+                asn1Object.tagSet == univ.ObjectIdentifier.tagSet):
+            return oids.intern(asn1Object)
+
+        else:
+            return asn1Object
+
+        return self._intern(frozenType, _template(asn1Object), values)
+
+    def decode(self, substrate, asn1Spec, **options):
+        """Decode DER serialisation against `asn1Spec` into frozen object
+
+        Extra `options` are passed on to the DER decoder (e.g.
+        `decodeOpenTypes`), trailing octets raise
+        :py:class:`~pyasn1.error.PyAsn1Error`.
+        """
+        asn1Object, rest = decoder.decode(
+            substrate, asn1Spec=asn1Spec, **options)
+
+        if rest:
+            raise error.PyAsn1Error('Trailing octets after %s' % (
+                asn1Spec.__class__.__name__,))
+
+        return self.freeze(asn1Object)
+
+
+_freezer = Freezer()
+
+
+def freeze(asn1Object):
+    """Return frozen `asn1Object` interned in the default pool"""
+    return _freezer.freeze(asn1Object)
+
+
+def decode(substrate, asn1Spec, **options):
+    """Decode `substrate` into frozen object interned in the default pool"""
+    return _freezer.decode(substrate, asn1Spec, **options)
+
+
+def clearCache():
+    """Drop interned objects of the default pool and cached templates"""
+    _freezer.clear()
+    _templates.clear()
@@ -0,0 +1,538 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# IP address and AS number resource sets
+#
+# Turns IPAddrBlocks and ASIdentifiers certificate extensions into
+# sorted sets of integer intervals supporting fast containment,
+# intersection and subset tests, and builds canonical extension
+# values back from them.
+#
+# ASN.1 source from:
+# https://www.rfc-editor.org/rfc/rfc3779.txt
+# https://www.rfc-editor.org/rfc/rfc8360.txt
+#
+import bisect
+
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+from pyasn1.type import univ
+
+from pyasn1_modules import rfc3779
+from pyasn1_modules import rfc8360
+from pyasn1_modules import rpki
+
+
+class IntervalSet(object):
+    """Immutable set of integers kept as sorted disjoint intervals
+
+    Parameters
+    ----------
+    intervals:
+        Iterable of inclusive `(low, high)` integer pairs, may overlap
+        and come in any order
+    """
+    __slots__ = ('_lows', '_highs')
+
+    def __init__(self, intervals=()):
+        lows = []
+        highs = []
+
+        for low, high in sorted(intervals):
+            if low > high:
+                raise error.PyAsn1Error(
+                    'Malformed interval %s-%s' % (low, high))
+
+            if highs and low <= highs[-1] + 1:
+                if high > highs[-1]:
+                    highs[-1] = high
+
+            else:
+                lows.append(low)
+                highs.append(high)
+
+        self._lows = lows
+        self._highs = highs
+
+    def __iter__(self):
+        return iter(zip(self._lows, self._highs))
+
+    def __len__(self):
+        return len(self._lows)
+
+    def __bool__(self):
+        return bool(self._lows)
+
+    __nonzero__ = __bool__
+
+    def __eq__(self, other):
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+
+        return self._lows == other._lows and self._highs == other._highs
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+
+        if equal is NotImplemented:
+            return equal
+
+        return not equal
+
+    def __hash__(self):
+        return hash((tuple(self._lows), tuple(self._highs)))
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, list(self))
+
+    def __contains__(self, value):
+        return self.containsRange(value, value)
+
+    def containsRange(self, low, high):
+        """Tell whether all of `low`..`high` are in the set"""
+        index = bisect.bisect_right(self._lows, low) - 1
+
+        return index >= 0 and self._highs[index] >= high
+
+    def overlapsRange(self, low, high):
+        """Tell whether any of `low`..`high` is in the set"""
+        index = bisect.bisect_right(self._lows, high) - 1
+
+        return index >= 0 and self._highs[index] >= low
+
+    def issubset(self, other):
+        for low, high in self:
+            if not other.containsRange(low, high):
+                return False
+
+        return True
+
+    def issuperset(self, other):
+        return other.issubset(self)
+
+    def union(self, other):
+        return self.__class__(list(self) + list(other))
+
+    def intersection(self, other):
+        intervals = []
+
+        lows, highs = self._lows, self._highs
+        otherLows, otherHighs = other._lows, other._highs
+
+        index = otherIndex = 0
+
+        while index < len(lows) and otherIndex < len(otherLows):
+            low = max(lows[index], otherLows[otherIndex])
+            high = min(highs[index], otherHighs[otherIndex])
+
+            if low <= high:
+                intervals.append((low, high))
+
+            if highs[index] < otherHighs[otherIndex]:
+                index += 1
+
+            else:
+                otherIndex += 1
+
+        return self.__class__(intervals)
+
+    def isdisjoint(self, other):
+        return not self.intersection(other)
+
+
+class IPResources(object):
+    """IP address resources keyed by address family
+
+    Address families are the raw addressFamily octets (AFI with
+    optional SAFI). Families marked as inherited take their
+    resources from the issuer, see :meth:`resolve`.
+    """
+    __slots__ = ('families', 'inherited')
+
+    def __init__(self, families=None, inherited=()):
+        self.families = dict(families or {})
+        self.inherited = frozenset(inherited)
+
+    def __eq__(self, other):
+        if not isinstance(other, IPResources):
+            return NotImplemented
+
+        return (self.families == other.families and
+                self.inherited == other.inherited)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+
+        if equal is NotImplemented:
+            return equal
+
+        return not equal
+
+    def __repr__(self):
+        return '%s(%r, inherited=%r)' % (
+            self.__class__.__name__, self.families, sorted(self.inherited))
+
+    def _family(self, addressFamily):
+        if addressFamily in self.inherited:
+            raise error.PyAsn1Error(
+                'Resources of family %r are inherited' % (addressFamily,))
+
+        return self.families.get(addressFamily, _emptySet)
+
+    def coversRange(self, addressFamily, low, high):
+        return self._family(addressFamily).containsRange(low, high)
+
+    def coversPrefix(self, addressFamily, address, prefixLength):
+        low, high = prefixInterval(addressFamily, address, prefixLength)
+
+        return self._family(addressFamily).containsRange(low, high)
+
+    def issubset(self, other):
+        for addressFamily, intervals in self.families.items():
+            if intervals and not intervals.issubset(
+                    other._family(addressFamily)):
+                return False
+
+        return True
+
+    def intersection(self, other):
+        families = {}
+
+        for addressFamily, intervals in self.families.items():
+            common = intervals.intersection(other._family(addressFamily))
+
+            if common:
+                families[addressFamily] = common
+
+        return self.__class__(families)
+
+    def resolve(self, issuer):
+        """Replace inherited families with the issuer's resources"""
+        families = dict(self.families)
+
+        for addressFamily in self.inherited:
+            intervals = issuer._family(addressFamily)
+
+            if intervals:
+                families[addressFamily] = intervals
+
+        return self.__class__(families)
+
+
+class ASResources(object):
+    """AS number and routing domain identifier resources
+
+    Components set to `None` are inherited from the issuer,
+    see :meth:`resolve`.
+    """
+    __slots__ = ('asnum', 'rdi')
+
+    def __init__(self, asnum=None, rdi=None):
+        self.asnum = asnum
+        self.rdi = rdi
+
+    def __eq__(self, other):
+        if not isinstance(other, ASResources):
+            return NotImplemented
+
+        return self.asnum == other.asnum and self.rdi == other.rdi
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+
+        if equal is NotImplemented:
+            return equal
+
+        return not equal
+
+    def __repr__(self):
+        return '%s(asnum=%r, rdi=%r)' % (
+            self.__class__.__name__, self.asnum, self.rdi)
+
+    @staticmethod
+    def _resolved(intervals):
+        if intervals is None:
+            raise error.PyAsn1Error('Resources are inherited')
+
+        return intervals
+
+    def coversAS(self, low, high=None):
+        if high is None:
+            high = low
+
+        return self._resolved(self.asnum).containsRange(low, high)
+
+    def issubset(self, other):
+        for intervals, otherIntervals in ((self.asnum, other.asnum),
+                                          (self.rdi, other.rdi)):
+            # no resources are a subset of inherited ones as well
+            if (self._resolved(intervals) and not
+                    intervals.issubset(self._resolved(otherIntervals))):
+                return False
+
+        return True
+
+    def intersection(self, other):
+        return self.__class__(
+            self._resolved(self.asnum).intersection(other._resolved(other.asnum)),
+            self._resolved(self.rdi).intersection(other._resolved(other.rdi)))
+
+    def resolve(self, issuer):
+        """Replace inherited components with the issuer's resources"""
+        asnum, rdi = self.asnum, self.rdi
+
+        if asnum is None:
+            asnum = issuer.asnum
+
+        if rdi is None:
+            rdi = issuer.rdi
+
+        return self.__class__(asnum, rdi)
+
+
+_emptySet = IntervalSet()
+
+
+def _afi(addressFamily):
+    octets = bytearray(addressFamily)
+
+    if len(octets) < 2:
+        raise error.PyAsn1Error('Malformed addressFamily')
+
+    return octets[0] << 8 | octets[1]
+
+
+def _width(addressFamily):
+    try:
+        return rpki.addressWidths[_afi(addressFamily)]
+
+    except KeyError:
+        raise error.PyAsn1Error(
+            'Unsupported address family %r' % (addressFamily,))
+
+
+def prefixInterval(addressFamily, address, prefixLength):
+    """Return inclusive `(low, high)` addresses covered by prefix"""
+    hostBits = _width(addressFamily) - prefixLength
+
+    low = address >> hostBits << hostBits
+
+    return low, low | (1 << hostBits) - 1
+
+
+def _bitsInterval(width, bits, fill):
+    bitCount = len(bits)
+
+    if bitCount > width:
+        raise error.PyAsn1Error('Address longer than %d bits' % width)
+
+    value = bitCount and bits.asInteger() or 0
+
+    hostBits = width - bitCount
+
+    value <<= hostBits
+
+    if fill:
+        value |= (1 << hostBits) - 1
+
+    return value
+
+
+def fromIPAddrBlocks(ipAddrBlocks):
+    """Build :class:`IPResources` from decoded IPAddrBlocks"""
+    families = {}
+    inherited = set()
+
+    for family in ipAddrBlocks:
+        addressFamily = family['addressFamily'].asOctets()
+
+        choice = family['ipAddressChoice']
+
+        if choice.getName() == 'inherit':
+            inherited.add(addressFamily)
+            continue
+
+        width = _width(addressFamily)
+
+        intervals = []
+
+        for addressOrRange in choice['addressesOrRanges']:
+            if addressOrRange.getName() == 'addressPrefix':
+                bits = addressOrRange['addressPrefix']
+                intervals.append((_bitsInterval(width, bits, False),
+                                  _bitsInterval(width, bits, True)))
+
+            else:
+                addressRange = addressOrRange['addressRange']
+                intervals.append(
+                    (_bitsInterval(width, addressRange['min'], False),
+                     _bitsInterval(width, addressRange['max'], True)))
+
+        families[addressFamily] = IntervalSet(intervals)
+
+    return IPResources(families, inherited)
+
+
+def _asIntervalSet(choice):
+    if not choice.isValue:
+        return _emptySet
+
+    if choice.getName() == 'inherit':
+        return None
+
+    intervals = []
+
+    for asIdOrRange in choice['asIdsOrRanges']:
+        if asIdOrRange.getName() == 'id':
+            asId = int(asIdOrRange['id'])
+            intervals.append((asId, asId))
+
+        else:
+            asRange = asIdOrRange['range']
+            intervals.append((int(asRange['min']), int(asRange['max'])))
+
+    return IntervalSet(intervals)
+
+
+def fromASIdentifiers(asIdentifiers):
+    """Build :class:`ASResources` from decoded ASIdentifiers"""
+    return ASResources(_asIntervalSet(asIdentifiers['asnum']),
+                       _asIntervalSet(asIdentifiers['rdi']))
+
+
+_extensions = {
+    rfc3779.id_pe_ipAddrBlocks: (rfc3779.IPAddrBlocks, fromIPAddrBlocks, 0),
+    rfc3779.id_pe_autonomousSysIds: (rfc3779.ASIdentifiers, fromASIdentifiers, 1),
+    rfc8360.id_pe_ipAddrBlocks_v2: (rfc8360.IPAddrBlocks, fromIPAddrBlocks, 0),
+    rfc8360.id_pe_autonomousSysIds_v2: (rfc8360.ASIdentifiers, fromASIdentifiers, 1)
+}
+
+
+def fromCertificate(certificate):
+    """Extract resources from decoded rfc5280.Certificate
+
+    Returns `(ipResources, asResources)` where absent extensions
+    are reported as `None`. Both RFC3779 and RFC8360 (validation
+    reconsidered) extensions are recognized.
+    """
+    resources = [None, None]
+
+    extensions = certificate['tbsCertificate']['extensions']
+
+    if not extensions.isValue:
+        return tuple(resources)
+
+    for extension in extensions:
+        try:
+            asn1Spec, builder, index = _extensions[extension['extnID']]
+
+        except KeyError:
+            continue
+
+        extnValue, rest = decoder.decode(
+            extension['extnValue'], asn1Spec=asn1Spec())
+
+        resources[index] = builder(extnValue)
+
+    return tuple(resources)
+
+
+def _bits(value, bitCount, width):
+    if not bitCount:
+        return rfc3779.IPAddress(binValue='')
+
+    return rfc3779.IPAddress(
+        binValue=bin(value >> width - bitCount)[2:].zfill(bitCount))
+
+
+def _addressOrRange(width, low, high):
+    size = high - low + 1
+
+    # exact prefix: power of two sized and aligned
+    if not size & size - 1 and not low & size - 1:
+        hostBits = size.bit_length() - 1
+
+        addressOrRange = rfc3779.IPAddressOrRange()
+        addressOrRange['addressPrefix'] = _bits(low, width - hostBits, width)
+
+        return addressOrRange
+
+    # range bounds drop trailing zeros (min) and ones (max)
+    minBits = width
+    while minBits and not low >> width - minBits & 1:
+        minBits -= 1
+
+    maxBits = width
+    while maxBits and high >> width - maxBits & 1:
+        maxBits -= 1
+
+    addressOrRange = rfc3779.IPAddressOrRange()
+    addressRange = addressOrRange['addressRange']
+    addressRange['min'] = _bits(low, minBits, width)
+    addressRange['max'] = _bits(high, maxBits, width)
+
+    return addressOrRange
+
+
+def toIPAddrBlocks(ipResources):
+    """Build canonical rfc3779.IPAddrBlocks from :class:`IPResources`"""
+    ipAddrBlocks = rfc3779.IPAddrBlocks()
+
+    addressFamilies = sorted(
+        set(ipResources.families) | set(ipResources.inherited))
+
+    for addressFamily in addressFamilies:
+        family = ipAddrBlocks.getComponentByPosition(len(ipAddrBlocks))
+        family['addressFamily'] = addressFamily
+
+        choice = family['ipAddressChoice']
+
+        if addressFamily in ipResources.inherited:
+            choice['inherit'] = univ.Null('')
+            continue
+
+        width = _width(addressFamily)
+
+        addresses = choice['addressesOrRanges']
+
+        # keep component initialized even if empty
+        addresses.clear()
+
+        for low, high in ipResources.families[addressFamily]:
+            addresses.append(_addressOrRange(width, low, high))
+
+    return ipAddrBlocks
+
+
+def _asIdentifierChoice(intervals, choice):
+    if intervals is None:
+        choice['inherit'] = univ.Null('')
+        return
+
+    asIdsOrRanges = choice['asIdsOrRanges']
+
+    for low, high in intervals:
+        asIdOrRange = asIdsOrRanges.getComponentByPosition(len(asIdsOrRanges))
+
+        if low == high:
+            asIdOrRange['id'] = low
+
+        else:
+            asIdOrRange['range']['min'] = low
+            asIdOrRange['range']['max'] = high
+
+
+def toASIdentifiers(asResources):
+    """Build canonical rfc3779.ASIdentifiers from :class:`ASResources`"""
+    asIdentifiers = rfc3779.ASIdentifiers()
+
+    if asResources.asnum is None or asResources.asnum:
+        _asIdentifierChoice(asResources.asnum, asIdentifiers['asnum'])
+
+    if asResources.rdi is None or asResources.rdi:
+        _asIdentifierChoice(asResources.rdi, asIdentifiers['rdi'])
+
+    return asIdentifiers
@@ -0,0 +1,367 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# LDAP message stream processing
+#
+# Frames LDAPMessage PDUs arriving over a byte stream in arbitrary
+# fragments by scanning outer TLV headers only. Complete frames can
+# be passed through as-is or decoded into rfc2251.LDAPMessage.
+#
+# SearchResultEntry attributes can be accessed lazily, straight
+# from the serialised message.
+#
+from pyasn1 import error
+from pyasn1.codec.ber import decoder
+
+from pyasn1_modules import rfc2251
+from pyasn1_modules import tlv
+
+
+def _buildProtocolOpsMap():
+    namedTypes = rfc2251.LDAPMessage.componentType
+
+    protocolOp = namedTypes.getTypeByPosition(
+        namedTypes.getPositionByName('protocolOp'))
+
+    protocolOpsMap = {}
+
+    for namedType in protocolOp.componentType.namedTypes:
+        outerTag = namedType.asn1Object.tagSet[-1]
+        protocolOpsMap[(outerTag.tagClass, outerTag.tagId)] = namedType.name
+
+    return protocolOpsMap
+
+
+# Map of (tagClass, tagId) to LDAPMessage protocolOp component name
+
+protocolOpsMap = _buildProtocolOpsMap()
+
+
+class LDAPFrame(object):
+    """Complete serialised LDAPMessage
+
+    Carries `messageID` and `protocolOp` component name read from
+    the substrate without decoding the message.
+    """
+    __slots__ = ('messageID', 'protocolOp', 'substrate')
+
+    def __init__(self, messageID, protocolOp, substrate):
+        self.messageID = messageID
+        self.protocolOp = protocolOp
+        self.substrate = substrate
+
+    def __repr__(self):
+        return '%s(messageID=%r, protocolOp=%r, <%d octets>)' % (
+            self.__class__.__name__, self.messageID,
+            self.protocolOp, len(self.substrate))
+
+    def decode(self, asn1Spec=None):
+        """Decode frame into LDAPMessage"""
+        if asn1Spec is None:
+            asn1Spec = rfc2251.LDAPMessage()
+
+        asn1Object, rest = decoder.decode(self.substrate, asn1Spec=asn1Spec)
+
+        if rest:
+            raise error.PyAsn1Error(
+                'Trailing %d octets in LDAPMessage frame' % len(rest))
+
+        return asn1Object
+
+
+def readFrame(substrate, offset=0):
+    """Read LDAPFrame header fields off serialised LDAPMessage
+
+    Returns `(messageID, protocolOp, end)` where `end` is the offset
+    past the message. Raises `SubstrateUnderrunError` if the message
+    is not complete yet.
+    """
+    tag, valueOffset, length = tlv.readHeader(substrate, offset)
+
+    if length is None:
+        raise error.PyAsn1Error(
+            'Indefinite length LDAPMessage at offset %d' % offset)
+
+    end = valueOffset + length
+
+    if end > len(substrate):
+        raise error.SubstrateUnderrunError(
+            '%d more octets needed' % (end - len(substrate)))
+
+    messageID = tlv.readTlv(substrate, valueOffset)
+
+    protocolOpTag, _, _ = tlv.readHeader(substrate, messageID.end)
+
+    try:
+        protocolOp = protocolOpsMap[(protocolOpTag[0], protocolOpTag[2])]
+
+    except KeyError:
+        raise error.PyAsn1Error(
+            'Unknown LDAPMessage protocolOp tag %s' % (protocolOpTag,))
+
+    return tlv.integerValue(substrate, messageID), protocolOp, end
+
+
+class LDAPMessageStream(object):
+    """Incremental LDAPMessage framer
+
+    Accepts chunks of a byte stream through :meth:`feed` and yields
+    complete :class:`LDAPFrame` objects as soon as they are available.
+    Only incomplete trailing data is retained between calls, so long
+    result sets are processed one message at a time.
+
+    Parameters
+    ----------
+    maxMessageSize: :py:class:`int`
+        Reject messages longer than that many octets (unlimited
+        if `None`)
+    """
+    def __init__(self, maxMessageSize=None):
+        self._maxMessageSize = maxMessageSize
+        self._buffer = bytearray()
+        self._offset = 0
+
+    def __len__(self):
+        """Number of buffered octets not yet framed"""
+        return len(self._buffer) - self._offset
+
+    def feed(self, chunk):
+        """Append `chunk` to the stream, return iterator over new frames"""
+        self._buffer.extend(chunk)
+
+        return self._frames()
+
+    def _frames(self):
+        while True:
+            offset = self._offset
+
+            try:
+                messageID, protocolOp, end = readFrame(self._buffer, offset)
+
+            except error.SubstrateUnderrunError:
+                if self._maxMessageSize is not None:
+                    self._checkSize()
+                break
+
+            if (self._maxMessageSize is not None and
+                    end - offset > self._maxMessageSize):
+                raise error.PyAsn1Error(
+                    'LDAPMessage of %d octets exceeds limit' % (end - offset))
+
+            self._offset = end
+
+            substrate = bytes(self._buffer[offset:end])
+
+            self._compact()
+
+            yield LDAPFrame(messageID, protocolOp, substrate)
+
+        self._compact()
+
+    def _checkSize(self):
+        try:
+            tag, valueOffset, length = tlv.readHeader(self._buffer, self._offset)
+
+        except error.SubstrateUnderrunError:
+            return
+
+        if length is not None and valueOffset + length - self._offset > self._maxMessageSize:
+            raise error.PyAsn1Error(
+                'LDAPMessage of %d octets exceeds limit' % (
+                    valueOffset + length - self._offset))
+
+    def _compact(self):
+        # drop consumed data once it dominates the buffer
+        if self._offset and self._offset * 2 >= len(self._buffer):
+            del self._buffer[:self._offset]
+            self._offset = 0
+
+
+def iterFrames(chunks, maxMessageSize=None):
+    """Yield :class:`LDAPFrame` objects framed from iterable of byte chunks"""
+    stream = LDAPMessageStream(maxMessageSize)
+
+    for chunk in chunks:
+        for frame in stream.feed(chunk):
+            yield frame
+
+    if len(stream):
+        raise error.SubstrateUnderrunError(
+            '%d octets of incomplete LDAPMessage left' % len(stream))
+
+
+def iterMessages(chunks, maxMessageSize=None):
+    """Yield decoded LDAPMessage objects from iterable of byte chunks"""
+    asn1Spec = rfc2251.LDAPMessage()
+
+    for frame in iterFrames(chunks, maxMessageSize):
+        yield frame.decode(asn1Spec)
+
+
+class LazySearchResultEntry(object):
+    """Read-only view over serialised SearchResultEntry
+
+    Attribute descriptions are indexed to the position of their
+    values on first access, values are only extracted when
+    requested. Attribute names are matched case-insensitively.
+
+    Parameters
+    ----------
+    substrate: :py:class:`bytes`
+        Serialised SearchResultEntry at `offset`
+    """
+    __slots__ = ('_substrate', '_entry', '_objectName', '_index')
+
+    def __init__(self, substrate, offset=0):
+        entry = tlv.readTlv(substrate, offset)
+
+        if protocolOpsMap.get((entry.tag[0], entry.tag[2])) != 'searchResEntry':
+            raise error.PyAsn1Error(
+                'Not a SearchResultEntry at offset %d' % offset)
+
+        self._substrate = substrate
+        self._entry = entry
+        self._objectName = None
+        self._index = None
+
+    @classmethod
+    def fromMessage(cls, substrate):
+        """Build view over SearchResultEntry carried by serialised LDAPMessage"""
+        if isinstance(substrate, LDAPFrame):
+            substrate = substrate.substrate
+
+        message = tlv.readTlv(substrate)
+
+        messageID = tlv.readTlv(substrate, message.valueOffset)
+
+        return cls(substrate, messageID.end)
+
+    def _components(self):
+        components = tlv.children(self._substrate, self._entry)
+
+        if len(components) != 2:
+            raise error.PyAsn1Error('Malformed SearchResultEntry')
+
+        return components
+
+    @property
+    def objectName(self):
+        if self._objectName is None:
+            self._objectName = bytes(
+                tlv.value(self._substrate, self._components()[0]))
+
+        return self._objectName
+
+    def _buildIndex(self):
+        index = {}
+
+        attributes = self._components()[1]
+
+        for attribute in tlv.iterTlvs(
+                self._substrate, attributes.valueOffset, attributes.valueEnd):
+            attrType, attrVals = tlv.children(self._substrate, attribute)
+
+            attrType = bytes(tlv.value(self._substrate, attrType))
+
+            index[attrType.lower()] = attrType, attrVals
+
+        self._index = index
+
+        return index
+
+    @staticmethod
+    def _key(name):
+        if not isinstance(name, bytes):
+            name = name.encode('ascii')
+
+        return name.lower()
+
+    def _lookup(self, name):
+        index = self._index
+
+        if index is None:
+            index = self._buildIndex()
+
+        return index[self._key(name)]
+
+    def __contains__(self, name):
+        try:
+            self._lookup(name)
+
+        except KeyError:
+            return False
+
+        return True
+
+    def __len__(self):
+        index = self._index
+
+        if index is None:
+            index = self._buildIndex()
+
+        return len(index)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        """Return attribute descriptions as found in the entry"""
+        index = self._index
+
+        if index is None:
+            index = self._buildIndex()
+
+        return [attrType for attrType, attrVals in index.values()]
+
+    def getRawValues(self, name):
+        """Return list of value octets of attribute `name`
+
+        Raises `KeyError` if no such attribute is present.
+        """
+        attrType, attrVals = self._lookup(name)
+
+        values = []
+
+        for attrVal in tlv.iterTlvs(
+                self._substrate, attrVals.valueOffset, attrVals.valueEnd):
+
+            if attrVal.tag[1]:
+                # constructed (segmented) OCTET STRING is BER-only
+                asn1Object, rest = decoder.decode(
+                    bytes(self._substrate[attrVal.offset:attrVal.end]),
+                    asn1Spec=rfc2251.AttributeValue())
+
+                values.append(asn1Object.asOctets())
+
+            else:
+                values.append(bytes(tlv.value(self._substrate, attrVal)))
+
+        return values
+
+    def __getitem__(self, name):
+        return self.getRawValues(name)
+
+    def get(self, name, default=None):
+        try:
+            return self.getRawValues(name)
+
+        except KeyError:
+            return default
+
+    def getValues(self, name):
+        """Return list of rfc2251.AttributeValue objects of attribute `name`"""
+        return [rfc2251.AttributeValue(value)
+                for value in self.getRawValues(name)]
+
+    def decode(self):
+        """Fully decode entry into rfc2251.SearchResultEntry"""
+        entry = self._entry
+
+        asn1Object, rest = decoder.decode(
+            bytes(self._substrate[entry.offset:entry.end]),
+            asn1Spec=rfc2251.SearchResultEntry())
+
+        return asn1Object
@@ -0,0 +1,442 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# LDAP search filter compiler
+#
+# Turns string representation of LDAP search filters into
+# rfc2251.Filter objects or directly into their BER serialisation.
+# Compiled filters are cached by the filter string.
+#
+# String representation from:
+# https://www.rfc-editor.org/rfc/rfc4515.txt
+#
+import collections
+import threading
+
+from pyasn1 import error
+
+from pyasn1_modules import rfc2251
+from pyasn1_modules import tlv
+
+
+_hexDigits = frozenset('0123456789abcdefABCDEF')
+
+
+class FilterSyntaxError(error.PyAsn1Error):
+    pass
+
+
+def _readValue(text, position, allowStar):
+    """Read assertion value up to closing parenthesis
+
+    Returns `(chunks, position)` where `chunks` is a list of unescaped
+    value octets separated by unescaped asterisks.
+    """
+    chunks = []
+    value = bytearray()
+    length = len(text)
+
+    while position < length:
+        char = text[position]
+
+        if char == ')':
+            chunks.append(bytes(value))
+            return chunks, position
+
+        if char == '(':
+            raise FilterSyntaxError(
+                'Unescaped parenthesis at position %d' % position)
+
+        if char == '\\':
+            escape = text[position + 1:position + 3]
+
+            # int() would take signs and whitespace
+            if len(escape) != 2 or not all(
+                    digit in _hexDigits for digit in escape):
+                raise FilterSyntaxError(
+                    'Bad escape sequence at position %d' % position)
+
+            value.append(int(escape, 16))
+
+            position += 3
+            continue
+
+        if char == '*':
+            if not allowStar:
+                raise FilterSyntaxError(
+                    'Unexpected asterisk at position %d' % position)
+
+            chunks.append(bytes(value))
+            value = bytearray()
+
+        else:
+            value.extend(char.encode('utf-8'))
+
+        position += 1
+
+    raise FilterSyntaxError('Unterminated filter')
+
+
+def _readAttribute(text, position, stopChars):
+    start = position
+
+    while position < len(text) and text[position] not in stopChars:
+        position += 1
+
+    return text[start:position].encode('utf-8'), position
+
+
+def _parseItem(text, position):
+    attr, position = _readAttribute(text, position, '=~<>:)(')
+
+    if position >= len(text):
+        raise FilterSyntaxError('Unterminated filter')
+
+    char = text[position]
+
+    if char == ':':
+        return _parseExtensible(text, position, attr)
+
+    if char in '~<>':
+        if text[position + 1:position + 2] != '=':
+            raise FilterSyntaxError(
+                'Bad filter type at position %d' % position)
+
+        kind = {'~': 'approxMatch',
+                '<': 'lessOrEqual',
+                '>': 'greaterOrEqual'}[char]
+
+        chunks, position = _readValue(text, position + 2, False)
+
+        if not attr:
+            raise FilterSyntaxError('Missing attribute description')
+
+        return (kind, attr, chunks[0]), position
+
+    if char != '=':
+        raise FilterSyntaxError('Bad filter item at position %d' % position)
+
+    if not attr:
+        raise FilterSyntaxError('Missing attribute description')
+
+    chunks, position = _readValue(text, position + 1, True)
+
+    if len(chunks) == 1:
+        return ('equalityMatch', attr, chunks[0]), position
+
+    if chunks == [b'', b'']:
+        return ('present', attr), position
+
+    substrings = []
+
+    if chunks[0]:
+        substrings.append(('initial', chunks[0]))
+
+    for chunk in chunks[1:-1]:
+        if not chunk:
+            raise FilterSyntaxError('Empty substring')
+
+        substrings.append(('any', chunk))
+
+    if chunks[-1]:
+        substrings.append(('final', chunks[-1]))
+
+    return ('substrings', attr, substrings), position
+
+
+def _parseExtensible(text, position, attr):
+    dnAttributes = False
+    matchingRule = None
+
+    while True:
+        if text[position:position + 2] == ':=':
+            break
+
+        if text[position] != ':':
+            raise FilterSyntaxError(
+                'Bad extensible match at position %d' % position)
+
+        token, position = _readAttribute(text, position + 1, ':=)(')
+
+        if token.lower() == b'dn' and not dnAttributes and matchingRule is None:
+            dnAttributes = True
+
+        elif token and matchingRule is None:
+            matchingRule = token
+
+        else:
+            raise FilterSyntaxError(
+                'Bad extensible match at position %d' % position)
+
+    if not attr and matchingRule is None:
+        raise FilterSyntaxError('Extensible match needs type or matching rule')
+
+    chunks, position = _readValue(text, position + 2, False)
+
+    return ('extensibleMatch', matchingRule, attr or None,
+            chunks[0], dnAttributes), position
+
+
+def _parseFilter(text, position):
+    if text[position:position + 1] != '(':
+        raise FilterSyntaxError(
+            'Expected opening parenthesis at position %d' % position)
+
+    position += 1
+
+    char = text[position:position + 1]
+
+    if char in ('&', '|'):
+        position += 1
+
+        components = []
+
+        while text[position:position + 1] == '(':
+            component, position = _parseFilter(text, position)
+            components.append(component)
+
+        node = (char == '&' and 'and' or 'or', components)
+
+    elif char == '!':
+        component, position = _parseFilter(text, position + 1)
+
+        node = ('not', component)
+
+    else:
+        node, position = _parseItem(text, position)
+
+    if text[position:position + 1] != ')':
+        raise FilterSyntaxError(
+            'Expected closing parenthesis at position %d' % position)
+
+    return node, position + 1
+
+
+def parseFilter(filterString):
+    """Parse string representation of LDAP filter into nested tuples
+
+    Each tuple starts with the name of rfc2251.Filter alternative.
+    """
+    if isinstance(filterString, bytes):
+        filterString = filterString.decode('utf-8')
+
+    filterString = filterString.strip()
+
+    if not filterString.startswith('('):
+        filterString = '(' + filterString + ')'
+
+    node, position = _parseFilter(filterString, 0)
+
+    if position != len(filterString):
+        raise FilterSyntaxError(
+            'Trailing garbage at position %d' % position)
+
+    return node
+
+
+def escapeFilterValue(value):
+    """Escape octets for use as assertion value in filter string"""
+    if not isinstance(value, bytes):
+        value = value.encode('utf-8')
+
+    escaped = []
+
+    for octet in bytearray(value):
+        if octet in (0x00, 0x28, 0x29, 0x2A, 0x5C) or octet > 0x7E:
+            escaped.append('\\%02x' % octet)
+
+        else:
+            escaped.append(chr(octet))
+
+    return ''.join(escaped)
+
+
+def _buildFilter(node, asn1Object):
+    kind = node[0]
+
+    try:
+        component = asn1Object[kind]
+
+    except KeyError:
+        raise error.PyAsn1Error(
+            'Filter nesting too deep for %s' % asn1Object.__class__.__name__)
+
+    if kind in ('and', 'or'):
+        # absolute true/false filters are empty sets
+        component.clear()
+
+        for child in node[1]:
+            _buildFilter(
+                child, component.getComponentByPosition(len(component)))
+
+    elif kind == 'not':
+        _buildFilter(node[1], component)
+
+    elif kind == 'present':
+        asn1Object[kind] = node[1]
+
+    elif kind == 'substrings':
+        component['type'] = node[1]
+
+        substrings = component['substrings']
+
+        for choice, value in node[2]:
+            substrings.getComponentByPosition(len(substrings))[choice] = value
+
+    elif kind == 'extensibleMatch':
+        matchingRule, attr, value, dnAttributes = node[1:]
+
+        if matchingRule is not None:
+            component['matchingRule'] = matchingRule
+
+        if attr is not None:
+            component['type'] = attr
+
+        component['matchValue'] = value
+
+        if dnAttributes:
+            component['dnAttributes'] = True
+
+    else:
+        component['attributeDesc'] = node[1]
+        component['assertionValue'] = node[2]
+
+
+_filterTags = {
+    'and': (0x80, 0x20, 0),
+    'or': (0x80, 0x20, 1),
+    'not': (0x80, 0x20, 2),
+    'equalityMatch': (0x80, 0x20, 3),
+    'substrings': (0x80, 0x20, 4),
+    'greaterOrEqual': (0x80, 0x20, 5),
+    'lessOrEqual': (0x80, 0x20, 6),
+    'present': (0x80, 0x00, 7),
+    'approxMatch': (0x80, 0x20, 8),
+    'extensibleMatch': (0x80, 0x20, 9)
+}
+
+_substringTags = {
+    'initial': (0x80, 0x00, 0),
+    'any': (0x80, 0x00, 1),
+    'final': (0x80, 0x00, 2)
+}
+
+
+def _encodeFilter(node):
+    kind = node[0]
+
+    if kind in ('and', 'or'):
+        value = b''.join([_encodeFilter(child) for child in node[1]])
+
+    elif kind == 'not':
+        value = _encodeFilter(node[1])
+
+    elif kind == 'present':
+        value = node[1]
+
+    elif kind == 'substrings':
+        substrings = b''.join(
+            [tlv.encodeTlv(_substringTags[choice], chunk)
+             for choice, chunk in node[2]])
+
+        value = (tlv.encodeTlv(tlv.tagOctetString, node[1]) +
+                 tlv.encodeTlv(tlv.tagSequence, substrings))
+
+    elif kind == 'extensibleMatch':
+        matchingRule, attr, matchValue, dnAttributes = node[1:]
+
+        value = b''
+
+        if matchingRule is not None:
+            value += tlv.encodeTlv((0x80, 0x00, 1), matchingRule)
+
+        if attr is not None:
+            value += tlv.encodeTlv((0x80, 0x00, 2), attr)
+
+        value += tlv.encodeTlv((0x80, 0x00, 3), matchValue)
+
+        if dnAttributes:
+            value += tlv.encodeTlv((0x80, 0x00, 4), b'\xff')
+
+    else:
+        value = (tlv.encodeTlv(tlv.tagOctetString, node[1]) +
+                 tlv.encodeTlv(tlv.tagOctetString, node[2]))
+
+    return tlv.encodeTlv(_filterTags[kind], value)
+
+
+class _FilterCache(object):
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, factory):
+        with self._lock:
+            try:
+                value = self._cache.pop(key)
+
+            except KeyError:
+                pass
+
+            else:
+                self._cache[key] = value
+                return value
+
+        value = factory(key)
+
+        with self._lock:
+            self._cache[key] = value
+
+            while len(self._cache) > self.maxSize:
+                self._cache.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+_compiledFilters = _FilterCache(1024)
+
+_encodedFilters = _FilterCache(1024)
+
+
+def _compile(filterString):
+    asn1Object = rfc2251.Filter()
+
+    _buildFilter(parseFilter(filterString), asn1Object)
+
+    return asn1Object
+
+
+def compileFilter(filterString):
+    """Compile string representation of LDAP filter into rfc2251.Filter
+
+    Compiled filters are cached by `filterString`, the returned
+    object is shared between callers and should not be modified.
+    """
+    return _compiledFilters.get(filterString, _compile)
+
+
+def encodeFilter(filterString):
+    """Serialise string representation of LDAP filter into BER
+
+    The result is the BER encoding of :func:`compileFilter` outcome
+    restricted as RFC4511 section 5.1 requires (e.g. BOOLEAN TRUE
+    is always 0xFF), but no pyasn1 objects are built. Filters nested
+    deeper than rfc2251.Filter supports are encoded as well.
+    Serialised filters are cached by `filterString`.
+    """
+    return _encodedFilters.get(
+        filterString, lambda x: _encodeFilter(parseFilter(x)))
+
+
+def clearCache():
+    """Drop all cached compiled filters"""
+    _compiledFilters.clear()
+    _encodedFilters.clear()
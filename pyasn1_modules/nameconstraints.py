@@ -0,0 +1,438 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# X.509 NameConstraints matching
+#
+# Compiles rfc5280.NameConstraints extension of a CA into lookup
+# structures - domain name tries, IP address prefix tables, mailbox
+# sets and distinguished name prefix tables - so that names of any
+# number of subordinate certificates can be checked against it without
+# scanning the subtrees. Names are read straight off the DER
+# substrate, GeneralName objects are not built.
+#
+# Matching rules from:
+# https://www.rfc-editor.org/rfc/rfc5280.txt (section 4.2.1.10)
+#
+import binascii
+
+try:
+    from urllib.parse import urlsplit
+
+except ImportError:
+    from urlparse import urlsplit
+
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+from pyasn1.codec.der import encoder
+
+from pyasn1_modules import extensions
+from pyasn1_modules import oids
+from pyasn1_modules import rfc5280
+from pyasn1_modules import tlv
+from pyasn1_modules import x509name
+
+# GeneralName alternatives tag IDs
+
+_rfc822Name = 1
+_dNSName = 2
+_directoryName = 4
+_uniformResourceIdentifier = 6
+_iPAddress = 7
+
+_versionTag = (0x80, 0x20, 0)
+
+_emailAddressOid = oids.oidKey(rfc5280.id_emailAddress)
+
+# trie node markers, labels are always strings
+
+_EXACT = 0
+_SUBDOMAINS = 1
+
+
+def _labels(domain):
+    domain = domain.lower().rstrip('.')
+
+    if not domain:
+        return []
+
+    return domain.split('.')[::-1]
+
+
+class _DomainTrie(object):
+    """Domain names keyed by labels, top-level label first"""
+    __slots__ = ('_root',)
+
+    def __init__(self):
+        self._root = {}
+
+    def add(self, domain, exact=True, subdomains=True):
+        node = self._root
+
+        for label in _labels(domain):
+            node = node.setdefault(label, {})
+
+        if exact:
+            node[_EXACT] = True
+
+        if subdomains:
+            node[_SUBDOMAINS] = True
+
+    def match(self, domain):
+        node = self._root
+
+        for label in _labels(domain):
+            if _SUBDOMAINS in node:
+                return True
+
+            node = node.get(label)
+
+            if node is None:
+                return False
+
+        return _EXACT in node
+
+
+def _toInteger(octets):
+    if not octets:
+        return 0
+
+    return int(binascii.hexlify(octets), 16)
+
+
+class _AddressTable(object):
+    """IP address ranges indexed by address width and prefix length"""
+    __slots__ = ('_prefixes', '_masks')
+
+    def __init__(self):
+        self._prefixes = {}
+        self._masks = []
+
+    def add(self, octets):
+        if len(octets) not in (8, 32):
+            raise error.PyAsn1Error(
+                'Bad iPAddress constraint length %d' % len(octets))
+
+        half = len(octets) // 2
+        width = half * 8
+
+        address = _toInteger(octets[:half])
+        mask = _toInteger(octets[half:])
+
+        prefixLength = bin(mask).count('1')
+
+        if mask != ((1 << prefixLength) - 1) << (width - prefixLength):
+            # non-contiguous mask, rare enough to be scanned
+            self._masks.append((width, address & mask, mask))
+            return
+
+        networks = self._prefixes.setdefault(
+            width, {}).setdefault(prefixLength, set())
+
+        networks.add(address >> (width - prefixLength))
+
+    def match(self, octets):
+        width = len(octets) * 8
+
+        address = _toInteger(octets)
+
+        for prefixLength, networks in self._prefixes.get(width, {}).items():
+            if address >> (width - prefixLength) in networks:
+                return True
+
+        for maskWidth, network, mask in self._masks:
+            if maskWidth == width and address & mask == network:
+                return True
+
+        return False
+
+
+class _NameTable(object):
+    """Distinguished name prefixes indexed by number of RDNs"""
+    __slots__ = ('_prefixes',)
+
+    def __init__(self):
+        self._prefixes = {}
+
+    def add(self, rdns):
+        self._prefixes.setdefault(len(rdns), set()).add(rdns)
+
+    def match(self, rdns):
+        for length, prefixes in self._prefixes.items():
+            if length <= len(rdns) and rdns[:length] in prefixes:
+                return True
+
+        return False
+
+
+def _readText(substrate, component):
+    return tlv.value(substrate, component).decode('latin-1')
+
+
+def _readGeneralName(substrate, component):
+    """Return `(kind, value)` of serialised GeneralName
+
+    The `kind` is the tag ID of GeneralName alternative, the `value`
+    is a form suitable for constraint matching.
+    """
+    tagClass, tagFormat, kind = component.tag
+
+    if tagClass != 0x80:
+        raise error.PyAsn1Error('Bad GeneralName tag %s' % (component.tag,))
+
+    if kind in (_rfc822Name, _dNSName, _uniformResourceIdentifier):
+        return kind, _readText(substrate, component)
+
+    if kind == _iPAddress:
+        return kind, bytes(tlv.value(substrate, component))
+
+    if kind == _directoryName:
+        name = tlv.readTlv(substrate, component.valueOffset)
+
+        return kind, x509name.canonicalRdns(
+            substrate[name.offset:name.end])
+
+    # other alternatives are only matched verbatim
+    return kind, bytes(substrate[component.offset:component.end])
+
+
+def _uriHost(uri):
+    try:
+        return urlsplit(uri).hostname
+
+    except ValueError:
+        return None
+
+
+class _Subtrees(object):
+    """Compiled GeneralSubtrees"""
+    def __init__(self):
+        self.kinds = set()
+        self._domains = _DomainTrie()
+        self._mailboxes = set()
+        self._mailHosts = _DomainTrie()
+        self._uriHosts = _DomainTrie()
+        self._addresses = _AddressTable()
+        self._names = _NameTable()
+        self._others = set()
+
+    def add(self, kind, value):
+        self.kinds.add(kind)
+
+        if kind == _dNSName:
+            if value.startswith('.'):
+                self._domains.add(value[1:], exact=False)
+
+            else:
+                self._domains.add(value)
+
+        elif kind == _rfc822Name:
+            if '@' in value:
+                local, host = value.rsplit('@', 1)
+                self._mailboxes.add((local, host.lower()))
+
+            elif value.startswith('.'):
+                self._mailHosts.add(value[1:], exact=False)
+
+            else:
+                self._mailHosts.add(value, subdomains=False)
+
+        elif kind == _uniformResourceIdentifier:
+            if value.startswith('.'):
+                self._uriHosts.add(value[1:], exact=False)
+
+            else:
+                self._uriHosts.add(value, subdomains=False)
+
+        elif kind == _iPAddress:
+            self._addresses.add(value)
+
+        elif kind == _directoryName:
+            self._names.add(value)
+
+        else:
+            self._others.add((kind, value))
+
+    def match(self, kind, value):
+        if kind == _dNSName:
+            return self._domains.match(value)
+
+        if kind == _rfc822Name:
+            if '@' not in value:
+                return False
+
+            local, host = value.rsplit('@', 1)
+
+            return ((local, host.lower()) in self._mailboxes or
+                    self._mailHosts.match(host))
+
+        if kind == _uniformResourceIdentifier:
+            host = _uriHost(value)
+
+            return host is not None and self._uriHosts.match(host)
+
+        if kind == _iPAddress:
+            return self._addresses.match(value)
+
+        if kind == _directoryName:
+            return self._names.match(value)
+
+        return (kind, value) in self._others
+
+
+def _tbsComponents(substrate):
+    certificate = tlv.readTlv(substrate)
+
+    components = tlv.children(
+        substrate, tlv.children(substrate, certificate)[0])
+
+    if components and components[0].tag == _versionTag:
+        components = components[1:]
+
+    if len(components) < 6:
+        raise error.PyAsn1Error('Malformed certificate')
+
+    return components
+
+
+class NameConstraintsMatcher(object):
+    """Compiled NameConstraints extension
+
+    Parameters
+    ----------
+    nameConstraints: :py:class:`rfc5280.NameConstraints` or :py:class:`bytes`
+        Decoded or DER-serialised NameConstraints extension value
+
+    A name is acceptable when it falls within at least one permitted
+    subtree of its kind (or there are no permitted subtrees of that
+    kind) and within no excluded subtree. Only the `base` of subtrees
+    is considered, as RFC5280 profile demands.
+
+    Names of `otherName`, `x400Address`, `ediPartyName` and
+    `registeredID` kinds are matched by exact encoding.
+    """
+    def __init__(self, nameConstraints):
+        if not isinstance(nameConstraints, rfc5280.NameConstraints):
+            nameConstraints, rest = decoder.decode(
+                nameConstraints, asn1Spec=rfc5280.NameConstraints())
+
+        self._permitted = self._compile(nameConstraints['permittedSubtrees'])
+        self._excluded = self._compile(nameConstraints['excludedSubtrees'])
+
+    @staticmethod
+    def _compile(generalSubtrees):
+        subtrees = _Subtrees()
+
+        if not generalSubtrees.isValue:
+            return subtrees
+
+        for generalSubtree in generalSubtrees:
+            substrate = encoder.encode(generalSubtree['base'])
+
+            subtrees.add(
+                *_readGeneralName(substrate, tlv.readTlv(substrate)))
+
+        return subtrees
+
+    def _permits(self, kind, value):
+        if (kind in self._permitted.kinds and
+                not self._permitted.match(kind, value)):
+            return False
+
+        return not (kind in self._excluded.kinds and
+                    self._excluded.match(kind, value))
+
+    def checkGeneralName(self, generalName):
+        """Check decoded or DER-serialised GeneralName"""
+        if isinstance(generalName, rfc5280.GeneralName):
+            generalName = encoder.encode(generalName)
+
+        return self._permits(
+            *_readGeneralName(generalName, tlv.readTlv(generalName)))
+
+    def checkGeneralNames(self, generalNames):
+        """Check all names of decoded or DER-serialised GeneralNames"""
+        if isinstance(generalNames, rfc5280.GeneralNames):
+            generalNames = encoder.encode(generalNames)
+
+        return self._checkGeneralNames(
+            generalNames, tlv.readTlv(generalNames))
+
+    def _checkGeneralNames(self, substrate, generalNames):
+        for component in tlv.children(substrate, generalNames):
+            if not self._permits(*_readGeneralName(substrate, component)):
+                return False
+
+        return True
+
+    def checkSubject(self, name):
+        """Check decoded or DER-serialised subject Name
+
+        Non-empty name is matched against `directoryName` constraints,
+        its emailAddress attributes against `rfc822Name` constraints.
+        """
+        if isinstance(name, rfc5280.Name):
+            name = encoder.encode(name)
+
+        return self._checkSubject(name, tlv.readTlv(name))
+
+    def _checkSubject(self, substrate, name):
+        rdns = tlv.children(substrate, name)
+
+        if not rdns:
+            return True
+
+        # canonicalise only if there are directoryName constraints
+        if ((_directoryName in self._permitted.kinds or
+                _directoryName in self._excluded.kinds) and
+                not self._permits(
+                    _directoryName, x509name.canonicalRdns(
+                        substrate[name.offset:name.end]))):
+            return False
+
+        for rdn in rdns:
+            for ava in tlv.children(substrate, rdn):
+                components = tlv.children(substrate, ava)
+
+                if len(components) != 2:
+                    raise error.PyAsn1Error(
+                        'Malformed AttributeTypeAndValue at offset %d' % (
+                            ava.offset,))
+
+                attrType, attrValue = components
+
+                if tlv.value(substrate, attrType) != _emailAddressOid:
+                    continue
+
+                if not self._permits(
+                        _rfc822Name, _readText(substrate, attrValue)):
+                    return False
+
+        return True
+
+    def checkCertificate(self, certificate):
+        """Check subject and subjectAltName names of certificate
+
+        The `certificate` can be rfc5280.Certificate object or its
+        DER serialisation.
+        """
+        if isinstance(certificate, rfc5280.Certificate):
+            certificate = encoder.encode(certificate)
+
+        components = _tbsComponents(certificate)
+
+        if not self._checkSubject(certificate, components[4]):
+            return False
+
+        index = extensions.ExtensionIndex.fromCertificate(certificate)
+
+        try:
+            generalNames = index.getRawValue(rfc5280.id_ce_subjectAltName)
+
+        except KeyError:
+            return True
+
+        return self._checkGeneralNames(
+            generalNames, tlv.readTlv(generalNames))
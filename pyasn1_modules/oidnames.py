@@ -0,0 +1,120 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# OID to symbolic name lookup
+#
+# Names of OID constants defined across pyasn1_modules.rfc* modules
+# are kept in a static table generated by tools/mkoidnames.py, so
+# no RFC module (nor pyasn1 itself) is imported to resolve them.
+# The table is only read on first lookup.
+#
+import pkgutil
+import threading
+
+_lock = threading.Lock()
+
+# dotted OID -> unparsed names
+_table = None
+
+# name -> dotted OID
+_oids = None
+
+
+def _load():
+    global _table
+
+    with _lock:
+        if _table is None:
+            data = pkgutil.get_data('pyasn1_modules', 'oidnames.txt')
+
+            table = {}
+
+            for line in data.decode('ascii').splitlines():
+                if line and not line.startswith('#'):
+                    oid, names = line.split(' ', 1)
+                    table[oid] = names
+
+            _table = table
+
+    return _table
+
+
+def _dotted(oid):
+    if isinstance(oid, tuple):
+        return '.'.join([str(arc) for arc in oid])
+
+    return str(oid)
+
+
+def getNames(oid):
+    """Return list of `(name, modules)` tuples for `oid`
+
+    The `oid` can be ObjectIdentifier, tuple of integers or dotted
+    string. Names shared by most modules come first, `modules` is a
+    list of RFC module names defining the constant. Unknown OIDs
+    yield empty list.
+    """
+    table = _table
+
+    if table is None:
+        table = _load()
+
+    names = table.get(_dotted(oid))
+
+    if names is None:
+        return []
+
+    entries = []
+
+    for entry in names.split(' '):
+        name, modules = entry.split(':')
+        entries.append((name, modules.split(',')))
+
+    return entries
+
+
+def getName(oid, default=None):
+    """Return preferred symbolic name of `oid` or `default` if unknown"""
+    table = _table
+
+    if table is None:
+        table = _load()
+
+    names = table.get(_dotted(oid))
+
+    if names is None:
+        return default
+
+    return names[:names.index(':')]
+
+
+def getOid(name, default=None):
+    """Return dotted OID defined under symbolic `name`
+
+    If modules disagree on the value of `name`, the OID with the
+    name listed first wins.
+    """
+    global _oids
+
+    oids = _oids
+
+    if oids is None:
+        oids = {}
+
+        for oid, names in sorted(_load().items()):
+            for position, entry in enumerate(names.split(' ')):
+                symbol = entry[:entry.index(':')]
+
+                if symbol not in oids or position < oids[symbol][0]:
+                    oids[symbol] = position, oid
+
+        _oids = oids
+
+    try:
+        return oids[name][1]
+
+    except KeyError:
+        return default
@@ -0,0 +1,211 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# Object identifier interning
+#
+# Serialised OID contents (no tag and length) make the cheapest
+# dictionary key available when reading DER substrate: no arcs need
+# to be computed and no ObjectIdentifier object built. This module
+# converts OIDs into such keys, resolves keys into shared
+# ObjectIdentifier objects and offers read-only views of OID-keyed
+# maps (e.g. rfc5280.certificateExtensionsMap) keyed by them.
+#
+# Only OIDs read through this module are interned, ObjectIdentifier
+# objects built by pyasn1 decoders are not.
+#
+import sys
+
+from pyasn1 import error
+from pyasn1.compat.octets import ints2octs
+from pyasn1.compat.octets import octs2ints
+from pyasn1.type import univ
+
+from pyasn1_modules import tlv
+
+# Upper bound on the number of interned OIDs, as keys may originate
+# from untrusted substrate
+maxInterned = 65536
+
+_keys = {}
+
+_objects = {}
+
+
+def encodeOid(arcs):
+    """Serialise OID arcs into OID contents octets"""
+    arcs = tuple(arcs)
+
+    if len(arcs) < 2 or arcs[0] > 2 or (arcs[0] < 2 and arcs[1] > 39):
+        raise error.PyAsn1Error('Bad OID %s' % (arcs,))
+
+    octets = []
+
+    for arc in (arcs[0] * 40 + arcs[1],) + arcs[2:]:
+        if arc < 0:
+            raise error.PyAsn1Error('Negative OID arc in %s' % (arcs,))
+
+        chunk = [arc & 0x7F]
+        arc >>= 7
+
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+
+        octets.extend(reversed(chunk))
+
+    return ints2octs(octets)
+
+
+def decodeOid(octets):
+    """Return tuple of arcs of serialised OID contents"""
+    arcs = []
+    arc = 0
+    start = True
+
+    for octet in octs2ints(octets):
+        if start and octet == 0x80:
+            raise error.PyAsn1Error('Invalid octet 0x80 in OID encoding')
+
+        arc = (arc << 7) | (octet & 0x7F)
+        start = not octet & 0x80
+
+        if start:
+            arcs.append(arc)
+            arc = 0
+
+    if not start or not arcs:
+        raise error.PyAsn1Error('Truncated OID encoding')
+
+    first = arcs[0]
+
+    if first < 80:
+        return (first // 40, first % 40) + tuple(arcs[1:])
+
+    return (2, first - 80) + tuple(arcs[1:])
+
+
+if sys.version_info[0] <= 2:
+    def _isDotted(oid):
+        # dotted strings are octet strings as well
+        return oid[:1].isdigit() and not oid.strip('0123456789.')
+
+else:
+    def _isDotted(oid):
+        return False
+
+
+def oidKey(oid):
+    """Return serialised OID contents to key OID-indexed maps with
+
+    The `oid` can be ObjectIdentifier, tuple of integers or dotted
+    string. Octet strings are taken to be keys already.
+    """
+    if isinstance(oid, bytes) and not _isDotted(oid):
+        return oid
+
+    if isinstance(oid, univ.ObjectIdentifier):
+        arcs = oid.asTuple()
+
+    elif isinstance(oid, tuple):
+        arcs = oid
+
+    else:
+        arcs = tuple(int(arc) for arc in str(oid).split('.'))
+
+    try:
+        return _keys[arcs]
+
+    except KeyError:
+        pass
+
+    key = encodeOid(arcs)
+
+    if len(_keys) < maxInterned:
+        key = _keys.setdefault(arcs, key)
+
+    return key
+
+
+def intern(oid):
+    """Return shared ObjectIdentifier object for `oid`
+
+    The `oid` can be anything :func:`oidKey` accepts. The same object
+    is returned for equal OIDs, so they are built and hashed once.
+    ObjectIdentifier objects coming out of pyasn1 decoders are not
+    interned unless passed through this function.
+    """
+    key = oidKey(oid)
+
+    try:
+        return _objects[key]
+
+    except KeyError:
+        pass
+
+    asn1Object = univ.ObjectIdentifier(decodeOid(key))
+
+    if len(_objects) < maxInterned:
+        asn1Object = _objects.setdefault(key, asn1Object)
+
+    return asn1Object
+
+
+def readOid(substrate, component):
+    """Return shared ObjectIdentifier of serialised OID `component`"""
+    return intern(bytes(tlv.value(substrate, component)))
+
+
+class OidMap(object):
+    """Read-only view of OID-keyed map by serialised OID contents
+
+    Lookups take anything :func:`oidKey` accepts. The view is a snapshot
+    of the underlying map, rebuilt when the size of the map changes so
+    that entries registered by modules imported later on are picked up.
+    Call :meth:`refresh` after replacing values or swapping entries of
+    the underlying map.
+
+    Parameters
+    ----------
+    mapping: :py:class:`dict`
+        Map keyed by ObjectIdentifier objects
+    """
+    def __init__(self, mapping):
+        self._mapping = mapping
+        self._index = {}
+        self._size = None
+
+    def refresh(self):
+        """Rebuild the view off the underlying map"""
+        self._index = dict((oidKey(oid), value)
+                           for oid, value in self._mapping.items())
+        self._size = len(self._mapping)
+
+    def _refresh(self):
+        if self._size != len(self._mapping):
+            self.refresh()
+
+        return self._index
+
+    def __getitem__(self, oid):
+        return self._refresh()[oidKey(oid)]
+
+    def __contains__(self, oid):
+        return oidKey(oid) in self._refresh()
+
+    def __len__(self):
+        return len(self._refresh())
+
+    def __iter__(self):
+        return iter(self._refresh())
+
+    def get(self, oid, default=None):
+        return self._refresh().get(oidKey(oid), default)
+
+
+def clearCache():
+    """Drop all interned OIDs and keys"""
+    _keys.clear()
+    _objects.clear()
@@ -0,0 +1,423 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# Password-based key derivation
+#
+# Turns rfc8018.PBES2_params, rfc7292.Pkcs_12PbeParams and
+# rfc7292.MacData into hashable KdfParams and derives keys from them
+# with PBKDF2 (RFC8018) or PKCS#12 KDF (RFC7292 appendix B). Derived
+# keys are memoized, so that many blobs protected under the same
+# password and parameters cost a single derivation.
+#
+# Cached keys are held in bytearrays that are overwritten with zeros
+# when evicted or cleared. The cache is keyed by HMAC of the password
+# under a per-process random key, passwords themselves are not kept.
+#
+import binascii
+import collections
+import hashlib
+import hmac
+import os
+import threading
+
+from multiprocessing.pool import ThreadPool
+
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+from pyasn1.type import univ
+
+from pyasn1_modules import oids
+from pyasn1_modules import rfc4055
+from pyasn1_modules import rfc5280
+from pyasn1_modules import rfc7292
+from pyasn1_modules import rfc8018
+
+# key derivation functions
+
+PBKDF2 = 'pbkdf2'
+PKCS12 = 'pkcs12'
+
+# PKCS#12 KDF purposes (ID byte)
+
+KEY_MATERIAL = 1
+IV_MATERIAL = 2
+MAC_MATERIAL = 3
+
+# Hashable key derivation parameters, `purpose` is PKCS#12 KDF ID byte
+# or `None` for PBKDF2
+
+KdfParams = collections.namedtuple(
+    'KdfParams', ('kdf', 'hashName', 'salt', 'iterations', 'keyLength',
+                  'purpose'))
+
+_prfHashNames = oids.OidMap({
+    rfc8018.id_hmacWithSHA1: 'sha1',
+    rfc8018.id_hmacWithSHA224: 'sha224',
+    rfc8018.id_hmacWithSHA256: 'sha256',
+    rfc8018.id_hmacWithSHA384: 'sha384',
+    rfc8018.id_hmacWithSHA512: 'sha512',
+    rfc8018.id_hmacWithSHA512_224: 'sha512_224',
+    rfc8018.id_hmacWithSHA512_256: 'sha512_256',
+})
+
+_digestHashNames = oids.OidMap({
+    rfc4055.id_sha1: 'sha1',
+    rfc4055.id_sha224: 'sha224',
+    rfc4055.id_sha256: 'sha256',
+    rfc4055.id_sha384: 'sha384',
+    rfc4055.id_sha512: 'sha512',
+})
+
+# PBES2 encryption scheme key lengths
+
+_encryptionKeyLengths = oids.OidMap({
+    rfc8018.desCBC: 8,
+    rfc8018.des_EDE3_CBC: 24,
+    rfc8018.rc2CBC: 16,
+    rfc8018.aes128_CBC_PAD: 16,
+    rfc8018.aes192_CBC_PAD: 24,
+    rfc8018.aes256_CBC_PAD: 32,
+})
+
+# PKCS#12 PBE algorithms key and IV lengths
+
+_pkcs12PbeLengths = oids.OidMap({
+    rfc7292.pbeWithSHAAnd128BitRC4: (16, 0),
+    rfc7292.pbeWithSHAAnd40BitRC4: (5, 0),
+    rfc7292.pbeWithSHAAnd3_KeyTripleDES_CBC: (24, 8),
+    rfc7292.pbeWithSHAAnd2_KeyTripleDES_CBC: (16, 8),
+    rfc7292.pbeWithSHAAnd128BitRC2_CBC: (16, 8),
+    rfc7292.pbeWithSHAAnd40BitRC2_CBC: (5, 8),
+})
+
+
+def _decode(value, asn1Spec):
+    """Return `value` decoded against `asn1Spec` unless it is already"""
+    if isinstance(value, univ.Any):
+        value = value.asOctets()
+
+    elif not isinstance(value, bytes):
+        return value
+
+    value, rest = decoder.decode(value, asn1Spec=asn1Spec)
+
+    if rest:
+        raise error.PyAsn1Error('Trailing octets in %s' % (
+            asn1Spec.__class__.__name__,))
+
+    return value
+
+
+def fromPbkdf2Params(params, keyLength=None):
+    """Return KdfParams of decoded or DER-serialised PBKDF2_params
+
+    The `keyLength` is used if the parameters do not carry one.
+    """
+    params = _decode(params, rfc8018.PBKDF2_params())
+
+    salt = params['salt']
+
+    if salt.getName() != 'specified':
+        raise error.PyAsn1Error('Unsupported PBKDF2 salt source')
+
+    if params['keyLength'].isValue:
+        keyLength = int(params['keyLength'])
+
+    if keyLength is None:
+        raise error.PyAsn1Error('PBKDF2 key length unknown')
+
+    prf = params['prf']['algorithm']
+
+    hashName = _prfHashNames.get(prf)
+
+    if hashName is None:
+        raise error.PyAsn1Error('Unsupported PBKDF2 PRF %s' % prf)
+
+    return KdfParams(
+        PBKDF2, hashName, salt['specified'].asOctets(),
+        int(params['iterationCount']), keyLength, None)
+
+
+def fromPbes2Params(params):
+    """Return KdfParams of decoded or DER-serialised PBES2_params
+
+    Key length is taken from PBKDF2 parameters or, if absent there,
+    from the encryption scheme.
+    """
+    params = _decode(params, rfc8018.PBES2_params())
+
+    keyDerivationFunc = params['keyDerivationFunc']
+
+    if keyDerivationFunc['algorithm'] != rfc8018.id_PBKDF2:
+        raise error.PyAsn1Error(
+            'Unsupported key derivation function %s' % (
+                keyDerivationFunc['algorithm'],))
+
+    keyLength = _encryptionKeyLengths.get(
+        params['encryptionScheme']['algorithm'])
+
+    return fromPbkdf2Params(keyDerivationFunc['parameters'], keyLength)
+
+
+def fromPkcs12PbeParams(algorithm, params, purpose=KEY_MATERIAL):
+    """Return KdfParams of decoded or DER-serialised Pkcs_12PbeParams
+
+    The `algorithm` is one of rfc7292.pbeWithSHAAnd* OIDs, `purpose`
+    tells whether the key (KEY_MATERIAL) or the IV (IV_MATERIAL) of
+    the cipher is derived.
+    """
+    lengths = _pkcs12PbeLengths.get(algorithm)
+
+    if lengths is None:
+        raise error.PyAsn1Error('Unsupported PKCS#12 PBE %s' % (algorithm,))
+
+    if purpose == KEY_MATERIAL:
+        keyLength = lengths[0]
+
+    elif purpose == IV_MATERIAL and lengths[1]:
+        keyLength = lengths[1]
+
+    else:
+        raise error.PyAsn1Error(
+            'No material of purpose %s for %s' % (purpose, algorithm))
+
+    params = _decode(params, rfc7292.Pkcs_12PbeParams())
+
+    return KdfParams(
+        PKCS12, 'sha1', params['salt'].asOctets(),
+        int(params['iterations']), keyLength, purpose)
+
+
+def fromMacData(macData):
+    """Return KdfParams of PFX integrity key of decoded or DER MacData"""
+    macData = _decode(macData, rfc7292.MacData())
+
+    algorithm = macData['mac']['digestAlgorithm']['algorithm']
+
+    hashName = _digestHashNames.get(algorithm)
+
+    if hashName is None:
+        raise error.PyAsn1Error('Unsupported MAC digest %s' % (algorithm,))
+
+    return KdfParams(
+        PKCS12, hashName, macData['macSalt'].asOctets(),
+        int(macData['iterations']), hashlib.new(hashName).digest_size,
+        MAC_MATERIAL)
+
+
+def fromAlgorithmIdentifier(algorithmIdentifier, purpose=KEY_MATERIAL):
+    """Return KdfParams of password-based encryption AlgorithmIdentifier
+
+    E.g. `encryptionAlgorithm` of rfc5958.EncryptedPrivateKeyInfo or
+    rfc5652.EncryptedContentInfo. PBES2 and PKCS#12 PBE algorithms are
+    supported, `purpose` only applies to the latter.
+    """
+    algorithmIdentifier = _decode(
+        algorithmIdentifier, rfc5280.AlgorithmIdentifier())
+
+    algorithm = algorithmIdentifier['algorithm']
+    parameters = algorithmIdentifier['parameters']
+
+    if algorithm == rfc8018.id_PBES2:
+        return fromPbes2Params(parameters)
+
+    return fromPkcs12PbeParams(algorithm, parameters, purpose)
+
+
+def _pbkdf2(password, params):
+    return hashlib.pbkdf2_hmac(
+        params.hashName, password.encode('utf-8'), params.salt,
+        params.iterations, params.keyLength)
+
+
+def _toInteger(octets):
+    return int(binascii.hexlify(octets), 16)
+
+
+def _fromInteger(number, length):
+    return binascii.unhexlify('%0*x' % (length * 2, number))
+
+
+def _pkcs12Kdf(password, params):
+    """PKCS#12 KDF, RFC7292 appendix B.2"""
+    hashName = params.hashName
+
+    digestSize = hashlib.new(hashName).digest_size
+    blockSize = hashlib.new(hashName).block_size
+
+    def stretch(octets):
+        if not octets:
+            return b''
+
+        length = blockSize * ((len(octets) + blockSize - 1) // blockSize)
+
+        return (octets * (length // len(octets) + 1))[:length]
+
+    # BMPString with two zero octets terminator
+    password = password.encode('utf-16-be') + b'\x00\x00'
+
+    diversifier = bytes(bytearray((params.purpose,)) * blockSize)
+
+    material = bytearray(stretch(params.salt) + stretch(password))
+
+    mask = (1 << blockSize * 8) - 1
+
+    key = bytearray()
+
+    while True:
+        digest = hashlib.new(hashName, diversifier + bytes(material)).digest()
+
+        for _ in range(params.iterations - 1):
+            digest = hashlib.new(hashName, digest).digest()
+
+        key.extend(digest)
+
+        if len(key) >= params.keyLength:
+            break
+
+        addend = _toInteger(
+            (digest * (blockSize // digestSize + 1))[:blockSize]) + 1
+
+        for offset in range(0, len(material), blockSize):
+            block = _toInteger(bytes(material[offset:offset + blockSize]))
+
+            material[offset:offset + blockSize] = _fromInteger(
+                (block + addend) & mask, blockSize)
+
+    return bytes(key[:params.keyLength])
+
+
+_kdfs = {
+    PBKDF2: _pbkdf2,
+    PKCS12: _pkcs12Kdf
+}
+
+
+def _wipe(key):
+    key[:] = bytearray(len(key))
+
+
+class _KeyCache(object):
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._cache.pop(key)
+
+            except KeyError:
+                return None
+
+            self._cache[key] = value
+
+            return bytes(value)
+
+    def put(self, key, value):
+        with self._lock:
+            previous = self._cache.pop(key, None)
+
+            if previous is not None:
+                _wipe(previous)
+
+            self._cache[key] = bytearray(value)
+
+            while len(self._cache) > self.maxSize:
+                _wipe(self._cache.popitem(last=False)[1])
+
+    def clear(self):
+        with self._lock:
+            for value in self._cache.values():
+                _wipe(value)
+
+            self._cache.clear()
+
+
+_derivedKeys = _KeyCache(256)
+
+_cacheSecret = os.urandom(32)
+
+
+def _password(password):
+    if isinstance(password, bytes):
+        return password.decode('utf-8')
+
+    return password
+
+
+def _cacheKey(password, params):
+    digest = hmac.new(
+        _cacheSecret, password.encode('utf-8'), hashlib.sha256).digest()
+
+    return digest, params
+
+
+def _derive(password, params):
+    key = _kdfs[params.kdf](password, params)
+
+    _derivedKeys.put(_cacheKey(password, params), key)
+
+    return key
+
+
+def deriveKey(password, params):
+    """Return key derived from `password` according to KdfParams `params`
+
+    The `password` is text or UTF-8 encoded octets. PBKDF2 takes it
+    UTF-8 encoded, PKCS#12 KDF as BMPString.
+    """
+    password = _password(password)
+
+    key = _derivedKeys.get(_cacheKey(password, params))
+
+    if key is None:
+        key = _derive(password, params)
+
+    return key
+
+
+def deriveKeys(password, paramsList, processes=None):
+    """Return list of keys derived from `password` for each KdfParams
+
+    Keys not cached yet are derived concurrently by a pool of
+    `processes` threads (as many as CPUs by default). PBKDF2
+    runs in hashlib and releases the GIL; PKCS#12 KDF iterates in
+    Python and gains little from concurrency.
+    """
+    password = _password(password)
+
+    keys = {}
+
+    for params in paramsList:
+        if params not in keys:
+            keys[params] = _derivedKeys.get(_cacheKey(password, params))
+
+    missing = [params for params, key in keys.items() if key is None]
+
+    if len(missing) == 1:
+        keys[missing[0]] = _derive(password, missing[0])
+
+    elif missing:
+        pool = ThreadPool(processes)
+
+        try:
+            derived = pool.map(
+                lambda params: _derive(password, params), missing)
+
+        finally:
+            pool.close()
+            pool.join()
+
+        keys.update(zip(missing, derived))
+
+    return [keys[params] for params in paramsList]
+
+
+def clearCache():
+    """Wipe and drop all cached keys"""
+    _derivedKeys.clear()
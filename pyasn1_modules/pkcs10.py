@@ -0,0 +1,332 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# PKCS#10 certification request intake
+#
+# Reads serialised rfc2986.CertificationRequest (or the structurally
+# identical rfc2314 one) in a single pass over the DER substrate. The
+# signed certificationRequestInfo span, subject Name, public key and
+# attributes are located without decoding, requested extensions are
+# indexed by OID and decoded on demand through extensions.ExtensionIndex.
+#
+# Requests can be processed in bulk off directories, PEM streams or
+# iterables of serialised requests.
+#
+import collections
+import io
+import os
+
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+
+from pyasn1_modules import extensions
+from pyasn1_modules import oids
+from pyasn1_modules import pem
+from pyasn1_modules import rfc2986
+from pyasn1_modules import rfc5280
+from pyasn1_modules import tlv
+from pyasn1_modules import x509name
+
+_attributesTag = (0x80, 0x20, 0)
+
+_extensionRequestOid = oids.oidKey(rfc5280.pkcs_9 + (14,))
+
+pemMarkers = (
+    ('-----BEGIN CERTIFICATE REQUEST-----',
+     '-----END CERTIFICATE REQUEST-----'),
+    ('-----BEGIN NEW CERTIFICATE REQUEST-----',
+     '-----END NEW CERTIFICATE REQUEST-----')
+)
+
+ErrorRecord = collections.namedtuple('ErrorRecord', ('source', 'error'))
+
+
+def _errorText(exc):
+    # str() of PyAsn1Error is empty on Python 2 with pyasn1 0.5
+    args = exc.args or getattr(exc, '_args', ())
+
+    return ' '.join([str(arg) for arg in args]) or exc.__class__.__name__
+
+
+def _bitString(substrate, component, what):
+    if component.tag != tlv.tagBitString:
+        raise error.PyAsn1Error('Malformed %s' % what)
+
+    octets = tlv.value(substrate, component)
+
+    if not octets or octets[:1] != b'\x00':
+        raise error.PyAsn1Error('Unaligned %s' % what)
+
+    return octets[1:]
+
+
+class CertificationRequestEntry(object):
+    """Serialised PKCS#10 certification request
+
+    Parameters
+    ----------
+    substrate: :py:class:`bytes`
+        DER serialisation of rfc2986.CertificationRequest
+
+    Attributes
+    ----------
+    signedSpan: :py:class:`tuple`
+        `(offset, end)` of certificationRequestInfo within `substrate`,
+        the exact octets covered by the signature
+    subject, subjectPublicKeyInfo, signatureAlgorithm: :py:class:`bytes`
+        DER serialisations of the respective components
+    publicKeyAlgorithm: :py:class:`~pyasn1.type.univ.ObjectIdentifier`
+        Public key algorithm OID
+    publicKey, signature: :py:class:`bytes`
+        Public key and signature BIT STRING value octets
+    """
+    __slots__ = ('substrate', 'signedSpan', 'version', 'subject',
+                 'subjectPublicKeyInfo', 'publicKeyAlgorithm', 'publicKey',
+                 'signatureAlgorithm', 'signature',
+                 '_attributes', '_extensions', '_values')
+
+    def __init__(self, substrate):
+        substrate = bytes(substrate)
+
+        try:
+            certificationRequest = tlv.readTlv(substrate)
+
+            if certificationRequest.end != len(substrate):
+                raise error.PyAsn1Error('Trailing octets')
+
+            components = tlv.children(substrate, certificationRequest)
+
+            if len(components) != 3:
+                raise error.PyAsn1Error('Expected three components')
+
+            info, signatureAlgorithm, signature = components
+
+            infoComponents = tlv.children(substrate, info)
+
+            if (len(infoComponents) != 4 or
+                    infoComponents[0].tag != tlv.tagInteger or
+                    infoComponents[3].tag != _attributesTag):
+                raise error.PyAsn1Error('Malformed certificationRequestInfo')
+
+            version, subject, subjectPKInfo, attributes = infoComponents
+
+            publicKeyAlgorithm, publicKey = tlv.children(
+                substrate, subjectPKInfo)
+
+            self.publicKeyAlgorithm = oids.readOid(
+                substrate, tlv.readTlv(
+                    substrate, publicKeyAlgorithm.valueOffset))
+
+            self.publicKey = _bitString(substrate, publicKey, 'public key')
+            self.signature = _bitString(substrate, signature, 'signature')
+
+            self._attributes = self._readAttributes(substrate, attributes)
+
+        except (error.PyAsn1Error, ValueError) as exc:
+            raise error.PyAsn1Error(
+                'Malformed CertificationRequest: %s' % _errorText(exc))
+
+        self.substrate = substrate
+        self.signedSpan = info.offset, info.end
+        self.version = tlv.integerValue(substrate, version)
+        self.subject = substrate[subject.offset:subject.end]
+        self.subjectPublicKeyInfo = substrate[
+            subjectPKInfo.offset:subjectPKInfo.end]
+        self.signatureAlgorithm = substrate[
+            signatureAlgorithm.offset:signatureAlgorithm.end]
+
+        self._extensions = None
+        self._values = {}
+
+    @staticmethod
+    def _readAttributes(substrate, attributes):
+        index = {}
+
+        for attribute in tlv.children(substrate, attributes):
+            components = tlv.children(substrate, attribute)
+
+            if (len(components) != 2 or
+                    components[0].tag != tlv.tagObjectIdentifier or
+                    components[1].tag != tlv.tagSet):
+                raise error.PyAsn1Error(
+                    'Malformed Attribute at offset %d' % attribute.offset)
+
+            attrType, attrValues = components
+
+            index[bytes(tlv.value(substrate, attrType))] = attrValues
+
+        return index
+
+    def __repr__(self):
+        return '%s(<%d octets>)' % (
+            self.__class__.__name__, len(self.substrate))
+
+    @property
+    def signedData(self):
+        """Serialised certificationRequestInfo, the signature input"""
+        offset, end = self.signedSpan
+
+        return self.substrate[offset:end]
+
+    @property
+    def canonicalSubject(self):
+        """Canonical subject Name as returned by x509name.canonicalName"""
+        return x509name.canonicalName(self.subject)
+
+    @property
+    def attributeTypes(self):
+        """Return attribute OIDs as ObjectIdentifier objects"""
+        return [oids.intern(key) for key in self._attributes]
+
+    def getRawAttribute(self, attrType):
+        """Return list of DER-serialised values of attribute `attrType`
+
+        The `attrType` can be ObjectIdentifier, tuple of integers,
+        dotted string or serialised OID contents. Missing attribute
+        raises `KeyError`.
+        """
+        attrValues = self._attributes[oids.oidKey(attrType)]
+
+        return [self.substrate[component.offset:component.end]
+                for component in tlv.children(self.substrate, attrValues)]
+
+    @property
+    def extensions(self):
+        """Requested extensions as extensions.ExtensionIndex
+
+        Extension values are decoded on demand against
+        rfc5280.certificateExtensionsMap.
+        """
+        if self._extensions is None:
+            attrValues = self._attributes.get(_extensionRequestOid)
+
+            if attrValues is None or attrValues.valueOffset == attrValues.end:
+                self._extensions = extensions.ExtensionIndex(self.substrate)
+
+            else:
+                self._extensions = extensions.ExtensionIndex(
+                    self.substrate,
+                    tlv.readTlv(self.substrate, attrValues.valueOffset))
+
+        return self._extensions
+
+    def _decode(self, name, substrate, asn1Spec):
+        try:
+            return self._values[name]
+
+        except KeyError:
+            value, rest = decoder.decode(substrate, asn1Spec=asn1Spec)
+
+            self._values[name] = value
+
+            return value
+
+    @property
+    def publicKeyInfo(self):
+        """Decoded rfc5280.SubjectPublicKeyInfo"""
+        return self._decode('publicKeyInfo', self.subjectPublicKeyInfo,
+                            rfc5280.SubjectPublicKeyInfo())
+
+    def decode(self, asn1Spec=None):
+        """Return request decoded against `asn1Spec`
+
+        Defaults to rfc2986.CertificationRequest, memoized values are
+        shared between callers and should not be modified.
+        """
+        if asn1Spec is None:
+            return self._decode('certificationRequest', self.substrate,
+                                rfc2986.CertificationRequest())
+
+        value, rest = decoder.decode(self.substrate, asn1Spec=asn1Spec)
+
+        return value
+
+
+def readCertificationRequest(substrate):
+    """Return :class:`CertificationRequestEntry` of serialised request
+
+    Raises
+    ------
+    : :py:class:`~pyasn1.error.PyAsn1Error`
+        If request is not well-formed
+    """
+    return CertificationRequestEntry(substrate)
+
+
+def iterPemRequests(fileObj):
+    """Yield DER serialisations of PEM-armoured requests read off `fileObj`
+
+    The `fileObj` is a text stream.
+    """
+    while True:
+        idx, substrate = pem.readPemBlocksFromFile(fileObj, *pemMarkers)
+
+        if not substrate:
+            break
+
+        yield substrate
+
+
+def _readFile(path):
+    with open(path, 'rb') as fileObj:
+        octets = fileObj.read()
+
+    if octets[:1] == b'\x30':
+        return [octets]
+
+    return list(iterPemRequests(io.StringIO(octets.decode('ascii'))))
+
+
+def iterDirectory(rootDir, suffixes=('.csr', '.req', '.p10', '.pem', '.der')):
+    """Yield `(path, substrate)` of requests stored under `rootDir`
+
+    Files may hold a single DER-serialised request or any number of
+    PEM-armoured ones.
+    """
+    for dirPath, dirNames, fileNames in os.walk(rootDir):
+        dirNames.sort()
+
+        for fileName in sorted(fileNames):
+            if not fileName.endswith(suffixes):
+                continue
+
+            path = os.path.join(dirPath, fileName)
+
+            try:
+                for substrate in _readFile(path):
+                    yield path, substrate
+
+            except (EnvironmentError, ValueError) as exc:
+                yield path, exc
+
+
+def iterCertificationRequests(source):
+    """Yield :class:`CertificationRequestEntry` of each request in `source`
+
+    The `source` is a directory name, a text stream of PEM-armoured
+    requests or an iterable of DER serialisations. Malformed requests
+    are yielded as :class:`ErrorRecord` carrying the file name or the
+    ordinal number of the request so that bulk intake carries on.
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        substrates = iterDirectory(source)
+
+    elif hasattr(source, 'readline'):
+        substrates = enumerate(iterPemRequests(source))
+
+    else:
+        substrates = enumerate(source)
+
+    for origin, substrate in substrates:
+        if isinstance(substrate, Exception):
+            yield ErrorRecord(origin, str(substrate))
+            continue
+
+        try:
+            yield CertificationRequestEntry(substrate)
+
+        except error.PyAsn1Error as exc:
+            yield ErrorRecord(origin, _errorText(exc))
@@ -0,0 +1,373 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# PKCS#12 PFX reader
+#
+# Locates SafeBags of serialised rfc7292.PFX without decoding it. Bags
+# are indexed by bag type, friendlyName and localKeyId attributes on
+# first access, keeping only offsets into the PFX substrate. Bag values
+# are decoded on demand against rfc7292.pkcs12BagTypeMap, certificates
+# of CertBags are served as they are found in the substrate.
+#
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+
+from pyasn1_modules import oids
+from pyasn1_modules import rfc5652
+from pyasn1_modules import rfc7292
+from pyasn1_modules import tlv
+
+_explicitTag = (0x80, 0x20, 0)
+
+_dataOid = oids.oidKey(rfc5652.id_data)
+
+_signedDataOid = oids.oidKey(rfc5652.id_signedData)
+
+_safeContentsBagOid = oids.oidKey(rfc7292.id_safeContentsBag)
+
+_certBagOid = oids.oidKey(rfc7292.id_certBag)
+
+_friendlyNameOid = oids.oidKey(rfc7292.pkcs_9_at_friendlyName)
+
+_localKeyIdOid = oids.oidKey(rfc7292.pkcs_9_at_localKeyId)
+
+x509Certificate = oids.intern(rfc7292.certTypes + (1,))
+
+sdsiCertificate = oids.intern(rfc7292.certTypes + (2,))
+
+# Bag value specs by serialised OID
+
+_bagTypeMap = oids.OidMap(rfc7292.pkcs12BagTypeMap)
+
+
+def _explicitContent(substrate, component):
+    """Return TLV wrapped into [0] EXPLICIT `component`"""
+    if component.tag != _explicitTag:
+        raise error.PyAsn1Error(
+            'Expected [0] at offset %d' % component.offset)
+
+    return tlv.readTlv(substrate, component.valueOffset)
+
+
+def _octetString(substrate, component):
+    """Return `(substrate, offset, end)` of OCTET STRING contents
+
+    Segments of constructed (BER) encoding are joined into new
+    substrate.
+    """
+    if not component.tag[1]:
+        return substrate, component.valueOffset, component.valueEnd
+
+    chunks = []
+
+    for segment in tlv.children(substrate, component):
+        chunk, offset, end = _octetString(substrate, segment)
+        chunks.append(chunk[offset:end])
+
+    octets = b''.join([bytes(chunk) for chunk in chunks])
+
+    return octets, 0, len(octets)
+
+
+class SafeBagEntry(object):
+    """SafeBag located in serialised PFX or SafeContents
+
+    Parameters
+    ----------
+    substrate: :py:class:`bytes`
+        Serialised structure holding SafeBag
+    safeBag: :py:class:`tlv.Tlv`
+        SafeBag within `substrate`
+
+    The `bagId` is shared ObjectIdentifier, `friendlyName` and
+    `localKeyId` are values of the respective bag attributes (if
+    present) as text and octets.
+    """
+    __slots__ = ('bagId', 'friendlyName', 'localKeyId', '_substrate',
+                 '_safeBag', '_bagValue', '_value')
+
+    def __init__(self, substrate, safeBag):
+        components = tlv.children(substrate, safeBag)
+
+        if len(components) not in (2, 3):
+            raise error.PyAsn1Error(
+                'Malformed SafeBag at offset %d' % safeBag.offset)
+
+        self._substrate = substrate
+        self._safeBag = safeBag
+        self._bagValue = _explicitContent(substrate, components[1])
+        self._value = None
+
+        self.bagId = oids.readOid(substrate, components[0])
+        self.friendlyName = None
+        self.localKeyId = None
+
+        if len(components) == 3:
+            self._readAttributes(substrate, components[2])
+
+    def _readAttributes(self, substrate, bagAttributes):
+        for attribute in tlv.children(substrate, bagAttributes):
+            attrId, attrValues = tlv.children(substrate, attribute)
+
+            values = tlv.children(substrate, attrValues)
+
+            if not values:
+                continue
+
+            attrId = tlv.value(substrate, attrId)
+
+            if attrId == _friendlyNameOid:
+                self.friendlyName = bytes(
+                    tlv.value(substrate, values[0])).decode('utf-16-be')
+
+            elif attrId == _localKeyIdOid:
+                self.localKeyId = bytes(tlv.value(substrate, values[0]))
+
+    @property
+    def substrate(self):
+        """DER serialisation of the SafeBag"""
+        return self._substrate[self._safeBag.offset:self._safeBag.end]
+
+    @property
+    def rawBagValue(self):
+        """DER serialisation of the bag value"""
+        return self._substrate[self._bagValue.offset:self._bagValue.end]
+
+    @property
+    def bagValue(self):
+        """Bag value decoded against rfc7292.pkcs12BagTypeMap
+
+        Decoded value is memoized, the returned object is shared between
+        callers and should not be modified.
+        """
+        if self._value is None:
+            asn1Spec = _bagTypeMap.get(self.bagId)
+
+            if asn1Spec is None:
+                raise error.PyAsn1Error('Unknown bag type %s' % self.bagId)
+
+            self._value, rest = decoder.decode(
+                self.rawBagValue, asn1Spec=asn1Spec)
+
+        return self._value
+
+    def _certBag(self):
+        if oids.oidKey(self.bagId) != _certBagOid:
+            return None
+
+        components = tlv.children(self._substrate, self._bagValue)
+
+        if len(components) != 2:
+            raise error.PyAsn1Error(
+                'Malformed CertBag at offset %d' % self._bagValue.offset)
+
+        return components
+
+    @property
+    def certId(self):
+        """Certificate type of CertBag or `None` for other bags"""
+        components = self._certBag()
+
+        if components is None:
+            return None
+
+        return oids.readOid(self._substrate, components[0])
+
+    @property
+    def certValue(self):
+        """Certificate carried by CertBag or `None` for other bags
+
+        The certificate is returned as it is stored in the bag: DER
+        serialisation of X.509 certificate for `x509Certificate` type,
+        base64 text for `sdsiCertificate` type.
+        """
+        components = self._certBag()
+
+        if components is None:
+            return None
+
+        certValue = _explicitContent(self._substrate, components[1])
+
+        substrate, offset, end = _octetString(self._substrate, certValue)
+
+        return substrate[offset:end]
+
+
+class PfxReader(object):
+    """SafeBags of serialised PFX
+
+    Parameters
+    ----------
+    substrate: :py:class:`bytes`
+        DER serialisation of rfc7292.PFX
+
+    Bags of plaintext SafeContents are indexed on first access, nested
+    SafeContents bags are flattened. Password- or public key-encrypted
+    SafeContents are listed in `encryptedContents` and can be indexed
+    once decrypted with :meth:`addSafeContents`.
+    """
+    def __init__(self, substrate):
+        components = tlv.children(substrate, tlv.readTlv(substrate))
+
+        if len(components) not in (2, 3):
+            raise error.PyAsn1Error('Malformed PFX')
+
+        self._substrate = substrate
+        self._authSafe = components[1]
+        self._macData = None
+
+        if len(components) == 3:
+            self._macData = components[2]
+
+        self.version = tlv.integerValue(substrate, components[0])
+
+        self._entries = None
+        self._encrypted = None
+        self._byBagId = {}
+        self._byFriendlyName = {}
+        self._byLocalKeyId = {}
+
+    def _authenticatedSafe(self):
+        substrate = self._substrate
+
+        contentType, content = tlv.children(substrate, self._authSafe)
+
+        contentType = tlv.value(substrate, contentType)
+
+        content = _explicitContent(substrate, content)
+
+        if contentType == _signedDataOid:
+            encapContentInfo = tlv.children(substrate, content)[2]
+
+            contentType, content = tlv.children(substrate, encapContentInfo)
+
+            contentType = tlv.value(substrate, contentType)
+
+            content = _explicitContent(substrate, content)
+
+        if contentType != _dataOid:
+            raise error.PyAsn1Error(
+                'Unsupported authSafe content type %s' % oids.intern(
+                    bytes(contentType)))
+
+        return _octetString(substrate, content)
+
+    @property
+    def authenticatedSafe(self):
+        """DER serialisation of AuthenticatedSafe, the MAC-protected data"""
+        substrate, offset, end = self._authenticatedSafe()
+
+        return substrate[offset:end]
+
+    @property
+    def rawMacData(self):
+        """DER serialisation of MacData or `None` if absent"""
+        if self._macData is None:
+            return None
+
+        return self._substrate[self._macData.offset:self._macData.end]
+
+    def _index(self):
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = []
+        self._encrypted = []
+
+        substrate, offset, end = self._authenticatedSafe()
+
+        authenticatedSafe = tlv.readTlv(substrate, offset)
+
+        for contentInfo in tlv.iterTlvs(
+                substrate, authenticatedSafe.valueOffset,
+                authenticatedSafe.valueEnd):
+
+            contentType, content = tlv.children(substrate, contentInfo)
+
+            if tlv.value(substrate, contentType) != _dataOid:
+                self._encrypted.append(
+                    substrate[contentInfo.offset:contentInfo.end])
+                continue
+
+            safeContents, offset, end = _octetString(
+                substrate, _explicitContent(substrate, content))
+
+            self._addSafeContents(
+                safeContents, tlv.readTlv(safeContents, offset))
+
+        return self._entries
+
+    def _addSafeContents(self, substrate, safeContents):
+        for safeBag in tlv.children(substrate, safeContents):
+            entry = SafeBagEntry(substrate, safeBag)
+
+            if oids.oidKey(entry.bagId) == _safeContentsBagOid:
+                self._addSafeContents(substrate, entry._bagValue)
+                continue
+
+            self._entries.append(entry)
+
+            self._byBagId.setdefault(
+                oids.oidKey(entry.bagId), []).append(entry)
+
+            if entry.friendlyName is not None:
+                self._byFriendlyName.setdefault(
+                    entry.friendlyName, []).append(entry)
+
+            if entry.localKeyId is not None:
+                self._byLocalKeyId.setdefault(
+                    entry.localKeyId, []).append(entry)
+
+    def addSafeContents(self, substrate):
+        """Index bags of DER-serialised SafeContents
+
+        Meant for SafeContents decrypted by the caller off
+        `encryptedContents`.
+        """
+        self._index()
+
+        self._addSafeContents(substrate, tlv.readTlv(substrate))
+
+    @property
+    def encryptedContents(self):
+        """DER serialisations of ContentInfo holding encrypted SafeContents"""
+        self._index()
+
+        return list(self._encrypted)
+
+    def __len__(self):
+        return len(self._index())
+
+    def __iter__(self):
+        return iter(list(self._index()))
+
+    def findByBagId(self, bagId):
+        """Return list of bags of type `bagId`
+
+        The `bagId` can be ObjectIdentifier, tuple of integers, dotted
+        string or serialised OID contents.
+        """
+        self._index()
+
+        return list(self._byBagId.get(oids.oidKey(bagId), ()))
+
+    def findByFriendlyName(self, friendlyName):
+        """Return list of bags carrying `friendlyName` attribute"""
+        self._index()
+
+        return list(self._byFriendlyName.get(friendlyName, ()))
+
+    def findByLocalKeyId(self, localKeyId):
+        """Return list of bags carrying `localKeyId` attribute"""
+        self._index()
+
+        return list(self._byLocalKeyId.get(localKeyId, ()))
+
+    def certificates(self):
+        """Yield DER serialisations of X.509 certificates in CertBags"""
+        for entry in self.findByBagId(_certBagOid):
+            if entry.certId == x509Certificate:
+                yield entry.certValue
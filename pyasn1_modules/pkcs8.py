@@ -0,0 +1,460 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# Private key format converter
+#
+# Rewraps serialised private keys between rfc5208.PrivateKeyInfo,
+# rfc5958.OneAsymmetricKey / AsymmetricKeyPackage and bare
+# rfc8017.RSAPrivateKey / rfc5915.ECPrivateKey encodings. Keys are
+# spliced at the DER level: the `privateKey` OCTET STRING contents,
+# algorithm identifier and attributes are copied as they are found in
+# the substrate, nothing is decoded into pyasn1 objects.
+#
+# Key inventories are converted in bulk by KeyConverter into a single
+# reusable bytearray, optionally by a pool of worker processes.
+#
+import collections
+import multiprocessing
+
+from pyasn1 import error
+
+from pyasn1_modules import oids
+from pyasn1_modules import rfc5480
+from pyasn1_modules import tlv
+
+# key formats
+
+PRIVATE_KEY_INFO = 'PrivateKeyInfo'
+ONE_ASYMMETRIC_KEY = 'OneAsymmetricKey'
+ASYMMETRIC_KEY_PACKAGE = 'AsymmetricKeyPackage'
+RSA_PRIVATE_KEY = 'RSAPrivateKey'
+EC_PRIVATE_KEY = 'ECPrivateKey'
+
+_keyFormats = (
+    PRIVATE_KEY_INFO, ONE_ASYMMETRIC_KEY, ASYMMETRIC_KEY_PACKAGE,
+    RSA_PRIVATE_KEY, EC_PRIVATE_KEY
+)
+
+
+# OneAsymmetricKey [0] IMPLICIT attributes and [1] IMPLICIT publicKey
+_attributesTag = (0x80, 0x20, 0)
+_publicKeyTag = (0x80, 0x00, 1)
+
+# ECPrivateKey [0] EXPLICIT parameters
+_ecParametersTag = (0x80, 0x20, 0)
+
+_rsaEncryptionOid = oids.oidKey(rfc5480.rsaEncryption)
+
+_ecPublicKeyOid = oids.oidKey(rfc5480.id_ecPublicKey)
+
+_version1 = tlv.encodeTlv(tlv.tagInteger, b'\x00')
+
+_version2 = tlv.encodeTlv(tlv.tagInteger, b'\x01')
+
+# rsaEncryption with NULL parameters
+_rsaAlgorithm = tlv.encodeTlv(
+    tlv.tagSequence,
+    tlv.encodeTlv(tlv.tagObjectIdentifier, _rsaEncryptionOid) + b'\x05\x00')
+
+# Components of private key in DER: `algorithm` is complete
+# AlgorithmIdentifier, `privateKey` is the contents of privateKey OCTET
+# STRING, `attributes` and `publicKey` are complete OneAsymmetricKey
+# [0] and [1] components or `None` if absent
+
+PrivateKeyParts = collections.namedtuple(
+    'PrivateKeyParts', ('algorithm', 'privateKey', 'attributes', 'publicKey'))
+
+
+def _keyFormat(substrate, key):
+    if key.tag != tlv.tagSequence:
+        raise error.PyAsn1Error(
+            'Private key expected at offset %d' % key.offset)
+
+    if key.valueOffset == key.valueEnd:
+        raise error.PyAsn1Error('Empty private key at offset %d' % key.offset)
+
+    first = tlv.readTlv(substrate, key.valueOffset)
+
+    if first.tag == tlv.tagSequence:
+        return ASYMMETRIC_KEY_PACKAGE
+
+    if first.tag == tlv.tagInteger and first.end < key.valueEnd:
+        second = tlv.readTlv(substrate, first.end)
+
+        if second.tag == tlv.tagSequence:
+            if tlv.integerValue(substrate, first):
+                return ONE_ASYMMETRIC_KEY
+
+            return PRIVATE_KEY_INFO
+
+        if second.tag == tlv.tagInteger:
+            return RSA_PRIVATE_KEY
+
+        if second.tag == tlv.tagOctetString:
+            return EC_PRIVATE_KEY
+
+    raise error.PyAsn1Error(
+        'Unknown private key format at offset %d' % key.offset)
+
+
+def detectFormat(substrate, offset=0):
+    """Return format of serialised private key found at `offset`
+
+    Distinguishes the formats by the types of the leading components,
+    OneAsymmetricKey of version v1 is reported as PRIVATE_KEY_INFO.
+    """
+    return _keyFormat(substrate, tlv.readTlv(substrate, offset))
+
+
+def _algorithmOid(algorithm):
+    component = tlv.readTlv(algorithm, tlv.readTlv(algorithm).valueOffset)
+
+    return bytes(tlv.value(algorithm, component))
+
+
+def _algorithmParameters(algorithm):
+    """Return serialised parameters of AlgorithmIdentifier or `None`"""
+    components = tlv.children(algorithm, tlv.readTlv(algorithm))
+
+    if len(components) < 2:
+        return None
+
+    return algorithm[components[1].offset:components[1].end]
+
+
+def _splitPkcs8(substrate, key):
+    components = tlv.children(substrate, key)
+
+    if len(components) < 3:
+        raise error.PyAsn1Error(
+            'Malformed private key info at offset %d' % key.offset)
+
+    algorithm, privateKey = components[1:3]
+
+    if privateKey.tag != tlv.tagOctetString:
+        raise error.PyAsn1Error(
+            'Bad privateKey at offset %d' % privateKey.offset)
+
+    attributes = publicKey = None
+
+    for component in components[3:]:
+        if component.tag == _attributesTag:
+            attributes = substrate[component.offset:component.end]
+
+        elif component.tag == _publicKeyTag:
+            publicKey = substrate[component.offset:component.end]
+
+        else:
+            raise error.PyAsn1Error(
+                'Unexpected component at offset %d' % component.offset)
+
+    return PrivateKeyParts(
+        substrate[algorithm.offset:algorithm.end],
+        tlv.value(substrate, privateKey), attributes, publicKey)
+
+
+def _splitEc(substrate, key):
+    components = tlv.children(substrate, key)
+
+    for index, component in enumerate(components[2:], 2):
+        if component.tag == _ecParametersTag:
+            break
+
+    else:
+        raise error.PyAsn1Error(
+            'ECPrivateKey without curve parameters at offset %d' % key.offset)
+
+    algorithm = tlv.encodeTlv(
+        tlv.tagSequence,
+        tlv.encodeTlv(tlv.tagObjectIdentifier, _ecPublicKeyOid) +
+        tlv.value(substrate, component))
+
+    # curve parameters move from the key into the algorithm
+    privateKey = tlv.encodeTlv(
+        tlv.tagSequence,
+        substrate[key.valueOffset:component.offset] +
+        substrate[component.end:key.valueEnd])
+
+    return PrivateKeyParts(algorithm, privateKey, None, None)
+
+
+def _split(substrate, key, keyFormat):
+    if keyFormat in (PRIVATE_KEY_INFO, ONE_ASYMMETRIC_KEY):
+        return _splitPkcs8(substrate, key)
+
+    if keyFormat == RSA_PRIVATE_KEY:
+        return PrivateKeyParts(
+            _rsaAlgorithm, substrate[key.offset:key.end], None, None)
+
+    if keyFormat == EC_PRIVATE_KEY:
+        return _splitEc(substrate, key)
+
+    raise error.PyAsn1Error(
+        'Single key expected, got %s at offset %d' % (keyFormat, key.offset))
+
+
+def unwrap(substrate, offset=0):
+    """Return :class:`PrivateKeyParts` of serialised private key
+
+    The key at `offset` may be PrivateKeyInfo, OneAsymmetricKey,
+    RSAPrivateKey or ECPrivateKey (which must carry curve parameters).
+    """
+    key = tlv.readTlv(substrate, offset)
+
+    return _split(substrate, key, _keyFormat(substrate, key))
+
+
+def _pkcs8Chunks(parts, keepPublicKey):
+    if keepPublicKey and parts.publicKey is not None:
+        chunks = [_version2]
+
+    else:
+        chunks = [_version1]
+
+    chunks.append(parts.algorithm)
+    chunks.append(tlv.encodeHeader(tlv.tagOctetString, len(parts.privateKey)))
+    chunks.append(parts.privateKey)
+
+    if parts.attributes is not None:
+        chunks.append(parts.attributes)
+
+    if keepPublicKey and parts.publicKey is not None:
+        chunks.append(parts.publicKey)
+
+    chunks.insert(
+        0, tlv.encodeHeader(tlv.tagSequence, sum([len(x) for x in chunks])))
+
+    return chunks
+
+
+def _ecChunks(parts):
+    privateKey = parts.privateKey
+
+    key = tlv.readTlv(privateKey)
+
+    components = tlv.children(privateKey, key)
+
+    if len(components) < 2:
+        raise error.PyAsn1Error('Malformed ECPrivateKey')
+
+    for component in components[2:]:
+        if component.tag == _ecParametersTag:
+            return [privateKey]
+
+    # move curve parameters from the algorithm into the key
+    parameters = _algorithmParameters(parts.algorithm)
+
+    if parameters is None:
+        return [privateKey]
+
+    split = components[1].end
+
+    chunks = [privateKey[key.valueOffset:split],
+              tlv.encodeHeader(_ecParametersTag, len(parameters)),
+              parameters,
+              privateKey[split:key.valueEnd]]
+
+    chunks.insert(
+        0, tlv.encodeHeader(tlv.tagSequence, sum([len(x) for x in chunks])))
+
+    return chunks
+
+
+def _join(parts, keyFormat):
+    """Return list of octet chunks making up `keyFormat` serialisation"""
+    if keyFormat == PRIVATE_KEY_INFO:
+        return _pkcs8Chunks(parts, False)
+
+    if keyFormat == ONE_ASYMMETRIC_KEY:
+        return _pkcs8Chunks(parts, True)
+
+    algorithm = _algorithmOid(parts.algorithm)
+
+    if keyFormat == RSA_PRIVATE_KEY:
+        if algorithm != _rsaEncryptionOid:
+            raise error.PyAsn1Error(
+                'Not an RSA key: %s' % oids.intern(algorithm))
+
+        return [parts.privateKey]
+
+    if keyFormat == EC_PRIVATE_KEY:
+        if algorithm != _ecPublicKeyOid:
+            raise error.PyAsn1Error(
+                'Not an EC key: %s' % oids.intern(algorithm))
+
+        return _ecChunks(parts)
+
+    raise error.PyAsn1Error('Unsupported key format %s' % (keyFormat,))
+
+
+def _iterKeys(substrate):
+    """Yield `(key, keyFormat)` of serialised key or key package"""
+    key = tlv.readTlv(substrate)
+
+    keyFormat = _keyFormat(substrate, key)
+
+    if keyFormat != ASYMMETRIC_KEY_PACKAGE:
+        yield key, keyFormat
+        return
+
+    for component in tlv.children(substrate, key):
+        yield component, _keyFormat(substrate, component)
+
+
+def _convertKeys(args):
+    """Return list of `target`-formatted keys found in `substrates`"""
+    substrates, target = args
+
+    if target == ASYMMETRIC_KEY_PACKAGE:
+        target = ONE_ASYMMETRIC_KEY
+
+    converted = []
+
+    for substrate in substrates:
+        for key, keyFormat in _iterKeys(substrate):
+            if keyFormat == target:
+                converted.append(substrate[key.offset:key.end])
+                continue
+
+            chunks = _join(_split(substrate, key, keyFormat), target)
+
+            converted.append(b''.join([bytes(x) for x in chunks]))
+
+    return converted
+
+
+def convert(substrate, target):
+    """Return serialised key or key package converted into `target` format
+
+    Keys of AsymmetricKeyPackage are converted into a package of keys,
+    or into a single key of `target` format if the package holds just
+    one. Converting OneAsymmetricKey into PrivateKeyInfo drops its
+    public key. Curve parameters of ECPrivateKey are moved into the
+    algorithm identifier when wrapping and back when unwrapping.
+    """
+    if target not in _keyFormats:
+        raise error.PyAsn1Error('Unsupported key format %s' % (target,))
+
+    converted = _convertKeys(([substrate], target))
+
+    if target == ASYMMETRIC_KEY_PACKAGE:
+        return tlv.encodeTlv(tlv.tagSequence, b''.join(converted))
+
+    if len(converted) != 1:
+        raise error.PyAsn1Error(
+            'Key package of %d keys can not be converted into %s' % (
+                len(converted), target))
+
+    return converted[0]
+
+
+class KeyConverter(object):
+    """Convert serialised private keys in bulk into `target` format
+
+    Converted keys are laid out back to back in :attr:`buffer` which
+    is reused (never shrunk) across :meth:`convert` calls; positions
+    of the keys are kept in :attr:`spans`. Keys of AsymmetricKeyPackage
+    inputs are converted one by one, with ASYMMETRIC_KEY_PACKAGE
+    `target` all keys are packed into a single package.
+
+    Inputs are converted in-process by default. With `processes` other
+    than `1` chunks of `chunkSize` inputs are handed over to a pool of
+    worker processes (one per CPU if `None`) which is reused until
+    :meth:`close` is called.
+    """
+    def __init__(self, target, processes=1, chunkSize=64):
+        if target not in _keyFormats:
+            raise error.PyAsn1Error('Unsupported key format %s' % (target,))
+
+        self.target = target
+        self.buffer = bytearray()
+        self.spans = []
+
+        self._chunkSize = chunkSize
+        self._length = 0
+        self._pool = None
+
+        if processes != 1:
+            self._pool = multiprocessing.Pool(processes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __getitem__(self, index):
+        start, end = self.spans[index]
+
+        return bytes(self.buffer[start:end])
+
+    def __iter__(self):
+        for index in range(len(self.spans)):
+            yield self[index]
+
+    def _write(self, octets):
+        start = self._length
+
+        self._length += len(octets)
+
+        self.buffer[start:self._length] = octets
+
+    def _iterConverted(self, substrates):
+        if self._pool is None:
+            return iter(_convertKeys((substrates, self.target)))
+
+        chunks = [substrates[index:index + self._chunkSize]
+                  for index in range(0, len(substrates), self._chunkSize)]
+
+        return (key for converted in self._pool.imap(
+                _convertKeys, [(chunk, self.target) for chunk in chunks])
+                for key in converted)
+
+    def convert(self, substrates):
+        """Convert serialised keys or key packages of `substrates`
+
+        Previous contents of :attr:`buffer` and :attr:`spans` are
+        overwritten. Returns the number of converted keys.
+        """
+        substrates = list(substrates)
+
+        self._length = 0
+        self.spans = []
+
+        converted = self._iterConverted(substrates)
+
+        if self.target == ASYMMETRIC_KEY_PACKAGE:
+            converted = list(converted)
+
+            self._write(tlv.encodeHeader(
+                tlv.tagSequence, sum([len(x) for x in converted])))
+
+        for key in converted:
+            start = self._length
+
+            self._write(key)
+
+            self.spans.append((start, self._length))
+
+        count = len(self.spans)
+
+        if self.target == ASYMMETRIC_KEY_PACKAGE:
+            self.spans = [(0, self._length)]
+
+        return count
+
+    def getvalue(self):
+        """Return all converted keys as a single octet string"""
+        return bytes(self.buffer[:self._length])
@@ -0,0 +1,583 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# Streaming rendering of ASN.1 objects
+#
+# Writes decoded objects out as indented text, in the spirit of
+# prettyPrint(), or as JSON lines piece by piece into a file object
+# rather than building the whole output string in memory. Output can
+# be limited in depth and in the number of SEQUENCE OF / SET OF
+# elements shown, known OIDs are annotated with their symbolic names.
+#
+# DER substrate can be rendered against ASN.1 spec without decoding
+# it: the substrate is walked along the spec and scalar values are
+# built and written out one at a time, so memory use does not grow
+# with the size of the object (e.g. number of revoked certificates of
+# a CRL). Open types are resolved on the way.
+#
+import json
+import sys
+
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+from pyasn1.compat.octets import octs2ints
+from pyasn1.type import char
+from pyasn1.type import univ
+from pyasn1.type import useful
+
+from pyasn1_modules import oidnames
+from pyasn1_modules import oids
+from pyasn1_modules import tlv
+
+_listTypes = (univ.SequenceOf, univ.SetOf)
+
+_mapTypes = (univ.Sequence, univ.Set, univ.Choice)
+
+_textTypes = (char.AbstractCharacterString, useful.GeneralizedTime,
+              useful.UTCTime)
+
+
+def _hex(octets):
+    return ''.join(['%.2x' % x for x in octs2ints(octets)])
+
+
+class _TextWriter(object):
+    """Indented text, one component per line"""
+    def __init__(self, fileObj, oidNames):
+        self._write = fileObj.write
+        self._oidNames = oidNames
+
+    @staticmethod
+    def _prefix(depth, name):
+        if name is None:
+            return ' ' * depth
+
+        return ' ' * depth + name + '='
+
+    def begin(self, depth, name, asn1Object, isList):
+        self._write(
+            self._prefix(depth, name) + asn1Object.__class__.__name__ + ':\n')
+
+    def end(self, depth, isList):
+        pass
+
+    def scalar(self, depth, name, asn1Object):
+        if isinstance(asn1Object, univ.ObjectIdentifier):
+            text = str(asn1Object)
+
+            if self._oidNames:
+                symbol = oidnames.getName(text)
+
+                if symbol is not None:
+                    text += ' (%s)' % symbol
+
+        else:
+            text = asn1Object.prettyPrint()
+
+        self._write(self._prefix(depth, name) + text + '\n')
+
+    def truncated(self, depth, name, asn1Object):
+        self._write(
+            self._prefix(depth, name) + asn1Object.__class__.__name__ +
+            ': ...\n')
+
+    def more(self, depth, count):
+        self._write(' ' * depth + '... (%d more)\n' % count)
+
+    def finish(self):
+        pass
+
+
+class _JsonWriter(object):
+    """Compact JSON document per rendered object, one per line"""
+    def __init__(self, fileObj, oidNames):
+        self._write = fileObj.write
+        self._first = [True]
+
+    def _key(self, name):
+        if self._first[-1]:
+            self._first[-1] = False
+
+        else:
+            self._write(',')
+
+        if name is not None:
+            self._write(json.dumps(name) + ':')
+
+    def begin(self, depth, name, asn1Object, isList):
+        self._key(name)
+        self._write(isList and '[' or '{')
+        self._first.append(True)
+
+    def end(self, depth, isList):
+        self._first.pop()
+        self._write(isList and ']' or '}')
+
+    def scalar(self, depth, name, asn1Object):
+        self._key(name)
+
+        if isinstance(asn1Object, univ.Boolean):
+            value = bool(asn1Object)
+
+        elif isinstance(asn1Object, univ.Integer):
+            value = int(asn1Object)
+
+        elif isinstance(asn1Object, univ.Null):
+            value = None
+
+        elif isinstance(asn1Object, univ.Real):
+            value = float(asn1Object)
+
+        elif isinstance(asn1Object, univ.ObjectIdentifier):
+            value = str(asn1Object)
+
+        elif isinstance(asn1Object, univ.BitString):
+            value = asn1Object.asBinary()
+
+        elif isinstance(asn1Object, _textTypes):
+            value = asn1Object.prettyPrint()
+
+        elif isinstance(asn1Object, (univ.OctetString, univ.Any)):
+            value = _hex(asn1Object.asOctets())
+
+        else:
+            value = asn1Object.prettyPrint()
+
+        self._write(json.dumps(value))
+
+    def truncated(self, depth, name, asn1Object):
+        self._key(name)
+        self._write('"..."')
+
+    def more(self, depth, count):
+        self._key(None)
+        self._write(json.dumps('... (%d more)' % count))
+
+    def finish(self):
+        self._write('\n')
+        self._first = [True]
+
+
+def _tagKey(tag):
+    # constructedness is not relied upon
+    return tag[0], tag[2]
+
+
+# outermost tags by ASN.1 spec object id, the spec is held to keep
+# the id from being reused
+_outerTags = {}
+
+
+def _getOuterTags(asn1Spec):
+    """Return set of outermost tags of `asn1Spec` or `None` for any"""
+    try:
+        return _outerTags[id(asn1Spec)][1]
+
+    except KeyError:
+        pass
+
+    if asn1Spec.tagSet:
+        outerTag = asn1Spec.tagSet[-1]
+
+        tags = set([(outerTag.tagClass, outerTag.tagId)])
+
+    elif isinstance(asn1Spec, univ.Choice):
+        tags = set()
+
+        for namedType in asn1Spec.componentType.namedTypes:
+            alternativeTags = _getOuterTags(namedType.asn1Object)
+
+            if alternativeTags is None:
+                tags = None
+                break
+
+            tags.update(alternativeTags)
+
+    else:
+        # untagged ANY
+        tags = None
+
+    _outerTags[id(asn1Spec)] = asn1Spec, tags
+
+    return tags
+
+
+def _matches(asn1Spec, component):
+    tags = _getOuterTags(asn1Spec)
+
+    return tags is None or _tagKey(component.tag) in tags
+
+
+def _peel(substrate, component, count):
+    """Strip `count` explicit tags off `component`"""
+    for _ in range(count):
+        component = tlv.readTlv(substrate, component.valueOffset)
+
+    return component
+
+
+def _readScalar(asn1Spec, substrate, component):
+    """Build `asn1Spec` value off primitive `component` or return `None`
+
+    Covers the types worth bypassing the decoder for, the rest is left
+    to it.
+    """
+    if component.tag[1]:
+        # constructed encoding
+        return None
+
+    if isinstance(asn1Spec, univ.Boolean):
+        return asn1Spec.clone(tlv.integerValue(substrate, component) != 0)
+
+    if isinstance(asn1Spec, univ.Integer):
+        return asn1Spec.clone(tlv.integerValue(substrate, component))
+
+    if isinstance(asn1Spec, univ.ObjectIdentifier):
+        return asn1Spec.clone(
+            oids.decodeOid(bytes(tlv.value(substrate, component))))
+
+    if isinstance(asn1Spec, univ.Null):
+        return asn1Spec.clone('')
+
+    if (isinstance(asn1Spec, univ.OctetString) and
+            not isinstance(asn1Spec, univ.Any)):
+        return asn1Spec.clone(bytes(tlv.value(substrate, component)))
+
+    return None
+
+
+class _Renderer(object):
+    def __init__(self, writer, maxDepth, maxWidth):
+        self._writer = writer
+        self._maxDepth = maxDepth
+        self._maxWidth = maxWidth
+
+    def _isTruncated(self, depth):
+        return self._maxDepth is not None and depth >= self._maxDepth
+
+    def renderObject(self, asn1Object, name, depth):
+        writer = self._writer
+
+        if isinstance(asn1Object, _listTypes):
+            if self._isTruncated(depth):
+                writer.truncated(depth, name, asn1Object)
+                return
+
+            writer.begin(depth, name, asn1Object, True)
+
+            maxWidth = self._maxWidth
+
+            for idx, component in enumerate(asn1Object):
+                if maxWidth is not None and idx >= maxWidth:
+                    writer.more(depth + 1, len(asn1Object) - idx)
+                    break
+
+                self.renderObject(component, None, depth + 1)
+
+            writer.end(depth, True)
+
+        elif isinstance(asn1Object, _mapTypes):
+            if self._isTruncated(depth):
+                writer.truncated(depth, name, asn1Object)
+                return
+
+            if isinstance(asn1Object, univ.Choice):
+                writer.begin(depth, name, asn1Object, False)
+
+                if asn1Object.isValue:
+                    self.renderObject(
+                        asn1Object.getComponent(), asn1Object.getName(),
+                        depth + 1)
+
+                writer.end(depth, False)
+
+                return
+
+            namedTypes = asn1Object.componentType
+
+            if not namedTypes:
+                # schema-less SEQUENCE / SET
+                writer.begin(depth, name, asn1Object, True)
+
+                for idx in range(len(asn1Object)):
+                    self.renderObject(
+                        asn1Object.getComponentByPosition(idx), None,
+                        depth + 1)
+
+                writer.end(depth, True)
+
+                return
+
+            writer.begin(depth, name, asn1Object, False)
+
+            for idx, namedType in enumerate(namedTypes.namedTypes):
+                component = asn1Object.getComponentByPosition(
+                    idx, default=univ.noValue, instantiate=False)
+
+                if component is not univ.noValue:
+                    self.renderObject(component, namedType.name, depth + 1)
+
+            writer.end(depth, False)
+
+        else:
+            writer.scalar(depth, name, asn1Object)
+
+    def renderSubstrate(self, substrate, component, asn1Spec, name, depth):
+        """Render DER `component` of `substrate` against `asn1Spec`
+
+        Returns scalar value built, if any, for open type resolution.
+        """
+        writer = self._writer
+
+        if isinstance(asn1Spec, univ.Choice):
+            if self._isTruncated(depth):
+                writer.truncated(depth, name, asn1Spec)
+                return
+
+            self._renderChoice(
+                substrate, _peel(substrate, component, len(asn1Spec.tagSet)),
+                asn1Spec, name, depth)
+
+            return
+
+        if isinstance(asn1Spec, _listTypes):
+            if self._isTruncated(depth):
+                writer.truncated(depth, name, asn1Spec)
+                return
+
+            self._renderList(
+                substrate, _peel(substrate, component, len(asn1Spec.tagSet) - 1),
+                asn1Spec.componentType, 0, asn1Spec, name, depth)
+
+            return
+
+        if (isinstance(asn1Spec, (univ.Sequence, univ.Set)) and
+                asn1Spec.componentType):
+            if self._isTruncated(depth):
+                writer.truncated(depth, name, asn1Spec)
+                return
+
+            self._renderSequence(
+                substrate, _peel(substrate, component, len(asn1Spec.tagSet) - 1),
+                asn1Spec, name, depth)
+
+            return
+
+        if not isinstance(asn1Spec, univ.Any):
+            asn1Object = _readScalar(
+                asn1Spec, substrate,
+                _peel(substrate, component, len(asn1Spec.tagSet) - 1))
+
+            if asn1Object is not None:
+                writer.scalar(depth, name, asn1Object)
+                return asn1Object
+
+        asn1Object, _ = decoder.decode(
+            substrate[component.offset:component.end], asn1Spec=asn1Spec,
+            decodeOpenTypes=True)
+
+        self.renderObject(asn1Object, name, depth)
+
+        return asn1Object
+
+    def _renderChoice(self, substrate, component, asn1Spec, name, depth):
+        writer = self._writer
+
+        for namedType in asn1Spec.componentType.namedTypes:
+            if _matches(namedType.asn1Object, component):
+                break
+
+        else:
+            raise error.PyAsn1Error(
+                'No alternative of %s matches component at offset %d' % (
+                    asn1Spec.__class__.__name__, component.offset))
+
+        writer.begin(depth, name, asn1Spec, False)
+
+        self.renderSubstrate(
+            substrate, component, namedType.asn1Object, namedType.name,
+            depth + 1)
+
+        writer.end(depth, False)
+
+    def _renderSequence(self, substrate, component, asn1Spec, name, depth):
+        writer = self._writer
+
+        writer.begin(depth, name, asn1Spec, False)
+
+        namedTypes = asn1Spec.componentType.namedTypes
+
+        isSet = isinstance(asn1Spec, univ.Set)
+
+        # values of open type governing components
+        values = {}
+
+        position = 0
+
+        for child in tlv.iterTlvs(
+                substrate, component.valueOffset, component.valueEnd):
+
+            if isSet:
+                position = 0
+
+            while position < len(namedTypes):
+                namedType = namedTypes[position]
+
+                position += 1
+
+                if _matches(namedType.asn1Object, child):
+                    break
+
+                if isSet:
+                    continue
+
+                if not (namedType.isOptional or namedType.isDefaulted):
+                    raise error.PyAsn1Error(
+                        'Component %s of %s missing at offset %d' % (
+                            namedType.name, asn1Spec.__class__.__name__,
+                            child.offset))
+
+            else:
+                raise error.PyAsn1Error(
+                    'Unexpected component of %s at offset %d' % (
+                        asn1Spec.__class__.__name__, child.offset))
+
+            values[namedType.name] = self._renderComponent(
+                substrate, child, namedType, values, depth + 1)
+
+        if not isSet:
+            for namedType in namedTypes[position:]:
+                if not (namedType.isOptional or namedType.isDefaulted):
+                    raise error.PyAsn1Error(
+                        'Component %s of %s missing' % (
+                            namedType.name, asn1Spec.__class__.__name__))
+
+        writer.end(depth, False)
+
+    def _renderList(self, substrate, component, asn1Spec, peelCount,
+                    listSpec, name, depth):
+        writer = self._writer
+
+        writer.begin(depth, name, listSpec, True)
+
+        maxWidth = self._maxWidth
+
+        count = 0
+
+        for child in tlv.iterTlvs(
+                substrate, component.valueOffset, component.valueEnd):
+
+            if maxWidth is None or count < maxWidth:
+                self.renderSubstrate(
+                    substrate, _peel(substrate, child, peelCount), asn1Spec,
+                    None, depth + 1)
+
+            count += 1
+
+        if maxWidth is not None and count > maxWidth:
+            writer.more(depth + 1, count - maxWidth)
+
+        writer.end(depth, True)
+
+    def _renderComponent(self, substrate, component, namedType, values, depth):
+        asn1Spec = namedType.asn1Object
+        openType = namedType.openType
+
+        if openType is not None:
+            governingValue = values.get(openType.name)
+
+            if governingValue is not None and governingValue in openType:
+                openSpec = openType[governingValue]
+
+                if not isinstance(asn1Spec, _listTypes):
+                    return self.renderSubstrate(
+                        substrate,
+                        _peel(substrate, component, len(asn1Spec.tagSet)),
+                        openSpec, namedType.name, depth)
+
+                if self._isTruncated(depth):
+                    self._writer.truncated(depth, namedType.name, asn1Spec)
+                    return
+
+                # SET OF ANY governed by the same value
+                self._renderList(
+                    substrate,
+                    _peel(substrate, component, len(asn1Spec.tagSet) - 1),
+                    openSpec, len(asn1Spec.componentType.tagSet), asn1Spec,
+                    namedType.name, depth)
+
+                return
+
+        return self.renderSubstrate(
+            substrate, component, asn1Spec, namedType.name, depth)
+
+
+def _makeRenderer(fileObj, maxDepth, maxWidth, oidNames, jsonLines):
+    if fileObj is None:
+        fileObj = sys.stdout
+
+    if jsonLines:
+        writer = _JsonWriter(fileObj, oidNames)
+
+    else:
+        writer = _TextWriter(fileObj, oidNames)
+
+    return writer, _Renderer(writer, maxDepth, maxWidth)
+
+
+def render(asn1Object, fileObj=None, maxDepth=None, maxWidth=None,
+           oidNames=True, jsonLines=False):
+    """Write out decoded ASN.1 object
+
+    Parameters
+    ----------
+    asn1Object:
+        Decoded ASN.1 object (e.g. rfc5280.Certificate)
+    fileObj:
+        Text file object to write to, `sys.stdout` by default
+    maxDepth: :py:class:`int`
+        Constructed components nested this deep are elided
+    maxWidth: :py:class:`int`
+        SEQUENCE OF / SET OF elements past this many are elided
+    oidNames: :py:class:`bool`
+        Annotate OIDs with symbolic names (text output only)
+    jsonLines: :py:class:`bool`
+        Write compact JSON document terminated by newline rather than
+        indented text. OIDs become dotted strings, OCTET STRINGs and
+        undecoded ANY values hex strings, BIT STRINGs strings of bits.
+    """
+    writer, renderer = _makeRenderer(
+        fileObj, maxDepth, maxWidth, oidNames, jsonLines)
+
+    renderer.renderObject(asn1Object, None, 0)
+
+    writer.finish()
+
+
+def renderSubstrate(substrate, asn1Spec, fileObj=None, offset=0,
+                    maxDepth=None, maxWidth=None, oidNames=True,
+                    jsonLines=False):
+    """Write out DER-serialised ASN.1 object at `offset` of `substrate`
+
+    Output is the same as :func:`render` produces for the decoded
+    object, but the object is never decoded as a whole. Other
+    parameters are as for :func:`render`.
+
+    Returns
+    -------
+    : :py:class:`int`
+        Offset past the rendered object
+    """
+    writer, renderer = _makeRenderer(
+        fileObj, maxDepth, maxWidth, oidNames, jsonLines)
+
+    component = tlv.readTlv(substrate, offset)
+
+    renderer.renderSubstrate(substrate, component, asn1Spec, None, 0)
+
+    writer.finish()
+
+    return component.end
@@ -0,0 +1,632 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# RPKI repository bulk loader
+#
+# Walks local copy of RPKI repository, decodes CMS-wrapped Route
+# Origin Authorizations and Manifests along with their EE certificates
+# and turns them into compact records made of Python built-in types.
+# Files are processed in parallel by a pool of worker processes.
+#
+# Validated ROA payloads can also be extracted in bulk into columnar
+# arrays straight from the DER substrate, publication points can be
+# checked against their Manifests by hashing files in a thread pool.
+#
+# ASN.1 source from:
+# https://www.rfc-editor.org/rfc/rfc6482.txt
+# https://www.rfc-editor.org/rfc/rfc6486.txt
+# https://www.rfc-editor.org/rfc/rfc6487.txt
+#
+import array
+import binascii
+import collections
+import hashlib
+import multiprocessing
+import os
+import threading
+
+from multiprocessing import pool as mp_pool
+
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+
+from pyasn1_modules import oids
+from pyasn1_modules import rfc4055
+from pyasn1_modules import rfc5280
+from pyasn1_modules import rfc5652
+from pyasn1_modules import rfc6482
+from pyasn1_modules import rfc6486
+from pyasn1_modules import tlv
+
+
+afiIPv4 = 1
+
+afiIPv6 = 2
+
+addressWidths = {
+    afiIPv4: 32,
+    afiIPv6: 128
+}
+
+_signedDataOid = oids.oidKey(rfc5652.id_signedData)
+
+# notBefore and notAfter are naive datetime objects in UTC
+EECertificate = collections.namedtuple(
+    'EECertificate', ('serialNumber', 'subjectKeyIdentifier',
+                      'authorityKeyIdentifier', 'notBefore', 'notAfter'))
+
+# prefixes is a tuple of (afi, address, prefixLength, maxLength)
+RoaRecord = collections.namedtuple(
+    'RoaRecord', ('path', 'asID', 'prefixes', 'certificate'))
+
+# fileList maps file names into hash octets, thisUpdate and nextUpdate
+# are naive datetime objects in UTC
+ManifestRecord = collections.namedtuple(
+    'ManifestRecord', ('path', 'manifestNumber', 'thisUpdate', 'nextUpdate',
+                       'fileHashAlg', 'fileList', 'certificate'))
+
+ErrorRecord = collections.namedtuple('ErrorRecord', ('path', 'error'))
+
+
+def _utcDateTime(asn1Time):
+    # naive UTC datetime, pyasn1 tzinfo objects do not pickle on Python 2
+    dateTime = asn1Time.asDateTime
+
+    if dateTime.tzinfo is None:
+        return dateTime
+
+    return (dateTime - dateTime.utcoffset()).replace(tzinfo=None)
+
+
+def prefixFromBitString(afi, address):
+    """Turn IPAddress BIT STRING into `(address, prefixLength)` integers"""
+    try:
+        width = addressWidths[afi]
+
+    except KeyError:
+        raise error.PyAsn1Error('Unsupported AFI %s' % afi)
+
+    prefixLength = len(address)
+
+    if prefixLength > width:
+        raise error.PyAsn1Error('Prefix too long for AFI %s' % afi)
+
+    if not prefixLength:
+        return 0, 0
+
+    return address.asInteger() << width - prefixLength, prefixLength
+
+
+def addressFamily(octets):
+    """Return AFI from addressFamily OCTET STRING"""
+    octets = bytearray(octets.asOctets())
+
+    if len(octets) < 2:
+        raise error.PyAsn1Error('Malformed addressFamily')
+
+    return octets[0] << 8 | octets[1]
+
+
+def _eeCertificate(signedData):
+    certificates = signedData['certificates']
+
+    if not certificates.isValue or len(certificates) != 1:
+        raise error.PyAsn1Error('Exactly one EE certificate expected')
+
+    tbsCertificate = certificates[0]['certificate']['tbsCertificate']
+
+    subjectKeyIdentifier = authorityKeyIdentifier = None
+
+    for extension in tbsCertificate['extensions']:
+        if extension['extnID'] == rfc5280.id_ce_subjectKeyIdentifier:
+            keyIdentifier, rest = decoder.decode(
+                extension['extnValue'],
+                asn1Spec=rfc5280.SubjectKeyIdentifier())
+            subjectKeyIdentifier = keyIdentifier.asOctets()
+
+        elif extension['extnID'] == rfc5280.id_ce_authorityKeyIdentifier:
+            keyIdentifier, rest = decoder.decode(
+                extension['extnValue'],
+                asn1Spec=rfc5280.AuthorityKeyIdentifier())
+            if keyIdentifier['keyIdentifier'].isValue:
+                authorityKeyIdentifier = keyIdentifier['keyIdentifier'].asOctets()
+
+    validity = tbsCertificate['validity']
+
+    return EECertificate(
+        int(tbsCertificate['serialNumber']),
+        subjectKeyIdentifier, authorityKeyIdentifier,
+        _utcDateTime(validity['notBefore'].getComponent()),
+        _utcDateTime(validity['notAfter'].getComponent()))
+
+
+def _roaRecord(path, roa, certificate):
+    prefixes = []
+
+    for family in roa['ipAddrBlocks']:
+        afi = addressFamily(family['addressFamily'])
+
+        for roaAddress in family['addresses']:
+            address, prefixLength = prefixFromBitString(
+                afi, roaAddress['address'])
+
+            if roaAddress['maxLength'].isValue:
+                maxLength = int(roaAddress['maxLength'])
+
+            else:
+                maxLength = prefixLength
+
+            prefixes.append((afi, address, prefixLength, maxLength))
+
+    return RoaRecord(path, int(roa['asID']), tuple(prefixes), certificate)
+
+
+def _manifestRecord(path, manifest, certificate):
+    fileList = {}
+
+    for fileAndHash in manifest['fileList']:
+        fileList[str(fileAndHash['file'])] = fileAndHash['hash'].asOctets()
+
+    return ManifestRecord(
+        path, int(manifest['manifestNumber']),
+        _utcDateTime(manifest['thisUpdate']),
+        _utcDateTime(manifest['nextUpdate']),
+        str(manifest['fileHashAlg']), fileList, certificate)
+
+
+_recordBuilders = {
+    rfc6482.id_ct_routeOriginAuthz: (rfc6482.RouteOriginAttestation, _roaRecord),
+    rfc6486.id_ct_rpkiManifest: (rfc6486.Manifest, _manifestRecord)
+}
+
+
+def loadObject(substrate, path=None):
+    """Decode CMS-wrapped RPKI signed object into compact record
+
+    Returns :class:`RoaRecord` or :class:`ManifestRecord` depending
+    on the encapsulated content type.
+    """
+    contentInfo, rest = decoder.decode(
+        substrate, asn1Spec=rfc5652.ContentInfo())
+
+    if rest:
+        raise error.PyAsn1Error('Trailing garbage after ContentInfo')
+
+    if contentInfo['contentType'] != rfc5652.id_signedData:
+        raise error.PyAsn1Error('Not a SignedData object')
+
+    signedData, rest = decoder.decode(
+        contentInfo['content'], asn1Spec=rfc5652.SignedData())
+
+    encapContentInfo = signedData['encapContentInfo']
+
+    try:
+        asn1Spec, builder = _recordBuilders[encapContentInfo['eContentType']]
+
+    except KeyError:
+        raise error.PyAsn1Error(
+            'Unsupported content type %s' % encapContentInfo['eContentType'])
+
+    eContent, rest = decoder.decode(
+        encapContentInfo['eContent'], asn1Spec=asn1Spec())
+
+    return builder(path, eContent, _eeCertificate(signedData))
+
+
+def loadFile(path):
+    """Load RPKI signed object from file
+
+    Returns :class:`ErrorRecord` rather than raising on failure
+    so that bulk loads carry on.
+    """
+    try:
+        with open(path, 'rb') as fileObj:
+            substrate = fileObj.read()
+
+        return loadObject(substrate, path)
+
+    except EnvironmentError as exc:
+        return ErrorRecord(path, str(exc))
+
+    except error.PyAsn1Error as exc:
+        # str() of PyAsn1Error is empty on Python 2 with pyasn1 0.5
+        args = exc.args or getattr(exc, '_args', ())
+
+        return ErrorRecord(
+            path, ' '.join([str(arg) for arg in args]) or
+            exc.__class__.__name__)
+
+
+def iterRepositoryFiles(rootDir, suffixes=('.roa', '.mft')):
+    """Yield paths of RPKI signed objects found under `rootDir`"""
+    for dirPath, dirNames, fileNames in os.walk(rootDir):
+        dirNames.sort()
+
+        for fileName in sorted(fileNames):
+            if fileName.endswith(suffixes):
+                yield os.path.join(dirPath, fileName)
+
+
+def iterRepository(rootDir, processes=None, chunkSize=64,
+                   suffixes=('.roa', '.mft')):
+    """Load all ROAs and Manifests found under `rootDir`
+
+    Files are decoded by a pool of `processes` worker processes
+    (one per CPU by default, in-process if `1`). Records are yielded
+    in no particular order as they become ready.
+    """
+    paths = iterRepositoryFiles(rootDir, suffixes)
+
+    if processes == 1:
+        for path in paths:
+            yield loadFile(path)
+
+        return
+
+    pool = multiprocessing.Pool(processes)
+
+    try:
+        for record in pool.imap_unordered(loadFile, paths, chunkSize):
+            yield record
+
+        pool.close()
+
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _typecode(size):
+    for typecode in ('B', 'H', 'I', 'L', 'Q'):
+        try:
+            if array.array(typecode).itemsize == size:
+                return typecode
+
+        except ValueError:
+            continue
+
+    raise error.PyAsn1Error('No %d-octet array type on this platform' % size)
+
+
+class VrpColumns(object):
+    """Columnar table of validated ROA payloads
+
+    Each column is an :py:class:`array.array` of unsigned integers:
+    `asn` (32 bits), `afi` (8 bits), `addressHigh` and `addressLow`
+    (64 bits each, IPv4 addresses occupy the lower 32 bits of
+    `addressLow`), `prefixLength` and `maxLength` (8 bits).
+    """
+    __slots__ = ('asn', 'afi', 'addressHigh', 'addressLow',
+                 'prefixLength', 'maxLength')
+
+    def __init__(self):
+        self.asn = array.array(_typecode(4))
+        self.afi = array.array('B')
+        self.addressHigh = array.array(_typecode(8))
+        self.addressLow = array.array(_typecode(8))
+        self.prefixLength = array.array('B')
+        self.maxLength = array.array('B')
+
+    def __len__(self):
+        return len(self.asn)
+
+    def __iter__(self):
+        """Yield `(asn, afi, address, prefixLength, maxLength)` rows"""
+        for index in range(len(self.asn)):
+            yield (self.asn[index], self.afi[index],
+                   self.addressHigh[index] << 64 | self.addressLow[index],
+                   self.prefixLength[index], self.maxLength[index])
+
+    @staticmethod
+    def check(asn, afi, address, prefixLength, maxLength):
+        """Raise PyAsn1Error unless the row fits RFC6482 and the columns"""
+        if not 0 <= asn <= 0xFFFFFFFF:
+            raise error.PyAsn1Error('AS number %s out of range' % asn)
+
+        try:
+            width = addressWidths[afi]
+
+        except KeyError:
+            raise error.PyAsn1Error('Unsupported AFI %s' % afi)
+
+        if not 0 <= prefixLength <= maxLength <= width:
+            raise error.PyAsn1Error(
+                'Bad prefix length %s or maxLength %s for AFI %s' % (
+                    prefixLength, maxLength, afi))
+
+        if not 0 <= address < 1 << width:
+            raise error.PyAsn1Error('Address out of range for AFI %s' % afi)
+
+    def append(self, asn, afi, address, prefixLength, maxLength):
+        """Add a row, checking it first so that columns stay aligned"""
+        self.check(asn, afi, address, prefixLength, maxLength)
+
+        self.asn.append(asn)
+        self.afi.append(afi)
+        self.addressHigh.append(address >> 64)
+        self.addressLow.append(address & 0xFFFFFFFFFFFFFFFF)
+        self.prefixLength.append(prefixLength)
+        self.maxLength.append(maxLength)
+
+    def toNumpy(self):
+        """Return columns as dict of NumPy arrays sharing the same memory
+
+        Requires NumPy to be installed.
+        """
+        import numpy
+
+        columns = {}
+
+        for name in self.__slots__:
+            column = getattr(self, name)
+            columns[name] = numpy.frombuffer(
+                column, dtype='u%d' % column.itemsize)
+
+        return columns
+
+
+def _oidValue(substrate, component):
+    if component.tag != tlv.tagObjectIdentifier:
+        raise error.PyAsn1Error(
+            'OBJECT IDENTIFIER expected at offset %d' % component.offset)
+
+    return bytes(tlv.value(substrate, component))
+
+
+def _encapsulatedContent(substrate, expectedType):
+    # ContentInfo -> [0] SignedData -> encapContentInfo -> [0] eContent
+    contentInfo = tlv.readTlv(substrate)
+
+    contentType, content = tlv.children(substrate, contentInfo)[:2]
+
+    if _oidValue(substrate, contentType) != _signedDataOid:
+        raise error.PyAsn1Error('ContentInfo does not carry SignedData')
+
+    signedData = tlv.readTlv(substrate, content.valueOffset)
+
+    encapContentInfo = tlv.children(substrate, signedData)[2]
+
+    eContentType, eContent = tlv.children(substrate, encapContentInfo)
+
+    if _oidValue(substrate, eContentType) != oids.oidKey(expectedType):
+        raise error.PyAsn1Error(
+            'Unexpected eContentType %s' % oids.intern(
+                _oidValue(substrate, eContentType)))
+
+    eContent = tlv.readTlv(substrate, eContent.valueOffset)
+
+    if eContent.tag[1]:
+        raise error.PyAsn1Error('Constructed eContent is not DER')
+
+    return eContent.valueOffset, eContent.valueEnd
+
+
+def _extractRawVrps(substrate, rows):
+    roa = tlv.readTlv(substrate)
+
+    components = tlv.children(substrate, roa)
+
+    if components[0].tag == tlv.tagObjectIdentifier:
+        # ContentInfo starts with content type OID
+        start, end = _encapsulatedContent(
+            substrate, rfc6482.id_ct_routeOriginAuthz)
+        return _extractRawVrps(substrate[start:end], rows)
+
+    # skip explicitly tagged version
+    if components[0].tag[0]:
+        components = components[1:]
+
+    asn = tlv.integerValue(substrate, components[0])
+
+    for family in tlv.children(substrate, components[1]):
+        addressFamily, addresses = tlv.children(substrate, family)
+
+        afi = bytearray(tlv.value(substrate, addressFamily))
+
+        if len(afi) < 2:
+            raise error.PyAsn1Error('Malformed addressFamily')
+
+        afi = afi[0] << 8 | afi[1]
+
+        try:
+            width = addressWidths[afi]
+
+        except KeyError:
+            raise error.PyAsn1Error('Unsupported AFI %s' % afi)
+
+        for roaAddress in tlv.children(substrate, addresses):
+            components = tlv.children(substrate, roaAddress)
+
+            bitString = components[0]
+
+            octets = substrate[bitString.valueOffset + 1:bitString.valueEnd]
+
+            prefixLength = len(octets) * 8 - bytearray(
+                substrate[bitString.valueOffset:bitString.valueOffset + 1])[0]
+
+            if prefixLength > width:
+                raise error.PyAsn1Error('Prefix too long for AFI %s' % afi)
+
+            address = octets and int(binascii.hexlify(octets), 16) or 0
+
+            address <<= width - len(octets) * 8
+
+            if len(components) > 1:
+                maxLength = tlv.integerValue(substrate, components[1])
+
+            else:
+                maxLength = prefixLength
+
+            rows.append((asn, afi, address, prefixLength, maxLength))
+
+
+def _extractDecodedVrps(roa, rows):
+    record = _roaRecord(None, roa, None)
+
+    for afi, address, prefixLength, maxLength in record.prefixes:
+        rows.append((record.asID, afi, address, prefixLength, maxLength))
+
+
+def extractVrps(roas, columns=None):
+    """Collect validated ROA payloads into :class:`VrpColumns`
+
+    Items of `roas` may be decoded RouteOriginAttestation objects,
+    serialised RouteOriginAttestation or whole serialised CMS
+    ContentInfo carrying one. Serialised ROAs are read straight
+    from the substrate without building pyasn1 objects.
+
+    Payloads of a ROA are checked before any of them is added, a bad
+    ROA raises PyAsn1Error leaving `columns` as they were.
+    """
+    if columns is None:
+        columns = VrpColumns()
+
+    for roa in roas:
+        rows = []
+
+        if isinstance(roa, rfc6482.RouteOriginAttestation):
+            _extractDecodedVrps(roa, rows)
+
+        else:
+            _extractRawVrps(roa, rows)
+
+        for row in rows:
+            columns.check(*row)
+
+        for row in rows:
+            columns.append(*row)
+
+    return columns
+
+
+# Map of Manifest fileHashAlg OIDs to hashlib constructors
+
+manifestHashAlgorithmsMap = {
+    str(rfc4055.id_sha224): hashlib.sha224,
+    str(rfc4055.id_sha256): hashlib.sha256,
+    str(rfc4055.id_sha384): hashlib.sha384,
+    str(rfc4055.id_sha512): hashlib.sha512,
+}
+
+# names of files are sorted lists
+ManifestCheck = collections.namedtuple(
+    'ManifestCheck', ('matched', 'mismatched', 'missing', 'extra'))
+
+
+class ManifestVerifier(object):
+    """Check publication points against their Manifests
+
+    Files are hashed by a pool of `threads` worker threads (hashlib
+    releases the GIL while hashing large buffers) reading
+    `bufferSize` octets at a time. The pool is reused across
+    :meth:`verify` calls until :meth:`close` is called.
+    """
+    def __init__(self, threads=None, bufferSize=1048576):
+        self._pool = mp_pool.ThreadPool(threads)
+        self._bufferSize = bufferSize
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def _hashFile(self, args):
+        path, hashFunction = args
+
+        try:
+            buffer = self._local.buffer
+
+        except AttributeError:
+            buffer = self._local.buffer = bytearray(self._bufferSize)
+
+        view = memoryview(buffer)
+
+        digest = hashFunction()
+
+        try:
+            with open(path, 'rb', 0) as fileObj:
+                while True:
+                    count = fileObj.readinto(buffer)
+
+                    if not count:
+                        break
+
+                    digest.update(view[:count])
+
+        except EnvironmentError:
+            return None
+
+        return digest.digest()
+
+    def verify(self, manifest, directory):
+        """Compare files in `directory` with those listed in `manifest`
+
+        The `manifest` may be :class:`ManifestRecord` or decoded
+        rfc6486.Manifest. Manifest files found in `directory` are
+        not reported as extra.
+
+        Returns :class:`ManifestCheck`.
+        """
+        if not isinstance(manifest, ManifestRecord):
+            manifest = _manifestRecord(None, manifest, None)
+
+        try:
+            hashFunction = manifestHashAlgorithmsMap[manifest.fileHashAlg]
+
+        except KeyError:
+            raise error.PyAsn1Error(
+                'Unsupported file hash algorithm %s' % manifest.fileHashAlg)
+
+        try:
+            present = set(
+                fileName for fileName in os.listdir(directory)
+                if os.path.isfile(os.path.join(directory, fileName)))
+
+        except EnvironmentError:
+            present = set()
+
+        expected = manifest.fileList
+
+        names = sorted(present.intersection(expected))
+
+        digests = self._pool.map(
+            self._hashFile,
+            [(os.path.join(directory, name), hashFunction) for name in names])
+
+        matched = []
+        mismatched = []
+
+        for name, digest in zip(names, digests):
+            if digest == expected[name]:
+                matched.append(name)
+
+            else:
+                mismatched.append(name)
+
+        missing = sorted(set(expected).difference(present))
+
+        extra = sorted(
+            fileName for fileName in present.difference(expected)
+            if not fileName.endswith('.mft'))
+
+        return ManifestCheck(matched, mismatched, missing, extra)
+
+
+def verifyManifest(manifest, directory, threads=None):
+    """Check `directory` against `manifest`, see :meth:`ManifestVerifier.verify`"""
+    verifier = ManifestVerifier(threads)
+
+    try:
+        return verifier.verify(manifest, directory)
+
+    finally:
+        verifier.close()
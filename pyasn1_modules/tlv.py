@@ -0,0 +1,265 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# Lightweight BER/DER tag-length-value scanner
+#
+# Locates component boundaries in serialised ASN.1 without building
+# pyasn1 objects. Handy whenever only the position of a component
+# within the substrate is of interest.
+#
+import collections
+import sys
+
+from pyasn1 import error
+from pyasn1.codec.der import encoder
+
+if sys.version_info[0] <= 2:
+    def _octet(substrate, index):
+        octet = substrate[index]
+        if isinstance(octet, int):
+            return octet
+        return ord(octet)
+
+else:
+    def _octet(substrate, index):
+        return substrate[index]
+
+
+# Tag is a (tagClass, tagFormat, tagId) tuple compatible with
+# the constants from pyasn1.type.tag
+Tlv = collections.namedtuple(
+    'Tlv', ('tag', 'offset', 'valueOffset', 'valueEnd', 'end'))
+
+tagEndOfOctets = (0, 0, 0)
+
+tagInteger = (0x00, 0x00, 2)
+tagBitString = (0x00, 0x00, 3)
+tagOctetString = (0x00, 0x00, 4)
+tagObjectIdentifier = (0x00, 0x00, 6)
+tagGeneralizedTime = (0x00, 0x00, 24)
+tagSequence = (0x00, 0x20, 16)
+tagSet = (0x00, 0x20, 17)
+
+
+def tagOf(asn1Object):
+    """Return outermost (tagClass, tagFormat, tagId) of ASN.1 type"""
+    outerTag = asn1Object.tagSet[-1]
+    return outerTag.tagClass, outerTag.tagFormat, outerTag.tagId
+
+
+def readHeader(substrate, offset=0):
+    """Parse identifier and length octets at `offset`
+
+    Returns `(tag, valueOffset, length)` where `length` is `None`
+    for indefinite length encoding.
+    """
+    size = len(substrate)
+
+    if offset >= size:
+        raise error.SubstrateUnderrunError(
+            'Short substrate for tag at offset %d' % offset)
+
+    octet = _octet(substrate, offset)
+    offset += 1
+
+    tagClass = octet & 0xC0
+    tagFormat = octet & 0x20
+    tagId = octet & 0x1F
+
+    if tagId == 0x1F:
+        tagId = 0
+
+        while True:
+            if offset >= size:
+                raise error.SubstrateUnderrunError(
+                    'Short substrate for long tag at offset %d' % offset)
+
+            octet = _octet(substrate, offset)
+            offset += 1
+
+            tagId = tagId << 7 | octet & 0x7F
+
+            if not octet & 0x80:
+                break
+
+    if offset >= size:
+        raise error.SubstrateUnderrunError(
+            'Short substrate for length at offset %d' % offset)
+
+    octet = _octet(substrate, offset)
+    offset += 1
+
+    if octet < 0x80:
+        length = octet
+
+    elif octet == 0x80:
+        if not tagFormat:
+            raise error.PyAsn1Error(
+                'Indefinite length for primitive type at offset %d' % offset)
+
+        length = None
+
+    else:
+        count = octet & 0x7F
+
+        if offset + count > size:
+            raise error.SubstrateUnderrunError(
+                'Short substrate for length at offset %d' % offset)
+
+        length = 0
+
+        for index in range(offset, offset + count):
+            length = length << 8 | _octet(substrate, index)
+
+        offset += count
+
+    return (tagClass, tagFormat, tagId), offset, length
+
+
+def readTlv(substrate, offset=0):
+    """Locate complete TLV starting at `offset`
+
+    Returns :class:`Tlv` carrying the tag and the absolute offsets of
+    the TLV start, its value, the end of the value and the end of the
+    whole TLV (including end-of-octets for indefinite form).
+    """
+    tag, valueOffset, length = readHeader(substrate, offset)
+
+    if length is not None:
+        end = valueOffset + length
+
+        if end > len(substrate):
+            raise error.SubstrateUnderrunError(
+                'Short substrate for value at offset %d' % valueOffset)
+
+        return Tlv(tag, offset, valueOffset, end, end)
+
+    position = valueOffset
+
+    while True:
+        component = readTlv(substrate, position)
+
+        if component.tag == tagEndOfOctets and component.end == component.valueOffset:
+            return Tlv(tag, offset, valueOffset, position, component.end)
+
+        position = component.end
+
+
+def iterTlvs(substrate, offset=0, end=None):
+    """Yield consecutive :class:`Tlv` found within `substrate[offset:end]`"""
+    if end is None:
+        end = len(substrate)
+
+    while offset < end:
+        component = readTlv(substrate, offset)
+
+        if component.end > end:
+            raise error.PyAsn1Error(
+                'Component at offset %d overruns its container' % offset)
+
+        yield component
+
+        offset = component.end
+
+
+def children(substrate, parent):
+    """Return list of :class:`Tlv` components of constructed `parent`"""
+    return list(iterTlvs(substrate, parent.valueOffset, parent.valueEnd))
+
+
+def value(substrate, component):
+    """Return value octets of :class:`Tlv` `component`"""
+    return substrate[component.valueOffset:component.valueEnd]
+
+
+def integerValue(substrate, component):
+    """Return value of INTEGER :class:`Tlv` `component` as Python integer"""
+    if component.valueOffset == component.valueEnd:
+        raise error.PyAsn1Error(
+            'Empty INTEGER at offset %d' % component.offset)
+
+    number = 0
+
+    for index in range(component.valueOffset, component.valueEnd):
+        number = number << 8 | _octet(substrate, index)
+
+    if _octet(substrate, component.valueOffset) & 0x80:
+        number -= 1 << 8 * (component.valueEnd - component.valueOffset)
+
+    return number
+
+
+def encodeLength(length):
+    """Serialise definite length octets"""
+    if length < 0x80:
+        return bytes(bytearray((length,)))
+
+    octets = bytearray()
+
+    while length:
+        octets.insert(0, length & 0xFF)
+        length >>= 8
+
+    octets.insert(0, 0x80 | len(octets))
+
+    return bytes(octets)
+
+
+def encodeTag(tag):
+    """Serialise identifier octets of (tagClass, tagFormat, tagId) tuple"""
+    tagClass, tagFormat, tagId = tag
+
+    if tagId < 0x1F:
+        return bytes(bytearray((tagClass | tagFormat | tagId,)))
+
+    octets = bytearray((tagId & 0x7F,))
+    tagId >>= 7
+
+    while tagId:
+        octets.insert(0, 0x80 | tagId & 0x7F)
+        tagId >>= 7
+
+    octets.insert(0, tagClass | tagFormat | 0x1F)
+
+    return bytes(octets)
+
+
+def encodeHeader(tag, length):
+    """Serialise identifier and definite length octets"""
+    return encodeTag(tag) + encodeLength(length)
+
+
+def encodeTlv(tag, valueOctets):
+    """Serialise complete definite length TLV"""
+    return encodeHeader(tag, len(valueOctets)) + bytes(valueOctets)
+
+
+def encodeInteger(number):
+    """Serialise complete INTEGER TLV in minimal two's complement form"""
+    octets = bytearray()
+
+    while True:
+        octets.insert(0, number & 0xFF)
+        number >>= 8
+
+        if number == 0 and not octets[0] & 0x80:
+            break
+
+        if number == -1 and octets[0] & 0x80:
+            break
+
+    return encodeTlv(tagInteger, octets)
+
+
+def encodeDer(value):
+    """Return DER serialisation of pyasn1 object, octets as they are
+
+    `None` is passed through, so are serialisations given as `bytes`.
+    """
+    if value is None or isinstance(value, bytes):
+        return value
+
+    return encoder.encode(value)
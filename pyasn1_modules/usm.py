@@ -0,0 +1,302 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# SNMPv3 User-based Security Model message authentication helpers
+#
+# Locates msgAuthenticationParameters within serialised SNMPv3Message
+# so that HMAC can be computed and verified right on the substrate
+# without decoding and re-encoding the whole message.
+#
+# Algorithms from:
+# http://www.ietf.org/rfc/rfc3414.txt
+# https://www.rfc-editor.org/rfc/rfc7860.txt
+#
+import collections
+import hashlib
+import hmac
+import threading
+
+from pyasn1 import error
+from pyasn1.codec.ber import encoder
+from pyasn1.type import univ
+
+from pyasn1_modules import tlv
+
+
+usmHMACMD5AuthProtocol = univ.ObjectIdentifier('1.3.6.1.6.3.10.1.1.2')
+
+usmHMACSHAAuthProtocol = univ.ObjectIdentifier('1.3.6.1.6.3.10.1.1.3')
+
+usmHMAC128SHA224AuthProtocol = univ.ObjectIdentifier('1.3.6.1.6.3.10.1.1.4')
+
+usmHMAC192SHA256AuthProtocol = univ.ObjectIdentifier('1.3.6.1.6.3.10.1.1.5')
+
+usmHMAC256SHA384AuthProtocol = univ.ObjectIdentifier('1.3.6.1.6.3.10.1.1.6')
+
+usmHMAC384SHA512AuthProtocol = univ.ObjectIdentifier('1.3.6.1.6.3.10.1.1.7')
+
+
+# Map of authentication protocols to (hash function, MAC length)
+
+authProtocolsMap = {
+    usmHMACMD5AuthProtocol: (hashlib.md5, 12),
+    usmHMACSHAAuthProtocol: (hashlib.sha1, 12),
+    usmHMAC128SHA224AuthProtocol: (hashlib.sha224, 16),
+    usmHMAC192SHA256AuthProtocol: (hashlib.sha256, 24),
+    usmHMAC256SHA384AuthProtocol: (hashlib.sha384, 32),
+    usmHMAC384SHA512AuthProtocol: (hashlib.sha512, 48),
+}
+
+
+def _authProtocol(authProtocol):
+    try:
+        return authProtocolsMap[authProtocol]
+
+    except KeyError:
+        raise error.PyAsn1Error(
+            'Unknown authentication protocol %s' % (authProtocol,))
+
+
+def locateAuthenticationParameters(wholeMsg):
+    """Find msgAuthenticationParameters in serialised SNMPv3Message
+
+    Returns `(offset, length)` of the parameter value relative to
+    the beginning of `wholeMsg`.
+    """
+    message = tlv.readTlv(wholeMsg)
+
+    components = tlv.children(wholeMsg, message)
+
+    if len(components) != 4:
+        raise error.PyAsn1Error('Not a SNMPv3Message')
+
+    # msgSecurityParameters OCTET STRING carries UsmSecurityParameters
+    securityParameters = components[2]
+
+    usmParameters = tlv.readTlv(wholeMsg, securityParameters.valueOffset)
+
+    components = tlv.children(wholeMsg, usmParameters)
+
+    if len(components) != 6:
+        raise error.PyAsn1Error('Not a UsmSecurityParameters')
+
+    authParameters = components[4]
+
+    return (authParameters.valueOffset,
+            authParameters.valueEnd - authParameters.valueOffset)
+
+
+def encodeSecurityParameters(usmSecurityParameters):
+    """Serialise UsmSecurityParameters recording authentication parameters position
+
+    Returns `(substrate, offset, length)` where `offset` and `length`
+    locate msgAuthenticationParameters value within `substrate`.
+    """
+    substrate = encoder.encode(usmSecurityParameters)
+
+    components = tlv.children(substrate, tlv.readTlv(substrate))
+
+    authParameters = components[4]
+
+    return (substrate, authParameters.valueOffset,
+            authParameters.valueEnd - authParameters.valueOffset)
+
+
+def encodeMessage(snmpV3Message, usmSecurityParameters, authProtocol):
+    """Serialise SNMPv3Message ready for in-place authentication
+
+    The msgAuthenticationParameters component of `usmSecurityParameters`
+    is filled with zeros of the MAC length of `authProtocol`, the
+    parameters are embedded into `snmpV3Message` and the whole message
+    is encoded.
+
+    Returns `(wholeMsg, offset)` where `wholeMsg` is a `bytearray`
+    and `offset` locates msgAuthenticationParameters value in it.
+    """
+    hashFunction, macLength = _authProtocol(authProtocol)
+
+    usmSecurityParameters['msgAuthenticationParameters'] = univ.OctetString(
+        bytes(bytearray(macLength)))
+
+    securityParameters, offset, length = encodeSecurityParameters(
+        usmSecurityParameters)
+
+    snmpV3Message['msgSecurityParameters'] = securityParameters
+
+    wholeMsg = bytearray(encoder.encode(snmpV3Message))
+
+    # message layout up to msgSecurityParameters is shallow and known
+    messageTlv = tlv.readTlv(wholeMsg)
+
+    components = tlv.children(wholeMsg, messageTlv)
+
+    offset += components[2].valueOffset
+
+    return wholeMsg, offset
+
+
+def _computeMac(wholeMsg, offset, hashFunction, macLength, localizedKey):
+    buffer = memoryview(wholeMsg)
+
+    mac = hmac.new(localizedKey, digestmod=hashFunction)
+
+    mac.update(buffer[:offset])
+    mac.update(bytes(bytearray(macLength)))
+    mac.update(buffer[offset + macLength:])
+
+    return mac.digest()[:macLength]
+
+
+def authenticateMessage(wholeMsg, authProtocol, localizedKey, offset=None):
+    """Compute HMAC over serialised SNMPv3Message and store it in place
+
+    The `wholeMsg` should be a `bytearray` as returned by
+    :func:`encodeMessage`, other types are copied into one.
+    The `offset` of msgAuthenticationParameters is located
+    in the substrate when not given.
+
+    Returns authenticated `wholeMsg`.
+    """
+    hashFunction, macLength = _authProtocol(authProtocol)
+
+    if not isinstance(wholeMsg, bytearray):
+        wholeMsg = bytearray(wholeMsg)
+
+    if offset is None:
+        offset, length = locateAuthenticationParameters(wholeMsg)
+
+        if length != macLength:
+            raise error.PyAsn1Error(
+                'Authentication parameters size %d does not match '
+                'protocol MAC size %d' % (length, macLength))
+
+    wholeMsg[offset:offset + macLength] = _computeMac(
+        wholeMsg, offset, hashFunction, macLength, localizedKey)
+
+    return wholeMsg
+
+
+def verifyMessage(wholeMsg, authProtocol, localizedKey, offset=None):
+    """Verify HMAC carried in serialised SNMPv3Message
+
+    The MAC is computed over the substrate as if
+    msgAuthenticationParameters were zeroed, without copying
+    or modifying `wholeMsg`.
+
+    Returns `True` if the message is authentic.
+    """
+    hashFunction, macLength = _authProtocol(authProtocol)
+
+    if offset is None:
+        offset, length = locateAuthenticationParameters(wholeMsg)
+
+        if length != macLength:
+            return False
+
+    expected = _computeMac(
+        wholeMsg, offset, hashFunction, macLength, localizedKey)
+
+    received = bytes(wholeMsg[offset:offset + macLength])
+
+    return hmac.compare_digest(expected, received)
+
+
+def passwordToKey(authProtocol, password):
+    """Turn password into master key (RFC3414 A.2)"""
+    hashFunction, macLength = _authProtocol(authProtocol)
+
+    password = bytearray(password)
+
+    if not password:
+        raise error.PyAsn1Error('Empty password')
+
+    # one megabyte worth of password repetitions
+    chunk = bytes(password * (64 // len(password) + 2))
+
+    digest = hashFunction()
+
+    count = 0
+
+    while count < 1048576:
+        block = chunk[count % len(password):][:64]
+        digest.update(block)
+        count += 64
+
+    return digest.digest()
+
+
+def localizeKey(authProtocol, masterKey, engineId):
+    """Localize master key for authoritative SNMP engine (RFC3414 A.2)"""
+    hashFunction, macLength = _authProtocol(authProtocol)
+
+    engineId = bytes(engineId)
+
+    return hashFunction(masterKey + engineId + masterKey).digest()
+
+
+class LocalizedKeyCache(object):
+    """Bounded cache of localized keys
+
+    Master keys are cached per (authProtocol, password), localized
+    keys per (authProtocol, password, engineId). The least recently
+    used entries are evicted once `maxSize` is exceeded.
+    """
+    def __init__(self, maxSize=65536):
+        self._maxSize = maxSize
+        self._masterKeys = collections.OrderedDict()
+        self._localizedKeys = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._localizedKeys)
+
+    def _lookup(self, cache, key):
+        with self._lock:
+            try:
+                value = cache.pop(key)
+
+            except KeyError:
+                return None
+
+            cache[key] = value
+
+            return value
+
+    def _store(self, cache, key, value):
+        with self._lock:
+            cache[key] = value
+
+            while len(cache) > self._maxSize:
+                cache.popitem(last=False)
+
+    def getKey(self, authProtocol, password, engineId):
+        """Return key localized to `engineId`"""
+        password = bytes(password)
+        engineId = bytes(engineId)
+
+        cacheKey = authProtocol, password, engineId
+
+        localizedKey = self._lookup(self._localizedKeys, cacheKey)
+
+        if localizedKey is not None:
+            return localizedKey
+
+        masterKey = self._lookup(self._masterKeys, cacheKey[:2])
+
+        if masterKey is None:
+            masterKey = passwordToKey(authProtocol, password)
+            self._store(self._masterKeys, cacheKey[:2], masterKey)
+
+        localizedKey = localizeKey(authProtocol, masterKey, engineId)
+
+        self._store(self._localizedKeys, cacheKey, localizedKey)
+
+        return localizedKey
+
+    def clear(self):
+        with self._lock:
+            self._masterKeys.clear()
+            self._localizedKeys.clear()
@@ -0,0 +1,264 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# Unified X.509 schema access
+#
+# The rfc2459, rfc3280 and rfc5280 modules define certificate and CRL
+# schemas that serialise identically: they differ in subtype
+# constraints and in the format bit of some tags, neither of which
+# affects DER or tag matching. This module serves the rfc5280 schema
+# for the older profiles wherever their schemas also agree on component
+# names, so that the older modules need not be imported just to decode
+# certificates or CRLs. Other schemas (e.g. rfc2459.Name, whose
+# alternative is unnamed) are taken from the requested module, which
+# is imported on first use.
+#
+# Decoded objects of wire-compatible schemas are converted between
+# profiles by re-parenting their components rather than by re-encoding.
+# Components are shared where the schemas agree on component names as
+# well, and re-parented recursively where they do not.
+#
+import importlib
+
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+from pyasn1.codec.der import encoder
+from pyasn1.type import base
+from pyasn1.type import univ
+
+from pyasn1_modules import rfc5280
+
+profiles = ('rfc2459', 'rfc3280', 'rfc5280')
+
+# Schemas interchangeable in all profiles
+
+sharedNames = (
+    'AlgorithmIdentifier',
+    'AttributeTypeAndValue',
+    'CertificateSerialNumber',
+    'Extension',
+    'Extensions',
+    'RDNSequence',
+    'RelativeDistinguishedName',
+    'SubjectPublicKeyInfo',
+    'Time',
+    'UniqueIdentifier',
+    'Validity',
+    'Version'
+)
+
+# Schemas interchangeable in rfc3280 and rfc5280 only
+
+_rfc3280Names = (
+    'Certificate',
+    'CertificateList',
+    'GeneralName',
+    'GeneralNames',
+    'Name',
+    'TBSCertList',
+    'TBSCertificate'
+)
+
+_sharedSpecs = {
+    'rfc2459': frozenset(sharedNames),
+    'rfc3280': frozenset(sharedNames + _rfc3280Names),
+    'rfc5280': None
+}
+
+Certificate = rfc5280.Certificate
+TBSCertificate = rfc5280.TBSCertificate
+CertificateList = rfc5280.CertificateList
+TBSCertList = rfc5280.TBSCertList
+Name = rfc5280.Name
+AlgorithmIdentifier = rfc5280.AlgorithmIdentifier
+SubjectPublicKeyInfo = rfc5280.SubjectPublicKeyInfo
+Extensions = rfc5280.Extensions
+Extension = rfc5280.Extension
+
+_signatures = {}
+
+
+def _module(profile):
+    if profile not in _sharedSpecs:
+        raise error.PyAsn1Error('Unknown X.509 profile %s' % profile)
+
+    return importlib.import_module('pyasn1_modules.' + profile)
+
+
+def getSpec(name, profile='rfc5280'):
+    """Return schema class `name` of `profile`
+
+    The `profile` is one of :py:data:`profiles`. Schemas listed in
+    :py:data:`sharedNames` are served off rfc5280 for every profile,
+    as are certificate, CRL and Name schemas for rfc3280. Others are
+    looked up in the `profile` module.
+    """
+    shared = _sharedSpecs.get(profile)
+
+    if profile == 'rfc5280' or shared is not None and name in shared:
+        return getattr(rfc5280, name)
+
+    try:
+        return getattr(_module(profile), name)
+
+    except AttributeError:
+        raise error.PyAsn1Error('No %s in %s' % (name, profile))
+
+
+def _signature(asn1Spec, componentNames, depth=0):
+    """Return serialisation-relevant structure of `asn1Spec` as a tuple
+
+    Subtype constraints, named values, open types and tag format bits
+    are disregarded, so are component names unless `componentNames`
+    is set.
+    """
+    componentType = getattr(asn1Spec, 'componentType', None)
+
+    # inline schemas share class and tags, key on their component type
+    key = type(asn1Spec), asn1Spec.tagSet, id(componentType), componentNames
+
+    try:
+        return _signatures[key][1]
+
+    except KeyError:
+        pass
+
+    if depth > 64:
+        raise error.PyAsn1Error('Schema nesting too deep')
+
+    for baseType in type(asn1Spec).__mro__:
+        if baseType.__module__.startswith('pyasn1.type'):
+            break
+
+    tags = tuple([(tag.tagClass, tag.tagId)
+                  for tag in asn1Spec.tagSet.superTags])
+
+    components = ()
+
+    if isinstance(asn1Spec, univ.SequenceOfAndSetOfBase):
+        components = _signature(componentType, componentNames, depth + 1),
+
+    elif componentType is not None:
+        components = tuple(
+            [(componentNames and namedType.name, namedType.isOptional,
+              namedType.isDefaulted,
+              _signature(namedType.asn1Object, componentNames, depth + 1))
+             for namedType in componentType.namedTypes])
+
+    signature = baseType.__name__, tags, components
+
+    # keep component type referenced so that its id is not reused
+    _signatures[key] = componentType, signature
+
+    return signature
+
+
+def isWireCompatible(asn1Spec1, asn1Spec2, componentNames=False):
+    """Tell whether two schemas (or their classes) serialise identically
+
+    With `componentNames` set, component names must match as well, so
+    that the schemas are interchangeable in code.
+    """
+    if isinstance(asn1Spec1, type):
+        asn1Spec1 = asn1Spec1()
+
+    if isinstance(asn1Spec2, type):
+        asn1Spec2 = asn1Spec2()
+
+    return (_signature(asn1Spec1, componentNames) ==
+            _signature(asn1Spec2, componentNames))
+
+
+def decode(substrate, name='Certificate', profile='rfc5280'):
+    """Decode DER serialisation against schema `name` of `profile`
+
+    Returns decoded object, trailing octets raise
+    :py:class:`~pyasn1.error.PyAsn1Error`.
+    """
+    value, rest = decoder.decode(
+        substrate, asn1Spec=getSpec(name, profile)())
+
+    if rest:
+        raise error.PyAsn1Error('Trailing octets after %s' % name)
+
+    return value
+
+
+def _reparent(asn1Object, target):
+    """Populate empty `target` with converted components of `asn1Object`
+
+    Components whose schemas agree with the target ones, component names
+    included, are shared as they are, others are converted recursively.
+    """
+    componentType = target.componentType
+
+    if isinstance(asn1Object, univ.Choice):
+        position = asn1Object.componentType.getPositionByName(
+            asn1Object.getName())
+
+        components = [(position, asn1Object.getComponentByPosition(position),
+                       componentType.getTypeByPosition(position))]
+
+    elif isinstance(asn1Object, univ.SequenceOfAndSetOfBase):
+        components = [(position, component, componentType)
+                      for position, component in enumerate(asn1Object)]
+
+    else:
+        components = []
+
+        for position in range(len(asn1Object.componentType)):
+            component = asn1Object.getComponentByPosition(
+                position, default=None, instantiate=False)
+
+            if component is not None and component.isValue:
+                components.append(
+                    (position, component,
+                     componentType.getTypeByPosition(position)))
+
+    for position, component, asn1Spec in components:
+        if (isinstance(component, base.ConstructedAsn1Type) and
+                not isWireCompatible(component, asn1Spec,
+                                     componentNames=True)):
+            component = _reparent(component, asn1Spec.clone())
+
+        target.setComponentByPosition(
+            position, component, verifyConstraints=False)
+
+    return target
+
+
+def convert(asn1Object, profile='rfc5280', name=None):
+    """Return decoded `asn1Object` as an object of `profile` schema
+
+    The `name` of the schema defaults to the class name of
+    `asn1Object`. Objects already of the target class are returned as
+    they are. Wire-compatible objects are re-parented: a new object of
+    the target class shares those components of `asn1Object` whose
+    schemas agree with the target ones including component names, the
+    rest is re-parented recursively, so that the outcome can be
+    accessed by the target component names all the way down.
+    Otherwise `asn1Object` is re-encoded and decoded.
+    """
+    if name is None:
+        name = type(asn1Object).__name__
+
+    targetSpec = getSpec(name, profile)
+
+    if type(asn1Object) is targetSpec:
+        return asn1Object
+
+    target = targetSpec()
+
+    if not asn1Object.isValue:
+        return target
+
+    if not isWireCompatible(asn1Object, target):
+        return decode(encoder.encode(asn1Object), name, profile)
+
+    if isinstance(asn1Object, base.ConstructedAsn1Type):
+        return _reparent(asn1Object, target)
+
+    return target.clone(asn1Object)
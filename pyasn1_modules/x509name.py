@@ -0,0 +1,237 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# X.509 distinguished name canonicalisation
+#
+# Maps rfc5280.Name, decoded or DER-serialised, into canonical octet
+# string so that names differing only in the ways RFC5280 section 7.1
+# considers insignificant (string type, letter case, surrounding and
+# repeated white space) compare and hash equal.
+#
+# Canonical encoding follows OpenSSL exactly: every string attribute
+# value is re-encoded as UTF8String with ASCII letters lowercased and
+# ASCII white space stripped and collapsed, attributes within RDN are
+# sorted, and the outer SEQUENCE header is dropped. Non-ASCII text is
+# left as it is, as OpenSSL does.
+#
+# Folded encoding additionally applies Unicode compatibility
+# normalisation and case folding in the spirit of RFC4518, matching
+# e.g. Greek or accented names regardless of letter case.
+#
+import collections
+import hashlib
+import re
+import struct
+import threading
+import unicodedata
+
+from pyasn1 import error
+from pyasn1.codec.der import encoder
+
+from pyasn1_modules import rfc5280
+from pyasn1_modules import tlv
+
+_utf8String = (0x00, 0x00, 12)
+
+# Universal tag ID to codec of DirectoryString (and alike) value
+
+_stringCodecs = {
+    12: 'utf-8',  # UTF8String
+    19: 'ascii',  # PrintableString
+    20: 'latin-1',  # TeletexString, as OpenSSL takes it
+    22: 'ascii',  # IA5String
+    26: 'ascii',  # VisibleString
+    28: 'utf-32-be',  # UniversalString
+    30: 'utf-16-be'  # BMPString
+}
+
+
+# OpenSSL ossl_isspace() set
+_asciiSpaces = re.compile(b'[ \t\n\v\f\r]+')
+
+
+def _opensslString(octets):
+    """Canonicalise UTF-8 `octets` the way OpenSSL asn1_string_canon() does"""
+    # bytes.lower() only touches ASCII letters
+    return _asciiSpaces.sub(b' ', octets.strip(b' \t\n\v\f\r')).lower()
+
+
+def canonicalString(text):
+    """Fold case and insignificant white space of attribute value text
+
+    Non-ASCII text is NFKC-normalised and case folded in the spirit of
+    RFC4518, therefore the outcome may differ from OpenSSL's for such
+    text. Used for :func:`foldedName`.
+    """
+    if any(ord(char) > 0x7F for char in text):
+        text = unicodedata.normalize('NFKC', text)
+
+        # full case folding is Python 3 only
+        if hasattr(text, 'casefold'):
+            return ' '.join(text.casefold().split())
+
+    return ' '.join(text.lower().split())
+
+
+def _canonicalValue(substrate, component, fold):
+    tagClass, tagFormat, tagId = component.tag
+
+    if tagClass or tagFormat or tagId not in _stringCodecs:
+        return substrate[component.offset:component.end]
+
+    try:
+        text = tlv.value(substrate, component).decode(_stringCodecs[tagId])
+
+    except UnicodeError:
+        return substrate[component.offset:component.end]
+
+    if fold:
+        octets = canonicalString(text).encode('utf-8')
+
+    else:
+        octets = _opensslString(text.encode('utf-8'))
+
+    return tlv.encodeTlv(_utf8String, octets)
+
+
+def _canonicalRdns(substrate, fold=False):
+    name = tlv.readTlv(substrate)
+
+    if name.end != len(substrate):
+        raise error.PyAsn1Error('Trailing octets after Name')
+
+    rdns = []
+
+    for rdn in tlv.children(substrate, name):
+        avas = []
+
+        for ava in tlv.children(substrate, rdn):
+            components = tlv.children(substrate, ava)
+
+            if len(components) != 2:
+                raise error.PyAsn1Error('Malformed AttributeTypeAndValue')
+
+            attrType, attrValue = components
+
+            avas.append(tlv.encodeTlv(
+                ava.tag,
+                substrate[attrType.offset:attrType.end] +
+                _canonicalValue(substrate, attrValue, fold)))
+
+        avas.sort()
+
+        rdns.append(tlv.encodeTlv(rdn.tag, b''.join(avas)))
+
+    return tuple(rdns)
+
+
+def _canonicalize(substrate):
+    return b''.join(_canonicalRdns(substrate))
+
+
+def _fold(substrate):
+    return b''.join(_canonicalRdns(substrate, fold=True))
+
+
+class _NameCache(object):
+    def __init__(self, maxSize, canonicalize=_canonicalize):
+        self.maxSize = maxSize
+        self._canonicalize = canonicalize
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._cache.pop(key)
+
+            except KeyError:
+                pass
+
+            else:
+                self._cache[key] = value
+                return value
+
+        value = self._canonicalize(key)
+
+        with self._lock:
+            # concurrent callers get the same object
+            value = self._cache.setdefault(key, value)
+
+            while len(self._cache) > self.maxSize:
+                self._cache.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+_canonicalNames = _NameCache(16384)
+
+_foldedNames = _NameCache(16384, _fold)
+
+
+def canonicalName(name):
+    """Return canonical octet string of rfc5280.Name
+
+    The `name` can be rfc5280.Name object or its DER serialisation.
+    Canonical forms are memoized by the serialisation, names that
+    are met repeatedly are therefore shared rather than recomputed.
+    """
+    if isinstance(name, rfc5280.Name):
+        name = encoder.encode(name)
+
+    return _canonicalNames.get(bytes(name))
+
+
+def foldedName(name):
+    """Return canonical octet string of rfc5280.Name with Unicode folding
+
+    Like :func:`canonicalName`, but string values are folded by
+    :func:`canonicalString`, so that non-ASCII names differing in
+    letter case or Unicode compatibility forms match. Not suitable
+    for computing OpenSSL subject hash.
+    """
+    if isinstance(name, rfc5280.Name):
+        name = encoder.encode(name)
+
+    return _foldedNames.get(bytes(name))
+
+
+def canonicalRdns(name):
+    """Return tuple of canonical RelativeDistinguishedName octet strings
+
+    Joined together they make :func:`canonicalName` outcome. Handy
+    for matching Name prefixes. Not memoized.
+    """
+    if isinstance(name, rfc5280.Name):
+        name = encoder.encode(name)
+
+    return _canonicalRdns(bytes(name))
+
+
+def namesEqual(name1, name2):
+    """Compare rfc5280.Name objects or their DER serialisations"""
+    return canonicalName(name1) == canonicalName(name2)
+
+
+def nameHash(name):
+    """Return OpenSSL subject hash of rfc5280.Name
+
+    That is the value `openssl x509 -hash` reports and certificate
+    directories are keyed by.
+    """
+    digest = hashlib.sha1(canonicalName(name)).digest()
+
+    return struct.unpack('<L', digest[:4])[0]
+
+
+def clearCache():
+    """Drop all memoized canonical names"""
+    _canonicalNames.clear()
+    _foldedNames.clear()
@@ -63,6 +63,7 @@ if sys.version_info[:2] < (2, 7):
 
 try:
     from setuptools import setup, Command
+    from setuptools.command.build_py import build_py
 
     params = {
         'zip_safe': True,
@@ -76,6 +77,7 @@ except ImportError:
             sys.exit(1)
 
     from distutils.core import setup, Command
+    from distutils.command.build_py import build_py
 
     params = {
         'requires': ['pyasn1(>=0.4.6,<0.6.0)']
@@ -95,9 +97,29 @@ params.update(
      'classifiers': [x for x in classifiers.split('\n') if x],
      'license': 'BSD-2-Clause',
      'packages': ['pyasn1_modules'],
+     'package_data': {'pyasn1_modules': ['oidnames.txt']},
      'python_requires': '>=2.7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, !=3.4.*'})
 
 
+# modules requiring Python 3.5 or later
+
+py3Modules = ('aioenrol',)
+
+
+class BuildPy(build_py):
+    """Leave Python 3 only modules out of Python 2 builds"""
+
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+
+        if sys.version_info[0] < 3:
+            modules = [(package, module, path)
+                       for package, module, path in modules
+                       if module not in py3Modules]
+
+        return modules
+
+
 class PyTest(Command):
     user_options = []
 
@@ -115,6 +137,7 @@ class PyTest(Command):
         unittest.TextTestRunner(verbosity=2).run(suite)
 
 params['cmdclass'] = {
+    'build_py': BuildPy,
     'test': PyTest,
     'tests': PyTest
 }
@@ -7,7 +7,25 @@
 import unittest
 
 suite = unittest.TestLoader().loadTestsFromNames(
-    ['tests.test_pem.suite',
+    ['tests.test_aioenrol.suite',
+     'tests.test_certchain.suite',
+     'tests.test_cmc.suite',
+     'tests.test_cmp.suite',
+     'tests.test_crmf.suite',
+     'tests.test_extensions.suite',
+     'tests.test_frozen.suite',
+     'tests.test_ipresources.suite',
+     'tests.test_ldap.suite',
+     'tests.test_ldapfilter.suite',
+     'tests.test_nameconstraints.suite',
+     'tests.test_oidnames.suite',
+     'tests.test_oids.suite',
+     'tests.test_pbe.suite',
+     'tests.test_pem.suite',
+     'tests.test_pkcs10.suite',
+     'tests.test_pkcs12.suite',
+     'tests.test_pkcs8.suite',
+     'tests.test_render.suite',
      'tests.test_rfc2314.suite',
      'tests.test_rfc2315.suite',
      'tests.test_rfc2437.suite',
@@ -127,7 +145,12 @@ suite = unittest.TestLoader().loadTestsFromNames(
      'tests.test_rfc8696.suite',
      'tests.test_rfc8702.suite',
      'tests.test_rfc8708.suite',
-     'tests.test_rfc8769.suite']
+     'tests.test_rfc8769.suite',
+     'tests.test_rpki.suite',
+     'tests.test_tlv.suite',
+     'tests.test_usm.suite',
+     'tests.test_x509.suite',
+     'tests.test_x509name.suite']
 )
 
 
@@ -0,0 +1,427 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import base64
+import hashlib
+import sys
+import unittest
+
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+
+from pyasn1_modules import cmp
+from pyasn1_modules import pem
+from pyasn1_modules import rfc2985
+from pyasn1_modules import rfc4210
+from pyasn1_modules import rfc4211
+from pyasn1_modules import rfc5280
+from pyasn1_modules import rfc7030
+from pyasn1_modules import tlv
+
+try:
+    import asyncio
+
+    from pyasn1_modules import aioenrol
+
+except (ImportError, SyntaxError):
+    asyncio = aioenrol = None
+
+# openssl crl2pkcs7 -nocrl -certfile leaf.pem
+certs_only_pem_text = """\
+MIIB4gYJKoZIhvcNAQcCoIIB0zCCAc8CAQExADALBgkqhkiG9w0BBwGgggG3MIIB
+szCCAVqgAwIBAgIBBjAKBggqhkjOPQQDAjApMRAwDgYDVQQKDAdFeGFtcGxlMRUw
+EwYDVQQDDAxJbnRlcm1lZGlhdGUwIBcNMjYxMDE5MTYzNjE0WhgPMjEyNjA5MjUx
+NjM2MTRaMC0xEDAOBgNVBAoMB0V4YW1wbGUxGTAXBgNVBAMMEGxlYWYuZXhhbXBs
+ZS5jb20wWTATBgcqhkjOPQIBBggqhkjOPQMBBwNCAARWIO78eH2N3D9r/+5iZcEl
+JS/gSoEUx4z6cmrpqsRyytEsp0YFAblqZGchYOONqFb07/KZQlGRpkc0KjbOUXTA
+o20wazAMBgNVHRMBAf8EAjAAMB0GA1UdDgQWBBTbaOouLwWk8nou6wONetUU4rED
+TTAfBgNVHSMEGDAWgBQ+JxQtFym94HIOjAlom18Fpq0zSjAbBgNVHREEFDASghBs
+ZWFmLmV4YW1wbGUuY29tMAoGCCqGSM49BAMCA0cAMEQCIEz7O662Jh+sOcct5/bx
+xtrjDDO0HMYyDprYwYqPWLQVAiAF/jVcyH9h3I2eOg6GrpJ4IEPX6J2Zde5S8hV5
+j/r3LjEA
+"""
+
+def _encodeSequence(*components):
+    return tlv.encodeTlv(tlv.tagSequence, b''.join(components))
+
+
+def _encodeCertRepMessage(responses):
+    certResponses = []
+
+    for certReqId, status, certificate in responses:
+        components = [tlv.encodeInteger(certReqId),
+                      _encodeSequence(tlv.encodeInteger(status))]
+
+        if certificate is not None:
+            components.append(_encodeSequence(cmp._explicit(0, certificate)))
+
+        certResponses.append(_encodeSequence(*components))
+
+    return _encodeSequence(_encodeSequence(*certResponses))
+
+
+class StandInCA(object):
+    """CMP and EST server issuing the same certificate after a delay"""
+
+    def __init__(self, certsOnly):
+        self.certsOnly = certsOnly
+        self.certificate = aioenrol.readCertsOnly(certsOnly)[0]
+        self.connections = 0
+        self.transports = []
+        self.messages = []
+        self.pending = set()
+        self.confirmed = []
+        self.queries = []
+
+    def handle(self, method, path, headers, body):
+        path, _, query = path.partition('?')
+
+        self.queries.append(query)
+
+        if path == '/cmp':
+            return self.handleCmp(body)
+
+        if path == '/.well-known/est/csrattrs':
+            csrAttrs = rfc7030.CsrAttrs()
+            csrAttrs.append(rfc7030.AttrOrOID())
+            csrAttrs[0]['oid'] = rfc2985.pkcs_9_at_challengePassword
+
+            return 200, {}, base64.b64encode(der_encoder(csrAttrs))
+
+        if path == '/.well-known/est/simpleenroll':
+            csr = base64.b64decode(body)
+
+            if csr not in self.pending:
+                self.pending.add(csr)
+                return 202, {'Retry-After': '0'}, b''
+
+            return 200, {}, base64.b64encode(self.certsOnly)
+
+        return 404, {}, b''
+
+    def handleCmp(self, body):
+        # full decode makes sure client messages are well-formed
+        pkiMessage, rest = der_decoder(body, asn1Spec=rfc4210.PKIMessage())
+
+        frame = cmp.readFrame(body)
+
+        self.messages.append(frame)
+
+        if frame.bodyType in ('ir', 'p10cr'):
+            self.pending.add(frame.transactionID)
+            bodyType = frame.bodyType == 'ir' and 'ip' or 'cp'
+            content = _encodeCertRepMessage([(0, 3, None)])
+
+        elif frame.bodyType == 'pollReq':
+            if frame.transactionID in self.pending:
+                self.pending.remove(frame.transactionID)
+                bodyType = 'pollRep'
+                content = _encodeSequence(_encodeSequence(
+                    tlv.encodeInteger(0), tlv.encodeInteger(0)))
+
+            else:
+                bodyType = 'ip'
+                content = _encodeCertRepMessage(
+                    [(0, 0, self.certificate)])
+
+        elif frame.bodyType == 'certConf':
+            self.confirmed.append(pkiMessage['body']['certConf'])
+            bodyType = 'pkiconf'
+            content = b'\x05\x00'
+
+        else:
+            bodyType = 'error'
+            content = _encodeSequence(
+                _encodeSequence(tlv.encodeInteger(2)))
+
+        header = cmp.encodeHeader(
+            frame.recipient, frame.sender, transactionID=frame.transactionID,
+            senderNonce=b'server nonce', recipNonce=frame.senderNonce)
+
+        return 200, {'Content-Type': 'application/pkixcmp'}, \
+            cmp.encodeMessage(header, cmp.encodeBody(bodyType, content))
+
+
+if asyncio is not None:
+    class StandInProtocol(asyncio.Protocol):
+        def __init__(self, ca):
+            self.ca = ca
+            self.buffer = b''
+
+        def connection_made(self, transport):
+            self.transport = transport
+            self.ca.connections += 1
+            self.ca.transports.append(transport)
+
+        def data_received(self, data):
+            self.buffer += data
+
+            while True:
+                headerEnd = self.buffer.find(b'\r\n\r\n')
+
+                if headerEnd < 0:
+                    return
+
+                lines = self.buffer[:headerEnd].decode('latin-1').split('\r\n')
+
+                method, path, version = lines[0].split(' ')
+
+                headers = {}
+
+                for line in lines[1:]:
+                    name, value = line.split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+
+                end = headerEnd + 4 + int(headers.get('content-length', 0))
+
+                if len(self.buffer) < end:
+                    return
+
+                body = self.buffer[headerEnd + 4:end]
+
+                self.buffer = self.buffer[end:]
+
+                status, headers, body = self.ca.handle(
+                    method, path, headers, body)
+
+                lines = ['HTTP/1.1 %d Whatever' % status,
+                         'Content-Length: %d' % len(body)]
+
+                lines.extend(['%s: %s' % x for x in headers.items()])
+
+                self.transport.write(
+                    ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') +
+                    body)
+
+
+@unittest.skipIf(asyncio is None, 'asyncio client requires Python 3.5+')
+class EnrolmentTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+        self.ca = StandInCA(pem.readBase64fromText(certs_only_pem_text))
+
+        self.server = self.loop.run_until_complete(self.loop.create_server(
+            lambda: StandInProtocol(self.ca), '127.0.0.1', 0))
+
+        self.url = 'http://127.0.0.1:%d' % (
+            self.server.sockets[0].getsockname()[1],)
+
+    def tearDown(self):
+        for transport in self.ca.transports:
+            transport.close()
+
+        self.server.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+
+    def _run(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+
+@unittest.skipIf(asyncio is None, 'asyncio client requires Python 3.5+')
+class CMPClientTestCase(EnrolmentTestCase):
+    def setUp(self):
+        EnrolmentTestCase.setUp(self)
+
+        name = rfc5280.GeneralName()
+        name['directoryName']['rdnSequence'] = rfc5280.RDNSequence()
+
+        self.sender = der_encoder(name)
+
+        self.client = aioenrol.CMPClient(
+            self.url + '/cmp', self.sender, self.sender, maxConnections=4)
+
+    def tearDown(self):
+        self.client.close()
+        EnrolmentTestCase.tearDown(self)
+
+    def _certReqMessages(self):
+        certReqMessages = rfc4211.CertReqMessages()
+
+        certReqMsg = rfc4211.CertReqMsg()
+        certReqMsg['certReq']['certReqId'] = 0
+        certReqMsg['certReq']['certTemplate']['version'] = 2
+
+        certReqMessages.append(certReqMsg)
+
+        return der_encoder(certReqMessages)
+
+    def testEnrol(self):
+        responses = self._run(self.client.enrol(self._certReqMessages()))
+
+        self.assertEqual(1, len(responses))
+        self.assertEqual(0, responses[0].certReqId)
+        self.assertEqual('accepted', responses[0].status)
+        self.assertEqual(self.ca.certificate, responses[0].certificate)
+
+        self.assertEqual(
+            ['ir', 'pollReq', 'pollReq', 'certConf'],
+            [frame.bodyType for frame in self.ca.messages])
+
+        self.assertEqual(
+            1, len(set([frame.transactionID for frame in self.ca.messages])))
+
+        # ecdsa-with-SHA256 signed certificate
+        self.assertEqual(
+            hashlib.sha256(self.ca.certificate).digest(),
+            self.ca.confirmed[0][0]['certHash'])
+
+        self.assertEqual(1, self.ca.connections)
+
+    def testNonces(self):
+        self._run(self.client.enrol(self._certReqMessages()))
+
+        self.assertEqual(None, self.ca.messages[0].recipNonce)
+
+        for frame in self.ca.messages[1:]:
+            self.assertEqual(b'server nonce', frame.recipNonce)
+
+        self.assertEqual(
+            4, len(set([frame.senderNonce for frame in self.ca.messages])))
+
+    def testQuery(self):
+        client = aioenrol.CMPClient(
+            self.url + '/cmp?profile=tls', self.sender, self.sender,
+            pool=self.client.pool)
+
+        self._run(client.enrol(self._certReqMessages(), confirm=False))
+
+        self.assertEqual(['profile=tls'] * 3, self.ca.queries)
+
+    def testNoConfirm(self):
+        self._run(self.client.enrol(self._certReqMessages(), confirm=False))
+
+        self.assertEqual(
+            ['ir', 'pollReq', 'pollReq'],
+            [frame.bodyType for frame in self.ca.messages])
+
+    def testError(self):
+        self.assertRaises(
+            aioenrol.EnrolmentError, self._run,
+            self.client.enrol(self._certReqMessages(), 'kur'))
+
+        try:
+            self._run(self.client.enrol(self._certReqMessages(), 'cr'))
+
+        except aioenrol.EnrolmentError as exc:
+            self.assertEqual('rejection', exc.status)
+
+        else:
+            self.fail('EnrolmentError not raised')
+
+    def testProtection(self):
+        class Protection(object):
+            algorithm = rfc5280.AlgorithmIdentifier()
+            algorithm['algorithm'] = (1, 2, 3, 4)
+
+            def protect(self, protectedPart):
+                return hashlib.sha256(protectedPart).digest()
+
+        client = aioenrol.CMPClient(
+            self.url + '/cmp', self.sender, self.sender,
+            protection=Protection(), senderKID=b'kid',
+            pool=self.client.pool)
+
+        self._run(client.enrol(self._certReqMessages()))
+
+        pkiMessage = self.ca.messages[0].decode()
+
+        protectedPart = rfc4210.ProtectedPart()
+        protectedPart['header'] = pkiMessage['header']
+        protectedPart['infoValue'] = pkiMessage['body']
+
+        self.assertEqual(
+            hashlib.sha256(der_encoder(protectedPart)).digest(),
+            pkiMessage['protection'].asOctets())
+        self.assertEqual(b'kid', self.ca.messages[0].senderKID)
+
+    def testEnrolMany(self):
+        results = self._run(self.client.enrolMany(
+            [self._certReqMessages()] * 20, concurrency=10))
+
+        self.assertEqual(20, len(results))
+
+        for responses in results:
+            self.assertEqual(self.ca.certificate, responses[0].certificate)
+
+        self.assertEqual(
+            20, len(set([frame.transactionID for frame in self.ca.messages])))
+
+        self.assertTrue(self.ca.connections <= 4)
+        self.assertEqual(self.ca.connections, self.client.pool.connectionsMade)
+
+
+@unittest.skipIf(asyncio is None, 'asyncio client requires Python 3.5+')
+class ESTClientTestCase(EnrolmentTestCase):
+    def setUp(self):
+        EnrolmentTestCase.setUp(self)
+
+        self.client = aioenrol.ESTClient(
+            self.url + '/.well-known/est', maxConnections=2)
+
+    def tearDown(self):
+        self.client.close()
+        EnrolmentTestCase.tearDown(self)
+
+    def testCsrAttrs(self):
+        csrAttrs = self._run(self.client.getCsrAttrs())
+
+        self.assertEqual(
+            rfc2985.pkcs_9_at_challengePassword, csrAttrs[0]['oid'])
+
+    def testSimpleEnroll(self):
+        certificates = self._run(self.client.simpleEnroll(b'csr'))
+
+        self.assertEqual([self.ca.certificate], certificates)
+
+    def testEnrolMany(self):
+        csrs = [('csr %d' % index).encode('ascii') for index in range(10)]
+
+        results = self._run(self.client.enrolMany(csrs))
+
+        self.assertEqual([[self.ca.certificate]] * 10, results)
+        self.assertTrue(self.ca.connections <= 2)
+
+    def testQuery(self):
+        client = aioenrol.ESTClient(
+            self.url + '/.well-known/est/?label=x', pool=self.client.pool)
+
+        self._run(client.getCsrAttrs())
+
+        self.assertEqual(['label=x'], self.ca.queries)
+
+    def testNotFound(self):
+        try:
+            self._run(self.client.simpleReenroll(b'csr'))
+
+        except aioenrol.EnrolmentError as exc:
+            self.assertEqual(404, exc.status)
+
+        else:
+            self.fail('EnrolmentError not raised')
+
+
+@unittest.skipIf(asyncio is None, 'asyncio client requires Python 3.5+')
+class ReadCertsOnlyTestCase(unittest.TestCase):
+    def testReadCertsOnly(self):
+        certificates = aioenrol.readCertsOnly(
+            pem.readBase64fromText(certs_only_pem_text))
+
+        self.assertEqual(1, len(certificates))
+
+        certificate, rest = der_decoder(
+            certificates[0], asn1Spec=rfc5280.Certificate())
+
+        self.assertFalse(rest)
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
@@ -0,0 +1,268 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+from pyasn1.type import char
+
+from pyasn1_modules import certchain
+from pyasn1_modules import pem
+from pyasn1_modules import rfc5280
+from pyasn1_modules import x509name
+
+# Root A and Root B are self-signed and cross-certify each other,
+# Intermediate is issued by Root A and issues the leaf certificate
+
+rootA_pem_text = """\
+MIIBizCCATCgAwIBAgIBATAKBggqhkjOPQQDAjAjMRAwDgYDVQQKDAdFeGFtcGxl
+MQ8wDQYDVQQDDAZSb290IEEwIBcNMjYxMDE5MTYzNjEzWhgPMjEyNjA5MjUxNjM2
+MTNaMCMxEDAOBgNVBAoMB0V4YW1wbGUxDzANBgNVBAMMBlJvb3QgQTBZMBMGByqG
+SM49AgEGCCqGSM49AwEHA0IABKPXJfrre/kGXWtKFZwQCIaEFt7q6K67KcEJwEbl
++jpghFSh+Cc5YpYTOdwRXB70tNPSxFVeq+BYy964G+hm8CSjUzBRMB0GA1UdDgQW
+BBRG9YPMKJ7YIczTlGlEOEcoxJTdjzAfBgNVHSMEGDAWgBRG9YPMKJ7YIczTlGlE
+OEcoxJTdjzAPBgNVHRMBAf8EBTADAQH/MAoGCCqGSM49BAMCA0kAMEYCIQDPox/R
+ETceMgBLNYjPQPSjmVKXnVmL1+vwt0NYNbqqZQIhAPYFaJ3rtPaaVIyQERwmX/py
+qdRP/LDiPXxiOhfR03cG
+"""
+
+rootB_pem_text = """\
+MIIBijCCATCgAwIBAgIBAjAKBggqhkjOPQQDAjAjMRAwDgYDVQQKDAdFeGFtcGxl
+MQ8wDQYDVQQDDAZSb290IEIwIBcNMjYxMDE5MTYzNjEzWhgPMjEyNjA5MjUxNjM2
+MTNaMCMxEDAOBgNVBAoMB0V4YW1wbGUxDzANBgNVBAMMBlJvb3QgQjBZMBMGByqG
+SM49AgEGCCqGSM49AwEHA0IABH2rTTFOt7LlZWcKQlImqd87qe3jhaBDm4UktBfr
+gqTYXCIFO8DX7Q+93POTlunkLJwx7NtwEjLE4T6aGDZmpdyjUzBRMB0GA1UdDgQW
+BBRi1fZRN9rLS8BEWERYjEK8G4XnljAfBgNVHSMEGDAWgBRi1fZRN9rLS8BEWERY
+jEK8G4XnljAPBgNVHRMBAf8EBTADAQH/MAoGCCqGSM49BAMCA0gAMEUCIQDXNu6g
+obn0zBdM4ARIGYeAs+f9EhL+VxjtZIjJ1YkwIQIgVc2jgGqqQBbwicue3V6TSZhy
+hHNxpcY9UKaFvJzS5d4=
+"""
+
+intermediate_pem_text = """\
+MIIBoDCCAUagAwIBAgIBAzAKBggqhkjOPQQDAjAjMRAwDgYDVQQKDAdFeGFtcGxl
+MQ8wDQYDVQQDDAZSb290IEEwIBcNMjYxMDE5MTYzNjEzWhgPMjEyNjA5MjUxNjM2
+MTNaMCkxEDAOBgNVBAoMB0V4YW1wbGUxFTATBgNVBAMMDEludGVybWVkaWF0ZTBZ
+MBMGByqGSM49AgEGCCqGSM49AwEHA0IABCbPv66WVivZi4vfYMRjkuzINqre6OyI
+rPIT8zqYeYMqe0oWsx5rrqtbfF2F1NS/wmBjDd6WZB0pV2poXLjmsBOjYzBhMA8G
+A1UdEwEB/wQFMAMBAf8wDgYDVR0PAQH/BAQDAgEGMB0GA1UdDgQWBBQ+JxQtFym9
+4HIOjAlom18Fpq0zSjAfBgNVHSMEGDAWgBRG9YPMKJ7YIczTlGlEOEcoxJTdjzAK
+BggqhkjOPQQDAgNIADBFAiEA482oP+bpHuG7oxEK5oBjWblDJxGygnRAy/1ZP4ju
+BesCIDhxAXfNt8FhOZd3I5EGXlps2cYreW0mggUPNvRB5QQy
+"""
+
+crossA_pem_text = """\
+MIIBmjCCAUCgAwIBAgIBBDAKBggqhkjOPQQDAjAjMRAwDgYDVQQKDAdFeGFtcGxl
+MQ8wDQYDVQQDDAZSb290IEIwIBcNMjYxMDE5MTYzNjE0WhgPMjEyNjA5MjUxNjM2
+MTRaMCMxEDAOBgNVBAoMB0V4YW1wbGUxDzANBgNVBAMMBlJvb3QgQTBZMBMGByqG
+SM49AgEGCCqGSM49AwEHA0IABKPXJfrre/kGXWtKFZwQCIaEFt7q6K67KcEJwEbl
++jpghFSh+Cc5YpYTOdwRXB70tNPSxFVeq+BYy964G+hm8CSjYzBhMA8GA1UdEwEB
+/wQFMAMBAf8wDgYDVR0PAQH/BAQDAgEGMB0GA1UdDgQWBBRG9YPMKJ7YIczTlGlE
+OEcoxJTdjzAfBgNVHSMEGDAWgBRi1fZRN9rLS8BEWERYjEK8G4XnljAKBggqhkjO
+PQQDAgNIADBFAiEAidM8YzCfQwQLc/vPi9A2y5xGP77s2Gq63U58AD/ul1oCIHQe
+aX05RQC18D8spOWQuzfL2G1ZI5qgRvht4xnzTN3n
+"""
+
+crossB_pem_text = """\
+MIIBmzCCAUCgAwIBAgIBBTAKBggqhkjOPQQDAjAjMRAwDgYDVQQKDAdFeGFtcGxl
+MQ8wDQYDVQQDDAZSb290IEEwIBcNMjYxMDE5MTYzNjE0WhgPMjEyNjA5MjUxNjM2
+MTRaMCMxEDAOBgNVBAoMB0V4YW1wbGUxDzANBgNVBAMMBlJvb3QgQjBZMBMGByqG
+SM49AgEGCCqGSM49AwEHA0IABH2rTTFOt7LlZWcKQlImqd87qe3jhaBDm4UktBfr
+gqTYXCIFO8DX7Q+93POTlunkLJwx7NtwEjLE4T6aGDZmpdyjYzBhMA8GA1UdEwEB
+/wQFMAMBAf8wDgYDVR0PAQH/BAQDAgEGMB0GA1UdDgQWBBRi1fZRN9rLS8BEWERY
+jEK8G4XnljAfBgNVHSMEGDAWgBRG9YPMKJ7YIczTlGlEOEcoxJTdjzAKBggqhkjO
+PQQDAgNJADBGAiEAzkqnAxdlDVHiR7xw1ULChxY6j/7nli6Q08o0BgmyKKECIQCL
+CE88Yn5U9zWF035KxdONUoBRbCbFxhHwMlvPNixg3Q==
+"""
+
+leaf_pem_text = """\
+MIIBszCCAVqgAwIBAgIBBjAKBggqhkjOPQQDAjApMRAwDgYDVQQKDAdFeGFtcGxl
+MRUwEwYDVQQDDAxJbnRlcm1lZGlhdGUwIBcNMjYxMDE5MTYzNjE0WhgPMjEyNjA5
+MjUxNjM2MTRaMC0xEDAOBgNVBAoMB0V4YW1wbGUxGTAXBgNVBAMMEGxlYWYuZXhh
+bXBsZS5jb20wWTATBgcqhkjOPQIBBggqhkjOPQMBBwNCAARWIO78eH2N3D9r/+5i
+ZcElJS/gSoEUx4z6cmrpqsRyytEsp0YFAblqZGchYOONqFb07/KZQlGRpkc0KjbO
+UXTAo20wazAMBgNVHRMBAf8EAjAAMB0GA1UdDgQWBBTbaOouLwWk8nou6wONetUU
+4rEDTTAfBgNVHSMEGDAWgBQ+JxQtFym94HIOjAlom18Fpq0zSjAbBgNVHREEFDAS
+ghBsZWFmLmV4YW1wbGUuY29tMAoGCCqGSM49BAMCA0cAMEQCIEz7O662Jh+sOcct
+5/bxxtrjDDO0HMYyDprYwYqPWLQVAiAF/jVcyH9h3I2eOg6GrpJ4IEPX6J2Zde5S
+8hV5j/r3Lg==
+"""
+
+
+def _read(pem_text):
+    return pem.readBase64fromText(pem_text)
+
+
+class CertificateEntryTestCase(unittest.TestCase):
+    def testKeys(self):
+        entry = certchain.CertificateEntry(_read(leaf_pem_text))
+
+        leaf, rest = der_decoder(
+            _read(leaf_pem_text), asn1Spec=rfc5280.Certificate())
+
+        tbsCertificate = leaf['tbsCertificate']
+
+        self.assertEqual(der_encoder(tbsCertificate['subject']), entry.subject)
+        self.assertEqual(der_encoder(tbsCertificate['issuer']), entry.issuer)
+        self.assertFalse(entry.isSelfIssued)
+
+        intermediate = certchain.CertificateEntry(_read(intermediate_pem_text))
+
+        self.assertEqual(
+            intermediate.subjectKeyIdentifier, entry.authorityKeyIdentifier)
+        self.assertEqual(20, len(entry.subjectKeyIdentifier))
+        self.assertEqual(leaf, entry.certificate)
+
+    def testSelfIssued(self):
+        entry = certchain.CertificateEntry(_read(rootA_pem_text))
+
+        self.assertTrue(entry.isSelfIssued)
+        self.assertEqual(
+            entry.subjectKeyIdentifier, entry.authorityKeyIdentifier)
+
+    def testCrossCertificateIdentity(self):
+        root = certchain.CertificateEntry(_read(rootA_pem_text))
+        cross = certchain.CertificateEntry(_read(crossA_pem_text))
+
+        self.assertNotEqual(root, cross)
+        self.assertEqual(root.identity, cross.identity)
+
+    def testCanonicalNames(self):
+        entry = certchain.CertificateEntry(_read(leaf_pem_text))
+
+        self.assertEqual(
+            x509name.canonicalName(entry.subject), entry.canonicalSubject)
+        self.assertNotEqual(entry.subject, entry.canonicalSubject)
+
+    def testMalformed(self):
+        self.assertRaises(
+            error.PyAsn1Error, certchain.CertificateEntry, b'\x30\x03\x02\x01\x01')
+
+
+class CertificateStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.store = certchain.CertificateStore(
+            [_read(x) for x in (rootA_pem_text, rootB_pem_text,
+                                intermediate_pem_text, crossA_pem_text,
+                                crossB_pem_text)])
+
+        self.leaf = _read(leaf_pem_text)
+
+    def _subjects(self, chain):
+        return [entry.certificate['tbsCertificate']['serialNumber']
+                for entry in chain]
+
+    def testDuplicates(self):
+        certificate, rest = der_decoder(
+            _read(rootA_pem_text), asn1Spec=rfc5280.Certificate())
+
+        self.store.add(certificate)
+        self.store.add(_read(rootA_pem_text))
+
+        self.assertEqual(5, len(self.store))
+        self.assertTrue(certificate in self.store)
+        self.assertFalse(self.leaf in self.store)
+
+    def testFindIssuers(self):
+        issuers = self.store.findIssuers(self.leaf)
+
+        self.assertEqual([_read(intermediate_pem_text)],
+                         [x.substrate for x in issuers])
+
+        issuers = self.store.findIssuers(_read(intermediate_pem_text))
+
+        self.assertEqual(
+            set([_read(rootA_pem_text), _read(crossA_pem_text)]),
+            set([x.substrate for x in issuers]))
+
+    def testFindIssuersSelfIssued(self):
+        issuers = self.store.findIssuers(_read(rootA_pem_text))
+
+        self.assertEqual([_read(crossA_pem_text)],
+                         [x.substrate for x in issuers])
+
+    def testFindBySubject(self):
+        entry = certchain.CertificateEntry(_read(rootA_pem_text))
+
+        certificate, rest = der_decoder(
+            _read(rootA_pem_text), asn1Spec=rfc5280.Certificate())
+
+        self.assertEqual(
+            2, len(self.store.findBySubject(entry.subject)))
+        self.assertEqual(
+            2, len(self.store.findBySubject(
+                certificate['tbsCertificate']['subject'])))
+        self.assertEqual(
+            2, len(self.store.findBySubjectKeyIdentifier(
+                entry.subjectKeyIdentifier)))
+
+    def testFindBySubjectCanonical(self):
+        name = rfc5280.Name()
+
+        rdnSequence = name['rdnSequence']
+
+        for attrType, attrValue in ((rfc5280.id_at_organizationName, 'EXAMPLE'),
+                                    (rfc5280.id_at_commonName, ' root  a ')):
+            ava = rfc5280.AttributeTypeAndValue()
+            ava['type'] = attrType
+            ava['value'] = der_encoder(char.PrintableString(attrValue))
+
+            rdn = rfc5280.RelativeDistinguishedName()
+            rdn.append(ava)
+
+            rdnSequence.append(rdn)
+
+        self.assertEqual(2, len(self.store.findBySubject(name)))
+
+    def testBuildChains(self):
+        chains = list(self.store.buildChains(self.leaf))
+
+        self.assertEqual(
+            sorted([[6, 3, 1], [6, 3, 4, 2]]),
+            sorted(self._subjects(chain) for chain in chains))
+
+    def testBuildChainsWithAnchors(self):
+        anchors = certchain.CertificateStore([_read(rootB_pem_text)])
+
+        chains = list(self.store.buildChains(self.leaf, anchors))
+
+        self.assertEqual([[6, 3, 4, 2]], [self._subjects(x) for x in chains])
+
+    def testBuildChainsExternalAnchor(self):
+        store = certchain.CertificateStore([_read(intermediate_pem_text)])
+
+        anchors = certchain.CertificateStore([_read(rootA_pem_text)])
+
+        chains = list(store.buildChains(self.leaf, anchors))
+
+        self.assertEqual([[6, 3, 1]], [self._subjects(x) for x in chains])
+
+    def testBuildChainsCycle(self):
+        # no self-signed roots - only the A <-> B cross-certification loop
+        store = certchain.CertificateStore(
+            [_read(x) for x in (intermediate_pem_text, crossA_pem_text,
+                                crossB_pem_text)])
+
+        self.assertEqual([], list(store.buildChains(self.leaf)))
+
+    def testBuildChainsMaxDepth(self):
+        chains = list(self.store.buildChains(self.leaf, maxDepth=3))
+
+        self.assertEqual([[6, 3, 1]], [self._subjects(x) for x in chains])
+
+    def testAnchorItself(self):
+        chains = list(self.store.buildChains(_read(rootA_pem_text)))
+
+        self.assertEqual([[1]], [self._subjects(x) for x in chains])
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
@@ -0,0 +1,312 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import io
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+from pyasn1.type import univ
+
+from pyasn1_modules import cmc
+from pyasn1_modules import crmf
+from pyasn1_modules import oids
+from pyasn1_modules import pem
+from pyasn1_modules import rfc5652
+from pyasn1_modules import rfc6402
+from pyasn1_modules import tlv
+
+_sequenceTag = (0x00, 0x20, 16)
+
+
+def _sequence(*components):
+    return tlv.encodeTlv(_sequenceTag, b''.join(components))
+
+
+def _integer(number):
+    return der_encoder(univ.Integer(number))
+
+
+def _oid(oid):
+    return der_encoder(univ.ObjectIdentifier(oid))
+
+
+class PKIDataTestCase(unittest.TestCase):
+    # SignedData carrying PKIData with one control and one tcr request
+    pem_text = """\
+MIIEJQYJKoZIhvcNAQcCoIIEFjCCBBICAQMxCzAJBgUrDgMCGgUAMIIDAgYIKwYBBQUHDAKgggL0
+BIIC8DCCAuwweDB2AgECBgorBgEEAYI3CgoBMWUwYwIBADADAgEBMVkwVwYJKwYBBAGCNxUUMUow
+SAIBBQwZcGl0dWNoYTEuZW1lYS5ocHFjb3JwLm5ldAwMRU1FQVxwaXR1Y2hhDBpDTUNSZXFHZW5l
+cmF0b3IudnNob3N0LmV4ZTCCAmqgggJmAgEBMIICXzCCAcgCAQAwADCBnzANBgkqhkiG9w0BAQEF
+AAOBjQAwgYkCgYEA0jm7SSSm2wyEAzuNKtFZFJKo91SrJq9wQwEhEKHDavZwMQOm1rZ2PF8NWCEb
+PqrhToQ7rtiGLSZa4dF4bzgmBqQ9aoSfEX4jISt31Vy+skHidXjHHpbsjT24NPhrZgANivL7CxD6
+Ft+s7qS1gL4HRm2twQkqSwOLrE/q2QeXl2UCAwEAAaCCAR0wGgYKKwYBBAGCNw0CAzEMFgo2LjIu
+OTIwMC4yMD4GCSqGSIb3DQEJDjExMC8wHQYDVR0OBBYEFMW2skn88gxhONWZQA4sWGBDb68yMA4G
+A1UdDwEB/wQEAwIHgDBXBgkrBgEEAYI3FRQxSjBIAgEFDBlwaXR1Y2hhMS5lbWVhLmhwcWNvcnAu
+bmV0DAxFTUVBXHBpdHVjaGEMGkNNQ1JlcUdlbmVyYXRvci52c2hvc3QuZXhlMGYGCisGAQQBgjcN
+AgIxWDBWAgECHk4ATQBpAGMAcgBvAHMAbwBmAHQAIABTAHQAcgBvAG4AZwAgAEMAcgB5AHAAdABv
+AGcAcgBhAHAAaABpAGMAIABQAHIAbwB2AGkAZABlAHIDAQAwDQYJKoZIhvcNAQEFBQADgYEAJZlu
+mxjtCxSOQi27jsVdd3y8NSIlzNv0b3LqmzvAly6L+CstXcnuG2MPQqPH9R7tbJonGUniBQO9sQ7C
+KhYWj2gfhiEkSID82lV5chINVUFKoUlSiEhWr0tPGgvOaqdsKQcrHfzrsBbFkhDqrFSVy7Yivbnh
+qYszKrOjJKiiCPMwADAAMYH5MIH2AgEDgBTFtrJJ/PIMYTjVmUAOLFhgQ2+vMjAJBgUrDgMCGgUA
+oD4wFwYJKoZIhvcNAQkDMQoGCCsGAQUFBwwCMCMGCSqGSIb3DQEJBDEWBBTFTkK/OifaFjwqHiJu
+xM7qXcg/VzANBgkqhkiG9w0BAQEFAASBgKfC6jOi1Wgy4xxDCQVK9+e5tktL8wE/j2cb9JSqq+aU
+5UxEgXEw7q7BoYZCAzcxMRriGzakXr8aXHcgkRJ7XcFvLPUjpmGg9SOZ2sGW4zQdWAwImN/i8loc
+xicQmJP+VoMHo/ZpjFY9fYCjNZUArgKsEwK/s+p9yrVVeB1Nf8Mn
+"""
+
+    def setUp(self):
+        self.contentInfo = pem.readBase64fromText(self.pem_text)
+
+        contentInfo, rest = der_decoder(
+            self.contentInfo, asn1Spec=rfc5652.ContentInfo())
+        signedData, rest = der_decoder(
+            contentInfo['content'], asn1Spec=rfc5652.SignedData())
+
+        self.pkiData = signedData['encapContentInfo']['eContent'].asOctets()
+
+    def _outerPKIData(self, controls=300):
+        # [1] IMPLICIT CertReqMsg of TaggedRequest
+        certReqMsg = crmf.CertReqBuilder().certReqMsg(
+            5, popo=crmf.raVerified)
+        crm = b'\xa1' + certReqMsg[1:]
+
+        orm = tlv.encodeTlv((0x80, 0x20, 2), _integer(6) + _oid(
+            '1.3.6.1.4.1.99999.1') + der_encoder(univ.Null('')))
+
+        controlSequence = [
+            _sequence(_integer(100 + index),
+                      _oid(rfc6402.id_cmc_transactionId),
+                      tlv.encodeTlv((0x00, 0x20, 17), _integer(index)))
+            for index in range(controls)]
+
+        cmsSequence = [_sequence(_integer(10), self.contentInfo)]
+
+        otherMsgSequence = [_sequence(_integer(20), _oid(
+            '1.3.6.1.4.1.99999.2'), der_encoder(univ.OctetString(b'x')))]
+
+        return _sequence(
+            _sequence(*controlSequence), _sequence(crm, orm),
+            _sequence(*cmsSequence), _sequence(*otherMsgSequence))
+
+    def testIndex(self):
+        index = cmc.PKIDataIndex(self.pkiData)
+
+        self.assertEqual(2, len(index))
+        self.assertEqual([2], [x.bodyPartID for x in index.controls])
+        self.assertEqual([1], [x.bodyPartID for x in index.requests])
+        self.assertEqual('tcr', index[1].requestType)
+        self.assertEqual('controlSequence', index[2].sequence)
+        self.assertEqual(
+            (1, 3, 6, 1, 4, 1, 311, 10, 10, 1), index[2].typeId)
+        self.assertEqual(
+            [index[2]], index.findByType('1.3.6.1.4.1.311.10.10.1'))
+        self.assertFalse(index.cmsContents)
+        self.assertFalse(index.otherMsgs)
+
+    def testValue(self):
+        index = cmc.PKIDataIndex(self.pkiData)
+
+        pkiData, rest = der_decoder(self.pkiData, asn1Spec=rfc6402.PKIData())
+
+        tcr = index[1].value
+
+        self.assertEqual(der_encoder(pkiData['reqSequence'][0]),
+                         der_encoder(tcr))
+        self.assertTrue(tcr is index[1].value)
+        self.assertEqual(
+            der_encoder(pkiData['reqSequence'][0]), index[1].substrate)
+
+        control = index[2].value
+
+        self.assertEqual(2, control['bodyPartID'])
+
+    def testOuterIndex(self):
+        substrate = self._outerPKIData()
+
+        pkiData, rest = der_decoder(substrate, asn1Spec=rfc6402.PKIData())
+
+        self.assertFalse(rest)
+        self.assertEqual(substrate, der_encoder(pkiData))
+
+        index = cmc.PKIDataIndex(substrate)
+
+        self.assertEqual(304, len(index))
+        self.assertEqual(300, len(index.findByType(
+            rfc6402.id_cmc_transactionId)))
+        self.assertEqual('crm', index[5].requestType)
+        self.assertEqual('orm', index[6].requestType)
+        self.assertEqual(rfc5652.id_signedData, index[10].typeId)
+        self.assertEqual(
+            univ.ObjectIdentifier('1.3.6.1.4.1.99999.2'), index[20].typeId)
+        self.assertEqual(
+            299, index[399].value['attrValues'][0])
+        self.assertEqual(
+            5, index[5].value['crm']['certReq']['certReqId'])
+        self.assertIn(250, index)
+        self.assertNotIn(400, index)
+
+    def testResolve(self):
+        index = cmc.PKIDataIndex(self._outerPKIData(controls=3))
+
+        self.assertTrue(index.resolve(5) is index[5])
+        self.assertTrue(index.resolve([10]) is index[10])
+
+        tcr = index.resolve([10, 1])
+
+        self.assertEqual('tcr', tcr.requestType)
+        self.assertTrue(tcr is index[10].nested[1])
+
+        path = rfc6402.BodyPartPath()
+        path.extend([10, 2])
+
+        reference = rfc6402.BodyPartReference()
+        reference['bodyPartPath'] = path
+
+        self.assertTrue(index.resolve(reference) is index[10].nested[2])
+
+        reference = rfc6402.BodyPartReference()
+        reference['bodyPartID'] = 102
+
+        self.assertTrue(index.resolve(reference) is index[102])
+
+    def testResolveMissing(self):
+        index = cmc.PKIDataIndex(self._outerPKIData(controls=3))
+
+        self.assertRaises(error.PyAsn1Error, index.resolve, 7)
+        self.assertRaises(error.PyAsn1Error, index.resolve, [10, 7])
+        self.assertRaises(error.PyAsn1Error, index.resolve, [5, 1])
+        self.assertRaises(error.PyAsn1Error, index.resolve, [])
+        self.assertEqual(None, index[5].nested)
+
+    def testMalformedNested(self):
+        setOf = tlv.encodeTlv(tlv.tagSet, b'')
+
+        for encapContentInfo in (
+                _sequence(),
+                _sequence(_integer(1), _integer(2)),
+                _sequence(_oid(rfc6402.id_cct_PKIData), tlv.encodeTlv(
+                    (0x80, 0x20, 0), _integer(1)))):
+            signedData = tlv.encodeTlv((0x80, 0x20, 0), _sequence(
+                _integer(3), setOf, encapContentInfo, setOf))
+
+            contentInfo = _sequence(_oid(rfc5652.id_signedData), signedData)
+
+            pkiData = _sequence(
+                _sequence(), _sequence(),
+                _sequence(_sequence(_integer(1), contentInfo)), _sequence())
+
+            index = cmc.PKIDataIndex(pkiData)
+
+            self.assertRaises(error.PyAsn1Error, index.resolve, [1, 2])
+
+    def testDuplicateBodyPartID(self):
+        substrate = _sequence(
+            _sequence(*[_sequence(_integer(1), _oid(
+                rfc6402.id_cmc_transactionId), tlv.encodeTlv(
+                (0x00, 0x20, 17), _integer(0)))] * 2),
+            _sequence(), _sequence(), _sequence())
+
+        self.assertRaises(error.PyAsn1Error, cmc.PKIDataIndex, substrate)
+
+
+class PKIResponseEncoderTestCase(unittest.TestCase):
+
+    def _statusInfoV2(self, bodyPartID):
+        statusInfo = rfc6402.CMCStatusInfoV2()
+        statusInfo['cMCStatus'] = 0
+
+        reference = rfc6402.BodyPartReference()
+        reference['bodyPartID'] = bodyPartID
+
+        statusInfo['bodyList'].append(reference)
+
+        return statusInfo
+
+    def testEncode(self):
+        responseEncoder = cmc.PKIResponseEncoder()
+
+        pkiResponse = rfc6402.PKIResponse()
+
+        for bodyPartID in range(1, 201):
+            statusInfo = self._statusInfoV2(bodyPartID + 1000)
+
+            responseEncoder.addControl(
+                bodyPartID, rfc6402.id_cmc_statusInfoV2, [statusInfo])
+
+            taggedAttribute = rfc6402.TaggedAttribute()
+            taggedAttribute['bodyPartID'] = bodyPartID
+            taggedAttribute['attrType'] = rfc6402.id_cmc_statusInfoV2
+            taggedAttribute['attrValues'].append(der_encoder(statusInfo))
+
+            pkiResponse['controlSequence'].append(taggedAttribute)
+
+        contentInfo = rfc5652.ContentInfo()
+        contentInfo['contentType'] = rfc5652.id_data
+        contentInfo['content'] = der_encoder(univ.OctetString(b'data'))
+
+        responseEncoder.addContentInfo(300, der_encoder(contentInfo))
+
+        taggedContentInfo = rfc6402.TaggedContentInfo()
+        taggedContentInfo['bodyPartID'] = 300
+        taggedContentInfo['contentInfo'] = contentInfo
+
+        pkiResponse['cmsSequence'].append(taggedContentInfo)
+
+        responseEncoder.addOtherMsg(
+            400, '1.3.6.1.4.1.99999.2', univ.OctetString(b'x'))
+
+        otherMsg = rfc6402.OtherMsg()
+        otherMsg['bodyPartID'] = 400
+        otherMsg['otherMsgType'] = univ.ObjectIdentifier(
+            '1.3.6.1.4.1.99999.2')
+        otherMsg['otherMsgValue'] = der_encoder(univ.OctetString(b'x'))
+
+        pkiResponse['otherMsgSequence'].append(otherMsg)
+
+        substrate = der_encoder(pkiResponse)
+
+        self.assertEqual(substrate, responseEncoder.getvalue())
+        self.assertEqual(len(substrate), len(responseEncoder))
+
+        stream = io.BytesIO()
+
+        self.assertEqual(len(substrate), responseEncoder.write(stream))
+        self.assertEqual(substrate, stream.getvalue())
+
+    def testSortedAttrValues(self):
+        responseEncoder = cmc.PKIResponseEncoder()
+        responseEncoder.addControl(
+            1, oids.oidKey(rfc6402.id_cmc_senderNonce),
+            [univ.OctetString(b'b'), univ.OctetString(b'a')])
+
+        pkiResponse, rest = der_decoder(
+            responseEncoder.getvalue(), asn1Spec=rfc6402.PKIResponse())
+
+        self.assertEqual(
+            responseEncoder.getvalue(), der_encoder(pkiResponse))
+
+    def testEmpty(self):
+        self.assertEqual(
+            b'\x30\x06\x30\x00\x30\x00\x30\x00',
+            cmc.PKIResponseEncoder().getvalue())
+
+    def testDuplicateBodyPartID(self):
+        responseEncoder = cmc.PKIResponseEncoder()
+        responseEncoder.addOtherMsg(1, '1.3.6.1.4.1.99999.2', b'\x05\x00')
+
+        self.assertRaises(
+            error.PyAsn1Error, responseEncoder.addContentInfo, 1,
+            b'\x30\x00')
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
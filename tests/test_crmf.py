@@ -0,0 +1,206 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+from pyasn1.type import tag
+from pyasn1.type import univ
+
+from pyasn1_modules import crmf
+from pyasn1_modules import pem
+from pyasn1_modules import rfc3280
+from pyasn1_modules import rfc4211
+
+
+class CertReqBuilderTestCase(unittest.TestCase):
+    pem_text = """\
+MIIBozCCAZ8wggEFAgUAwTnj2jCByoABAqURMA8xDTALBgNVBAMTBHVzZXKmgZ8w
+DQYJKoZIhvcNAQEBBQADgY0AMIGJAoGBAJ6ZQ2cYbn/lFsmBOlRltbRbFQUvvE0Q
+nbopOu1kC7Bmaaz7QTx8nxeiHi4m7uxCbGGxHNoGCt7EmdG8eZUBNAcHyGlXrJdm
+0z3/uNEGiBHq+xB8FnFJCA5EIJ3RWFnlbu9otSITLxWK7c5+/NHmWM+yaeHD/f/h
+rp01c/8qXZfZAgMBAAGpEDAOBgNVHQ8BAf8EBAMCBeAwLzASBgkrBgEFBQcFAQEM
+BTExMTExMBkGCSsGAQUFBwUBAgwMc2VydmVyX21hZ2ljoYGTMA0GCSqGSIb3DQEB
+BQUAA4GBAEI3KNEvTq/n1kNVhNhPkovk1AZxyJrN1u1+7Gkc4PLjWwjLOjcEVWt4
+AajUk/gkIJ6bbeO+fZlMjHfPSDKcD6AV2hN+n72QZwfzcw3icNvBG1el9EU4XfIm
+xfu5YVWi81/fw8QQ6X6YGHFQkomLd7jxakVyjxSng9BhO6GpjJNF
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pem_text)
+        self.asn1Object, rest = der_decoder(
+            self.substrate, asn1Spec=rfc4211.CertReqMessages())
+
+        self.certReqMsg = self.asn1Object[0]
+        self.certReq = self.certReqMsg['certReq']
+        certTemplate = self.certReq['certTemplate']
+
+        self.subject = der_encoder(
+            certTemplate['subject'], asn1Spec=rfc3280.Name())
+        self.publicKey = der_encoder(
+            certTemplate['publicKey'],
+            asn1Spec=rfc3280.SubjectPublicKeyInfo())
+
+        self.builder = crmf.CertReqBuilder(
+            certTemplate, controls=self.certReq['controls'])
+
+    def testReassemble(self):
+        signature = self.certReqMsg['popo']['signature']
+
+        popo = crmf.encodePOPOSigningKey(
+            signature['algorithmIdentifier'],
+            signature['signature'].asOctets())
+
+        self.assertEqual(
+            der_encoder(self.certReqMsg['popo']), popo)
+
+        substrate = self.builder.build(
+            [(self.certReq['certReqId'], self.subject, self.publicKey, popo)])
+
+        self.assertEqual(self.substrate, substrate)
+
+    def testCertRequest(self):
+        for certReqId in (0, 1, 127, 128, 255, 256, -1, -129, -200, 2 ** 70):
+            certReq, rest = der_decoder(
+                der_encoder(self.certReq), asn1Spec=rfc4211.CertRequest())
+            certReq['certReqId'] = certReqId
+
+            self.assertEqual(
+                der_encoder(certReq),
+                self.builder.certRequest(
+                    certReqId, self.subject, self.publicKey))
+
+    def testMinimalInteger(self):
+        substrate = self.builder.certRequest(-128)
+
+        self.assertEqual(b'\x02\x01\x80', substrate[2:5])
+
+    def testPyAsn1Values(self):
+        self.assertEqual(
+            der_encoder(self.certReq),
+            self.builder.certRequest(
+                self.certReq['certReqId'],
+                der_decoder(self.subject, asn1Spec=rfc3280.Name())[0],
+                der_decoder(self.publicKey,
+                            asn1Spec=rfc3280.SubjectPublicKeyInfo())[0]))
+
+    def testOmittedFields(self):
+        certTemplate = rfc4211.CertTemplate()
+        certTemplate['version'] = 2
+
+        builder = crmf.CertReqBuilder(certTemplate)
+
+        certReqMsg = rfc4211.CertReqMsg()
+        certReqMsg['certReq']['certReqId'] = 7
+        certReqMsg['certReq']['certTemplate'] = certTemplate
+        certReqMsg['popo']['raVerified'] = univ.Null('').subtype(
+            implicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0))
+
+        self.assertEqual(
+            der_encoder(certReqMsg),
+            builder.certReqMsg(7, popo=crmf.raVerified))
+
+    def testBatch(self):
+        requests = [(certReqId, self.subject, self.publicKey, crmf.raVerified)
+                    for certReqId in range(300)]
+
+        substrate = self.builder.build(requests)
+
+        asn1Object, rest = der_decoder(
+            substrate, asn1Spec=rfc4211.CertReqMessages())
+
+        self.assertFalse(rest)
+        self.assertEqual(300, len(asn1Object))
+        self.assertEqual(299, asn1Object[299]['certReq']['certReqId'])
+        self.assertEqual(substrate, der_encoder(asn1Object))
+
+    def testEmptyBatch(self):
+        self.assertRaises(error.PyAsn1Error, self.builder.build, [])
+
+    def testMalformedPublicKey(self):
+        self.assertRaises(
+            error.PyAsn1Error, self.builder.certRequest,
+            1, self.subject, b'\x04\x00')
+
+
+class POPOSigningKeyInputTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.publicKey = rfc3280.SubjectPublicKeyInfo()
+        self.publicKey['algorithm']['algorithm'] = univ.ObjectIdentifier(
+            '1.2.840.10045.2.1')
+        self.publicKey['subjectPublicKey'] = univ.BitString(hexValue='0400')
+
+        self.algorithm = rfc3280.AlgorithmIdentifier()
+        self.algorithm['algorithm'] = univ.ObjectIdentifier(
+            '1.2.840.10045.4.3.2')
+
+    def testSender(self):
+        poposkInput = rfc4211.POPOSigningKeyInput()
+        sender = poposkInput['authInfo']['sender']
+        sender['dNSName'] = 'ra.example.com'
+        poposkInput['publicKey'] = self.publicKey
+
+        generalName = rfc3280.GeneralName()
+        generalName['dNSName'] = 'ra.example.com'
+
+        self.assertEqual(
+            der_encoder(poposkInput),
+            crmf.encodePOPOSigningKeyInput(
+                der_encoder(self.publicKey), sender=generalName))
+
+    def testPublicKeyMAC(self):
+        publicKeyMAC = rfc4211.PKMACValue()
+        publicKeyMAC['algId']['algorithm'] = univ.ObjectIdentifier(
+            '1.2.840.113533.7.66.13')
+        publicKeyMAC['value'] = univ.BitString(hexValue='00112233')
+
+        poposkInput = rfc4211.POPOSigningKeyInput()
+        poposkInput['authInfo']['publicKeyMAC'] = publicKeyMAC
+        poposkInput['publicKey'] = self.publicKey
+
+        self.assertEqual(
+            der_encoder(poposkInput),
+            crmf.encodePOPOSigningKeyInput(
+                self.publicKey, publicKeyMAC=publicKeyMAC))
+
+    def testAuthInfo(self):
+        self.assertRaises(
+            error.PyAsn1Error, crmf.encodePOPOSigningKeyInput,
+            self.publicKey)
+
+    def testPOPOSigningKey(self):
+        generalName = rfc3280.GeneralName()
+        generalName['dNSName'] = 'ra.example.com'
+
+        poposkInput = crmf.encodePOPOSigningKeyInput(
+            self.publicKey, sender=generalName)
+
+        popo = crmf.encodePOPOSigningKey(
+            self.algorithm, b'\x01\x02', poposkInput=poposkInput)
+
+        asn1Object, rest = der_decoder(
+            popo, asn1Spec=rfc4211.ProofOfPossession())
+
+        self.assertFalse(rest)
+        self.assertEqual(popo, der_encoder(asn1Object))
+
+        signature = asn1Object['signature']
+
+        self.assertEqual(
+            'ra.example.com',
+            signature['poposkInput']['authInfo']['sender']['dNSName'])
+        self.assertEqual(b'\x01\x02', signature['signature'].asOctets())
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
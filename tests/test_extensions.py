@@ -0,0 +1,238 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+from pyasn1.type import univ
+
+from pyasn1_modules import extensions
+from pyasn1_modules import pem
+from pyasn1_modules import rfc2986
+from pyasn1_modules import rfc5280
+from pyasn1_modules import tlv
+
+
+class CertificateTestCase(unittest.TestCase):
+    # subjectAltName, subjectKeyIdentifier, authorityKeyIdentifier
+    pem_text = """\
+MIICNjCCAdugAwIBAgIBCDAKBggqhkjOPQQDAjApMRAwDgYDVQQKDAdFeGFtcGxl
+MRUwEwYDVQQDDAxJbnRlcm1lZGlhdGUwIBcNMjYxMDE5MTY0MjU5WhgPMjEyNjA5
+MjUxNjQyNTlaMFsxCzAJBgNVBAYTAlVTMRAwDgYDVQQKDAdFeGFtcGxlMRgwFgYD
+VQQDDA93d3cuZXhhbXBsZS5jb20xIDAeBgkqhkiG9w0BCQEWEWFkbWluQGV4YW1w
+bGUuY29tMFkwEwYHKoZIzj0CAQYIKoZIzj0DAQcDQgAEViDu/Hh9jdw/a//uYmXB
+JSUv4EqBFMeM+nJq6arEcsrRLKdGBQG5amRnIWDjjahW9O/ymUJRkaZHNCo2zlF0
+wKOBvzCBvDB6BgNVHREEczBxgg93d3cuZXhhbXBsZS5jb22CEG1haWwuZXhhbXBs
+ZS5vcmeHBMAAAgqHECABDbgAAAAAAAAAAAAAAAGBEGpvaG5AZXhhbXBsZS5jb22G
+Imh0dHBzOi8vaG9zdC5leGFtcGxlLmNvbTo4NDQzL3BhdGgwHQYDVR0OBBYEFNto
+6i4vBaTyei7rA4161RTisQNNMB8GA1UdIwQYMBaAFD4nFC0XKb3gcg6MCWibXwWm
+rTNKMAoGCCqGSM49BAMCA0kAMEYCIQCSg5eoZfqOQyPIYMzWp3hGc3phoLgc+3lA
+hgEHhoVr8wIhANbRzwICEHLrhDjmrwlCME07z4qqV8XW5PPLuSfHJEMI
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pem_text)
+        self.index = extensions.ExtensionIndex.fromCertificate(self.substrate)
+
+    def testIndex(self):
+        self.assertEqual(3, len(self.index))
+        self.assertTrue(rfc5280.id_ce_subjectAltName in self.index)
+        self.assertTrue('2.5.29.14' in self.index)
+        self.assertTrue((2, 5, 29, 35) in self.index)
+        self.assertFalse(rfc5280.id_ce_basicConstraints in self.index)
+        self.assertEqual(
+            set([rfc5280.id_ce_subjectAltName,
+                 rfc5280.id_ce_subjectKeyIdentifier,
+                 rfc5280.id_ce_authorityKeyIdentifier]),
+            set(self.index.keys()))
+
+    def testCritical(self):
+        self.assertFalse(self.index.isCritical(rfc5280.id_ce_subjectAltName))
+
+    def testDecodedCertificate(self):
+        certificate, rest = der_decoder(
+            self.substrate, asn1Spec=rfc5280.Certificate())
+
+        index = extensions.ExtensionIndex.fromCertificate(certificate)
+
+        for extension in certificate['tbsCertificate']['extensions']:
+            self.assertEqual(
+                extension['extnValue'],
+                index.getRawValue(extension['extnID']))
+
+    def testValue(self):
+        value = self.index.getValue(rfc5280.id_ce_subjectAltName)
+
+        self.assertTrue(isinstance(value, rfc5280.SubjectAltName))
+        self.assertEqual('www.example.com', value[0]['dNSName'])
+        self.assertTrue(
+            value is self.index.getValue(rfc5280.id_ce_subjectAltName))
+
+    def testExplicitSpec(self):
+        value = self.index.getValue(
+            rfc5280.id_ce_subjectKeyIdentifier, univ.OctetString())
+
+        self.assertEqual(20, len(value))
+
+    def testMissing(self):
+        self.assertRaises(
+            KeyError, self.index.getValue, rfc5280.id_ce_basicConstraints)
+        self.assertEqual(
+            None, self.index.get(rfc5280.id_ce_basicConstraints))
+
+    def testNoExtensions(self):
+        certificate, rest = der_decoder(
+            self.substrate, asn1Spec=rfc5280.Certificate())
+
+        certificate['tbsCertificate']['extensions'].reset()
+
+        index = extensions.ExtensionIndex.fromCertificate(certificate)
+
+        self.assertEqual(0, len(index))
+
+    def testOidKey(self):
+        self.assertTrue(b'\x55\x1d\x11' in self.index)
+
+
+class CertificateListTestCase(unittest.TestCase):
+    # crlExtensions: authorityKeyIdentifier, cRLNumber 4096
+    # revoked: 6 (keyCompromise), 8
+    pem_text = """\
+MIIBHTCBxAIBATAKBggqhkjOPQQDAjApMRAwDgYDVQQKDAdFeGFtcGxlMRUwEwYD
+VQQDDAxJbnRlcm1lZGlhdGUXDTI2MTAxOTE2NDUwN1oYDzIxMjYwOTI1MTY0NTA3
+WjA2MCACAQYXDTI2MTAxOTE2NDUwN1owDDAKBgNVHRUEAwoBATASAgEIFw0yNjEw
+MTkxNjQ1MDdaoDAwLjAfBgNVHSMEGDAWgBQ+JxQtFym94HIOjAlom18Fpq0zSjAL
+BgNVHRQEBAICEAAwCgYIKoZIzj0EAwIDSAAwRQIhAPUwLAOOpTwVS64MDPGzA3lS
+rsrE2/ALoVyR2T+efKWFAiA62hxuDtokmZ2MSy5NlUdsrug7rCLLfF8QKZrj5g+C
+Pw==
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pem_text)
+
+    def testCrlExtensions(self):
+        index = extensions.ExtensionIndex.fromCertificateList(self.substrate)
+
+        self.assertEqual(2, len(index))
+        self.assertEqual(4096, index.getValue(rfc5280.id_ce_cRLNumber))
+
+    def testTBSCertList(self):
+        certificateList, rest = der_decoder(
+            self.substrate, asn1Spec=rfc5280.CertificateList())
+
+        index = extensions.ExtensionIndex.fromCertificateList(
+            certificateList['tbsCertList'])
+
+        self.assertEqual(4096, index.getValue(rfc5280.id_ce_cRLNumber))
+
+    def testCrlEntries(self):
+        entries = list(extensions.iterCrlEntries(self.substrate))
+
+        self.assertEqual([6, 8], [serialNumber for serialNumber, _ in entries])
+
+        index = entries[0][1]
+
+        self.assertEqual(1, len(index))
+        self.assertEqual(
+            'keyCompromise', str(index.getValue(rfc5280.id_ce_cRLReasons)))
+        self.assertEqual(0, len(entries[1][1]))
+
+    def testCrlEntry(self):
+        certificateList, rest = der_decoder(
+            self.substrate, asn1Spec=rfc5280.CertificateList())
+
+        revokedCertificate = certificateList['tbsCertList']['revokedCertificates'][0]
+
+        index = extensions.ExtensionIndex.fromCrlEntry(revokedCertificate)
+
+        self.assertEqual(1, index.getValue(rfc5280.id_ce_cRLReasons))
+
+    def testNoRevokedCertificates(self):
+        certificateList, rest = der_decoder(
+            self.substrate, asn1Spec=rfc5280.CertificateList())
+
+        certificateList['tbsCertList']['revokedCertificates'].reset()
+
+        self.assertEqual(
+            [], list(extensions.iterCrlEntries(der_encoder(certificateList))))
+
+
+class CertificationRequestTestCase(unittest.TestCase):
+    # subjectAltName, critical basicConstraints
+    pem_text = """\
+MIIBEDCBtwIBADAaMRgwFgYDVQQDDA9jc3IuZXhhbXBsZS5jb20wWTATBgcqhkjO
+PQIBBggqhkjOPQMBBwNCAARWIO78eH2N3D9r/+5iZcElJS/gSoEUx4z6cmrpqsRy
+ytEsp0YFAblqZGchYOONqFb07/KZQlGRpkc0KjbOUXTAoDswOQYJKoZIhvcNAQkO
+MSwwKjAaBgNVHREEEzARgg9jc3IuZXhhbXBsZS5jb20wDAYDVR0TAQH/BAIwADAK
+BggqhkjOPQQDAgNIADBFAiEAkEWNy7+3DfpoGrNAOod8OgrHQO4WgXDAPIEBEsFQ
+YH8CIHyxu54aGQXRhBvzVs+kvQBSkuz9AWz3nNTUOFTBlb6p
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pem_text)
+
+    def testExtensionRequest(self):
+        index = extensions.ExtensionIndex.fromCertificationRequest(
+            self.substrate)
+
+        self.assertEqual(2, len(index))
+        self.assertTrue(index.isCritical(rfc5280.id_ce_basicConstraints))
+        self.assertFalse(
+            index.getValue(rfc5280.id_ce_basicConstraints)['cA'])
+
+    def testDecodedRequest(self):
+        certificationRequest, rest = der_decoder(
+            self.substrate, asn1Spec=rfc2986.CertificationRequest())
+
+        index = extensions.ExtensionIndex.fromCertificationRequest(
+            certificationRequest)
+
+        self.assertTrue(rfc5280.id_ce_subjectAltName in index)
+
+
+class ExtensionIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        extension = rfc5280.Extension()
+        extension['extnID'] = univ.ObjectIdentifier('1.3.6.1.4.1.99999.1')
+        extension['critical'] = True
+        extension['extnValue'] = der_encoder(univ.Integer(7))
+
+        extns = rfc5280.Extensions()
+        extns.append(extension)
+
+        self.substrate = der_encoder(extns)
+
+        self.index = extensions.ExtensionIndex(
+            self.substrate, tlv.readTlv(self.substrate))
+
+    def testUnknownExtension(self):
+        self.assertTrue(self.index.isCritical('1.3.6.1.4.1.99999.1'))
+        self.assertRaises(
+            error.PyAsn1Error, self.index.getValue, '1.3.6.1.4.1.99999.1')
+        self.assertEqual(7, self.index.getValue(
+            '1.3.6.1.4.1.99999.1', asn1Spec=univ.Integer()))
+
+    def testDuplicateExtension(self):
+        extns, rest = der_decoder(
+            self.substrate, asn1Spec=rfc5280.Extensions())
+
+        extns.append(extns[0])
+
+        substrate = der_encoder(extns)
+
+        index = extensions.ExtensionIndex(substrate, tlv.readTlv(substrate))
+
+        self.assertRaises(error.PyAsn1Error, len, index)
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
@@ -0,0 +1,245 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import sys
+import threading
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+from pyasn1.type import univ
+
+from pyasn1_modules import frozen
+from pyasn1_modules import oids
+from pyasn1_modules import pem
+from pyasn1_modules import rfc3279
+from pyasn1_modules import rfc5280
+
+
+class FrozenTestCase(unittest.TestCase):
+    pem_text = """\
+MIIC5zCCAlACAQEwDQYJKoZIhvcNAQEFBQAwgbsxJDAiBgNVBAcTG1ZhbGlDZXJ0
+IFZhbGlkYXRpb24gTmV0d29yazEXMBUGA1UEChMOVmFsaUNlcnQsIEluYy4xNTAz
+BgNVBAsTLFZhbGlDZXJ0IENsYXNzIDMgUG9saWN5IFZhbGlkYXRpb24gQXV0aG9y
+aXR5MSEwHwYDVQQDExhodHRwOi8vd3d3LnZhbGljZXJ0LmNvbS8xIDAeBgkqhkiG
+9w0BCQEWEWluZm9AdmFsaWNlcnQuY29tMB4XDTk5MDYyNjAwMjIzM1oXDTE5MDYy
+NjAwMjIzM1owgbsxJDAiBgNVBAcTG1ZhbGlDZXJ0IFZhbGlkYXRpb24gTmV0d29y
+azEXMBUGA1UEChMOVmFsaUNlcnQsIEluYy4xNTAzBgNVBAsTLFZhbGlDZXJ0IENs
+YXNzIDMgUG9saWN5IFZhbGlkYXRpb24gQXV0aG9yaXR5MSEwHwYDVQQDExhodHRw
+Oi8vd3d3LnZhbGljZXJ0LmNvbS8xIDAeBgkqhkiG9w0BCQEWEWluZm9AdmFsaWNl
+cnQuY29tMIGfMA0GCSqGSIb3DQEBAQUAA4GNADCBiQKBgQDjmFGWHOjVsQaBalfD
+cnWTq8+epvzzFlLWLU2fNUSoLgRNB0mKOCn1dzfnt6td3zZxFJmP3MKS8edgkpfs
+2Ejcv8ECIMYkpChMMFp2bbFc893enhBxoYjHW5tBbcqwuI4V7q0zK89HBFx1cQqY
+JJgpp0lZpd34t0NiYfPT4tBVPwIDAQABMA0GCSqGSIb3DQEBBQUAA4GBAFa7AliE
+Zwgs3x/be0kz9dNnnfS0ChCzycUs4pJqcXgn8nCDQtM+z6lU9PHYkhaM0QTLS6vJ
+n0WuPIqpsHEzXcjFV9+vqDWzf4mH6eglkrh/hXqu1rweN1gqZ8mRzyqBPu3GOd/A
+PhmcGcwTTYJBtYze4D1gCCAPRX5ron+jjBXu
+"""
+
+    crl_pem_text = """\
+MIIBVjCBwAIBATANBgkqhkiG9w0BAQUFADB+MQswCQYDVQQGEwJBVTETMBEGA1UE
+CBMKU29tZS1TdGF0ZTEhMB8GA1UEChMYSW50ZXJuZXQgV2lkZ2l0cyBQdHkgTHRk
+MRUwEwYDVQQDEwxzbm1wbGFicy5jb20xIDAeBgkqhkiG9w0BCQEWEWluZm9Ac25t
+cGxhYnMuY29tFw0xMjA0MTExMzQwNTlaFw0xMjA1MTExMzQwNTlaoA4wDDAKBgNV
+HRQEAwIBATANBgkqhkiG9w0BAQUFAAOBgQC1D/wwnrcY/uFBHGc6SyoYss2kn+nY
+RTwzXmmldbNTCQ03x5vkWGGIaRJdN8QeCzbEi7gpgxgpxAx6Y5WkxkMQ1UPjNM5n
+DGVDOtR0dskFrrbHuNpWqWrDaBN0/ryZiWKjr9JRbrpkHgVY29I1gLooQ6IHuKHY
+vjnIhxTFoCb5vA==
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pem_text)
+        self.crlSubstrate = pem.readBase64fromText(self.crl_pem_text)
+
+    def testDecode(self):
+        certificate = frozen.decode(self.substrate, rfc5280.Certificate())
+
+        self.assertTrue(isinstance(certificate, frozen.FrozenSequence))
+        self.assertTrue(certificate.asn1Type.isSameTypeWith(
+            rfc5280.Certificate()))
+        self.assertEqual(
+            ['tbsCertificate', 'signatureAlgorithm', 'signature'],
+            certificate.keys())
+
+        tbsCertificate = certificate['tbsCertificate']
+
+        # absent DEFAULT
+        self.assertEqual(0, tbsCertificate['version'])
+
+        self.assertEqual(1, tbsCertificate['serialNumber'])
+        self.assertTrue(tbsCertificate[1] is tbsCertificate['serialNumber'])
+        self.assertEqual('rdnSequence', tbsCertificate['issuer'].getName())
+        self.assertTrue(isinstance(
+            tbsCertificate['issuer']['rdnSequence'], frozen.FrozenSequenceOf))
+        self.assertTrue(tbsCertificate['extensions'] is None)
+        self.assertTrue(tbsCertificate.get('extensions') is None)
+        self.assertFalse('extensions' in tbsCertificate)
+        self.assertTrue('subject' in tbsCertificate)
+
+        self.assertRaises(KeyError, lambda: tbsCertificate['nonExisting'])
+        self.assertRaises(
+            error.PyAsn1Error, lambda: tbsCertificate['issuer'][1])
+
+        self.assertRaises(
+            error.PyAsn1Error, frozen.decode, self.substrate + b'\x00',
+            rfc5280.Certificate())
+
+    def testThaw(self):
+        certificate = frozen.decode(self.substrate, rfc5280.Certificate())
+        crl = frozen.decode(self.crlSubstrate, rfc5280.CertificateList())
+
+        asn1Object = certificate.thaw()
+
+        self.assertTrue(isinstance(asn1Object, rfc5280.Certificate))
+        self.assertEqual(self.substrate, der_encoder(asn1Object))
+        self.assertEqual(self.crlSubstrate, der_encoder(crl.thaw()))
+        self.assertEqual(asn1Object.prettyPrint(), certificate.prettyPrint())
+
+    def testFreeze(self):
+        asn1Object, rest = der_decoder(
+            self.substrate, asn1Spec=rfc5280.Certificate())
+
+        certificate = frozen.freeze(asn1Object)
+
+        self.assertTrue(certificate is frozen.decode(
+            self.substrate, rfc5280.Certificate()))
+        self.assertTrue(frozen.freeze(certificate) is certificate)
+
+        algorithm = certificate['signatureAlgorithm']['algorithm']
+
+        self.assertTrue(algorithm is oids.intern(
+            rfc3279.sha1WithRSAEncryption))
+
+    def testImmutable(self):
+        certificate = frozen.decode(self.substrate, rfc5280.Certificate())
+
+        def setAttribute():
+            certificate._values = ()
+
+        def deleteAttribute():
+            del certificate._values
+
+        def setItem():
+            certificate['signature'] = univ.BitString('')
+
+        self.assertRaises(AttributeError, setAttribute)
+        self.assertRaises(AttributeError, deleteAttribute)
+        self.assertRaises(TypeError, setItem)
+
+    def testStructuralSharing(self):
+        certificate = frozen.decode(self.substrate, rfc5280.Certificate())
+        crl = frozen.decode(self.crlSubstrate, rfc5280.CertificateList())
+
+        tbsCertificate = certificate['tbsCertificate']
+
+        # self-signed certificate shares issuer and subject
+        self.assertTrue(tbsCertificate['issuer'] is tbsCertificate['subject'])
+        self.assertTrue(
+            tbsCertificate['signature'] is certificate['signatureAlgorithm'])
+
+        # sha1WithRSAEncryption with NULL parameters
+        self.assertTrue(
+            certificate['signatureAlgorithm'] is crl['signatureAlgorithm'])
+
+        self.assertTrue(certificate is frozen.decode(
+            self.substrate, rfc5280.Certificate()))
+
+    def testHash(self):
+        freezer = frozen.Freezer()
+
+        certificate = frozen.decode(self.substrate, rfc5280.Certificate())
+        other = freezer.decode(self.substrate, rfc5280.Certificate())
+
+        self.assertFalse(certificate is other)
+        self.assertEqual(certificate, other)
+        self.assertEqual(hash(certificate), hash(other))
+        self.assertFalse(certificate != other)
+
+        crl = frozen.decode(self.crlSubstrate, rfc5280.CertificateList())
+
+        self.assertNotEqual(certificate, crl)
+        self.assertNotEqual(
+            certificate['tbsCertificate']['issuer'],
+            crl['tbsCertList']['issuer'])
+
+        index = {certificate: 'certificate', crl: 'crl'}
+
+        self.assertEqual('certificate', index[other])
+
+    def testSchemaIdentity(self):
+        algorithmIdentifier = rfc5280.AlgorithmIdentifier()
+        algorithmIdentifier['algorithm'] = rfc3279.sha1WithRSAEncryption
+
+        other = rfc5280.AlgorithmIdentifier()
+        other['algorithm'] = rfc3279.sha1WithRSAEncryption
+
+        # same values, different schema
+        smimeCapability = univ.Sequence(
+            componentType=algorithmIdentifier.componentType)
+        smimeCapability['algorithm'] = rfc3279.sha1WithRSAEncryption
+
+        self.assertTrue(
+            frozen.freeze(algorithmIdentifier) is frozen.freeze(other))
+        self.assertNotEqual(frozen.freeze(algorithmIdentifier),
+                            frozen.freeze(smimeCapability))
+
+    def testValueTypes(self):
+        first = univ.SequenceOf(componentType=univ.Any())
+        first.append(univ.Any(der_encoder(univ.Integer(1))))
+
+        second = univ.SequenceOf(componentType=univ.Any())
+        second.append(univ.OctetString(der_encoder(univ.Integer(1))))
+
+        self.assertNotEqual(frozen.freeze(first), frozen.freeze(second))
+
+    def testThreads(self):
+        results = []
+
+        def run():
+            results.append(frozen.decode(
+                self.substrate, rfc5280.Certificate()))
+
+        threads = [threading.Thread(target=run) for _ in range(8)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(8, len(results))
+
+        for result in results:
+            self.assertTrue(result is results[0])
+
+    def testWeakPool(self):
+        freezer = frozen.Freezer()
+
+        certificate = freezer.decode(self.substrate, rfc5280.Certificate())
+
+        self.assertTrue(len(freezer))
+
+        del certificate
+
+        self.assertEqual(0, len(freezer))
+
+    def testClearCache(self):
+        certificate = frozen.decode(self.substrate, rfc5280.Certificate())
+
+        frozen.clearCache()
+
+        other = frozen.decode(self.substrate, rfc5280.Certificate())
+
+        self.assertFalse(certificate is other)
+        self.assertEqual(self.substrate, der_encoder(other.thaw()))
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
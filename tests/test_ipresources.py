@@ -0,0 +1,203 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der import decoder as der_decoder
+from pyasn1.codec.der import encoder as der_encoder
+
+from pyasn1_modules import ipresources
+from pyasn1_modules import pem
+from pyasn1_modules import rfc3779
+from pyasn1_modules import rfc5280
+
+ipv4 = b'\x00\x01'
+
+ipv6 = b'\x00\x02'
+
+
+class IntervalSetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.intervals = ipresources.IntervalSet(
+            [(20, 30), (1, 5), (6, 10), (25, 40)])
+
+    def testNormalized(self):
+        self.assertEqual([(1, 10), (20, 40)], list(self.intervals))
+
+    def testContains(self):
+        self.assertIn(1, self.intervals)
+        self.assertIn(40, self.intervals)
+        self.assertNotIn(15, self.intervals)
+        self.assertTrue(self.intervals.containsRange(21, 39))
+        self.assertFalse(self.intervals.containsRange(5, 20))
+        self.assertTrue(self.intervals.overlapsRange(11, 20))
+        self.assertFalse(self.intervals.overlapsRange(11, 19))
+
+    def testSetOperations(self):
+        other = ipresources.IntervalSet([(8, 22), (35, 50)])
+
+        self.assertEqual(
+            [(8, 10), (20, 22), (35, 40)],
+            list(self.intervals.intersection(other)))
+        self.assertEqual([(1, 50)], list(self.intervals.union(other)))
+        self.assertFalse(other.issubset(self.intervals))
+        self.assertTrue(
+            ipresources.IntervalSet([(2, 3), (30, 31)]).issubset(self.intervals))
+        self.assertTrue(
+            self.intervals.isdisjoint(ipresources.IntervalSet([(11, 19)])))
+
+
+class CertificateResourcesTestCase(unittest.TestCase):
+    pem_text = """\
+MIIECjCCAvKgAwIBAgICAMkwDQYJKoZIhvcNAQELBQAwFjEUMBIGA1UEAxMLcmlw
+ZS1uY2MtdGEwIBcNMTcxMTI4MTQzOTU1WhgPMjExNzExMjgxNDM5NTVaMBYxFDAS
+BgNVBAMTC3JpcGUtbmNjLXRhMIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKC
+AQEA0URYSGqUz2myBsOzeW1jQ6NsxNvlLMyhWknvnl8NiBCs/T/S2XuNKQNZ+wBZ
+xIgPPV2pFBFeQAvoH/WK83HwA26V2siwm/MY2nKZ+Olw+wlpzlZ1p3Ipj2eNcKrm
+it8BwBC8xImzuCGaV0jkRB0GZ0hoH6Ml03umLprRsn6v0xOP0+l6Qc1ZHMFVFb38
+5IQ7FQQTcVIxrdeMsoyJq9eMkE6DoclHhF/NlSllXubASQ9KUWqJ0+Ot3QCXr4LX
+ECMfkpkVR2TZT+v5v658bHVs6ZxRD1b6Uk1uQKAyHUbn/tXvP8lrjAibGzVsXDT2
+L0x4Edx+QdixPgOji3gBMyL2VwIDAQABo4IBXjCCAVowHQYDVR0OBBYEFOhVKx/W
+0aT35ATG2OVoDR68Fj/DMA8GA1UdEwEB/wQFMAMBAf8wDgYDVR0PAQH/BAQDAgEG
+MIGxBggrBgEFBQcBCwSBpDCBoTA8BggrBgEFBQcwCoYwcnN5bmM6Ly9ycGtpLnJp
+cGUubmV0L3JlcG9zaXRvcnkvcmlwZS1uY2MtdGEubWZ0MDIGCCsGAQUFBzANhiZo
+dHRwczovL3JyZHAucmlwZS5uZXQvbm90aWZpY2F0aW9uLnhtbDAtBggrBgEFBQcw
+BYYhcnN5bmM6Ly9ycGtpLnJpcGUubmV0L3JlcG9zaXRvcnkvMBgGA1UdIAEB/wQO
+MAwwCgYIKwYBBQUHDgIwJwYIKwYBBQUHAQcBAf8EGDAWMAkEAgABMAMDAQAwCQQC
+AAIwAwMBADAhBggrBgEFBQcBCAEB/wQSMBCgDjAMMAoCAQACBQD/////MA0GCSqG
+SIb3DQEBCwUAA4IBAQAVgJjrZ3wFppC8Yk8D2xgzwSeWVT2vtYq96CQQsjaKb8nb
+eVz3DwcS3a7RIsevrNVGo43k3AGymg1ki+AWJjvHvJ+tSzCbn5+X6Z7AfYTf2g37
+xINVDHru0PTQUargSMBAz/MBNpFG8KThtT7WbJrK4+f/lvx0m8QOlYm2a17iXS3A
+GQJ6RHcq9ADscqGdumxmMMDjwED26bGaYdmru1hNIpwF//jVM/eRjBFoPHKFlx0k
+Ld/yoCQNmx1kW+xANx4uyWxi/DYgSV7Oynq+C60OucW+d8tIhkblh8+YfrmukJds
+V+vo2L72yerdbsP9xjqvhZrLKfsLZjYK4SdYYthi
+"""
+
+    def setUp(self):
+        substrate = pem.readBase64fromText(self.pem_text)
+        self.certificate, rest = der_decoder.decode(
+            substrate, asn1Spec=rfc5280.Certificate())
+
+    def testFromCertificate(self):
+        ipResources, asResources = ipresources.fromCertificate(
+            self.certificate)
+
+        self.assertTrue(ipResources.coversPrefix(ipv4, 0x0A000000, 8))
+        self.assertTrue(ipResources.coversRange(ipv6, 0, 2 ** 128 - 1))
+        self.assertTrue(asResources.coversAS(65536))
+        self.assertFalse(asResources.rdi)
+
+    def testReencode(self):
+        for extension in self.certificate['tbsCertificate']['extensions']:
+            if extension['extnID'] == rfc3779.id_pe_ipAddrBlocks:
+                ipAddrBlocks, rest = der_decoder.decode(
+                    extension['extnValue'], asn1Spec=rfc3779.IPAddrBlocks())
+
+                self.assertEqual(
+                    extension['extnValue'],
+                    der_encoder.encode(ipresources.toIPAddrBlocks(
+                        ipresources.fromIPAddrBlocks(ipAddrBlocks))))
+
+            if extension['extnID'] == rfc3779.id_pe_autonomousSysIds:
+                asIdentifiers, rest = der_decoder.decode(
+                    extension['extnValue'], asn1Spec=rfc3779.ASIdentifiers())
+
+                self.assertEqual(
+                    extension['extnValue'],
+                    der_encoder.encode(ipresources.toASIdentifiers(
+                        ipresources.fromASIdentifiers(asIdentifiers))))
+
+
+class CanonicalEncodingTestCase(unittest.TestCase):
+    def testPrefixesAndRanges(self):
+        # RFC3779 section 2.1.2 examples
+        resources = ipresources.IPResources({
+            ipv4: ipresources.IntervalSet([
+                (0x0A050000, 0x0A05FFFF),  # 10.5.0.0/16
+                (0x0A400000, 0x0A4001FF),  # 10.64.0.0-10.64.2.255 range
+                (0x0A400200, 0x0A4002FF),
+                (0x0A401000, 0x0A401FFF),  # 10.64.16.0/20 (disjoint)
+                (0x0A050100, 0x0A0501FF),  # merged into 10.5.0.0/16
+                (0x0A410000, 0x0A41FFFE)])})
+
+        ipAddrBlocks = ipresources.toIPAddrBlocks(resources)
+
+        substrate = der_encoder.encode(ipAddrBlocks)
+
+        decoded, rest = der_decoder.decode(
+            substrate, asn1Spec=rfc3779.IPAddrBlocks())
+
+        self.assertFalse(rest)
+        self.assertEqual(resources, ipresources.fromIPAddrBlocks(decoded))
+
+        addresses = decoded[0]['ipAddressChoice']['addressesOrRanges']
+
+        self.assertEqual(
+            ['addressPrefix', 'addressRange', 'addressPrefix', 'addressRange'],
+            [x.getName() for x in addresses])
+
+        self.assertEqual(
+            '0000101000000101', addresses[0]['addressPrefix'].asBinary())
+        self.assertEqual(
+            '0000101001', addresses[1]['addressRange']['min'].asBinary())
+        self.assertEqual(
+            '000010100100000000000010', addresses[1]['addressRange']['max'].asBinary())
+
+    def testInherit(self):
+        resources = ipresources.IPResources(inherited=[ipv6])
+
+        decoded, rest = der_decoder.decode(
+            der_encoder.encode(ipresources.toIPAddrBlocks(resources)),
+            asn1Spec=rfc3779.IPAddrBlocks())
+
+        child = ipresources.fromIPAddrBlocks(decoded)
+
+        self.assertRaises(
+            error.PyAsn1Error, child.coversPrefix, ipv6, 0, 0)
+
+        issuer = ipresources.IPResources(
+            {ipv6: ipresources.IntervalSet([(0, 2 ** 127)])})
+
+        self.assertTrue(child.resolve(issuer).coversPrefix(ipv6, 0, 1))
+
+        asResources = ipresources.ASResources(
+            None, ipresources.IntervalSet())
+
+        self.assertTrue(asResources.resolve(
+            ipresources.ASResources(ipresources.IntervalSet([(1, 10)]),
+                                    ipresources.IntervalSet())).coversAS(5))
+
+    def testSubsetOfInherited(self):
+        asnum = ipresources.IntervalSet([(1, 10)])
+
+        child = ipresources.ASResources(
+            ipresources.IntervalSet([(2, 3)]), ipresources.IntervalSet())
+
+        self.assertTrue(child.issubset(ipresources.ASResources(asnum, None)))
+        self.assertRaises(
+            error.PyAsn1Error, child.issubset,
+            ipresources.ASResources(None, asnum))
+
+        child = ipresources.IPResources({ipv4: ipresources.IntervalSet()})
+
+        self.assertTrue(child.issubset(
+            ipresources.IPResources(inherited=[ipv4])))
+
+    def testCompareOtherTypes(self):
+        for resources in (ipresources.IPResources(),
+                          ipresources.ASResources()):
+            self.assertFalse(resources == object())
+            self.assertNotEqual(resources, 'x')
+            self.assertEqual(resources, resources.__class__())
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
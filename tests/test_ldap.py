@@ -0,0 +1,160 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.ber import encoder
+
+from pyasn1_modules import ldap
+from pyasn1_modules import rfc2251
+
+
+def buildSearchResultEntry(messageID, objectName, attributes):
+    msg = rfc2251.LDAPMessage()
+    msg['messageID'] = messageID
+
+    entry = msg['protocolOp']['searchResEntry']
+    entry['objectName'] = objectName
+
+    for attrType, attrValues in attributes:
+        attribute = entry['attributes'].getComponentByPosition(
+            len(entry['attributes']))
+        attribute['type'] = attrType
+
+        for attrValue in attrValues:
+            attribute['vals'].append(attrValue)
+
+    return msg
+
+
+def buildBindRequest(messageID):
+    msg = rfc2251.LDAPMessage()
+    msg['messageID'] = messageID
+
+    request = msg['protocolOp']['bindRequest']
+    request['version'] = 3
+    request['name'] = 'cn=admin,dc=example,dc=com'
+    request['authentication']['simple'] = 'secret'
+
+    return msg
+
+
+class LDAPMessageStreamTestCase(unittest.TestCase):
+    def setUp(self):
+        self.messages = [
+            buildSearchResultEntry(
+                n, 'cn=user%d,dc=example,dc=com' % n,
+                [('cn', ['user%d' % n]), ('jpegPhoto', [b'\xff' * 300])])
+            for n in range(1, 6)
+        ]
+        self.messages.append(buildBindRequest(200))
+
+        self.substrate = b''.join(
+            [encoder.encode(msg) for msg in self.messages])
+
+    def testFragmented(self):
+        chunks = [self.substrate[i:i + 7]
+                  for i in range(0, len(self.substrate), 7)]
+
+        frames = list(ldap.iterFrames(chunks))
+
+        self.assertEqual(len(self.messages), len(frames))
+        self.assertEqual([1, 2, 3, 4, 5, 200],
+                         [frame.messageID for frame in frames])
+        self.assertEqual(['searchResEntry'] * 5 + ['bindRequest'],
+                         [frame.protocolOp for frame in frames])
+        self.assertEqual(self.substrate,
+                         b''.join([frame.substrate for frame in frames]))
+
+    def testPipelined(self):
+        messages = list(ldap.iterMessages([self.substrate]))
+
+        self.assertEqual(len(self.messages), len(messages))
+
+        for original, decoded in zip(self.messages, messages):
+            self.assertEqual(encoder.encode(original), encoder.encode(decoded))
+
+    def testBufferBounded(self):
+        stream = ldap.LDAPMessageStream()
+
+        for frame in stream.feed(self.substrate[:-3]):
+            pass
+
+        self.assertEqual(len(encoder.encode(self.messages[-1])) - 3, len(stream))
+
+        frames = list(stream.feed(self.substrate[-3:]))
+
+        self.assertEqual(1, len(frames))
+        self.assertEqual(0, len(stream))
+
+    def testIncomplete(self):
+        self.assertRaises(
+            error.SubstrateUnderrunError,
+            list, ldap.iterFrames([self.substrate[:-1]]))
+
+    def testMaxMessageSize(self):
+        stream = ldap.LDAPMessageStream(maxMessageSize=100)
+
+        self.assertRaises(
+            error.PyAsn1Error, list, stream.feed(self.substrate[:10]))
+
+
+class LazySearchResultEntryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.msg = buildSearchResultEntry(
+            7, 'cn=user,dc=example,dc=com',
+            [('cn', ['user']),
+             ('objectClass', ['top', 'person']),
+             ('jpegPhoto', [b'\xff' * 1000])])
+
+        self.substrate = encoder.encode(self.msg)
+
+    def testFromMessage(self):
+        entry = ldap.LazySearchResultEntry.fromMessage(self.substrate)
+
+        self.assertEqual(b'cn=user,dc=example,dc=com', entry.objectName)
+        self.assertEqual(3, len(entry))
+        self.assertEqual(
+            sorted([b'cn', b'objectClass', b'jpegPhoto']), sorted(entry.keys()))
+
+    def testCaseInsensitive(self):
+        entry = ldap.LazySearchResultEntry.fromMessage(self.substrate)
+
+        self.assertIn('OBJECTCLASS', entry)
+        self.assertEqual([b'top', b'person'], entry['objectclass'])
+        self.assertEqual([b'\xff' * 1000], entry[b'JPEGPhoto'])
+        self.assertNotIn('mail', entry)
+        self.assertIsNone(entry.get('mail'))
+
+    def testValues(self):
+        entry = ldap.LazySearchResultEntry.fromMessage(
+            ldap.LDAPFrame(7, 'searchResEntry', self.substrate))
+
+        values = entry.getValues('cn')
+
+        self.assertEqual(1, len(values))
+        self.assertEqual(rfc2251.AttributeValue(b'user'), values[0])
+
+    def testDecode(self):
+        entry = ldap.LazySearchResultEntry.fromMessage(self.substrate)
+
+        self.assertEqual(
+            encoder.encode(self.msg['protocolOp']['searchResEntry']),
+            encoder.encode(entry.decode()))
+
+    def testNotEntry(self):
+        self.assertRaises(
+            error.PyAsn1Error, ldap.LazySearchResultEntry.fromMessage,
+            encoder.encode(buildBindRequest(1)))
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
@@ -0,0 +1,113 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.ber import decoder
+from pyasn1.codec.ber import encoder
+
+from pyasn1_modules import ldapfilter
+from pyasn1_modules import rfc2251
+
+
+class CompileFilterTestCase(unittest.TestCase):
+    filters = [
+        '(cn=Babs Jensen)',
+        '(!(cn=Tim Howes))',
+        '(&(objectClass=Person)(|(sn=Jensen)(cn=Babs J*)))',
+        '(o=univ*of*mich*)',
+        '(seeAlso=)',
+        '(cn:caseExactMatch:=Fred Flintstone)',
+        '(cn:=Betty Rubble)',
+        '(sn:dn:2.4.6.8.10:=Barney Rubble)',
+        '(o:dn:=Ace Industry)',
+        '(:1.2.3:=Wilma Flintstone)',
+        '(:DN:2.4.6.8.10:=Dino)',
+        '(o=Parens R Us \\28for all your parenthetical needs\\29)',
+        '(cn=*\\2A*)',
+        '(filename=C:\\5cMyFile)',
+        '(bin=\\00\\00\\00\\04)',
+        '(sn=Lu\\c4\\8di\\c4\\87)',
+        '(1.3.6.1.4.1.1466.0=\\04\\02\\48\\69)',
+        '(age>=21)',
+        '(age<=65)',
+        '(sn~=Jensn)',
+        '(mail=*)',
+        'uid=jdoe',
+        '(&)',
+    ]
+
+    def testRoundtrip(self):
+        for filterString in self.filters:
+            compiled = ldapfilter.compileFilter(filterString)
+            substrate = ldapfilter.encodeFilter(filterString)
+
+            asn1Object, rest = decoder.decode(
+                substrate, asn1Spec=rfc2251.Filter())
+
+            self.assertFalse(rest)
+            self.assertEqual(compiled, asn1Object, filterString)
+
+            if 'dn:' not in filterString.lower():
+                self.assertEqual(encoder.encode(compiled), substrate)
+
+    def testValues(self):
+        compiled = ldapfilter.compileFilter('(&(cn=a\\2ab)(uid=jo*h*n))')
+
+        self.assertEqual(
+            b'a*b', compiled['and'][0]['equalityMatch']['assertionValue'])
+
+        substrings = compiled['and'][1]['substrings']['substrings']
+
+        self.assertEqual(
+            [b'jo', b'h', b'n'],
+            [substrings[0]['initial'], substrings[1]['any'],
+             substrings[2]['final']])
+
+    def testDnAttributes(self):
+        substrate = ldapfilter.encodeFilter('(o:dn:=Ace Industry)')
+
+        self.assertEqual(b'\x84\x01\xff', substrate[-3:])
+
+    def testCache(self):
+        self.assertIs(ldapfilter.compileFilter('(cn=x)'),
+                      ldapfilter.compileFilter('(cn=x)'))
+        self.assertIs(ldapfilter.encodeFilter('(cn=x)'),
+                      ldapfilter.encodeFilter('(cn=x)'))
+
+    def testDeepNesting(self):
+        filterString = '(&(&(&(&(cn=x)))))'
+
+        self.assertRaises(
+            error.PyAsn1Error, ldapfilter.compileFilter, filterString)
+
+        self.assertTrue(ldapfilter.encodeFilter(filterString))
+
+    def testSyntaxError(self):
+        for filterString in ('(cn=x', '(cn=x))', '(=x)', '(cn=(x))',
+                             '(cn=\\zz)', '(cn=\\ 4)', '(cn=\\+4)',
+                             '(cn=\\4)', '(cn>x)', '(cn=a**b)', '(:=x)'):
+            self.assertRaises(
+                ldapfilter.FilterSyntaxError,
+                ldapfilter.parseFilter, filterString)
+
+    def testEscape(self):
+        value = b'a*(b)\\\x00\xc4'
+
+        filterString = '(cn=%s)' % ldapfilter.escapeFilterValue(value)
+
+        self.assertEqual(
+            ('equalityMatch', b'cn', value),
+            ldapfilter.parseFilter(filterString))
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
@@ -0,0 +1,347 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import socket
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+from pyasn1.compat.octets import ints2octs
+from pyasn1.type import char
+
+from pyasn1_modules import nameconstraints
+from pyasn1_modules import pem
+from pyasn1_modules import rfc5280
+
+
+def _name(*attributes):
+    name = rfc5280.Name()
+
+    rdnSequence = name['rdnSequence']
+
+    for attrType, attrValue in attributes:
+        ava = rfc5280.AttributeTypeAndValue()
+        ava['type'] = attrType
+        ava['value'] = der_encoder(attrValue)
+
+        rdn = rfc5280.RelativeDistinguishedName()
+        rdn.append(ava)
+
+        rdnSequence.append(rdn)
+
+    return name
+
+
+def _generalName(kind, value):
+    generalName = rfc5280.GeneralName()
+
+    if kind == 'directoryName':
+        generalName[kind]['rdnSequence'] = value['rdnSequence']
+
+    else:
+        generalName[kind] = value
+
+    return generalName
+
+
+def _address(text):
+    if ':' in text:
+        return socket.inet_pton(socket.AF_INET6, text)
+
+    return socket.inet_aton(text)
+
+
+def _nameConstraints(permitted=(), excluded=()):
+    nameConstraints = rfc5280.NameConstraints()
+
+    for component, names in (('permittedSubtrees', permitted),
+                             ('excludedSubtrees', excluded)):
+        for kind, value in names:
+            generalSubtree = rfc5280.GeneralSubtree()
+            generalSubtree['base'] = _generalName(kind, value)
+
+            nameConstraints[component].append(generalSubtree)
+
+    return nameConstraints
+
+
+class DNSNameTestCase(unittest.TestCase):
+    def setUp(self):
+        self.matcher = nameconstraints.NameConstraintsMatcher(
+            _nameConstraints(
+                permitted=[('dNSName', 'example.com'),
+                           ('dNSName', '.example.org')],
+                excluded=[('dNSName', 'secret.example.com')]))
+
+    def _check(self, name):
+        return self.matcher.checkGeneralName(_generalName('dNSName', name))
+
+    def testPermitted(self):
+        self.assertTrue(self._check('example.com'))
+        self.assertTrue(self._check('WWW.Example.COM'))
+        self.assertTrue(self._check('a.b.example.com'))
+        self.assertTrue(self._check('www.example.org'))
+
+    def testSubdomainsOnly(self):
+        self.assertFalse(self._check('example.org'))
+
+    def testNotPermitted(self):
+        self.assertFalse(self._check('example.net'))
+        self.assertFalse(self._check('badexample.com'))
+        self.assertFalse(self._check('com'))
+
+    def testExcluded(self):
+        self.assertFalse(self._check('secret.example.com'))
+        self.assertFalse(self._check('www.secret.example.com'))
+        self.assertTrue(self._check('public.example.com'))
+
+    def testOtherKindsUnconstrained(self):
+        self.assertTrue(self.matcher.checkGeneralName(
+            _generalName('rfc822Name', 'user@example.net')))
+
+
+class RFC822NameTestCase(unittest.TestCase):
+    def setUp(self):
+        self.matcher = nameconstraints.NameConstraintsMatcher(
+            _nameConstraints(
+                permitted=[('rfc822Name', 'example.com'),
+                           ('rfc822Name', '.example.org'),
+                           ('rfc822Name', 'boss@example.net')]))
+
+    def _check(self, name):
+        return self.matcher.checkGeneralName(_generalName('rfc822Name', name))
+
+    def testHost(self):
+        self.assertTrue(self._check('john@example.com'))
+        self.assertTrue(self._check('john@EXAMPLE.com'))
+        self.assertFalse(self._check('john@mail.example.com'))
+
+    def testDomain(self):
+        self.assertTrue(self._check('john@mail.example.org'))
+        self.assertFalse(self._check('john@example.org'))
+
+    def testMailbox(self):
+        self.assertTrue(self._check('boss@example.net'))
+        self.assertFalse(self._check('Boss@example.net'))
+        self.assertFalse(self._check('john@example.net'))
+
+    def testMalformed(self):
+        self.assertFalse(self._check('example.com'))
+
+
+class URITestCase(unittest.TestCase):
+    def setUp(self):
+        self.matcher = nameconstraints.NameConstraintsMatcher(
+            _nameConstraints(
+                permitted=[('uniformResourceIdentifier', 'example.com'),
+                           ('uniformResourceIdentifier', '.example.org')]))
+
+    def _check(self, name):
+        return self.matcher.checkGeneralName(
+            _generalName('uniformResourceIdentifier', name))
+
+    def testHost(self):
+        self.assertTrue(self._check('https://example.com/'))
+        self.assertTrue(self._check('ldap://user@Example.com:389/o=x'))
+        self.assertFalse(self._check('https://www.example.com/'))
+        self.assertTrue(self._check('https://www.example.org/'))
+        self.assertFalse(self._check('https://example.org/'))
+
+    def testNoAuthority(self):
+        self.assertFalse(self._check('urn:example.com'))
+
+
+class IPAddressTestCase(unittest.TestCase):
+    def setUp(self):
+        self.matcher = nameconstraints.NameConstraintsMatcher(
+            _nameConstraints(
+                permitted=[('iPAddress', _address('192.0.2.0') +
+                            _address('255.255.255.0')),
+                           ('iPAddress', _address('10.0.0.0') +
+                            _address('255.0.0.0')),
+                           ('iPAddress', _address('2001:db8::') +
+                            _address('ffff:ffff::'))],
+                excluded=[('iPAddress', _address('10.1.2.0') +
+                           _address('255.255.255.128')),
+                          ('iPAddress', _address('192.0.2.1') +
+                           _address('255.0.255.255'))]))
+
+    def _check(self, name):
+        return self.matcher.checkGeneralName(
+            _generalName('iPAddress', _address(name)))
+
+    def testIPv4(self):
+        self.assertTrue(self._check('192.0.2.10'))
+        self.assertTrue(self._check('10.200.0.1'))
+        self.assertFalse(self._check('192.0.3.10'))
+
+    def testIPv4Excluded(self):
+        self.assertFalse(self._check('10.1.2.1'))
+        self.assertTrue(self._check('10.1.2.129'))
+
+    def testNonContiguousMask(self):
+        self.assertFalse(self._check('192.0.2.1'))
+
+    def testIPv6(self):
+        self.assertTrue(self._check('2001:db8::1'))
+        self.assertFalse(self._check('2001:db9::1'))
+
+    def testBadConstraint(self):
+        self.assertRaises(
+            error.PyAsn1Error, nameconstraints.NameConstraintsMatcher,
+            _nameConstraints(permitted=[('iPAddress', _address('10.0.0.0'))]))
+
+
+class DirectoryNameTestCase(unittest.TestCase):
+    def setUp(self):
+        self.matcher = nameconstraints.NameConstraintsMatcher(
+            _nameConstraints(
+                permitted=[('directoryName', _name(
+                    (rfc5280.id_at_countryName, char.PrintableString('US')),
+                    (rfc5280.id_at_organizationName,
+                     char.UTF8String(u'Example'))))],
+                excluded=[('directoryName', _name(
+                    (rfc5280.id_at_countryName, char.PrintableString('US')),
+                    (rfc5280.id_at_organizationName,
+                     char.UTF8String(u'Example')),
+                    (rfc5280.id_at_organizationalUnitName,
+                     char.UTF8String(u'Secret'))))]))
+
+    def testPrefix(self):
+        self.assertTrue(self.matcher.checkSubject(_name(
+            (rfc5280.id_at_countryName, char.PrintableString('us')),
+            (rfc5280.id_at_organizationName, char.PrintableString('EXAMPLE')),
+            (rfc5280.id_at_commonName, char.UTF8String(u'www')))))
+
+    def testNotPrefix(self):
+        self.assertFalse(self.matcher.checkSubject(_name(
+            (rfc5280.id_at_organizationName, char.UTF8String(u'Example')),
+            (rfc5280.id_at_countryName, char.PrintableString('US')))))
+
+    def testExcluded(self):
+        self.assertFalse(self.matcher.checkSubject(_name(
+            (rfc5280.id_at_countryName, char.PrintableString('US')),
+            (rfc5280.id_at_organizationName, char.UTF8String(u'Example')),
+            (rfc5280.id_at_organizationalUnitName, char.UTF8String(u'secret')),
+            (rfc5280.id_at_commonName, char.UTF8String(u'www')))))
+
+    def testEmptySubject(self):
+        self.assertTrue(self.matcher.checkSubject(_name()))
+
+    def testGeneralName(self):
+        self.assertFalse(self.matcher.checkGeneralName(_generalName(
+            'directoryName',
+            _name((rfc5280.id_at_commonName, char.UTF8String(u'www'))))))
+
+
+class CertificateTestCase(unittest.TestCase):
+    # C=US, O=Example, CN=www.example.com, emailAddress=admin@example.com
+    # subjectAltName: DNS:www.example.com, DNS:mail.example.org,
+    #   IP:192.0.2.10, IP:2001:db8::1, email:john@example.com,
+    #   URI:https://host.example.com:8443/path
+    pem_text = """\
+MIICNjCCAdugAwIBAgIBCDAKBggqhkjOPQQDAjApMRAwDgYDVQQKDAdFeGFtcGxl
+MRUwEwYDVQQDDAxJbnRlcm1lZGlhdGUwIBcNMjYxMDE5MTY0MjU5WhgPMjEyNjA5
+MjUxNjQyNTlaMFsxCzAJBgNVBAYTAlVTMRAwDgYDVQQKDAdFeGFtcGxlMRgwFgYD
+VQQDDA93d3cuZXhhbXBsZS5jb20xIDAeBgkqhkiG9w0BCQEWEWFkbWluQGV4YW1w
+bGUuY29tMFkwEwYHKoZIzj0CAQYIKoZIzj0DAQcDQgAEViDu/Hh9jdw/a//uYmXB
+JSUv4EqBFMeM+nJq6arEcsrRLKdGBQG5amRnIWDjjahW9O/ymUJRkaZHNCo2zlF0
+wKOBvzCBvDB6BgNVHREEczBxgg93d3cuZXhhbXBsZS5jb22CEG1haWwuZXhhbXBs
+ZS5vcmeHBMAAAgqHECABDbgAAAAAAAAAAAAAAAGBEGpvaG5AZXhhbXBsZS5jb22G
+Imh0dHBzOi8vaG9zdC5leGFtcGxlLmNvbTo4NDQzL3BhdGgwHQYDVR0OBBYEFNto
+6i4vBaTyei7rA4161RTisQNNMB8GA1UdIwQYMBaAFD4nFC0XKb3gcg6MCWibXwWm
+rTNKMAoGCCqGSM49BAMCA0kAMEYCIQCSg5eoZfqOQyPIYMzWp3hGc3phoLgc+3lA
+hgEHhoVr8wIhANbRzwICEHLrhDjmrwlCME07z4qqV8XW5PPLuSfHJEMI
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pem_text)
+
+        self.permitted = [
+            ('dNSName', 'example.com'),
+            ('dNSName', 'example.org'),
+            ('rfc822Name', 'example.com'),
+            ('uniformResourceIdentifier', '.example.com'),
+            ('iPAddress', _address('192.0.2.0') + _address('255.255.255.0')),
+            ('iPAddress', _address('2001:db8::') + _address('ffff:ffff::'))
+        ]
+
+    def testPermitted(self):
+        matcher = nameconstraints.NameConstraintsMatcher(
+            _nameConstraints(permitted=self.permitted))
+
+        self.assertTrue(matcher.checkCertificate(self.substrate))
+
+        certificate, rest = der_decoder(
+            self.substrate, asn1Spec=rfc5280.Certificate())
+
+        self.assertTrue(matcher.checkCertificate(certificate))
+
+    def testDerConstraints(self):
+        matcher = nameconstraints.NameConstraintsMatcher(
+            der_encoder(_nameConstraints(permitted=self.permitted)))
+
+        self.assertTrue(matcher.checkCertificate(self.substrate))
+
+    def testExcludedSubjectAltName(self):
+        matcher = nameconstraints.NameConstraintsMatcher(
+            _nameConstraints(permitted=self.permitted,
+                             excluded=[('dNSName', 'mail.example.org')]))
+
+        self.assertFalse(matcher.checkCertificate(self.substrate))
+
+    def testSubjectEmailAddress(self):
+        matcher = nameconstraints.NameConstraintsMatcher(
+            _nameConstraints(permitted=self.permitted,
+                             excluded=[('rfc822Name', 'admin@example.com')]))
+
+        self.assertFalse(matcher.checkCertificate(self.substrate))
+
+    def testSubjectDirectoryName(self):
+        matcher = nameconstraints.NameConstraintsMatcher(
+            _nameConstraints(permitted=[('directoryName', _name(
+                (rfc5280.id_at_countryName, char.PrintableString('CA'))))]))
+
+        self.assertFalse(matcher.checkCertificate(self.substrate))
+
+    def testMalformedSubject(self):
+        matcher = nameconstraints.NameConstraintsMatcher(
+            _nameConstraints(permitted=self.permitted))
+
+        directoryNameMatcher = nameconstraints.NameConstraintsMatcher(
+            _nameConstraints(permitted=[('directoryName', _name(
+                (rfc5280.id_at_countryName, char.PrintableString('US'))))]))
+
+        # AttributeTypeAndValue lacking value
+        for ava in (b'\x30\x05\x06\x03\x55\x04\x03', b'\x30\x00'):
+            name = b'\x30' + ints2octs((len(ava) + 2,)) + \
+                b'\x31' + ints2octs((len(ava),)) + ava
+
+            self.assertRaises(error.PyAsn1Error, matcher.checkSubject, name)
+            self.assertRaises(
+                error.PyAsn1Error, directoryNameMatcher.checkSubject, name)
+
+    def testGeneralNames(self):
+        matcher = nameconstraints.NameConstraintsMatcher(
+            _nameConstraints(permitted=[('dNSName', 'example.com')]))
+
+        generalNames = rfc5280.GeneralNames()
+        generalNames.append(_generalName('dNSName', 'www.example.com'))
+
+        self.assertTrue(matcher.checkGeneralNames(generalNames))
+
+        generalNames.append(_generalName('dNSName', 'www.example.net'))
+
+        self.assertFalse(matcher.checkGeneralNames(der_encoder(generalNames)))
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
@@ -0,0 +1,65 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import importlib
+import pkgutil
+import sys
+import unittest
+
+from pyasn1.type import univ
+
+import pyasn1_modules
+from pyasn1_modules import oidnames
+from pyasn1_modules import rfc5280
+
+
+class OidNamesTestCase(unittest.TestCase):
+    def testGetName(self):
+        self.assertEqual('id_ce_keyUsage', oidnames.getName('2.5.29.15'))
+        self.assertEqual('id_ce_keyUsage', oidnames.getName((2, 5, 29, 15)))
+        self.assertEqual(
+            'id_ce_keyUsage', oidnames.getName(rfc5280.id_ce_keyUsage))
+
+    def testUnknown(self):
+        self.assertEqual(None, oidnames.getName('1.2.3.4.5.6.7.8.9'))
+        self.assertEqual('x', oidnames.getName('1.2.3.4.5.6.7.8.9', 'x'))
+        self.assertEqual([], oidnames.getNames('1.2.3.4.5.6.7.8.9'))
+
+    def testGetNames(self):
+        names = dict(oidnames.getNames(rfc5280.id_ce_keyUsage))
+
+        self.assertTrue('rfc5280' in names['id_ce_keyUsage'])
+        self.assertTrue('rfc2459' in names['id_ce_keyUsage'])
+
+    def testGetOid(self):
+        self.assertEqual('2.5.29.15', oidnames.getOid('id_ce_keyUsage'))
+        self.assertEqual(None, oidnames.getOid('no_such_name'))
+
+    def testCoverage(self):
+        # the table must be regenerated with tools/mkoidnames.py
+        # whenever RFC modules change
+        for _, moduleName, _ in pkgutil.iter_modules(pyasn1_modules.__path__):
+            if not moduleName.startswith('rfc'):
+                continue
+
+            module = importlib.import_module('pyasn1_modules.' + moduleName)
+
+            for name, value in vars(module).items():
+                if (name.startswith('_') or
+                        not isinstance(value, univ.ObjectIdentifier) or
+                        not value.isValue or not len(value)):
+                    continue
+
+                self.assertTrue(
+                    moduleName in dict(oidnames.getNames(value)).get(name, ()),
+                    '%s.%s is missing' % (moduleName, name))
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
@@ -0,0 +1,124 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.encoder import encode as der_encoder
+from pyasn1.compat.octets import ints2octs
+from pyasn1.type import univ
+
+from pyasn1_modules import oids
+from pyasn1_modules import rfc5280
+from pyasn1_modules import tlv
+
+
+class OidCodecTestCase(unittest.TestCase):
+    def testRoundTrip(self):
+        for oid in ('0.9.2342.19200300.100.1.1', '1.2.840.113549.1.9.14',
+                    '1.3.6.1.4.1.311.21.20', '2.5.29.17', '2.999.3',
+                    '1.39.4294967296'):
+            asn1Object = univ.ObjectIdentifier(oid)
+
+            octets = oids.encodeOid(asn1Object)
+
+            self.assertEqual(der_encoder(asn1Object)[2:], octets)
+            self.assertEqual(asn1Object.asTuple(), oids.decodeOid(octets))
+
+    def testBadOid(self):
+        self.assertRaises(error.PyAsn1Error, oids.encodeOid, (3, 1))
+        self.assertRaises(error.PyAsn1Error, oids.encodeOid, (1, 40))
+        self.assertRaises(error.PyAsn1Error, oids.encodeOid, (1,))
+
+    def testBadEncoding(self):
+        self.assertRaises(
+            error.PyAsn1Error, oids.decodeOid, ints2octs((0x2b, 0x80, 0x01)))
+        self.assertRaises(
+            error.PyAsn1Error, oids.decodeOid, ints2octs((0x2b, 0x86)))
+        self.assertRaises(error.PyAsn1Error, oids.decodeOid, b'')
+
+
+class InternTestCase(unittest.TestCase):
+    def setUp(self):
+        oids.clearCache()
+
+    def testOidKey(self):
+        self.assertEqual(b'\x55\x1d\x11',
+                         oids.oidKey(rfc5280.id_ce_subjectAltName))
+        self.assertEqual(b'\x55\x1d\x11', oids.oidKey('2.5.29.17'))
+        self.assertEqual(b'\x55\x1d\x11', oids.oidKey((2, 5, 29, 17)))
+        self.assertEqual(b'\x55\x1d\x11', oids.oidKey(b'\x55\x1d\x11'))
+
+    def testIntern(self):
+        asn1Object = oids.intern('2.5.29.17')
+
+        self.assertEqual(rfc5280.id_ce_subjectAltName, asn1Object)
+        self.assertTrue(asn1Object is oids.intern(rfc5280.id_ce_subjectAltName))
+        self.assertTrue(asn1Object is oids.intern(b'\x55\x1d\x11'))
+
+    def testReadOid(self):
+        substrate = der_encoder(univ.SequenceOf(
+            componentType=univ.ObjectIdentifier()).setComponents(
+            rfc5280.id_ce_keyUsage, rfc5280.id_ce_subjectAltName))
+
+        components = tlv.children(substrate, tlv.readTlv(substrate))
+
+        self.assertTrue(oids.readOid(substrate, components[1]) is
+                        oids.intern(rfc5280.id_ce_subjectAltName))
+
+    def testBounded(self):
+        maxInterned = oids.maxInterned
+
+        oids.maxInterned = 1
+
+        try:
+            oids.intern('1.2.3')
+
+            self.assertFalse(oids.intern('1.2.4') is oids.intern('1.2.4'))
+
+        finally:
+            oids.maxInterned = maxInterned
+
+
+class OidMapTestCase(unittest.TestCase):
+    def setUp(self):
+        self.mapping = {rfc5280.id_ce_keyUsage: 'keyUsage'}
+        self.oidMap = oids.OidMap(self.mapping)
+
+    def testLookup(self):
+        self.assertEqual('keyUsage', self.oidMap[b'\x55\x1d\x0f'])
+        self.assertEqual('keyUsage', self.oidMap['2.5.29.15'])
+        self.assertTrue(rfc5280.id_ce_keyUsage in self.oidMap)
+        self.assertEqual(None, self.oidMap.get(rfc5280.id_ce_subjectAltName))
+        self.assertRaises(KeyError, lambda: self.oidMap['2.5.29.17'])
+
+    def testRefresh(self):
+        self.assertEqual(1, len(self.oidMap))
+
+        self.mapping[rfc5280.id_ce_subjectAltName] = 'subjectAltName'
+
+        self.assertEqual(2, len(self.oidMap))
+        self.assertEqual('subjectAltName', self.oidMap[b'\x55\x1d\x11'])
+
+    def testRefreshReplaced(self):
+        self.assertEqual('keyUsage', self.oidMap[rfc5280.id_ce_keyUsage])
+
+        del self.mapping[rfc5280.id_ce_keyUsage]
+        self.mapping[rfc5280.id_ce_subjectAltName] = 'subjectAltName'
+
+        self.oidMap.refresh()
+
+        self.assertFalse(rfc5280.id_ce_keyUsage in self.oidMap)
+        self.assertEqual(
+            'subjectAltName', self.oidMap[rfc5280.id_ce_subjectAltName])
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
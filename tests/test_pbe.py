@@ -0,0 +1,274 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import binascii
+import hashlib
+import hmac
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+
+from pyasn1_modules import pbe
+from pyasn1_modules import pem
+from pyasn1_modules import pkcs12
+from pyasn1_modules import rfc5280
+from pyasn1_modules import rfc5958
+from pyasn1_modules import rfc7292
+
+
+class KdfTestCase(unittest.TestCase):
+    salt = binascii.unhexlify('0102030405060708')
+
+    def tearDown(self):
+        pbe.clearCache()
+
+    def testPbkdf2(self):
+        # RFC6070 test vector
+        params = pbe.KdfParams(pbe.PBKDF2, 'sha1', b'salt', 2, 20, None)
+
+        self.assertEqual(
+            binascii.unhexlify('ea6c014dc72d6f8ccd1ed92ace1d41f0d8de8957'),
+            pbe.deriveKey('password', params))
+
+    def testPkcs12Kdf(self):
+        # openssl kdf -kdfopt hexpass:<BMPString> ... PKCS12KDF
+        params = pbe.KdfParams(
+            pbe.PKCS12, 'sha1', self.salt, 1000, 24, pbe.KEY_MATERIAL)
+
+        self.assertEqual(
+            binascii.unhexlify(
+                'b967a6a8784184d470a7d2e829c30fbdc6ef471273e7ad24'),
+            pbe.deriveKey('secret', params))
+
+        params = params._replace(keyLength=8, purpose=pbe.IV_MATERIAL)
+
+        self.assertEqual(
+            binascii.unhexlify('615ee2f46b1a21d7'),
+            pbe.deriveKey('secret', params))
+
+    def testPkcs12KdfLongKey(self):
+        params = pbe.KdfParams(
+            pbe.PKCS12, 'sha1', self.salt, 3, 64, pbe.KEY_MATERIAL)
+
+        self.assertEqual(
+            binascii.unhexlify(
+                '903a8aa1b8d275344926f7a8d19226a3919f0d3c5a1c32618006589b'
+                '5576e86dd31b3045560d46d3c9a244c2a3057a8c800d0f563006a705'
+                'a6865e33052daf01'),
+            pbe.deriveKey('secret', params))
+
+    def testOctetsPassword(self):
+        params = pbe.KdfParams(pbe.PBKDF2, 'sha256', self.salt, 10, 32, None)
+
+        self.assertEqual(
+            pbe.deriveKey(u'p\xe4ss', params),
+            pbe.deriveKey(u'p\xe4ss'.encode('utf-8'), params))
+
+    def testCache(self):
+        params = pbe.KdfParams(pbe.PBKDF2, 'sha256', self.salt, 10, 32, None)
+
+        key = pbe.deriveKey('secret', params)
+
+        cached = list(pbe._derivedKeys._cache.values())
+
+        self.assertEqual([bytearray(key)], cached)
+
+        for cacheKey in pbe._derivedKeys._cache:
+            self.assertFalse(b'secret' in cacheKey[0])
+
+        self.assertEqual(key, pbe.deriveKey('secret', params))
+        self.assertNotEqual(key, pbe.deriveKey('other', params))
+
+        pbe.clearCache()
+
+        self.assertEqual(0, len(pbe._derivedKeys._cache))
+        self.assertEqual(bytearray(32), cached[0])
+
+    def testEviction(self):
+        cache = pbe._KeyCache(2)
+
+        cache.put('a', b'aa')
+        cache.put('b', b'bb')
+
+        evicted = cache._cache['a']
+
+        cache.get('a')
+        cache.put('c', b'cc')
+
+        self.assertEqual(b'aa', cache.get('a'))
+        self.assertEqual(None, cache.get('b'))
+        self.assertEqual(b'cc', cache.get('c'))
+
+        cache.put('d', b'dd')
+
+        self.assertEqual(None, cache.get('a'))
+        self.assertEqual(bytearray(2), evicted)
+
+    def testDeriveKeys(self):
+        paramsList = [
+            pbe.KdfParams(pbe.PBKDF2, 'sha256', self.salt, 10, 32, None),
+            pbe.KdfParams(pbe.PBKDF2, 'sha1', self.salt, 20, 16, None),
+            pbe.KdfParams(
+                pbe.PKCS12, 'sha1', self.salt, 5, 24, pbe.KEY_MATERIAL),
+        ]
+
+        paramsList.append(paramsList[0])
+
+        keys = pbe.deriveKeys('secret', paramsList, processes=2)
+
+        self.assertEqual(4, len(keys))
+        self.assertEqual(keys[0], keys[3])
+        self.assertEqual(3, len(pbe._derivedKeys._cache))
+
+        pbe.clearCache()
+
+        self.assertEqual(
+            keys, [pbe.deriveKey('secret', params) for params in paramsList])
+
+        self.assertEqual(keys, pbe.deriveKeys('secret', paramsList))
+
+
+class Pkcs12PbeParamsTestCase(unittest.TestCase):
+    def setUp(self):
+        params = rfc7292.Pkcs_12PbeParams()
+        params['salt'] = b'saltsalt'
+        params['iterations'] = 2048
+
+        self.substrate = der_encoder(params)
+
+    def testKeyAndIv(self):
+        algorithm = rfc7292.pbeWithSHAAnd3_KeyTripleDES_CBC
+
+        params = pbe.fromPkcs12PbeParams(algorithm, self.substrate)
+
+        self.assertEqual(
+            pbe.KdfParams(pbe.PKCS12, 'sha1', b'saltsalt', 2048, 24,
+                          pbe.KEY_MATERIAL), params)
+
+        params = pbe.fromPkcs12PbeParams(
+            algorithm, self.substrate, pbe.IV_MATERIAL)
+
+        self.assertEqual(8, params.keyLength)
+        self.assertEqual(pbe.IV_MATERIAL, params.purpose)
+
+    def testNoIv(self):
+        self.assertRaises(
+            error.PyAsn1Error, pbe.fromPkcs12PbeParams,
+            rfc7292.pbeWithSHAAnd128BitRC4, self.substrate, pbe.IV_MATERIAL)
+
+    def testUnknownAlgorithm(self):
+        self.assertRaises(
+            error.PyAsn1Error, pbe.fromPkcs12PbeParams,
+            (1, 2, 3), self.substrate)
+
+
+class PfxTestCase(unittest.TestCase):
+    # openssl pkcs12 -export -name leaf, password "secret"
+    pfx_pem_text = """\
+MIIGRQIBAzCCBfsGCSqGSIb3DQEHAaCCBewEggXoMIIF5DCCBIIGCSqGSIb3DQEH
+BqCCBHMwggRvAgEAMIIEaAYJKoZIhvcNAQcBMFcGCSqGSIb3DQEFDTBKMCkGCSqG
+SIb3DQEFDDAcBAhby7pxKBGRSwICCAAwDAYIKoZIhvcNAgkFADAdBglghkgBZQME
+ASoEEDZd3MzecOXSdyaQHWCQm1WAggQANd3AK5XK4e1esQrRDBDac8l9Ud0MhIFe
+09doRm4gtd29D+rFvnbyLcFbU8hjt6LX/7cqe5P3anBYbQj8htbwI7Tdrd+5uSoi
+dwYl8lzpx8gu8zlKJdHdqYdsPUjVeseWfEUxIYLBNn1iXj1OyKBED0e6P6R/kSDj
+hKAbV7U7PuqP+aIKpQFVDlFPGYjYTBw3tLtYeVgur7RdXbpPAfsvQrtQTKqrSrKG
+KTY1YqxEGRho5t8Va5xvenIC5AHS4w7bxY+lcFBphC7gifx0d/GTCxa+i9fJ4Bo7
+aFdh36Gpo3TSI6CxI48T4DzGQS3Fap3zEuiiedmt56PEW9X6ah3r6BwU2PoDoX5V
+wEhPySCvkgsDxhRxXceQhL7Xc5reRc8rNIBh5W3dTt/qU6ibkTg7RYS5uvkDyk/M
+rksnUJb35tj2QiVuoWGISQ0v2jlkN597NvTOhoxRmov7+sRY98ppUeznJ2VnW9K0
+NCB2PZJJy83xKWIn11BfNBAuguiVD3J7oSP28hx58RLKeM80svKJMURbkBuHyys3
+cu0WS6xXujaJCzK/w5esLw9VqLjCRkm/MC+rteXeFIx4MKI8Zmr5YouIjP+MyRou
+1nS/ZClCVvSA+x8Uqlvjs7wNIg07LzaEIzljOokvUstD8yHKmcoNfVR4p1voLnZC
+oAfRUmwcNoR1LqO7PpPv7mGj5t06E0XeGpjqLgRuzwY42VxFq9HNev0tvw4X+lEA
+f12AJ/DoKaGjel9xVDnZkQS7BlEWvLMIBXRymFWxRzGXvNbNwnhAs95HMF3b15BJ
+5YDWPfAYxRvkksPx+ZqWJe97YtvfmIzdIQND09ZBORv4pxS95FGCkom+2RCX676u
+/xDxE53/MbBHQFCZ7lk1KEgmGTGm3kGZs8pr3w0GsAvMphQdd7fWvfxvIpjrT5Mt
+g42tIxqZA/ce3t2xYFPmUQGCZAdTdrgUBkKHBXvpB4yfokIes9Oc5pnK5yre9CnQ
+KSloVxSCiaBi9kQwl+7LkznSKZ/1fnBpSCrNVT5D9vxXjuUKak1sj2AMDlDXZYYx
+28K31huibjL5I329kCns2dzAZR+janBkV57/ZjhEj+VLausizlrC5G8ho7iIZWOV
+98BgNUbQ/6kpLP1dQYyGeNbnMrayuwTwzyoeR+SyT90LE4A0KMnMdNmD0a/j3lx8
+NFdX7XuqNmqm4HCRxGg2Ga0ErVFWzyFMsD2SdSFUoWXkAN+QVsWw6k+PmyQLKdPm
+yEx66bpr3jXdGPuk2DsQhDEiMFW8sUSW10XHE4927meTIvNS2+BDGjdWvjZWHWpv
+P/GJwacU8htwTn/UEPWHSf4TblWObLlW7o2eglBMYlmw3RinCNUsWTCCAVoGCSqG
+SIb3DQEHAaCCAUsEggFHMIIBQzCCAT8GCyqGSIb3DQEMCgECoIHvMIHsMFcGCSqG
+SIb3DQEFDTBKMCkGCSqGSIb3DQEFDDAcBAhYxCm1W/qH7AICCAAwDAYIKoZIhvcN
+AgkFADAdBglghkgBZQMEASoEEIO7x5sFZDOwBICLDHcw4/kEgZDFg+GsSoTaIiZn
+pz3miGodc5ooIEmmmnseRoom5WXmRsxl+lnY1FxJeCKzi2LJIUddU7zgsUHrRVix
+v/efWGn65YGDrcsVpwNbZ4dmL4ylF9qgZ1fazXVbNoZgjAAkkbipbS9oOeHTA63g
+LtqwbFdX1iObGvTah3Q8TbvmiAW/5T9/2LGi/Y5omSPJWCCbCYUxPjAXBgkqhkiG
+9w0BCRQxCh4IAGwAZQBhAGYwIwYJKoZIhvcNAQkVMRYEFFQpHpdXT6MQLPXPatod
+0TGzvLDjMEEwMTANBglghkgBZQMEAgEFAAQgTjBcvj70xF3Ipm1leDduw3VyGtA+
+f4fuzOtzDbLmFysECE+HzrXi5grkAgIIAA==
+"""
+
+    def setUp(self):
+        self.reader = pkcs12.PfxReader(
+            pem.readBase64fromText(self.pfx_pem_text))
+
+    def tearDown(self):
+        pbe.clearCache()
+
+    def testMacData(self):
+        params = pbe.fromMacData(self.reader.rawMacData)
+
+        self.assertEqual(pbe.PKCS12, params.kdf)
+        self.assertEqual('sha256', params.hashName)
+        self.assertEqual(2048, params.iterations)
+        self.assertEqual(pbe.MAC_MATERIAL, params.purpose)
+
+        macData, rest = der_decoder(
+            self.reader.rawMacData, asn1Spec=rfc7292.MacData())
+
+        key = pbe.deriveKey('secret', params)
+
+        self.assertEqual(
+            macData['mac']['digest'],
+            hmac.new(key, self.reader.authenticatedSafe,
+                     hashlib.sha256).digest())
+
+        key = pbe.deriveKey('wrong', params)
+
+        self.assertNotEqual(
+            macData['mac']['digest'],
+            hmac.new(key, self.reader.authenticatedSafe,
+                     hashlib.sha256).digest())
+
+    def testShroudedKeyBag(self):
+        entry, = self.reader.findByBagId(rfc7292.id_pkcs8ShroudedKeyBag)
+
+        encryptedPrivateKeyInfo, rest = der_decoder(
+            entry.rawBagValue,
+            asn1Spec=rfc5958.EncryptedPrivateKeyInfo())
+
+        algorithm = encryptedPrivateKeyInfo['encryptionAlgorithm']
+
+        params = pbe.fromAlgorithmIdentifier(der_encoder(algorithm))
+
+        self.assertEqual(pbe.PBKDF2, params.kdf)
+        self.assertEqual('sha256', params.hashName)
+        self.assertEqual(2048, params.iterations)
+        self.assertEqual(32, params.keyLength)
+
+        self.assertEqual(
+            hashlib.pbkdf2_hmac('sha256', b'secret', params.salt, 2048, 32),
+            pbe.deriveKey('secret', params))
+
+    def testUnsupportedAlgorithm(self):
+        algorithm = rfc5280.AlgorithmIdentifier()
+        algorithm['algorithm'] = (1, 2, 3)
+
+        self.assertRaises(
+            error.PyAsn1Error, pbe.fromAlgorithmIdentifier, algorithm)
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
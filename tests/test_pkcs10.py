@@ -0,0 +1,251 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import base64
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+
+from pyasn1_modules import oids
+from pyasn1_modules import pem
+from pyasn1_modules import pkcs10
+from pyasn1_modules import rfc2314
+from pyasn1_modules import rfc2986
+from pyasn1_modules import rfc5280
+from pyasn1_modules import rfc5480
+from pyasn1_modules import tlv
+
+
+class CertificationRequestTestCase(unittest.TestCase):
+    # EC key, subjectAltName, keyUsage and basicConstraints requested
+    pem_text = """\
+MIIBTTCB9AIBADA5MQswCQYDVQQGEwJYWDEQMA4GA1UECgwHRXhhbXBsZTEYMBYG
+A1UEAwwPY3NyLmV4YW1wbGUuY29tMFkwEwYHKoZIzj0CAQYIKoZIzj0DAQcDQgAE
+ViDu/Hh9jdw/a//uYmXBJSUv4EqBFMeM+nJq6arEcsrRLKdGBQG5amRnIWDjjahW
+9O/ymUJRkaZHNCo2zlF0wKBZMFcGCSqGSIb3DQEJDjFKMEgwKwYDVR0RBCQwIoIP
+Y3NyLmV4YW1wbGUuY29tgg93d3cuZXhhbXBsZS5jb20wDgYDVR0PAQH/BAQDAgeA
+MAkGA1UdEwQCMAAwCgYIKoZIzj0EAwIDSAAwRQIhAIao+b5JT7WVNLHfv72KX96h
+MK+OltxkEg2WvkpmiJuyAiB1jo5NYi9g56pAUf0ihSmSZSGF72rsLrkzq9cZ81dk
+0w==
+"""
+
+    # RSA key, no attributes
+    plain_pem_text = """\
+MIHJMHUCAQAwEDEOMAwGA1UEAwwFcGxhaW4wXDANBgkqhkiG9w0BAQEFAANLADBI
+AkEAr+JRjxrFA7+PK/zRXvp1wm9G297db4DgIuQ+1tl+npf5LzrROSiWpcSW5j5f
+dLrnrNXBbzS3T/Norxlmqd6YzQIDAQABoAAwDQYJKoZIhvcNAQELBQADQQAFZ7s0
+MzJD7SQpAPP/QZVb09qc/BOGXeHmzDjrM4TiW4pHAZucFEWCYLcDNayTlf9J97uU
+TFH6kh9QphyEaGjY
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pem_text)
+        self.plainSubstrate = pem.readBase64fromText(self.plain_pem_text)
+
+        self.asn1Object, rest = der_decoder(
+            self.substrate, asn1Spec=rfc2986.CertificationRequest())
+
+    def _pemText(self, substrate, marker='CERTIFICATE REQUEST'):
+        return '-----BEGIN %s-----\n%s\n-----END %s-----\n' % (
+            marker, base64.b64encode(substrate).decode('ascii'),
+            marker)
+
+    def testComponents(self):
+        entry = pkcs10.readCertificationRequest(self.substrate)
+
+        info = self.asn1Object['certificationRequestInfo']
+
+        self.assertEqual(der_encoder(info), entry.signedData)
+        self.assertEqual(
+            entry.signedData,
+            self.substrate[entry.signedSpan[0]:entry.signedSpan[1]])
+        self.assertEqual(0, entry.version)
+        self.assertEqual(der_encoder(info['subject']), entry.subject)
+        self.assertEqual(
+            der_encoder(info['subjectPKInfo']), entry.subjectPublicKeyInfo)
+        self.assertEqual(
+            rfc5480.id_ecPublicKey, entry.publicKeyAlgorithm)
+        self.assertEqual(
+            info['subjectPKInfo']['subjectPublicKey'].asOctets(),
+            entry.publicKey)
+        self.assertEqual(
+            der_encoder(self.asn1Object['signatureAlgorithm']),
+            entry.signatureAlgorithm)
+        self.assertEqual(
+            self.asn1Object['signature'].asOctets(), entry.signature)
+
+    def testExtensions(self):
+        entry = pkcs10.readCertificationRequest(self.substrate)
+
+        self.assertEqual(
+            [rfc5280.pkcs_9 + (14,)], entry.attributeTypes)
+        self.assertEqual(3, len(entry.extensions))
+        self.assertTrue(entry.extensions.isCritical(rfc5280.id_ce_keyUsage))
+
+        subjectAltName = entry.extensions.getValue(
+            rfc5280.id_ce_subjectAltName)
+
+        self.assertEqual(
+            ['csr.example.com', 'www.example.com'],
+            [str(x['dNSName']) for x in subjectAltName])
+        self.assertTrue(entry.extensions is entry.extensions)
+
+        self.assertEqual(
+            1, len(entry.getRawAttribute(rfc5280.pkcs_9 + (14,))))
+
+    def testNoAttributes(self):
+        entry = pkcs10.readCertificationRequest(self.plainSubstrate)
+
+        self.assertEqual([], entry.attributeTypes)
+        self.assertEqual(0, len(entry.extensions))
+        self.assertRaises(KeyError, entry.getRawAttribute,
+                          rfc5280.pkcs_9 + (14,))
+        self.assertEqual(
+            rfc5480.rsaEncryption, entry.publicKeyAlgorithm)
+
+    def testDecode(self):
+        entry = pkcs10.readCertificationRequest(self.substrate)
+
+        self.assertEqual(self.substrate, der_encoder(entry.decode()))
+        self.assertTrue(entry.decode() is entry.decode())
+
+        asn1Object = entry.decode(asn1Spec=rfc2314.CertificationRequest())
+
+        self.assertEqual(self.substrate, der_encoder(asn1Object))
+
+        self.assertEqual(
+            rfc5480.id_ecPublicKey,
+            entry.publicKeyInfo['algorithm']['algorithm'])
+
+    def testCanonicalSubject(self):
+        entry = pkcs10.readCertificationRequest(self.substrate)
+
+        self.assertIn(b'csr.example.com', entry.canonicalSubject)
+
+    def testMalformed(self):
+        for substrate in (self.substrate + b'\x00', self.substrate[:-1],
+                          b'\x30\x00', b'\x04\x01\x00',
+                          self.plainSubstrate[:4] + b'\x05' +
+                          self.plainSubstrate[5:]):
+            self.assertRaises(error.PyAsn1Error,
+                              pkcs10.readCertificationRequest, substrate)
+
+    def _withAttributes(self, attributes):
+        request = tlv.readTlv(self.plainSubstrate)
+
+        info, signatureAlgorithm, signature = tlv.children(
+            self.plainSubstrate, request)
+
+        components = [
+            self.plainSubstrate[component.offset:component.end]
+            for component in tlv.children(self.plainSubstrate, info)[:3]]
+
+        components.append(tlv.encodeTlv((0x80, 0x20, 0), attributes))
+
+        return tlv.encodeTlv(tlv.tagSequence, b''.join(
+            [tlv.encodeTlv(tlv.tagSequence, b''.join(components)),
+             self.plainSubstrate[signatureAlgorithm.offset:signature.end]]))
+
+    def testMalformedAttribute(self):
+        attrType = tlv.encodeTlv(
+            tlv.tagObjectIdentifier, oids.oidKey(rfc5280.pkcs_9 + (14,)))
+
+        for attribute in (attrType,
+                          attrType + tlv.encodeTlv(tlv.tagSequence, b''),
+                          tlv.encodeTlv(tlv.tagSet, b'') + attrType):
+            substrate = self._withAttributes(
+                tlv.encodeTlv(tlv.tagSequence, attribute))
+
+            self.assertRaises(error.PyAsn1Error,
+                              pkcs10.readCertificationRequest, substrate)
+
+            records = list(pkcs10.iterCertificationRequests(
+                [substrate, self.plainSubstrate]))
+
+            self.assertEqual(0, records[0].source)
+            self.assertIn('Malformed Attribute', records[0].error)
+            self.assertEqual(self.plainSubstrate, records[1].substrate)
+
+        substrate = self._withAttributes(tlv.encodeTlv(
+            tlv.tagSequence, attrType + tlv.encodeTlv(tlv.tagSet, b'')))
+
+        entry = pkcs10.readCertificationRequest(substrate)
+
+        self.assertEqual(
+            [], entry.getRawAttribute(rfc5280.pkcs_9 + (14,)))
+        self.assertEqual(0, len(entry.extensions))
+
+    def testStream(self):
+        stream = io.StringIO(
+            self._pemText(self.substrate) +
+            self._pemText(self.plainSubstrate, 'NEW CERTIFICATE REQUEST'))
+
+        entries = list(pkcs10.iterCertificationRequests(stream))
+
+        self.assertEqual(
+            [self.substrate, self.plainSubstrate],
+            [entry.substrate for entry in entries])
+
+    def testErrorText(self):
+        exc = error.PyAsn1Error('Malformed Attribute')
+
+        # str() is empty on Python 2 with pyasn1 0.5
+        exc.args = ()
+
+        self.assertEqual('Malformed Attribute', pkcs10._errorText(exc))
+
+    def testIterable(self):
+        records = list(pkcs10.iterCertificationRequests(
+            [self.substrate, b'\x30\x00', self.plainSubstrate]))
+
+        self.assertEqual(self.substrate, records[0].substrate)
+        self.assertEqual(1, records[1].source)
+        self.assertIn('Malformed', records[1].error)
+        self.assertEqual(self.plainSubstrate, records[2].substrate)
+
+    def testDirectory(self):
+        rootDir = tempfile.mkdtemp()
+
+        try:
+            os.mkdir(os.path.join(rootDir, 'sub'))
+
+            with open(os.path.join(rootDir, 'a.der'), 'wb') as fileObj:
+                fileObj.write(self.substrate)
+
+            with open(os.path.join(rootDir, 'sub', 'b.pem'), 'w') as fileObj:
+                fileObj.write(self._pemText(self.substrate))
+                fileObj.write(self._pemText(self.plainSubstrate))
+
+            with open(os.path.join(rootDir, 'c.csr'), 'wb') as fileObj:
+                fileObj.write(b'\x30\x03\x02\x01\x00')
+
+            with open(os.path.join(rootDir, 'd.txt'), 'wb') as fileObj:
+                fileObj.write(self.substrate)
+
+            records = list(pkcs10.iterCertificationRequests(rootDir))
+
+        finally:
+            shutil.rmtree(rootDir)
+
+        self.assertEqual(4, len(records))
+        self.assertEqual(self.substrate, records[0].substrate)
+        self.assertTrue(records[1].source.endswith('c.csr'))
+        self.assertEqual(self.substrate, records[2].substrate)
+        self.assertEqual(self.plainSubstrate, records[3].substrate)
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
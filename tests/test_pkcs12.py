@@ -0,0 +1,231 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import binascii
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+
+from pyasn1_modules import pem
+from pyasn1_modules import pkcs12
+from pyasn1_modules import rfc5280
+from pyasn1_modules import rfc5652
+from pyasn1_modules import rfc7292
+from pyasn1_modules import tlv
+
+
+class PfxReaderTestCase(unittest.TestCase):
+    # openssl pkcs12 -export -keypbe NONE -certpbe NONE -name leaf
+    # leaf and intermediate CA certificates, EC key
+    pfx_pem_text = """\
+MIIFZQIBAzCCBRsGCSqGSIb3DQEHAaCCBQwEggUIMIIFBDCCBAwGCSqGSIb3DQEH
+AaCCA/0EggP5MIID9TCCAiAGCyqGSIb3DQEMCgEDoIIBzzCCAcsGCiqGSIb3DQEJ
+FgGgggG7BIIBtzCCAbMwggFaoAMCAQICAQYwCgYIKoZIzj0EAwIwKTEQMA4GA1UE
+CgwHRXhhbXBsZTEVMBMGA1UEAwwMSW50ZXJtZWRpYXRlMCAXDTI2MTAxOTE2MzYx
+NFoYDzIxMjYwOTI1MTYzNjE0WjAtMRAwDgYDVQQKDAdFeGFtcGxlMRkwFwYDVQQD
+DBBsZWFmLmV4YW1wbGUuY29tMFkwEwYHKoZIzj0CAQYIKoZIzj0DAQcDQgAEViDu
+/Hh9jdw/a//uYmXBJSUv4EqBFMeM+nJq6arEcsrRLKdGBQG5amRnIWDjjahW9O/y
+mUJRkaZHNCo2zlF0wKNtMGswDAYDVR0TAQH/BAIwADAdBgNVHQ4EFgQU22jqLi8F
+pPJ6LusDjXrVFOKxA00wHwYDVR0jBBgwFoAUPicULRcpveByDowJaJtfBaatM0ow
+GwYDVR0RBBQwEoIQbGVhZi5leGFtcGxlLmNvbTAKBggqhkjOPQQDAgNHADBEAiBM
++zuutiYfrDnHLef28cba4wwztBzGMg6a2MGKj1i0FQIgBf41XMh/YdyNnjoOhq6S
+eCBD1+idmXXuUvIVeY/69y4xPjAXBgkqhkiG9w0BCRQxCh4IAGwAZQBhAGYwIwYJ
+KoZIhvcNAQkVMRYEFFQpHpdXT6MQLPXPatod0TGzvLDjMIIBzQYLKoZIhvcNAQwK
+AQOgggG8MIIBuAYKKoZIhvcNAQkWAaCCAagEggGkMIIBoDCCAUagAwIBAgIBAzAK
+BggqhkjOPQQDAjAjMRAwDgYDVQQKDAdFeGFtcGxlMQ8wDQYDVQQDDAZSb290IEEw
+IBcNMjYxMDE5MTYzNjEzWhgPMjEyNjA5MjUxNjM2MTNaMCkxEDAOBgNVBAoMB0V4
+YW1wbGUxFTATBgNVBAMMDEludGVybWVkaWF0ZTBZMBMGByqGSM49AgEGCCqGSM49
+AwEHA0IABCbPv66WVivZi4vfYMRjkuzINqre6OyIrPIT8zqYeYMqe0oWsx5rrqtb
+fF2F1NS/wmBjDd6WZB0pV2poXLjmsBOjYzBhMA8GA1UdEwEB/wQFMAMBAf8wDgYD
+VR0PAQH/BAQDAgEGMB0GA1UdDgQWBBQ+JxQtFym94HIOjAlom18Fpq0zSjAfBgNV
+HSMEGDAWgBRG9YPMKJ7YIczTlGlEOEcoxJTdjzAKBggqhkjOPQQDAgNIADBFAiEA
+482oP+bpHuG7oxEK5oBjWblDJxGygnRAy/1ZP4juBesCIDhxAXfNt8FhOZd3I5EG
+Xlps2cYreW0mggUPNvRB5QQyMIHxBgkqhkiG9w0BBwGggeMEgeAwgd0wgdoGCyqG
+SIb3DQEMCgEBoIGKMIGHAgEAMBMGByqGSM49AgEGCCqGSM49AwEHBG0wawIBAQQg
+yaQv73JYZQt0uVQ/MfLX3TU9ux8LICe9af7W3nqdTIqhRANCAARWIO78eH2N3D9r
+/+5iZcElJS/gSoEUx4z6cmrpqsRyytEsp0YFAblqZGchYOONqFb07/KZQlGRpkc0
+KjbOUXTAMT4wFwYJKoZIhvcNAQkUMQoeCABsAGUAYQBmMCMGCSqGSIb3DQEJFTEW
+BBRUKR6XV0+jECz1z2raHdExs7yw4zBBMDEwDQYJYIZIAWUDBAIBBQAEIC1iZGbO
+K/59F8iqwiYsvn8ut68bHPvf+sO2dx866YusBAjSyZ3OaNkqzgICCAA=
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pfx_pem_text)
+        self.reader = pkcs12.PfxReader(self.substrate)
+
+    def testIndex(self):
+        self.assertEqual(3, self.reader.version)
+        self.assertEqual(3, len(self.reader))
+        self.assertEqual([], self.reader.encryptedContents)
+
+        self.assertEqual(
+            [rfc7292.id_certBag, rfc7292.id_certBag, rfc7292.id_keyBag],
+            [entry.bagId for entry in self.reader])
+
+    def testFindByBagId(self):
+        self.assertEqual(2, len(self.reader.findByBagId(rfc7292.id_certBag)))
+        self.assertEqual(
+            1, len(self.reader.findByBagId('1.2.840.113549.1.12.10.1.1')))
+        self.assertEqual(
+            [], self.reader.findByBagId(rfc7292.id_pkcs8ShroudedKeyBag))
+
+    def testAttributes(self):
+        localKeyId = binascii.unhexlify(
+            '54291e97574fa3102cf5cf6ada1dd131b3bcb0e3')
+
+        entries = self.reader.findByFriendlyName('leaf')
+
+        self.assertEqual(2, len(entries))
+        self.assertEqual(entries, self.reader.findByLocalKeyId(localKeyId))
+
+        certBag, keyBag = entries
+
+        self.assertEqual(localKeyId, certBag.localKeyId)
+        self.assertEqual(rfc7292.id_keyBag, keyBag.bagId)
+
+        self.assertEqual([], self.reader.findByFriendlyName('other'))
+
+    def testCertificates(self):
+        certificates = list(self.reader.certificates())
+
+        self.assertEqual(2, len(certificates))
+
+        certificate, rest = der_decoder(
+            certificates[0], asn1Spec=rfc5280.Certificate())
+
+        self.assertFalse(rest)
+        self.assertEqual(6, certificate['tbsCertificate']['serialNumber'])
+        self.assertEqual(certificates[0], der_encoder(certificate))
+
+    def testCertBag(self):
+        entry = self.reader.findByBagId(rfc7292.id_certBag)[1]
+
+        self.assertEqual(pkcs12.x509Certificate, entry.certId)
+        self.assertEqual(
+            entry.certValue, entry.bagValue['certValue'].asOctets()[4:])
+
+        keyBag = self.reader.findByBagId(rfc7292.id_keyBag)[0]
+
+        self.assertEqual(None, keyBag.certId)
+        self.assertEqual(None, keyBag.certValue)
+
+    def testBagValue(self):
+        entry = self.reader.findByBagId(rfc7292.id_keyBag)[0]
+
+        self.assertTrue(isinstance(entry.bagValue, rfc7292.KeyBag))
+        self.assertTrue(entry.bagValue is entry.bagValue)
+        self.assertEqual(entry.rawBagValue, der_encoder(entry.bagValue))
+
+        safeBag, rest = der_decoder(
+            entry.substrate, asn1Spec=rfc7292.SafeBag())
+
+        self.assertEqual(rfc7292.id_keyBag, safeBag['bagId'])
+
+    def testMacData(self):
+        pfx, rest = der_decoder(self.substrate, asn1Spec=rfc7292.PFX())
+
+        self.assertEqual(der_encoder(pfx['macData']), self.reader.rawMacData)
+
+        authenticatedSafe, rest = der_decoder(
+            self.reader.authenticatedSafe,
+            asn1Spec=rfc7292.AuthenticatedSafe())
+
+        self.assertFalse(rest)
+        self.assertEqual(2, len(authenticatedSafe))
+
+    def testNestedSafeContents(self):
+        safeBags = [entry.substrate for entry in self.reader]
+
+        safeContents = tlv.encodeTlv((0, 0x20, 16), b''.join(safeBags[1:]))
+
+        nested = tlv.encodeTlv(
+            (0, 0x20, 16),
+            der_encoder(rfc7292.id_safeContentsBag) +
+            tlv.encodeTlv((0x80, 0x20, 0), safeContents))
+
+        self.reader.addSafeContents(
+            tlv.encodeTlv((0, 0x20, 16), safeBags[0] + nested))
+
+        self.assertEqual(6, len(self.reader))
+        self.assertEqual(4, len(self.reader.findByFriendlyName('leaf')))
+
+    def testBadPfx(self):
+        self.assertRaises(
+            error.PyAsn1Error, pkcs12.PfxReader, self.substrate[4:7])
+
+
+class EncryptedPfxReaderTestCase(unittest.TestCase):
+    # openssl pkcs12 -export -name leaf, password "secret"
+    pfx_pem_text = """\
+MIIGRQIBAzCCBfsGCSqGSIb3DQEHAaCCBewEggXoMIIF5DCCBIIGCSqGSIb3DQEH
+BqCCBHMwggRvAgEAMIIEaAYJKoZIhvcNAQcBMFcGCSqGSIb3DQEFDTBKMCkGCSqG
+SIb3DQEFDDAcBAhby7pxKBGRSwICCAAwDAYIKoZIhvcNAgkFADAdBglghkgBZQME
+ASoEEDZd3MzecOXSdyaQHWCQm1WAggQANd3AK5XK4e1esQrRDBDac8l9Ud0MhIFe
+09doRm4gtd29D+rFvnbyLcFbU8hjt6LX/7cqe5P3anBYbQj8htbwI7Tdrd+5uSoi
+dwYl8lzpx8gu8zlKJdHdqYdsPUjVeseWfEUxIYLBNn1iXj1OyKBED0e6P6R/kSDj
+hKAbV7U7PuqP+aIKpQFVDlFPGYjYTBw3tLtYeVgur7RdXbpPAfsvQrtQTKqrSrKG
+KTY1YqxEGRho5t8Va5xvenIC5AHS4w7bxY+lcFBphC7gifx0d/GTCxa+i9fJ4Bo7
+aFdh36Gpo3TSI6CxI48T4DzGQS3Fap3zEuiiedmt56PEW9X6ah3r6BwU2PoDoX5V
+wEhPySCvkgsDxhRxXceQhL7Xc5reRc8rNIBh5W3dTt/qU6ibkTg7RYS5uvkDyk/M
+rksnUJb35tj2QiVuoWGISQ0v2jlkN597NvTOhoxRmov7+sRY98ppUeznJ2VnW9K0
+NCB2PZJJy83xKWIn11BfNBAuguiVD3J7oSP28hx58RLKeM80svKJMURbkBuHyys3
+cu0WS6xXujaJCzK/w5esLw9VqLjCRkm/MC+rteXeFIx4MKI8Zmr5YouIjP+MyRou
+1nS/ZClCVvSA+x8Uqlvjs7wNIg07LzaEIzljOokvUstD8yHKmcoNfVR4p1voLnZC
+oAfRUmwcNoR1LqO7PpPv7mGj5t06E0XeGpjqLgRuzwY42VxFq9HNev0tvw4X+lEA
+f12AJ/DoKaGjel9xVDnZkQS7BlEWvLMIBXRymFWxRzGXvNbNwnhAs95HMF3b15BJ
+5YDWPfAYxRvkksPx+ZqWJe97YtvfmIzdIQND09ZBORv4pxS95FGCkom+2RCX676u
+/xDxE53/MbBHQFCZ7lk1KEgmGTGm3kGZs8pr3w0GsAvMphQdd7fWvfxvIpjrT5Mt
+g42tIxqZA/ce3t2xYFPmUQGCZAdTdrgUBkKHBXvpB4yfokIes9Oc5pnK5yre9CnQ
+KSloVxSCiaBi9kQwl+7LkznSKZ/1fnBpSCrNVT5D9vxXjuUKak1sj2AMDlDXZYYx
+28K31huibjL5I329kCns2dzAZR+janBkV57/ZjhEj+VLausizlrC5G8ho7iIZWOV
+98BgNUbQ/6kpLP1dQYyGeNbnMrayuwTwzyoeR+SyT90LE4A0KMnMdNmD0a/j3lx8
+NFdX7XuqNmqm4HCRxGg2Ga0ErVFWzyFMsD2SdSFUoWXkAN+QVsWw6k+PmyQLKdPm
+yEx66bpr3jXdGPuk2DsQhDEiMFW8sUSW10XHE4927meTIvNS2+BDGjdWvjZWHWpv
+P/GJwacU8htwTn/UEPWHSf4TblWObLlW7o2eglBMYlmw3RinCNUsWTCCAVoGCSqG
+SIb3DQEHAaCCAUsEggFHMIIBQzCCAT8GCyqGSIb3DQEMCgECoIHvMIHsMFcGCSqG
+SIb3DQEFDTBKMCkGCSqGSIb3DQEFDDAcBAhYxCm1W/qH7AICCAAwDAYIKoZIhvcN
+AgkFADAdBglghkgBZQMEASoEEIO7x5sFZDOwBICLDHcw4/kEgZDFg+GsSoTaIiZn
+pz3miGodc5ooIEmmmnseRoom5WXmRsxl+lnY1FxJeCKzi2LJIUddU7zgsUHrRVix
+v/efWGn65YGDrcsVpwNbZ4dmL4ylF9qgZ1fazXVbNoZgjAAkkbipbS9oOeHTA63g
+LtqwbFdX1iObGvTah3Q8TbvmiAW/5T9/2LGi/Y5omSPJWCCbCYUxPjAXBgkqhkiG
+9w0BCRQxCh4IAGwAZQBhAGYwIwYJKoZIhvcNAQkVMRYEFFQpHpdXT6MQLPXPatod
+0TGzvLDjMEEwMTANBglghkgBZQMEAgEFAAQgTjBcvj70xF3Ipm1leDduw3VyGtA+
+f4fuzOtzDbLmFysECE+HzrXi5grkAgIIAA==
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pfx_pem_text)
+        self.reader = pkcs12.PfxReader(self.substrate)
+
+    def testIndex(self):
+        self.assertEqual(1, len(self.reader))
+
+        entry, = self.reader
+
+        self.assertEqual(rfc7292.id_pkcs8ShroudedKeyBag, entry.bagId)
+        self.assertEqual('leaf', entry.friendlyName)
+        self.assertEqual([], list(self.reader.certificates()))
+
+    def testEncryptedContents(self):
+        encryptedContents = self.reader.encryptedContents
+
+        self.assertEqual(1, len(encryptedContents))
+
+        contentInfo, rest = der_decoder(
+            encryptedContents[0], asn1Spec=rfc5652.ContentInfo())
+
+        self.assertEqual(
+            rfc5652.id_encryptedData, contentInfo['contentType'])
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
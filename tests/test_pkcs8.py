@@ -0,0 +1,232 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+from pyasn1.type import univ
+
+from pyasn1_modules import pem
+from pyasn1_modules import pkcs8
+from pyasn1_modules import rfc5208
+from pyasn1_modules import rfc5915
+from pyasn1_modules import rfc5958
+from pyasn1_modules import rfc8017
+
+
+class KeyTestCase(unittest.TestCase):
+    # openssl genpkey -algorithm RSA -pkeyopt rsa_keygen_bits:512
+    rsa_pkcs8_pem_text = """\
+MIIBVAIBADANBgkqhkiG9w0BAQEFAASCAT4wggE6AgEAAkEAr+JRjxrFA7+PK/zR
+Xvp1wm9G297db4DgIuQ+1tl+npf5LzrROSiWpcSW5j5fdLrnrNXBbzS3T/Norxlm
+qd6YzQIDAQABAkAjjzwyFJV0dow5tnmWHEkmsFzBI0PdwU6Pf1n9Eif5ZCZ6wdiN
+KIose+RQdzTpk2GW+6ovY+o26WD8X8hLWoC5AiEA4IEPiiMgIbbeuKEW1/1sqQVp
+arW27O+TSb1+oqd2EW8CIQDIjxhRbC65im3BSDdiWuYBjgLw2F0vSshgrYDc6Uaj
+gwIgAtG8Fzj/s0yvmVP0jHvTPIAj5cIobOtJRzjI+VPvCKMCIQDDJgF6kLJyVVDw
+Zi2F5X6yepU/9rfNYY3SDGE8EzxpswIgPLAKK7tt3qgCJBIiUELsSIQSKnNx4tOO
+rlRvVVlEblU=
+"""
+
+    # openssl pkey -traditional
+    rsa_pem_text = """\
+MIIBOgIBAAJBAK/iUY8axQO/jyv80V76dcJvRtve3W+A4CLkPtbZfp6X+S860Tko
+lqXEluY+X3S656zVwW80t0/zaK8ZZqnemM0CAwEAAQJAI488MhSVdHaMObZ5lhxJ
+JrBcwSND3cFOj39Z/RIn+WQmesHYjSiKLHvkUHc06ZNhlvuqL2PqNulg/F/IS1qA
+uQIhAOCBD4ojICG23rihFtf9bKkFaWq1tuzvk0m9fqKndhFvAiEAyI8YUWwuuYpt
+wUg3YlrmAY4C8NhdL0rIYK2A3OlGo4MCIALRvBc4/7NMr5lT9Ix70zyAI+XCKGzr
+SUc4yPlT7wijAiEAwyYBepCyclVQ8GYtheV+snqVP/a3zWGN0gxhPBM8abMCIDyw
+Ciu7bd6oAiQSIlBC7EiEEipzceLTjq5Ub1VZRG5V
+"""
+
+    # openssl pkey, prime256v1 key
+    ec_pkcs8_pem_text = """\
+MIGHAgEAMBMGByqGSM49AgEGCCqGSM49AwEHBG0wawIBAQQgyaQv73JYZQt0uVQ/
+MfLX3TU9ux8LICe9af7W3nqdTIqhRANCAARWIO78eH2N3D9r/+5iZcElJS/gSoEU
+x4z6cmrpqsRyytEsp0YFAblqZGchYOONqFb07/KZQlGRpkc0KjbOUXTA
+"""
+
+    # openssl ec
+    ec_pem_text = """\
+MHcCAQEEIMmkL+9yWGULdLlUPzHy1901PbsfCyAnvWn+1t56nUyKoAoGCCqGSM49
+AwEHoUQDQgAEViDu/Hh9jdw/a//uYmXBJSUv4EqBFMeM+nJq6arEcsrRLKdGBQG5
+amRnIWDjjahW9O/ymUJRkaZHNCo2zlF0wA==
+"""
+
+    def setUp(self):
+        self.rsaPkcs8 = pem.readBase64fromText(self.rsa_pkcs8_pem_text)
+        self.rsa = pem.readBase64fromText(self.rsa_pem_text)
+        self.ecPkcs8 = pem.readBase64fromText(self.ec_pkcs8_pem_text)
+        self.ec = pem.readBase64fromText(self.ec_pem_text)
+
+    def _oneAsymmetricKey(self):
+        key, rest = der_decoder(
+            self.ecPkcs8, asn1Spec=rfc5958.OneAsymmetricKey())
+
+        ecKey, rest = der_decoder(
+            key['privateKey'], asn1Spec=rfc5915.ECPrivateKey())
+
+        key['version'] = 'v2'
+        key['publicKey'] = key['publicKey'].clone(ecKey['publicKey'])
+
+        return der_encoder(key)
+
+
+class ConvertTestCase(KeyTestCase):
+    def testDetectFormat(self):
+        self.assertEqual(
+            pkcs8.PRIVATE_KEY_INFO, pkcs8.detectFormat(self.rsaPkcs8))
+        self.assertEqual(pkcs8.RSA_PRIVATE_KEY, pkcs8.detectFormat(self.rsa))
+        self.assertEqual(pkcs8.EC_PRIVATE_KEY, pkcs8.detectFormat(self.ec))
+        self.assertEqual(
+            pkcs8.ONE_ASYMMETRIC_KEY,
+            pkcs8.detectFormat(self._oneAsymmetricKey()))
+
+    def testUnwrap(self):
+        parts = pkcs8.unwrap(self.rsaPkcs8)
+
+        key, rest = der_decoder(
+            self.rsaPkcs8, asn1Spec=rfc5208.PrivateKeyInfo())
+
+        self.assertEqual(key['privateKey'], parts.privateKey)
+        self.assertEqual(
+            der_encoder(key['privateKeyAlgorithm']), parts.algorithm)
+        self.assertEqual(None, parts.attributes)
+        self.assertEqual(None, parts.publicKey)
+
+    def testRsa(self):
+        self.assertEqual(
+            self.rsa, pkcs8.convert(self.rsaPkcs8, pkcs8.RSA_PRIVATE_KEY))
+        self.assertEqual(
+            self.rsaPkcs8, pkcs8.convert(self.rsa, pkcs8.PRIVATE_KEY_INFO))
+
+        key, rest = der_decoder(
+            pkcs8.convert(self.rsaPkcs8, pkcs8.RSA_PRIVATE_KEY),
+            asn1Spec=rfc8017.RSAPrivateKey())
+
+        self.assertFalse(rest)
+        self.assertEqual(65537, key['publicExponent'])
+
+    def testEc(self):
+        self.assertEqual(
+            self.ec, pkcs8.convert(self.ecPkcs8, pkcs8.EC_PRIVATE_KEY))
+        self.assertEqual(
+            self.ecPkcs8, pkcs8.convert(self.ec, pkcs8.PRIVATE_KEY_INFO))
+
+    def testEcWithoutParameters(self):
+        key, rest = der_decoder(self.ec, asn1Spec=rfc5915.ECPrivateKey())
+
+        key['parameters'] = key['parameters'].clone()
+
+        self.assertRaises(
+            error.PyAsn1Error, pkcs8.convert, der_encoder(key),
+            pkcs8.PRIVATE_KEY_INFO)
+
+    def testWrongAlgorithm(self):
+        self.assertRaises(
+            error.PyAsn1Error, pkcs8.convert, self.ecPkcs8,
+            pkcs8.RSA_PRIVATE_KEY)
+        self.assertRaises(
+            error.PyAsn1Error, pkcs8.convert, self.rsa, pkcs8.EC_PRIVATE_KEY)
+
+    def testOneAsymmetricKey(self):
+        substrate = self._oneAsymmetricKey()
+
+        self.assertEqual(
+            substrate, pkcs8.convert(substrate, pkcs8.ONE_ASYMMETRIC_KEY))
+        self.assertEqual(
+            self.ecPkcs8, pkcs8.convert(substrate, pkcs8.PRIVATE_KEY_INFO))
+        self.assertEqual(
+            self.ec, pkcs8.convert(substrate, pkcs8.EC_PRIVATE_KEY))
+        self.assertEqual(
+            self.ecPkcs8,
+            pkcs8.convert(self.ecPkcs8, pkcs8.ONE_ASYMMETRIC_KEY))
+
+    def testKeyPackage(self):
+        substrate = pkcs8.convert(self.rsa, pkcs8.ASYMMETRIC_KEY_PACKAGE)
+
+        package, rest = der_decoder(
+            substrate, asn1Spec=rfc5958.AsymmetricKeyPackage())
+
+        self.assertFalse(rest)
+        self.assertEqual(1, len(package))
+        self.assertEqual(der_encoder(package), substrate)
+        self.assertEqual(
+            self.rsaPkcs8,
+            pkcs8.convert(substrate, pkcs8.PRIVATE_KEY_INFO))
+
+    def testUnknownFormat(self):
+        self.assertRaises(
+            error.PyAsn1Error, pkcs8.convert, self.rsa, 'PEM')
+        self.assertRaises(
+            error.PyAsn1Error, pkcs8.detectFormat,
+            der_encoder(univ.Sequence()))
+
+
+class KeyConverterTestCase(KeyTestCase):
+    def testConvert(self):
+        converter = pkcs8.KeyConverter(pkcs8.PRIVATE_KEY_INFO)
+
+        self.assertEqual(
+            4, converter.convert(
+                [self.rsa, self.ec, self.rsaPkcs8, self._oneAsymmetricKey()]))
+
+        self.assertEqual(
+            [self.rsaPkcs8, self.ecPkcs8, self.rsaPkcs8, self.ecPkcs8],
+            list(converter))
+
+        start, end = converter.spans[1]
+
+        self.assertEqual(self.ecPkcs8, converter.buffer[start:end])
+
+    def testBufferReuse(self):
+        converter = pkcs8.KeyConverter(pkcs8.RSA_PRIVATE_KEY)
+
+        converter.convert([self.rsaPkcs8] * 3)
+
+        buffer = converter.buffer
+        size = len(buffer)
+
+        self.assertEqual(1, converter.convert([self.rsaPkcs8]))
+        self.assertTrue(buffer is converter.buffer)
+        self.assertEqual(size, len(converter.buffer))
+        self.assertEqual([self.rsa], list(converter))
+        self.assertEqual(self.rsa, converter.getvalue())
+
+    def testKeyPackage(self):
+        converter = pkcs8.KeyConverter(pkcs8.ASYMMETRIC_KEY_PACKAGE)
+
+        self.assertEqual(3, converter.convert([self.rsa, self.ec, self.rsa]))
+        self.assertEqual(1, len(converter))
+
+        package, rest = der_decoder(
+            converter[0], asn1Spec=rfc5958.AsymmetricKeyPackage())
+
+        self.assertEqual(3, len(package))
+
+    def testUnpackKeyPackage(self):
+        substrate = pkcs8.convert(self.ec, pkcs8.ASYMMETRIC_KEY_PACKAGE)
+
+        converter = pkcs8.KeyConverter(pkcs8.EC_PRIVATE_KEY)
+
+        self.assertEqual(2, converter.convert([substrate, self.ecPkcs8]))
+        self.assertEqual([self.ec, self.ec], list(converter))
+
+    def testProcessPool(self):
+        with pkcs8.KeyConverter(
+                pkcs8.RSA_PRIVATE_KEY, processes=2, chunkSize=2) as converter:
+
+            self.assertEqual(5, converter.convert([self.rsaPkcs8] * 5))
+            self.assertEqual([self.rsa] * 5, list(converter))
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
@@ -0,0 +1,238 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import json
+import sys
+import unittest
+
+try:
+    from StringIO import StringIO
+
+except ImportError:
+    from io import StringIO
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+
+from pyasn1_modules import pem
+from pyasn1_modules import render
+from pyasn1_modules import rfc5280
+from pyasn1_modules import rfc5652
+
+
+class CertificateTestCase(unittest.TestCase):
+    pem_text = """\
+MIICNjCCAdugAwIBAgIBCDAKBggqhkjOPQQDAjApMRAwDgYDVQQKDAdFeGFtcGxl
+MRUwEwYDVQQDDAxJbnRlcm1lZGlhdGUwIBcNMjYxMDE5MTY0MjU5WhgPMjEyNjA5
+MjUxNjQyNTlaMFsxCzAJBgNVBAYTAlVTMRAwDgYDVQQKDAdFeGFtcGxlMRgwFgYD
+VQQDDA93d3cuZXhhbXBsZS5jb20xIDAeBgkqhkiG9w0BCQEWEWFkbWluQGV4YW1w
+bGUuY29tMFkwEwYHKoZIzj0CAQYIKoZIzj0DAQcDQgAEViDu/Hh9jdw/a//uYmXB
+JSUv4EqBFMeM+nJq6arEcsrRLKdGBQG5amRnIWDjjahW9O/ymUJRkaZHNCo2zlF0
+wKOBvzCBvDB6BgNVHREEczBxgg93d3cuZXhhbXBsZS5jb22CEG1haWwuZXhhbXBs
+ZS5vcmeHBMAAAgqHECABDbgAAAAAAAAAAAAAAAGBEGpvaG5AZXhhbXBsZS5jb22G
+Imh0dHBzOi8vaG9zdC5leGFtcGxlLmNvbTo4NDQzL3BhdGgwHQYDVR0OBBYEFNto
+6i4vBaTyei7rA4161RTisQNNMB8GA1UdIwQYMBaAFD4nFC0XKb3gcg6MCWibXwWm
+rTNKMAoGCCqGSM49BAMCA0kAMEYCIQCSg5eoZfqOQyPIYMzWp3hGc3phoLgc+3lA
+hgEHhoVr8wIhANbRzwICEHLrhDjmrwlCME07z4qqV8XW5PPLuSfHJEMI
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pem_text)
+        self.asn1Spec = rfc5280.Certificate()
+        self.asn1Object, rest = der_decoder(
+            self.substrate, asn1Spec=self.asn1Spec, decodeOpenTypes=True)
+
+    def _render(self, **options):
+        output = StringIO()
+        render.render(self.asn1Object, output, **options)
+        return output.getvalue()
+
+    def _renderSubstrate(self, **options):
+        output = StringIO()
+        render.renderSubstrate(
+            self.substrate, self.asn1Spec, output, **options)
+        return output.getvalue()
+
+    def testText(self):
+        output = self._render()
+
+        self.assertTrue(output.startswith(
+            'Certificate:\n'
+            ' tbsCertificate=TBSCertificate:\n'
+            '  version=v3\n'
+            '  serialNumber=8\n'))
+        self.assertTrue(
+            '   algorithm=1.2.840.10045.4.3.2 (ecdsa_with_SHA256)\n' in output)
+        self.assertTrue('       utf8String=www.example.com\n' in output)
+
+    def testNoOidNames(self):
+        output = self._render(oidNames=False)
+
+        self.assertTrue('   algorithm=1.2.840.10045.4.3.2\n' in output)
+
+    def testJson(self):
+        output = self._render(jsonLines=True)
+
+        self.assertTrue(output.endswith('}\n'))
+        self.assertEqual(1, len(output.splitlines()))
+
+        document = json.loads(output)
+
+        tbsCertificate = document['tbsCertificate']
+
+        self.assertEqual(2, tbsCertificate['version'])
+        self.assertEqual(8, tbsCertificate['serialNumber'])
+        self.assertEqual(
+            '1.2.840.10045.4.3.2', tbsCertificate['signature']['algorithm'])
+        self.assertEqual(
+            {'utf8String': 'www.example.com'},
+            tbsCertificate['subject']['rdnSequence'][2][0]['value'])
+        self.assertEqual(
+            '2.5.29.17', tbsCertificate['extensions'][0]['extnID'])
+        self.assertEqual(
+            '0414db', tbsCertificate['extensions'][1]['extnValue'][:6])
+
+    def testMaxDepth(self):
+        output = self._render(maxDepth=1)
+
+        self.assertEqual(
+            'Certificate:\n'
+            ' tbsCertificate=TBSCertificate: ...\n'
+            ' signatureAlgorithm=AlgorithmIdentifier: ...\n'
+            ' signature=%s\n' % self.asn1Object['signature'].prettyPrint(),
+            output)
+
+        document = json.loads(self._render(maxDepth=1, jsonLines=True))
+
+        self.assertEqual('...', document['tbsCertificate'])
+
+    def testMaxWidth(self):
+        output = self._render(maxWidth=1)
+
+        self.assertTrue('   ... (2 more)\n' in output)
+        self.assertEqual(1, output.count('   Extension:\n'))
+
+        document = json.loads(self._render(maxWidth=1, jsonLines=True))
+
+        self.assertEqual(
+            '... (2 more)', document['tbsCertificate']['extensions'][-1])
+
+    def testSubstrate(self):
+        for options in ({}, {'jsonLines': True}, {'maxDepth': 3},
+                        {'maxWidth': 1}, {'oidNames': False}):
+            self.assertEqual(
+                self._render(**options), self._renderSubstrate(**options))
+
+    def testSubstrateOffset(self):
+        substrate = self.substrate + self.substrate
+
+        offset = render.renderSubstrate(
+            substrate, self.asn1Spec, StringIO())
+
+        self.assertEqual(len(self.substrate), offset)
+
+        offset = render.renderSubstrate(
+            substrate, self.asn1Spec, StringIO(), offset=offset)
+
+        self.assertEqual(len(substrate), offset)
+
+    def testBadSubstrate(self):
+        # first component of TBSCertificate is not version nor serialNumber
+        substrate = self.substrate[:8] + b'\x05' + self.substrate[9:]
+
+        self.assertRaises(
+            error.PyAsn1Error, render.renderSubstrate, substrate,
+            self.asn1Spec, StringIO())
+
+
+class CertificateListTestCase(unittest.TestCase):
+    pem_text = """\
+MIIBHTCBxAIBATAKBggqhkjOPQQDAjApMRAwDgYDVQQKDAdFeGFtcGxlMRUwEwYD
+VQQDDAxJbnRlcm1lZGlhdGUXDTI2MTAxOTE2NDUwN1oYDzIxMjYwOTI1MTY0NTA3
+WjA2MCACAQYXDTI2MTAxOTE2NDUwN1owDDAKBgNVHRUEAwoBATASAgEIFw0yNjEw
+MTkxNjQ1MDdaoDAwLjAfBgNVHSMEGDAWgBQ+JxQtFym94HIOjAlom18Fpq0zSjAL
+BgNVHRQEBAICEAAwCgYIKoZIzj0EAwIDSAAwRQIhAPUwLAOOpTwVS64MDPGzA3lS
+rsrE2/ALoVyR2T+efKWFAiA62hxuDtokmZ2MSy5NlUdsrug7rCLLfF8QKZrj5g+C
+Pw==
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pem_text)
+        self.asn1Spec = rfc5280.CertificateList()
+
+    def testSubstrate(self):
+        asn1Object, rest = der_decoder(
+            self.substrate, asn1Spec=self.asn1Spec, decodeOpenTypes=True)
+
+        for options in ({}, {'jsonLines': True}, {'maxWidth': 1}):
+            expected = StringIO()
+            render.render(asn1Object, expected, **options)
+
+            output = StringIO()
+            render.renderSubstrate(
+                self.substrate, self.asn1Spec, output, **options)
+
+            self.assertEqual(expected.getvalue(), output.getvalue())
+
+    def testRevokedCertificates(self):
+        output = StringIO()
+        render.renderSubstrate(
+            self.substrate, self.asn1Spec, output, jsonLines=True)
+
+        document = json.loads(output.getvalue())
+
+        self.assertEqual(
+            [6, 8], [entry['userCertificate'] for entry in
+                     document['tbsCertList']['revokedCertificates']])
+
+
+class ContentInfoTestCase(unittest.TestCase):
+    # certs-only SignedData
+    pem_text = """\
+MIIB4gYJKoZIhvcNAQcCoIIB0zCCAc8CAQExADALBgkqhkiG9w0BBwGgggG3MIIB
+szCCAVqgAwIBAgIBBjAKBggqhkjOPQQDAjApMRAwDgYDVQQKDAdFeGFtcGxlMRUw
+EwYDVQQDDAxJbnRlcm1lZGlhdGUwIBcNMjYxMDE5MTYzNjE0WhgPMjEyNjA5MjUx
+NjM2MTRaMC0xEDAOBgNVBAoMB0V4YW1wbGUxGTAXBgNVBAMMEGxlYWYuZXhhbXBs
+ZS5jb20wWTATBgcqhkjOPQIBBggqhkjOPQMBBwNCAARWIO78eH2N3D9r/+5iZcEl
+JS/gSoEUx4z6cmrpqsRyytEsp0YFAblqZGchYOONqFb07/KZQlGRpkc0KjbOUXTA
+o20wazAMBgNVHRMBAf8EAjAAMB0GA1UdDgQWBBTbaOouLwWk8nou6wONetUU4rED
+TTAfBgNVHSMEGDAWgBQ+JxQtFym94HIOjAlom18Fpq0zSjAbBgNVHREEFDASghBs
+ZWFmLmV4YW1wbGUuY29tMAoGCCqGSM49BAMCA0cAMEQCIEz7O662Jh+sOcct5/bx
+xtrjDDO0HMYyDprYwYqPWLQVAiAF/jVcyH9h3I2eOg6GrpJ4IEPX6J2Zde5S8hV5
+j/r3LjEA
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pem_text)
+
+    def testOpenType(self):
+        output = StringIO()
+        render.renderSubstrate(
+            self.substrate, rfc5652.ContentInfo(), output)
+
+        self.assertTrue(output.getvalue().startswith(
+            'ContentInfo:\n'
+            ' contentType=1.2.840.113549.1.7.2 (id_signedData)\n'
+            ' content=SignedData:\n'
+            '  version=v1\n'))
+        self.assertTrue(
+            '     serialNumber=6\n' in output.getvalue())
+
+        asn1Object, rest = der_decoder(
+            self.substrate, asn1Spec=rfc5652.ContentInfo(),
+            decodeOpenTypes=True)
+
+        expected = StringIO()
+        render.render(asn1Object, expected)
+
+        self.assertEqual(expected.getvalue(), output.getvalue())
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
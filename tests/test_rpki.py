@@ -0,0 +1,339 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import datetime
+import hashlib
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der import decoder
+from pyasn1.codec.der import encoder
+
+try:
+    import numpy
+
+except ImportError:
+    numpy = None
+
+from pyasn1_modules import pem
+from pyasn1_modules import rfc6482
+from pyasn1_modules import rpki
+
+
+class RepositoryTestCase(unittest.TestCase):
+    roa_pem_text = """\
+MIIGvwYJKoZIhvcNAQcCoIIGsDCCBqwCAQMxDTALBglghkgBZQMEAgEwKgYLKoZIhvcNAQkQ
+ARigGwQZMBcCAwDj+zAQMA4EAgABMAgwBgMEAJMcLaCCBLwwggS4MIIDoKADAgECAgIGGDAN
+BgkqhkiG9w0BAQsFADAzMTEwLwYDVQQDEyg2ZDZmYmZhOTc1M2RiOGQ4NDY0MzNkYjUzNTFk
+OWE5ZWMwN2M5NmJkMB4XDTE5MDgyMDAwNDkyOVoXDTIwMDcwMTAwMDAwMFowMzExMC8GA1UE
+AxMoNUI4M0REODdERTlBQzdDNkUzNEI4NzdERjUwMUEyQjEyMzBBODFCNDCCASIwDQYJKoZI
+hvcNAQEBBQADggEPADCCAQoCggEBAJcnDgSUtiQeelGQsTx2Ou5cgmfq6KPSEgMz/XyZrRzj
+wcqUQ/DyMYHyRJK8umKZjfMu+rItoPSkE26Wi9PcSnfuY+SyS9chTAtNOGMES6MbtHjNTmBF
+Xar5CFGM8teLIRHlCcScesgSR7q2eKgQ+cLiLTZnol0Mpmuf2NIs+V63Y4Hn/T7QOoudg9nU
+tmsh31hUN4jIENEXFvNDovkray25rl9aqFfW+dtkoNtdJjp367nNXCdp3GdE/3z0SIqT8wnh
+F67tgR22mwzex3umteQBwmM+iR28vuHL4E5jwRKBoiEgGPYqq7gbfkcoFtR3AV6QGKSK2aJU
+mUi+9VheS78CAwEAAaOCAdQwggHQMB0GA1UdDgQWBBRbg92H3prHxuNLh331AaKxIwqBtDAf
+BgNVHSMEGDAWgBRtb7+pdT242EZDPbU1HZqewHyWvTAYBgNVHSABAf8EDjAMMAoGCCsGAQUF
+Bw4CMFAGA1UdHwRJMEcwRaBDoEGGP3JzeW5jOi8vY2EucmcubmV0L3Jwa2kvUkduZXQtT1Uv
+YlctX3FYVTl1TmhHUXoyMU5SMmFuc0I4bHIwLmNybDBkBggrBgEFBQcBAQRYMFYwVAYIKwYB
+BQUHMAKGSHJzeW5jOi8vcnBraS5yaXBlLm5ldC9yZXBvc2l0b3J5L0RFRkFVTFQvYlctX3FY
+VTl1TmhHUXoyMU5SMmFuc0I4bHIwLmNlcjAOBgNVHQ8BAf8EBAMCB4AwgYoGCCsGAQUFBwEL
+BH4wfDBLBggrBgEFBQcwC4Y/cnN5bmM6Ly9jYS5yZy5uZXQvcnBraS9SR25ldC1PVS9XNFBk
+aDk2YXg4YmpTNGQ5OVFHaXNTTUtnYlEucm9hMC0GCCsGAQUFBzANhiFodHRwczovL2NhLnJn
+Lm5ldC9ycmRwL25vdGlmeS54bWwwHwYIKwYBBQUHAQcBAf8EEDAOMAwEAgABMAYDBACTHC0w
+DQYJKoZIhvcNAQELBQADggEBAKhhoJ3XtHejvG6XkFaCTxJci10gOgNvvPFWqz+CfOX2LmB0
+N3QhYjLiAZbfYSOxNReyL4bWDK/tpZgVA2VHuS8GB8fI8+nauQUiP38orVXKAbcUUxo7UkEM
+HxQ5T61FtXrEZx8hgKTlsfof0G2Q+baSJzNV2MIUgHmSszL4Mx/fHUXv8b7l/5mZQbdv3cZ9
+SbODHD0iOVAzK3fmHeuA4roSOk4mBQDWNRY1Ok+xH/HMDQdoOVtbfy57TZI2W7O2uxfElKvx
+fBeEc9TOaWqDz0xvmJ6bdZnmWRuvqW1475mhxi0s/I4eE2ZdaCinvrgrglBp/jpZi1jitY14
+dx+A1PMxggGqMIIBpgIBA4AUW4Pdh96ax8bjS4d99QGisSMKgbQwCwYJYIZIAWUDBAIBoGsw
+GgYJKoZIhvcNAQkDMQ0GCyqGSIb3DQEJEAEYMBwGCSqGSIb3DQEJBTEPFw0xOTA4MjAwMDQ5
+MjlaMC8GCSqGSIb3DQEJBDEiBCCfuHnOmhF2iBF3JXMOnoZCJzmE+Tcf8b+zObvDUpUddzAN
+BgkqhkiG9w0BAQEFAASCAQBDlJIMKCqWsFV/tQj/XvpSJUxJybG+zwjrUKm4yTKv8QEGOzOD
+aIL6irSOhhXeax6Lw0P2J7x+L3jGW1we1qWslumEDTr9kTE+kN/6rZuptUhwdrXcu3p9G6gJ
+mAUQtzqe2jRN1T3eSBfz1CNU3C7+jSHXOc+4Tea5mKiVddsjotYHXX0PbSCS/ZZ1yzdeES0o
+KWhXhW9ogS0bwtXWVTrciSekaRpp2n/pqcVEDxWg/5NpPiDlPNrRL/9eTEHFp940RAUfhbBh
+pbC2J02N0KgxUJxIJnGnpZ7rXKpG4jMiTVry7XB9bnFxCvZGBdjQW1Hagrfpl2TiVxQFvJWl
+IzU1
+"""
+
+    manifest_pem_text = """\
+MIIHVAYJKoZIhvcNAQcCoIIHRTCCB0ECAQMxDTALBglghkgBZQMEAgEwgYwGCyqGSIb3DQEJ
+EAEaoH0EezB5AgIK5xgPMjAxMjEwMjMyMjI2MDNaGA8yMDEyMTAyNTIyMjYwM1oGCWCGSAFl
+AwQCATBGMEQWH1pYU0dCREJrTDgyVEZHSHVFNFZPWXRKUC1FNC5jcmwDIQCzTdC3GsuONsRq
+RFnYf8+AJ2NnCIgmnc3O8PyfGvn18aCCBO4wggTqMIID0qADAgECAgIK5zANBgkqhkiG9w0B
+AQsFADATMREwDwYDVQQDEwhBOTE5OTg4NTAeFw0xMjEwMjMyMjI2MDNaFw0xMjEwMjUyMjI2
+MDNaMBgxFjAUBgNVBAMTDTUwODcxOTdjLTIwZjcwggEiMA0GCSqGSIb3DQEBAQUAA4IBDwAw
+ggEKAoIBAQDEl4R4LiCs6zyR/IAeaRCfz0O0mXXAUKt8bmG6DXzaDYNG8dnBjbrsM1L05sb4
+2Ti4TyE1UXtwFFEwatsFQ2uRBn9gsKmDGOjW8TH1AYObmZW+hZlEN7OLSz2bmPLtxIMwiCq/
+vqmBJlMWPyCSym4iPnjzwWbJechqHSiTMOYGICF1QSW5xjJDAhRfeZG3nRY7TqfW8R2KJXeN
+cKSYSGNKzv79B8GCswmwU8J8kcuryIiqb7WtcK2B6VBsROIQHGXM0UV4Zbnvv9m9Fl0SjvZJ
+XyrzRjGzV2C00hM0f4jAplD9nJhAJ7nOTe8OnadrFABRga+Ge1HooeDQJGmTekLXAgMBAAGj
+ggJBMIICPTAdBgNVHQ4EFgQUbcbOyNBHkRXXDaMq51jC7vOSHFUwHwYDVR0jBBgwFoAUZXSG
+BDBkL82TFGHuE4VOYtJP+E4wDgYDVR0PAQH/BAQDAgeAMIGDBgNVHR8EfDB6MHigdqB0hnJy
+c3luYzovL3Jwa2kuYXBuaWMubmV0L21lbWJlcl9yZXBvc2l0b3J5L0E5MTk5ODg1LzY1RkQ0
+M0FBNUJFRjExREZBQjYxQjNFNzU1QUZFN0NGL1pYU0dCREJrTDgyVEZHSHVFNFZPWXRKUC1F
+NC5jcmwwfgYIKwYBBQUHAQEEcjBwMG4GCCsGAQUFBzAChmJyc3luYzovL3Jwa2kuYXBuaWMu
+bmV0L3JlcG9zaXRvcnkvQTNDMzhBMjRENjAzMTFEQ0FCMDhGMzE5NzlCREJFMzkvWlhTR0JE
+QmtMODJURkdIdUU0Vk9ZdEpQLUU0LmNlcjAYBgNVHSABAf8EDjAMMAoGCCsGAQUFBw4CMIGQ
+BggrBgEFBQcBCwSBgzCBgDB+BggrBgEFBQcwC4ZycnN5bmM6Ly9ycGtpLmFwbmljLm5ldC9t
+ZW1iZXJfcmVwb3NpdG9yeS9BOTE5OTg4NS82NUZENDNBQTVCRUYxMURGQUI2MUIzRTc1NUFG
+RTdDRi9aWFNHQkRCa0w4MlRGR0h1RTRWT1l0SlAtRTQubWZ0MBUGCCsGAQUFBwEIAQH/BAYw
+BKACBQAwIQYIKwYBBQUHAQcBAf8EEjAQMAYEAgABBQAwBgQCAAIFADANBgkqhkiG9w0BAQsF
+AAOCAQEAyBl1J+ql1O3d6JiaQEG2UAjDSKHSMVau++QcB6/yd4RuWv2KpQxk1cp+awf4Ttoh
+GYakbUZQl7lJaXzbluG5siRSv6AowEWxf99iLhDx+pE1htklRfmmTE9oFpKnITAYZAUjarNC
+sYGCZ00vSwRu27OdpSQbZQ7WdyDAhyHS0Sun0pkImVSqPO11gqyKV9ZCwCJUa5U/zsWDMNrj
+MSZl1I3VoPs2rx997rLoiQiMqwGeoqfl7snpsL9OR/CazPmepuq3SyZNWcCrUGcGRhRdGScj
+Tm2EHne1GiRHapn46HWQ3am8jumEKv5u0gLT4Mi9CyZwkDyhotGTJZmdAmN7zzGCAaowggGm
+AgEDgBRtxs7I0EeRFdcNoyrnWMLu85IcVTALBglghkgBZQMEAgGgazAaBgkqhkiG9w0BCQMx
+DQYLKoZIhvcNAQkQARowHAYJKoZIhvcNAQkFMQ8XDTEyMTAyMzIyMjYwNFowLwYJKoZIhvcN
+AQkEMSIEIIu2XV8dT+rqQy5Cbpm3Tv5I1dwkLK8n2GesMGOr6/pEMA0GCSqGSIb3DQEBAQUA
+BIIBAFsd0zkl4dIHrqZts441T+w/5/ekymDLFwftk6W+Mi35Htjvm2IHOthnKHQsK5h6dnEh
+6DfNfc6tACmzLnM+UG7ve+uAhfpA+CUJIoVhpQvDH7Ntql0cD1X3d9ng484jpkVoHhbUIYNR
+TyxvV4DV5EBbLYpx2HYf6wWa8TCobxUXNtw53OVA24ceavS+KvuDa0JQPFpbYUCS0UPMt/Im
+mtKrWTmRUr8sYWdIQn+SStUh8iAR5rmSVr+Pe7aFbe2ju2FPf08gnIjH/SdCrJuFK8q7Z5MT
+C9ijmXiajracUe+7eCluqgXRE8yRtnscWoA/9fVFz1lPwgEeNHLoaK7Sqew=
+"""
+
+    def setUp(self):
+        self.rootDir = tempfile.mkdtemp()
+
+        publicationPoint = os.path.join(self.rootDir, 'rpki.example', 'ca')
+
+        os.makedirs(publicationPoint)
+
+        for fileName, pemText in (('route.roa', self.roa_pem_text),
+                                  ('ca.mft', self.manifest_pem_text)):
+            with open(os.path.join(publicationPoint, fileName), 'wb') as fileObj:
+                fileObj.write(pem.readBase64fromText(pemText))
+
+        with open(os.path.join(publicationPoint, 'broken.roa'), 'wb') as fileObj:
+            fileObj.write(b'\x30\x03\x02\x01')
+
+        with open(os.path.join(publicationPoint, 'ca.crl'), 'wb') as fileObj:
+            fileObj.write(b'')
+
+    def tearDown(self):
+        shutil.rmtree(self.rootDir)
+
+    def _records(self, processes):
+        records = {}
+
+        for record in rpki.iterRepository(self.rootDir, processes=processes):
+            records[os.path.basename(record.path)] = record
+
+        return records
+
+    def _check(self, records):
+        self.assertEqual(
+            ['broken.roa', 'ca.mft', 'route.roa'], sorted(records))
+
+        self.assertIsInstance(records['broken.roa'], rpki.ErrorRecord)
+        self.assertTrue(records['broken.roa'].error)
+
+        roa = records['route.roa']
+
+        self.assertEqual(58363, roa.asID)
+        self.assertEqual(
+            ((rpki.afiIPv4, 0x931c2d00, 24, 24),), roa.prefixes)
+        self.assertEqual(0x618, roa.certificate.serialNumber)
+        self.assertEqual(20, len(roa.certificate.subjectKeyIdentifier))
+
+        manifest = records['ca.mft']
+
+        self.assertEqual(2791, manifest.manifestNumber)
+        self.assertEqual('2.16.840.1.101.3.4.2.1', manifest.fileHashAlg)
+        self.assertEqual(
+            ['ZXSGBDBkL82TFGHuE4VOYtJP-E4.crl'], list(manifest.fileList))
+        self.assertEqual(
+            32, len(manifest.fileList['ZXSGBDBkL82TFGHuE4VOYtJP-E4.crl']))
+        self.assertEqual(
+            datetime.datetime(2012, 10, 23, 22, 26, 3), manifest.thisUpdate)
+        self.assertEqual(
+            datetime.datetime(2012, 10, 25, 22, 26, 3), manifest.nextUpdate)
+        self.assertEqual(
+            datetime.datetime(2012, 10, 23, 22, 26, 3),
+            manifest.certificate.notBefore)
+
+    def testSerial(self):
+        self._check(self._records(processes=1))
+
+    def testParallel(self):
+        self._check(self._records(processes=2))
+
+    def testPickle(self):
+        for record in self._records(processes=1).values():
+            self.assertEqual(record, pickle.loads(pickle.dumps(record)))
+
+
+class VrpColumnsTestCase(unittest.TestCase):
+    roa_pem_text = RepositoryTestCase.roa_pem_text
+
+    def setUp(self):
+        roa = rfc6482.RouteOriginAttestation()
+        roa['asID'] = 65000
+
+        family = roa['ipAddrBlocks'].getComponentByPosition(0)
+        family['addressFamily'] = b'\x00\x02'
+
+        address = family['addresses'].getComponentByPosition(0)
+        address['address'] = rfc6482.IPAddress(binValue='0010000000000001' + '0000110110111000')
+        address['maxLength'] = 48
+
+        address = family['addresses'].getComponentByPosition(1)
+        address['address'] = rfc6482.IPAddress(binValue='')
+
+        family = roa['ipAddrBlocks'].getComponentByPosition(1)
+        family['addressFamily'] = b'\x00\x01'
+
+        address = family['addresses'].getComponentByPosition(0)
+        address['address'] = rfc6482.IPAddress(binValue='0000101000000001')
+
+        self.roa = roa
+        self.expected = [
+            (65000, rpki.afiIPv6, 0x20010db8 << 96, 32, 48),
+            (65000, rpki.afiIPv6, 0, 0, 0),
+            (65000, rpki.afiIPv4, 0x0a010000, 16, 16)
+        ]
+
+    def testDecoded(self):
+        self.assertEqual(self.expected, list(rpki.extractVrps([self.roa])))
+
+    def testRaw(self):
+        substrate = encoder.encode(self.roa)
+
+        self.assertEqual(self.expected, list(rpki.extractVrps([substrate])))
+
+    def testCms(self):
+        substrate = pem.readBase64fromText(self.roa_pem_text)
+
+        columns = rpki.extractVrps([substrate, encoder.encode(self.roa)])
+
+        self.assertEqual(4, len(columns))
+        self.assertEqual(
+            (58363, rpki.afiIPv4, 0x931c2d00, 24, 24), list(columns)[0])
+
+    def testBadValues(self):
+        columns = rpki.extractVrps([self.roa])
+
+        for component, value in (('maxLength', 300), ('maxLength', 8),
+                                 ('asID', 1 << 32), ('asID', -1)):
+            roa, rest = decoder.decode(
+                encoder.encode(self.roa),
+                asn1Spec=rfc6482.RouteOriginAttestation())
+
+            if component == 'asID':
+                roa['asID'] = value
+
+            else:
+                # the last prefix of the ROA is bad
+                roa['ipAddrBlocks'][1]['addresses'][0]['maxLength'] = value
+
+            for item in (roa, encoder.encode(roa)):
+                self.assertRaises(
+                    error.PyAsn1Error, rpki.extractVrps, [item], columns)
+
+                self.assertEqual(self.expected, list(columns))
+                self.assertEqual(
+                    [3] * 6, [len(getattr(columns, name))
+                              for name in columns.__slots__])
+
+    def testWrongContentType(self):
+        substrate = pem.readBase64fromText(
+            RepositoryTestCase.manifest_pem_text)
+
+        columns = rpki.extractVrps([self.roa])
+
+        self.assertRaises(
+            error.PyAsn1Error, rpki.extractVrps, [substrate], columns)
+
+        self.assertEqual(self.expected, list(columns))
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def testNumpy(self):
+        columns = rpki.extractVrps([self.roa]).toNumpy()
+
+        self.assertEqual([65000] * 3, list(columns['asn']))
+        self.assertEqual([0x20010db800000000, 0, 0],
+                         list(columns['addressHigh']))
+        self.assertEqual([48, 0, 16], list(columns['maxLength']))
+
+
+class ManifestVerifierTestCase(unittest.TestCase):
+    manifest_pem_text = RepositoryTestCase.manifest_pem_text
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        self.files = {
+            'a.roa': b'a' * 3000000,
+            'b.crl': b'b' * 10,
+            'c.cer': b'',
+            'gone.roa': b'x'
+        }
+
+        fileList = {}
+
+        for name, content in self.files.items():
+            fileList[name] = hashlib.sha256(content).digest()
+
+            if name != 'gone.roa':
+                with open(os.path.join(self.directory, name), 'wb') as fileObj:
+                    fileObj.write(content)
+
+        with open(os.path.join(self.directory, 'b.crl'), 'ab') as fileObj:
+            fileObj.write(b'tampered')
+
+        with open(os.path.join(self.directory, 'stray.roa'), 'wb') as fileObj:
+            fileObj.write(b'')
+
+        with open(os.path.join(self.directory, 'pp.mft'), 'wb') as fileObj:
+            fileObj.write(b'')
+
+        self.manifest = rpki.ManifestRecord(
+            None, 1, None, None, '2.16.840.1.101.3.4.2.1', fileList, None)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testVerify(self):
+        with rpki.ManifestVerifier(threads=2, bufferSize=65536) as verifier:
+            check = verifier.verify(self.manifest, self.directory)
+
+            self.assertEqual(['a.roa', 'c.cer'], check.matched)
+            self.assertEqual(['b.crl'], check.mismatched)
+            self.assertEqual(['gone.roa'], check.missing)
+            self.assertEqual(['stray.roa'], check.extra)
+
+            check = verifier.verify(self.manifest, self.directory)
+
+            self.assertEqual(['a.roa', 'c.cer'], check.matched)
+
+    def testDecodedManifest(self):
+        substrate = pem.readBase64fromText(self.manifest_pem_text)
+
+        with open(os.path.join(self.directory, 'ca.mft'), 'wb') as fileObj:
+            fileObj.write(substrate)
+
+        record = rpki.loadFile(os.path.join(self.directory, 'ca.mft'))
+
+        check = rpki.verifyManifest(record, self.directory)
+
+        self.assertEqual(
+            ['ZXSGBDBkL82TFGHuE4VOYtJP-E4.crl'], check.missing)
+        self.assertEqual(sorted(self.files)[:-1] + ['stray.roa'], check.extra)
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
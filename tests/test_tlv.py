@@ -0,0 +1,101 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der import encoder
+from pyasn1.compat.octets import ints2octs
+from pyasn1.type import tag
+from pyasn1.type import univ
+
+from pyasn1_modules import tlv
+
+
+class ReadTlvTestCase(unittest.TestCase):
+    def testDefinite(self):
+        substrate = encoder.encode(
+            univ.SequenceOf(componentType=univ.Integer()).setComponents(1, 300))
+
+        outer = tlv.readTlv(substrate)
+
+        self.assertEqual(
+            (tag.tagClassUniversal, tag.tagFormatConstructed, 16), outer.tag)
+        self.assertEqual(len(substrate), outer.end)
+
+        components = tlv.children(substrate, outer)
+
+        self.assertEqual(2, len(components))
+        self.assertEqual(ints2octs((1, 44)), tlv.value(substrate, components[1]))
+
+    def testIndefinite(self):
+        substrate = ints2octs((0x30, 0x80, 0x02, 0x01, 0x01, 0x00, 0x00, 0x05, 0x00))
+
+        outer = tlv.readTlv(substrate)
+
+        self.assertEqual(7, outer.end)
+        self.assertEqual(5, outer.valueEnd)
+        self.assertEqual(1, len(tlv.children(substrate, outer)))
+
+    def testLongTag(self):
+        asn1Object = univ.Integer(7).subtype(
+            implicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 300))
+
+        substrate = encoder.encode(asn1Object)
+
+        self.assertEqual(tlv.tagOf(asn1Object), tlv.readTlv(substrate).tag)
+        self.assertEqual(
+            substrate, tlv.encodeTlv(tlv.tagOf(asn1Object), ints2octs((7,))))
+
+    def testLongLength(self):
+        substrate = encoder.encode(univ.OctetString(b'x' * 300))
+
+        self.assertEqual(
+            substrate[:4], tlv.encodeHeader((0, 0, 4), 300))
+        self.assertEqual(300, len(tlv.value(substrate, tlv.readTlv(substrate))))
+
+    def testIntegerValue(self):
+        for number in (0, 1, 127, 128, 255, 256, -1, -128, -129, 2 ** 40):
+            substrate = encoder.encode(univ.Integer(number))
+
+            self.assertEqual(
+                number, tlv.integerValue(substrate, tlv.readTlv(substrate)))
+
+    def testEncodeInteger(self):
+        for number in (0, 1, 127, 128, 255, 256, -1, -127, -129, 2 ** 40,
+                       -2 ** 40 - 1):
+            self.assertEqual(
+                encoder.encode(univ.Integer(number)), tlv.encodeInteger(number))
+
+        # minimal form, pyasn1 pads negative powers of two
+        for number, octets in ((-128, b'\x80'), (-32768, b'\x80\x00')):
+            substrate = tlv.encodeInteger(number)
+
+            self.assertEqual(b'\x02' + ints2octs((len(octets),)) + octets,
+                             substrate)
+            self.assertEqual(
+                number, tlv.integerValue(substrate, tlv.readTlv(substrate)))
+
+    def testEncodeDer(self):
+        self.assertEqual(b'\x05\x00', tlv.encodeDer(univ.Null('')))
+        self.assertEqual(b'\x05\x00', tlv.encodeDer(b'\x05\x00'))
+        self.assertTrue(tlv.encodeDer(None) is None)
+
+    def testUnderrun(self):
+        substrate = encoder.encode(univ.OctetString(b'x' * 300))
+
+        self.assertRaises(
+            error.SubstrateUnderrunError, tlv.readTlv, substrate[:-1])
+        self.assertRaises(
+            error.SubstrateUnderrunError, tlv.readTlv, substrate[:2])
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
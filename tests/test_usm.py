@@ -0,0 +1,140 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import sys
+import unittest
+
+from pyasn1.codec.ber import decoder
+from pyasn1.compat.octets import ints2octs
+
+from pyasn1_modules import rfc3412
+from pyasn1_modules import rfc3414
+from pyasn1_modules import usm
+
+
+class LocalizeKeyTestCase(unittest.TestCase):
+    # RFC3414 appendix A.3 test vectors
+    engineId = ints2octs((0,) * 11 + (2,))
+
+    def testMd5(self):
+        masterKey = usm.passwordToKey(
+            usm.usmHMACMD5AuthProtocol, b'maplesyrup')
+        localizedKey = usm.localizeKey(
+            usm.usmHMACMD5AuthProtocol, masterKey, self.engineId)
+
+        self.assertEqual(
+            ints2octs((0x52, 0x6f, 0x5e, 0xed, 0x9f, 0xcc, 0xe2, 0x6f,
+                       0x89, 0x64, 0xc2, 0x93, 0x07, 0x87, 0xd8, 0x2b)),
+            localizedKey)
+
+    def testSha(self):
+        masterKey = usm.passwordToKey(
+            usm.usmHMACSHAAuthProtocol, b'maplesyrup')
+        localizedKey = usm.localizeKey(
+            usm.usmHMACSHAAuthProtocol, masterKey, self.engineId)
+
+        self.assertEqual(
+            ints2octs((0x66, 0x95, 0xfe, 0xbc, 0x92, 0x88, 0xe3, 0x62,
+                       0x82, 0x23, 0x5f, 0xc7, 0x15, 0x1f, 0x12, 0x84,
+                       0x97, 0xb3, 0x8f, 0x3f)),
+            localizedKey)
+
+    def testCache(self):
+        cache = usm.LocalizedKeyCache(maxSize=2)
+
+        key = cache.getKey(
+            usm.usmHMACMD5AuthProtocol, b'maplesyrup', self.engineId)
+
+        self.assertEqual(key[:2], ints2octs((0x52, 0x6f)))
+        self.assertIs(key, cache.getKey(
+            usm.usmHMACMD5AuthProtocol, b'maplesyrup', self.engineId))
+
+        cache.getKey(usm.usmHMACMD5AuthProtocol, b'maplesyrup', b'\x01')
+        cache.getKey(usm.usmHMACMD5AuthProtocol, b'maplesyrup', b'\x02')
+
+        self.assertEqual(2, len(cache))
+
+
+class AuthenticateMessageTestCase(unittest.TestCase):
+    def setUp(self):
+        self.msg = rfc3412.SNMPv3Message()
+        self.msg['msgVersion'] = 3
+        self.msg['msgGlobalData']['msgID'] = 12345
+        self.msg['msgGlobalData']['msgMaxSize'] = 65507
+        self.msg['msgGlobalData']['msgFlags'] = b'\x01'
+        self.msg['msgGlobalData']['msgSecurityModel'] = 3
+        self.msg['msgData']['encryptedPDU'] = b'\x00' * 64
+
+        self.usmParams = rfc3414.UsmSecurityParameters()
+        self.usmParams['msgAuthoritativeEngineID'] = b'\x80\x00\x1f\x88\x04'
+        self.usmParams['msgAuthoritativeEngineBoots'] = 1
+        self.usmParams['msgAuthoritativeEngineTime'] = 100
+        self.usmParams['msgUserName'] = b'usr-md5-none'
+        self.usmParams['msgPrivacyParameters'] = b''
+
+        self.key = usm.localizeKey(
+            usm.usmHMACSHAAuthProtocol,
+            usm.passwordToKey(usm.usmHMACSHAAuthProtocol, b'authkey1'),
+            self.usmParams['msgAuthoritativeEngineID'])
+
+    def testLocate(self):
+        wholeMsg, offset = usm.encodeMessage(
+            self.msg, self.usmParams, usm.usmHMACSHAAuthProtocol)
+
+        self.assertEqual(
+            (offset, 12), usm.locateAuthenticationParameters(wholeMsg))
+
+    def testAuthenticate(self):
+        wholeMsg, offset = usm.encodeMessage(
+            self.msg, self.usmParams, usm.usmHMACSHAAuthProtocol)
+
+        signed = usm.authenticateMessage(
+            wholeMsg, usm.usmHMACSHAAuthProtocol, self.key, offset)
+
+        self.assertIs(wholeMsg, signed)
+        self.assertNotEqual(b'\x00' * 12, bytes(wholeMsg[offset:offset + 12]))
+
+        self.assertTrue(usm.verifyMessage(
+            bytes(wholeMsg), usm.usmHMACSHAAuthProtocol, self.key))
+
+        msg, rest = decoder.decode(
+            bytes(wholeMsg), asn1Spec=rfc3412.SNMPv3Message())
+
+        self.assertFalse(rest)
+
+        usmParams, rest = decoder.decode(
+            msg['msgSecurityParameters'],
+            asn1Spec=rfc3414.UsmSecurityParameters())
+
+        self.assertFalse(rest)
+        self.assertEqual(
+            bytes(wholeMsg[offset:offset + 12]),
+            usmParams['msgAuthenticationParameters'])
+
+    def testTampered(self):
+        wholeMsg, offset = usm.encodeMessage(
+            self.msg, self.usmParams, usm.usmHMACSHAAuthProtocol)
+
+        usm.authenticateMessage(wholeMsg, usm.usmHMACSHAAuthProtocol, self.key)
+
+        wholeMsg[-1] ^= 0xFF
+
+        self.assertFalse(usm.verifyMessage(
+            wholeMsg, usm.usmHMACSHAAuthProtocol, self.key))
+
+    def testProtocolMismatch(self):
+        wholeMsg, offset = usm.encodeMessage(
+            self.msg, self.usmParams, usm.usmHMACSHAAuthProtocol)
+
+        self.assertFalse(usm.verifyMessage(
+            wholeMsg, usm.usmHMAC192SHA256AuthProtocol, self.key))
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
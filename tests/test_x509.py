@@ -0,0 +1,199 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import os
+import subprocess
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+
+from pyasn1_modules import pem
+from pyasn1_modules import rfc2459
+from pyasn1_modules import rfc3280
+from pyasn1_modules import rfc5280
+from pyasn1_modules import x509
+
+
+class X509TestCase(unittest.TestCase):
+    pem_text = """\
+MIIC5zCCAlACAQEwDQYJKoZIhvcNAQEFBQAwgbsxJDAiBgNVBAcTG1ZhbGlDZXJ0
+IFZhbGlkYXRpb24gTmV0d29yazEXMBUGA1UEChMOVmFsaUNlcnQsIEluYy4xNTAz
+BgNVBAsTLFZhbGlDZXJ0IENsYXNzIDMgUG9saWN5IFZhbGlkYXRpb24gQXV0aG9y
+aXR5MSEwHwYDVQQDExhodHRwOi8vd3d3LnZhbGljZXJ0LmNvbS8xIDAeBgkqhkiG
+9w0BCQEWEWluZm9AdmFsaWNlcnQuY29tMB4XDTk5MDYyNjAwMjIzM1oXDTE5MDYy
+NjAwMjIzM1owgbsxJDAiBgNVBAcTG1ZhbGlDZXJ0IFZhbGlkYXRpb24gTmV0d29y
+azEXMBUGA1UEChMOVmFsaUNlcnQsIEluYy4xNTAzBgNVBAsTLFZhbGlDZXJ0IENs
+YXNzIDMgUG9saWN5IFZhbGlkYXRpb24gQXV0aG9yaXR5MSEwHwYDVQQDExhodHRw
+Oi8vd3d3LnZhbGljZXJ0LmNvbS8xIDAeBgkqhkiG9w0BCQEWEWluZm9AdmFsaWNl
+cnQuY29tMIGfMA0GCSqGSIb3DQEBAQUAA4GNADCBiQKBgQDjmFGWHOjVsQaBalfD
+cnWTq8+epvzzFlLWLU2fNUSoLgRNB0mKOCn1dzfnt6td3zZxFJmP3MKS8edgkpfs
+2Ejcv8ECIMYkpChMMFp2bbFc893enhBxoYjHW5tBbcqwuI4V7q0zK89HBFx1cQqY
+JJgpp0lZpd34t0NiYfPT4tBVPwIDAQABMA0GCSqGSIb3DQEBBQUAA4GBAFa7AliE
+Zwgs3x/be0kz9dNnnfS0ChCzycUs4pJqcXgn8nCDQtM+z6lU9PHYkhaM0QTLS6vJ
+n0WuPIqpsHEzXcjFV9+vqDWzf4mH6eglkrh/hXqu1rweN1gqZ8mRzyqBPu3GOd/A
+PhmcGcwTTYJBtYze4D1gCCAPRX5ron+jjBXu
+"""
+
+    crl_pem_text = """\
+MIIBVjCBwAIBATANBgkqhkiG9w0BAQUFADB+MQswCQYDVQQGEwJBVTETMBEGA1UE
+CBMKU29tZS1TdGF0ZTEhMB8GA1UEChMYSW50ZXJuZXQgV2lkZ2l0cyBQdHkgTHRk
+MRUwEwYDVQQDEwxzbm1wbGFicy5jb20xIDAeBgkqhkiG9w0BCQEWEWluZm9Ac25t
+cGxhYnMuY29tFw0xMjA0MTExMzQwNTlaFw0xMjA1MTExMzQwNTlaoA4wDDAKBgNV
+HRQEAwIBATANBgkqhkiG9w0BAQUFAAOBgQC1D/wwnrcY/uFBHGc6SyoYss2kn+nY
+RTwzXmmldbNTCQ03x5vkWGGIaRJdN8QeCzbEi7gpgxgpxAx6Y5WkxkMQ1UPjNM5n
+DGVDOtR0dskFrrbHuNpWqWrDaBN0/ryZiWKjr9JRbrpkHgVY29I1gLooQ6IHuKHY
+vjnIhxTFoCb5vA==
+"""
+
+    def setUp(self):
+        self.substrate = pem.readBase64fromText(self.pem_text)
+        self.crlSubstrate = pem.readBase64fromText(self.crl_pem_text)
+
+    def testSharedSpecs(self):
+        for profile, module in (('rfc2459', rfc2459), ('rfc3280', rfc3280)):
+            for name in x509._sharedSpecs[profile]:
+                self.assertTrue(
+                    x509.getSpec(name, profile) is getattr(rfc5280, name))
+                self.assertTrue(x509.isWireCompatible(
+                    getattr(module, name), getattr(rfc5280, name),
+                    componentNames=True), (profile, name))
+
+    def testLegacySpecs(self):
+        self.assertTrue(
+            x509.getSpec('Certificate', 'rfc2459') is rfc2459.Certificate)
+        self.assertTrue(
+            x509.getSpec('Name', 'rfc2459') is rfc2459.Name)
+        self.assertTrue(
+            x509.getSpec('DirectoryString', 'rfc3280') is
+            rfc3280.DirectoryString)
+        self.assertTrue(
+            x509.getSpec('Certificate') is rfc5280.Certificate)
+        self.assertTrue(x509.Certificate is rfc5280.Certificate)
+
+        self.assertRaises(
+            error.PyAsn1Error, x509.getSpec, 'Certificate', 'rfc1234')
+        self.assertRaises(
+            error.PyAsn1Error, x509.getSpec, 'NoSuchThing', 'rfc3280')
+
+    def testWireCompatible(self):
+        for name in ('Certificate', 'CertificateList', 'Name'):
+            self.assertTrue(x509.isWireCompatible(
+                getattr(rfc2459, name), getattr(rfc5280, name)))
+
+        # rfc2459.Name alternative is unnamed
+        self.assertFalse(x509.isWireCompatible(
+            rfc2459.Name, rfc5280.Name, componentNames=True))
+
+        self.assertFalse(x509.isWireCompatible(
+            rfc2459.DirectoryString, rfc5280.DirectoryString))
+        self.assertFalse(x509.isWireCompatible(
+            rfc5280.Certificate, rfc5280.CertificateList))
+
+    def testDecode(self):
+        for profile, spec in (('rfc2459', rfc2459.Certificate),
+                              ('rfc3280', rfc5280.Certificate),
+                              ('rfc5280', rfc5280.Certificate)):
+            asn1Object = x509.decode(self.substrate, profile=profile)
+
+            self.assertTrue(type(asn1Object) is spec)
+            self.assertEqual(self.substrate, der_encoder(asn1Object))
+
+        self.assertRaises(
+            error.PyAsn1Error, x509.decode, self.substrate + b'\x00')
+
+    def testConvertCertificate(self):
+        asn1Object, rest = der_decoder(
+            self.substrate, asn1Spec=rfc2459.Certificate())
+
+        converted = x509.convert(asn1Object)
+
+        self.assertTrue(type(converted) is rfc5280.Certificate)
+        self.assertEqual(self.substrate, der_encoder(converted))
+
+        # rfc2459.Name alternative is unnamed
+        tbsCertificate = converted['tbsCertificate']
+
+        self.assertTrue(type(tbsCertificate) is rfc5280.TBSCertificate)
+        self.assertTrue(type(tbsCertificate['subject']) is rfc5280.Name)
+        self.assertEqual(
+            rfc5280.id_at_localityName,
+            tbsCertificate['subject']['rdnSequence'][0][0]['type'])
+        self.assertEqual(
+            'rdnSequence', tbsCertificate['issuer'].getName())
+
+        # components agreeing on names are shared
+        self.assertTrue(
+            tbsCertificate['validity'] is
+            asn1Object['tbsCertificate']['validity'])
+        self.assertTrue(
+            converted['signatureAlgorithm'] is
+            asn1Object['signatureAlgorithm'])
+
+        self.assertTrue(x509.convert(converted, 'rfc3280') is converted)
+
+        back = x509.convert(converted, 'rfc2459')
+
+        self.assertTrue(type(back) is rfc2459.Certificate)
+        self.assertEqual(self.substrate, der_encoder(back))
+        self.assertEqual(
+            rfc5280.id_at_localityName,
+            back['tbsCertificate']['subject'][''][0][0]['type'])
+
+    def testConvertCertificateList(self):
+        asn1Object = x509.decode(self.crlSubstrate, 'CertificateList')
+
+        converted = x509.convert(asn1Object, 'rfc2459')
+
+        self.assertTrue(type(converted) is rfc2459.CertificateList)
+        self.assertEqual(self.crlSubstrate, der_encoder(converted))
+
+    def testConvertName(self):
+        asn1Object = x509.decode(self.substrate)
+
+        name = asn1Object['tbsCertificate']['subject']
+
+        converted = x509.convert(name, 'rfc2459', 'Name')
+
+        self.assertTrue(type(converted) is rfc2459.Name)
+        self.assertEqual(der_encoder(name), der_encoder(converted))
+        self.assertEqual(
+            'rdnSequence', x509.convert(converted).getName())
+
+    def testConvertIncompatible(self):
+        directoryString = rfc2459.DirectoryString()
+        directoryString['utf8String'] = 'example'
+
+        converted = x509.convert(directoryString, 'rfc5280')
+
+        self.assertTrue(type(converted) is rfc5280.DirectoryString)
+        self.assertEqual('example', converted['utf8String'])
+
+    def testLazyImport(self):
+        script = """\
+import sys
+from pyasn1_modules import x509
+x509.getSpec('Certificate', 'rfc3280')
+x509.getSpec('Extensions', 'rfc2459')
+print(sorted(m for m in ('pyasn1_modules.rfc2459', 'pyasn1_modules.rfc3280')
+             if m in sys.modules))
+"""
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(
+            os.path.dirname(os.path.abspath(x509.__file__))))
+
+        output = subprocess.check_output(
+            [sys.executable, '-c', script], env=env)
+
+        self.assertEqual(b'[]', output.strip())
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
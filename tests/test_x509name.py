@@ -0,0 +1,193 @@
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+import sys
+import unittest
+
+from pyasn1 import error
+from pyasn1.codec.der.decoder import decode as der_decoder
+from pyasn1.codec.der.encoder import encode as der_encoder
+from pyasn1.type import char
+
+from pyasn1_modules import pem
+from pyasn1_modules import rfc5280
+from pyasn1_modules import x509name
+
+
+def _name(*rdns):
+    name = rfc5280.Name()
+
+    rdnSequence = name['rdnSequence']
+
+    for rdn in rdns:
+        relativeDistinguishedName = rfc5280.RelativeDistinguishedName()
+
+        for attrType, attrValue in rdn:
+            ava = rfc5280.AttributeTypeAndValue()
+            ava['type'] = attrType
+            ava['value'] = der_encoder(attrValue)
+
+            relativeDistinguishedName.append(ava)
+
+        rdnSequence.append(relativeDistinguishedName)
+
+    return name
+
+
+class CanonicalNameTestCase(unittest.TestCase):
+    # subject=CN=MiXeD Case+OU=Unit,O=\  Example    Corp \ ,C=US
+    pem_text = """\
+MIIB3jCCAYSgAwIBAgIBBzAKBggqhkjOPQQDAjBNMQswCQYDVQQGEwJVUzEcMBoG
+A1UECgwTICBFeGFtcGxlICAgIENvcnAgIDEgMAsGA1UECwwEVW5pdDARBgNVBAMM
+Ck1pWGVEIENhc2UwIBcNMjYxMDE5MTYzODIxWhgPMjEyNjA5MjUxNjM4MjFaME0x
+CzAJBgNVBAYTAlVTMRwwGgYDVQQKDBMgIEV4YW1wbGUgICAgQ29ycCAgMSAwCwYD
+VQQLDARVbml0MBEGA1UEAwwKTWlYZUQgQ2FzZTBZMBMGByqGSM49AgEGCCqGSM49
+AwEHA0IABFYg7vx4fY3cP2v/7mJlwSUlL+BKgRTHjPpyaumqxHLK0SynRgUBuWpk
+ZyFg442oVvTv8plCUZGmRzQqNs5RdMCjUzBRMB0GA1UdDgQWBBTbaOouLwWk8nou
+6wONetUU4rEDTTAfBgNVHSMEGDAWgBTbaOouLwWk8nou6wONetUU4rEDTTAPBgNV
+HRMBAf8EBTADAQH/MAoGCCqGSM49BAMCA0gAMEUCIQCoqJxNO6LH4BIuum8PMaTG
+BWNKG2wU9QTAKMr0CMAnTwIgVD/j2YVwxS+vc/ExuSK9EIK5vV68nAacYcn0XH8j
+hf0=
+"""
+
+    # subject=O=Stra\u00dfe\u00a0 GmbH,CN=\u00c4rger  \u00c9COLE  \ufb01le
+    unicode_pem_text = """\
+MIIByTCCAW+gAwIBAgIUAkG4TFKVvQIep3A9qoOpR7QWXA0wCgYIKoZIzj0EAwIw
+OTEXMBUGA1UECgwOU3RyYcOfZcKgIEdtYkgxHjAcBgNVBAMMFcOEcmdlciAgw4lD
+T0xFICDvrIFsZTAgFw0yNjEwMTkxNzM4NDFaGA8yMTI2MDkyNTE3Mzg0MVowOTEX
+MBUGA1UECgwOU3RyYcOfZcKgIEdtYkgxHjAcBgNVBAMMFcOEcmdlciAgw4lDT0xF
+ICDvrIFsZTBZMBMGByqGSM49AgEGCCqGSM49AwEHA0IABBvKZH7wo6YCCMKYQhU4
+6xsyEJDs6TAozj+IrBl5jTdSbRBJViHAqdlCbkHqMa8u0dALXp7cdsW6XRTU/3dC
+HQGjUzBRMB0GA1UdDgQWBBTQJ96KCb5jOFLe7wnhFItD3wtiWDAfBgNVHSMEGDAW
+gBTQJ96KCb5jOFLe7wnhFItD3wtiWDAPBgNVHRMBAf8EBTADAQH/MAoGCCqGSM49
+BAMCA0gAMEUCIHPoKsLPou+isCI5rQqK6ckRkJw91rDMKAtGwk6p8xybAiEA2O/M
+GhP+RGDKXbQ72T1MLmVSNjG/VidLPTxUsDVlc+Y=
+"""
+
+    def setUp(self):
+        x509name.clearCache()
+
+        self.certificate, rest = der_decoder(
+            pem.readBase64fromText(self.pem_text),
+            asn1Spec=rfc5280.Certificate())
+
+        self.subject = self.certificate['tbsCertificate']['subject']
+
+    def testOpenSSLHash(self):
+        self.assertEqual(0x1b2df05f, x509name.nameHash(self.subject))
+        self.assertEqual(
+            0x1b2df05f, x509name.nameHash(der_encoder(self.subject)))
+
+    def testOpenSSLHashUnicode(self):
+        certificate, rest = der_decoder(
+            pem.readBase64fromText(self.unicode_pem_text),
+            asn1Spec=rfc5280.Certificate())
+
+        subject = certificate['tbsCertificate']['subject']
+
+        # openssl x509 -noout -subject_hash
+        self.assertEqual(0x12fe86c5, x509name.nameHash(subject))
+
+        name = _name(
+            [(rfc5280.id_at_organizationName,
+              char.BMPString(u' Stra\u00dfe\u00a0 GMBH\t'))],
+            [(rfc5280.id_at_commonName,
+              char.UTF8String(u'\u00c4RGER \u00c9COLE \ufb01LE'))])
+
+        self.assertEqual(0x12fe86c5, x509name.nameHash(name))
+
+    def testEquivalentName(self):
+        name = _name(
+            [(rfc5280.id_at_countryName, char.PrintableString('us'))],
+            [(rfc5280.id_at_organizationName,
+              char.BMPString(u'EXAMPLE Corp'))],
+            [(rfc5280.id_at_commonName, char.PrintableString(' mixed  case')),
+             (rfc5280.id_at_organizationalUnitName, char.TeletexString('UNIT'))])
+
+        self.assertTrue(x509name.namesEqual(self.subject, name))
+        self.assertEqual(
+            x509name.canonicalName(self.subject), x509name.canonicalName(name))
+        self.assertEqual(0x1b2df05f, x509name.nameHash(name))
+
+    def testDifferentName(self):
+        name = _name(
+            [(rfc5280.id_at_countryName, char.PrintableString('US'))],
+            [(rfc5280.id_at_organizationName, char.UTF8String(u'ExampleCorp'))],
+            [(rfc5280.id_at_commonName, char.UTF8String(u'MiXeD Case')),
+             (rfc5280.id_at_organizationalUnitName, char.UTF8String(u'Unit'))])
+
+        self.assertFalse(x509name.namesEqual(self.subject, name))
+
+    def testRdnStructure(self):
+        # same attributes split across different RDNs do not match
+        name = _name(
+            [(rfc5280.id_at_countryName, char.PrintableString('US'))],
+            [(rfc5280.id_at_organizationName, char.UTF8String(u'Example Corp'))],
+            [(rfc5280.id_at_commonName, char.UTF8String(u'MiXeD Case'))],
+            [(rfc5280.id_at_organizationalUnitName, char.UTF8String(u'Unit'))])
+
+        self.assertFalse(x509name.namesEqual(self.subject, name))
+
+    def testUnicode(self):
+        name1 = _name([(rfc5280.id_at_commonName,
+                        char.UTF8String(u'\u0395\u039b\u039b\u0391\u03a3'))])
+        name2 = _name([(rfc5280.id_at_commonName,
+                        char.BMPString(u'\u03b5\u03bb\u03bb\u03b1\u03c3'))])
+
+        # OpenSSL only folds ASCII
+        self.assertFalse(x509name.namesEqual(name1, name2))
+        self.assertEqual(
+            x509name.foldedName(name1), x509name.foldedName(name2))
+
+    def testFoldedName(self):
+        self.assertEqual(
+            x509name.foldedName(self.subject),
+            x509name.canonicalName(self.subject))
+
+        name = _name([(rfc5280.id_at_commonName,
+                       char.UTF8String(u'\u00c4rger\u00a0 \ufb01le'))])
+
+        self.assertEqual(
+            x509name.foldedName(name),
+            x509name.foldedName(_name([(rfc5280.id_at_commonName,
+                                        char.BMPString(u'\u00e4rger file'))])))
+
+    def testNonStringValue(self):
+        name = _name([(rfc5280.id_at_commonName, char.PrintableString('Abc'))],
+                     [(rfc5280.id_at_commonName, char.PrintableString('abc'))])
+
+        canonical = x509name.canonicalName(name)
+
+        self.assertEqual(canonical[:len(canonical) // 2],
+                         canonical[len(canonical) // 2:])
+
+    def testCanonicalRdns(self):
+        rdns = x509name.canonicalRdns(self.subject)
+
+        self.assertEqual(3, len(rdns))
+        self.assertEqual(x509name.canonicalName(self.subject), b''.join(rdns))
+
+    def testMemoized(self):
+        substrate = der_encoder(self.subject)
+
+        self.assertTrue(
+            x509name.canonicalName(substrate) is
+            x509name.canonicalName(substrate))
+
+    def testEmpty(self):
+        self.assertEqual(b'', x509name.canonicalName(_name()))
+
+    def testTrailingOctets(self):
+        self.assertRaises(
+            error.PyAsn1Error, x509name.canonicalName,
+            der_encoder(self.subject) + b'\x00')
+
+
+suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+if __name__ == '__main__':
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(not result.wasSuccessful())
@@ -5,21 +5,24 @@
 # Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
 # License: http://snmplabs.com/pyasn1/license.html
 #
-# Read X.509 CRL on stdin, print them pretty and encode back into 
-# original wire format.
+# Read X.509 CRL on stdin and print them pretty.
 # CRL can be generated with "openssl openssl ca -gencrl ..." commands.
 #
+# CRLs are rendered straight off the substrate, revoked certificates
+# are decoded one at a time, so that huge CRLs can be dumped in
+# bounded memory. They are not re-encoded for this reason.
+#
 import sys
 
-from pyasn1.codec.der import decoder
-from pyasn1.codec.der import encoder
-
 from pyasn1_modules import pem
+from pyasn1_modules import render
 from pyasn1_modules import rfc2459
 
-if len(sys.argv) != 1:
+jsonLines = sys.argv[1:] == ['--json']
+
+if len(sys.argv) != 1 and not jsonLines:
     print("""Usage:
-$ cat crl.pem | %s""" % sys.argv[0])
+$ cat crl.pem | %s [--json]""" % sys.argv[0])
     sys.exit(-1)
 
 asn1Spec = rfc2459.CertificateList()
@@ -31,15 +34,9 @@ while True:
     if not substrate:
         break
 
-    key, rest = decoder.decode(substrate, asn1Spec=asn1Spec)
-
-    if rest:
-        substrate = substrate[:-len(rest)]
-
-    print(key.prettyPrint())
-
-    assert encoder.encode(key) == substrate, 'pkcs8 recode fails'
+    render.renderSubstrate(substrate, asn1Spec, jsonLines=jsonLines)
 
     cnt += 1
 
-print('*** %s CRL(s) re/serialized' % cnt)
+if not jsonLines:
+    print('*** %s CRL(s) rendered' % cnt)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+#
+# This file is part of pyasn1-modules software.
+#
+# Copyright (c) 2005-2020, Ilya Etingof <etingof@gmail.com>
+# License: http://snmplabs.com/pyasn1/license.html
+#
+# Import every pyasn1_modules.rfc* module, collect module-level OID
+# constants and write OID to symbolic name table used by
+# pyasn1_modules.oidnames.
+#
+# Run it from the source tree whenever RFC modules are added:
+# $ PYTHONPATH=. python tools/mkoidnames.py pyasn1_modules/oidnames.txt
+#
+import importlib
+import os
+import pkgutil
+import sys
+
+from pyasn1.type import univ
+
+import pyasn1_modules
+
+if len(sys.argv) != 2:
+    print("""Usage:
+$ %s <output-file>""" % sys.argv[0])
+    sys.exit(-1)
+
+# OID -> {name: [module, ...]}
+names = {}
+
+moduleNames = sorted(
+    name for _, name, _ in pkgutil.iter_modules(pyasn1_modules.__path__)
+    if name.startswith('rfc'))
+
+for moduleName in moduleNames:
+    module = importlib.import_module('pyasn1_modules.' + moduleName)
+
+    for name, value in sorted(vars(module).items()):
+        if name.startswith('_') or not isinstance(value, univ.ObjectIdentifier):
+            continue
+
+        # skip ASN.1 values that are not constants (e.g. types)
+        if not value.isValue or not len(value):
+            continue
+
+        modules = names.setdefault(value.asTuple(), {}).setdefault(name, [])
+
+        modules.append(moduleName)
+
+with open(sys.argv[1], 'w') as output:
+    output.write('# OID to symbolic name table generated by '
+                 'tools/mkoidnames.py, do not edit\n')
+    output.write('# <OID> <name>:<module>[,<module>...] ...\n')
+
+    for oid in sorted(names):
+        # names used by more modules (or found in newer RFCs) first
+        entries = sorted(
+            names[oid].items(),
+            key=lambda x: (-len(x[1]), -max([int(m[3:]) for m in x[1]]), x[0]))
+
+        output.write('%s %s\n' % (
+            '.'.join([str(x) for x in oid]),
+            ' '.join(['%s:%s' % (name, ','.join(modules))
+                      for name, modules in entries])))
+
+print('*** %d OIDs written to %s' % (len(names), os.path.abspath(sys.argv[1])))
@@ -8,19 +8,79 @@
 # Read ASN.1/PEM X.509 certificate requests (PKCS#10 format) on stdin, 
 # parse each into plain text, then build substrate from it
 #
+# In benchmark mode, run requests read on stdin or found in a directory
+# through the intake pipeline and report throughput
+#
 import sys
+import time
 
+from pyasn1 import error
 from pyasn1.codec.der import decoder
 from pyasn1.codec.der import encoder
 
 from pyasn1_modules import pem
+from pyasn1_modules import pkcs10
 from pyasn1_modules import rfc2314
 
-if len(sys.argv) != 1:
+if (len(sys.argv) > 3 or len(sys.argv) > 1 and
+        sys.argv[1] != '--benchmark'):
     print("""Usage:
-$ cat certificateRequest.pem | %s""" % sys.argv[0])
+$ cat certificateRequest.pem | %s
+$ cat certificateRequest.pem | %s --benchmark
+$ %s --benchmark <directory>""" % (sys.argv[0], sys.argv[0], sys.argv[0]))
     sys.exit(-1)
 
+
+def benchmark(substrates, minTime=1.0):
+    substrates = list(substrates)
+
+    if not substrates:
+        return 0, 0, 0.0
+
+    requests = errors = 0
+
+    started = time.time()
+
+    while True:
+        for record in pkcs10.iterCertificationRequests(substrates):
+            if isinstance(record, pkcs10.ErrorRecord):
+                errors += 1
+                continue
+
+            record.signedData
+
+            for oid in record.extensions:
+                try:
+                    record.extensions.getValue(oid)
+
+                except error.PyAsn1Error:
+                    pass
+
+            requests += 1
+
+        elapsed = time.time() - started
+
+        if elapsed >= minTime:
+            return requests, errors, elapsed
+
+
+if len(sys.argv) > 1:
+    if len(sys.argv) == 3:
+        substrates = [substrate for path, substrate
+                      in pkcs10.iterDirectory(sys.argv[2])
+                      if isinstance(substrate, bytes)]
+
+    else:
+        substrates = pkcs10.iterPemRequests(sys.stdin)
+
+    requests, errors, elapsed = benchmark(substrates)
+
+    print('*** %d certificate request(s), %d error(s) processed in '
+          '%.3f sec, %.1f request(s)/sec' % (
+              requests, errors, elapsed, requests / (elapsed or 1)))
+
+    sys.exit(0)
+
 certType = rfc2314.CertificationRequest()
 
 certCnt = 0
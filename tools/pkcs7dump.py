@@ -14,11 +14,14 @@ from pyasn1.codec.der import decoder
 from pyasn1.codec.der import encoder
 
 from pyasn1_modules import pem
+from pyasn1_modules import render
 from pyasn1_modules import rfc2315
 
-if len(sys.argv) != 1:
+jsonLines = sys.argv[1:] == ['--json']
+
+if len(sys.argv) != 1 and not jsonLines:
     print("""Usage:
-$ cat pkcs7Certificate.pem | %s""" % sys.argv[0])
+$ cat pkcs7Certificate.pem | %s [--json]""" % sys.argv[0])
     sys.exit(-1)
 
 idx, substrate = pem.readPemBlocksFromFile(
@@ -27,29 +30,15 @@ idx, substrate = pem.readPemBlocksFromFile(
 
 assert substrate, 'bad PKCS7 data on input'
 
-contentInfo, rest = decoder.decode(substrate, asn1Spec=rfc2315.ContentInfo())
+asn1Spec = rfc2315.ContentInfo()
+
+contentInfo, rest = decoder.decode(substrate, asn1Spec=asn1Spec)
 
 if rest:
     substrate = substrate[:-len(rest)]
 
-print(contentInfo.prettyPrint())
-
 assert encoder.encode(contentInfo) == substrate, 're-encode fails'
 
-contentType = contentInfo.getComponentByName('contentType')
-
-contentInfoMap = {
-    (1, 2, 840, 113549, 1, 7, 1): rfc2315.Data(),
-    (1, 2, 840, 113549, 1, 7, 2): rfc2315.SignedData(),
-    (1, 2, 840, 113549, 1, 7, 3): rfc2315.EnvelopedData(),
-    (1, 2, 840, 113549, 1, 7, 4): rfc2315.SignedAndEnvelopedData(),
-    (1, 2, 840, 113549, 1, 7, 5): rfc2315.DigestedData(),
-    (1, 2, 840, 113549, 1, 7, 6): rfc2315.EncryptedData()
-}
-
-content, _ = decoder.decode(
-    contentInfo.getComponentByName('content'),
-    asn1Spec=contentInfoMap[contentType]
-)
+# content is rendered in place, decoded according to contentType
 
-print(content.prettyPrint())
+render.renderSubstrate(substrate, asn1Spec, jsonLines=jsonLines)
@@ -14,12 +14,15 @@ from pyasn1.codec.der import decoder
 from pyasn1.codec.der import encoder
 
 from pyasn1_modules import pem
+from pyasn1_modules import render
 from pyasn1_modules import rfc2459
 
-if len(sys.argv) != 1:
+jsonLines = sys.argv[1:] == ['--json']
+
+if len(sys.argv) != 1 and not jsonLines:
     print("""Usage:
-$ cat CACertificate.pem | %s
-$ cat userCertificate.pem | %s""" % (sys.argv[0], sys.argv[0]))
+$ cat CACertificate.pem | %s [--json]
+$ cat userCertificate.pem | %s [--json]""" % (sys.argv[0], sys.argv[0]))
     sys.exit(-1)
 
 certType = rfc2459.Certificate()
@@ -39,10 +42,11 @@ while True:
     if rest:
         substrate = substrate[:-len(rest)]
 
-    print(cert.prettyPrint())
+    render.render(cert, jsonLines=jsonLines)
 
     assert encoder.encode(cert) == substrate, 'cert recode fails'
 
     certCnt += 1
 
-print('*** %s PEM cert(s) de/serialized' % certCnt)
+if not jsonLines:
+    print('*** %s PEM cert(s) de/serialized' % certCnt)